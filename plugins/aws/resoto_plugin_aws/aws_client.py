@@ -3,7 +3,7 @@ from __future__ import annotations
 import logging
 from datetime import datetime
 from functools import cached_property
-from typing import Optional, Any, List
+from typing import Optional, Any, List, Callable, TypeVar
 from retrying import retry
 
 from botocore.exceptions import ClientError
@@ -16,6 +16,8 @@ log = logging.getLogger("resoto.plugins.aws")
 
 RetryableErrors = ("RequestLimitExceeded", "Throttling", "TooManyRequestsException")
 
+T = TypeVar("T")
+
 
 def is_retryable_exception(e: Exception) -> bool:
     if isinstance(e, ClientError):
@@ -63,12 +65,13 @@ class AwsClient:
         arg_info = " with args=" + ", ".join(kwargs.keys()) if kwargs else ""
         log.info(f"[Aws] call service={service} action={action}{arg_info}")
         py_action = action.replace("-", "_")
-        session = self.config.sessions().session(self.account_id, self.role, self.profile)
-        client = session.client(service, region_name=self.region)
+        client = self.config.sessions().client(self.account_id, self.role, self.profile, service, self.region)
         if client.can_paginate(py_action):
             paginator = client.get_paginator(py_action)
             result: List[Json] = []
-            for page in paginator.paginate(**kwargs):
+            pages = iter(paginator.paginate(**kwargs))
+            # every page is a separate request: pace every page
+            while (page := self.__paced(service, lambda: next(pages, None))) is not None:
                 next_page: Json = self.__to_json(page)  # type: ignore
                 if result_name is None:
                     # the whole object is appended
@@ -81,11 +84,24 @@ class AwsClient:
             log.info(f"[Aws] call service={service} action={action}{arg_info}: {len(result)} results.")
             return result
         else:
-            result = getattr(client, py_action)(**kwargs)
+            result = self.__paced(service, lambda: getattr(client, py_action)(**kwargs))
             single: Json = self.__to_json(result)  # type: ignore
             log.debug(f"[Aws] call service={service} action={action}{arg_info}: single result")
             return single.get(result_name) if result_name else [single]
 
+    def __paced(self, service: str, request: Callable[[], T]) -> T:
+        # wait for the rate limiter and adapt the rate based on the outcome of the request
+        rate_limits = self.config.sessions().rate_limits
+        rate_limits.acquire(self.account_id, self.region, service)
+        try:
+            result = request()
+        except ClientError as e:
+            if e.response["Error"]["Code"] in RetryableErrors:
+                rate_limits.throttled(self.account_id, self.region, service)
+            raise
+        rate_limits.success(self.account_id, self.region, service)
+        return result
+
     def call_handle(self, service: str, action: str, result_name: Optional[str], **kwargs: Any) -> JsonElement:
         try:
             return self.call(service, action, result_name, **kwargs)  # type: ignore
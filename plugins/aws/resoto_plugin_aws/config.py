@@ -2,19 +2,35 @@ import logging
 import threading
 import time
 import uuid
+from collections import OrderedDict
 from datetime import timedelta
 
 from attrs import define, field
 from functools import lru_cache
-from typing import List, ClassVar, Optional, Type, Any, Dict
+from typing import List, ClassVar, Optional, Type, Any, Dict, Tuple
 
 from boto3.session import Session as BotoSession
+from prometheus_client import Counter, Summary
 
+from resoto_plugin_aws.rate_limit import RateLimits
 from resotolib.durations import parse_duration
 from resotolib.proc import num_default_threads
 
 log = logging.getLogger("resoto.plugins.aws")
 
+metrics_client_cache = Counter(
+    "resoto_plugin_aws_client_cache_total", "Lookups of boto clients in the client cache", ["result"]
+)
+metrics_client_cache_evictions = Counter(
+    "resoto_plugin_aws_client_cache_evictions_total", "Boto clients evicted from the client cache", ["reason"]
+)
+metrics_client_construction = Summary(
+    "resoto_plugin_aws_client_construction_seconds", "Time it took to construct a boto client"
+)
+
+# account, role, profile, region, service, thread
+ClientKey = Tuple[str, Optional[str], Optional[str], Optional[str], str, Any]
+
 
 @define(hash=True, slots=False)
 class AwsSessionHolder:
@@ -22,9 +38,22 @@ class AwsSessionHolder:
     secret_access_key: Optional[str]
     role: Optional[str] = None
     role_override: bool = False
+    request_rate: float = 10
+    max_request_rate: float = 100
     # Only here to override in tests
     session_class_factory: Type[BotoSession] = BotoSession
     kind: ClassVar[str] = "aws_session_holder"
+    # maximum number of cached boto clients
+    max_clients: ClassVar[int] = 1024
+    _clients: "OrderedDict[ClientKey, Tuple[BotoSession, Any]]" = field(
+        factory=OrderedDict, init=False, eq=False, repr=False
+    )
+    _clients_lock: threading.Lock = field(factory=threading.Lock, init=False, eq=False, repr=False)
+    rate_limits: RateLimits = field(init=False, eq=False, repr=False)
+
+    @rate_limits.default
+    def __rate_limits(self) -> RateLimits:
+        return RateLimits(self.request_rate, self.max_request_rate)
 
     # noinspection PyUnusedLocal
     @lru_cache(maxsize=128)
@@ -77,6 +106,38 @@ class AwsSessionHolder:
             # let's renew the session after 10 minutes
             return self.__sts_session(aws_account, aws_role, aws_profile, thread_id, int(time.time() / 600))
 
+    def client(
+        self,
+        aws_account: str,
+        aws_role: Optional[str],
+        aws_profile: Optional[str],
+        service: str,
+        region: Optional[str],
+    ) -> Any:
+        # creating a boto client is expensive: reuse the client as long as the session is valid
+        # clients should not be shared across threads, same as sessions
+        session = self.session(aws_account, aws_role, aws_profile)
+        key: ClientKey = (aws_account, aws_role, aws_profile, region, service, threading.current_thread().ident)
+        with self._clients_lock:
+            if (entry := self._clients.get(key)) is not None:
+                client_session, client = entry
+                if client_session is session:
+                    self._clients.move_to_end(key)
+                    metrics_client_cache.labels(result="hit").inc()
+                    return client
+                # the session has been renewed, the credentials of the client expire
+                del self._clients[key]
+                metrics_client_cache_evictions.labels(reason="expired").inc()
+        metrics_client_cache.labels(result="miss").inc()
+        with metrics_client_construction.time():
+            client = session.client(service, region_name=region)
+        with self._clients_lock:
+            self._clients[key] = (session, client)
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                metrics_client_cache_evictions.labels(reason="size").inc()
+        return client
+
 
 @define(slots=False)
 class AwsConfig:
@@ -126,6 +187,17 @@ class AwsConfig:
         default=10,
         metadata={"description": "Maximum number of parallel API requests per account/region"},
     )
+    request_rate: float = field(
+        default=10,
+        metadata={
+            "description": "Initial number of API requests per second per account, region and service.\n"
+            "The rate is increased with every successful request and halved when AWS throttles requests."
+        },
+    )
+    max_request_rate: float = field(
+        default=100,
+        metadata={"description": "Maximum number of API requests per second per account, region and service."},
+    )
     collect: List[str] = field(
         factory=list,
         metadata={"description": "List of AWS services to collect (default: all)"},
@@ -190,5 +262,7 @@ class AwsConfig:
                         secret_access_key=self.secret_access_key,
                         role=self.role,
                         role_override=self.role_override,
+                        request_rate=self.request_rate,
+                        max_request_rate=self.max_request_rate,
                     )
         return self._holder
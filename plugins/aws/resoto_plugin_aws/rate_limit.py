@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+log = logging.getLogger("resoto.plugins.aws")
+
+metrics_throttled = Counter(
+    "resoto_plugin_aws_throttled_requests_total",
+    "Requests throttled by AWS",
+    ["account", "region", "service"],
+)
+metrics_request_rate = Gauge(
+    "resoto_plugin_aws_request_rate",
+    "Current allowed request rate per second",
+    ["account", "region", "service"],
+)
+metrics_request_wait = Counter(
+    "resoto_plugin_aws_request_wait_seconds_total",
+    "Time requests waited for the rate limiter",
+    ["account", "region", "service"],
+)
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket that learns the sustainable request rate of an AWS API.
+    The rate increases additively with every successful request and is halved when AWS throttles (AIMD).
+    A caller that has to wait reserves its token, so waiting callers are served in order.
+    """
+
+    def __init__(self, rate: float, max_rate: float, min_rate: float = 0.5, increase: float = 0.1) -> None:
+        self.rate = min(rate, max_rate)
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.tokens = self.capacity()
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def capacity(self) -> float:
+        # allow a burst of one second worth of requests
+        return max(1.0, self.rate)
+
+    def reserve(self) -> float:
+        """
+        Take one token from the bucket.
+        :return: the time in seconds to wait, before the request can be sent.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity(), self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0
+
+    def acquire(self) -> float:
+        if (wait := self.reserve()) > 0:
+            time.sleep(wait)
+        return wait
+
+    def success(self) -> None:
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def throttled(self) -> None:
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            # no burst after throttling
+            self.tokens = min(self.tokens, 0)
+
+
+class RateLimits:
+    """
+    Holds one adaptive token bucket for every combination of account, region and service.
+    """
+
+    def __init__(self, rate: float, max_rate: float) -> None:
+        self.rate = rate
+        self.max_rate = max_rate
+        self.buckets: Dict[Tuple[str, Optional[str], str], AdaptiveTokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, account: str, region: Optional[str], service: str) -> AdaptiveTokenBucket:
+        key = (account, region, service)
+        if (bucket := self.buckets.get(key)) is None:
+            with self.lock:
+                if (bucket := self.buckets.get(key)) is None:
+                    bucket = AdaptiveTokenBucket(self.rate, self.max_rate)
+                    self.buckets[key] = bucket
+        return bucket
+
+    def acquire(self, account: str, region: Optional[str], service: str) -> None:
+        if (wait := self.bucket(account, region, service).acquire()) > 0:
+            metrics_request_wait.labels(account, region or "", service).inc(wait)
+
+    def success(self, account: str, region: Optional[str], service: str) -> None:
+        bucket = self.bucket(account, region, service)
+        bucket.success()
+        metrics_request_rate.labels(account, region or "", service).set(bucket.rate)
+
+    def throttled(self, account: str, region: Optional[str], service: str) -> None:
+        bucket = self.bucket(account, region, service)
+        bucket.throttled()
+        log.debug(f"Throttled: account={account} region={region} service={service}. Reduce rate to {bucket.rate}/s")
+        metrics_throttled.labels(account, region or "", service).inc()
+        metrics_request_rate.labels(account, region or "", service).set(bucket.rate)
@@ -6,11 +6,12 @@ from concurrent.futures import Executor, Future
 from datetime import datetime, timezone
 from functools import lru_cache
 from threading import Lock
-from typing import ClassVar, Dict, Optional, List, Type, Any, TypeVar, Callable
+from typing import ClassVar, Dict, Optional, List, Type, Any, TypeVar, Callable, Tuple, Set
 
 from attr import evolve
 from attrs import define
 from boto3.exceptions import Boto3Error
+from prometheus_client import Gauge
 
 from resoto_plugin_aws.config import AwsConfig
 from resoto_plugin_aws.aws_client import AwsClient
@@ -31,6 +32,10 @@ from resotolib.types import Json
 
 log = logging.getLogger("resoto.plugins.aws")
 
+metrics_work_queue_depth = Gauge(
+    "resoto_plugin_aws_work_queue_depth", "Submitted work that is not completed yet", ["account"]
+)
+
 
 @define
 class AwsApiSpec:
@@ -255,7 +260,10 @@ class ExecutorQueue:
     _lock: Lock = Lock()
 
     def submit_work(self, fn: Callable[..., None], *args: Any, **kwargs: Any) -> Future[Any]:
+        depth = metrics_work_queue_depth.labels(self.name)
+        depth.inc()
         future = self.executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda _: depth.dec())
         with self._lock:
             self.futures.append(future)
         return future
@@ -273,6 +281,46 @@ class ExecutorQueue:
                 raise
 
 
+class NodeIndex:
+    """
+    Thread safe secondary index of all nodes in the graph by commonly queried attributes.
+    The indexed attributes of a node are expected to be stable, once the node is added to the graph.
+    """
+
+    # attributes in order of selectivity
+    attributes: ClassVar[Tuple[str, ...]] = ("arn", "id", "name")
+
+    def __init__(self, graph: Graph) -> None:
+        self.graph = graph
+        self.nodes: Dict[Tuple[str, Any], List[BaseResource]] = {}
+        self.indexed: Set[BaseResource] = set()
+        self.lock = Lock()
+        for node in graph.nodes:
+            self.add(node)
+
+    def add(self, node: BaseResource) -> None:
+        with self.lock:
+            if node not in self.indexed:
+                self.indexed.add(node)
+                for attr in self.attributes:
+                    if (value := getattr(node, attr, None)) is not None:
+                        self.nodes.setdefault((attr, value), []).append(node)
+
+    def candidates(self, **node: Any) -> Optional[List[BaseResource]]:
+        """
+        All nodes that might match the given attributes in insertion order.
+        None, if the index can not be used: no indexed attribute is queried or the graph has nodes that are not indexed.
+        """
+        for attr in self.attributes:
+            if (value := node.get(attr)) is not None:
+                with self.lock:
+                    # nodes added to the graph directly are not part of the index
+                    if len(self.indexed) < self.graph.number_of_nodes():
+                        return None
+                    return list(self.nodes.get((attr, value), []))
+        return None
+
+
 class GraphBuilder:
     def __init__(
         self,
@@ -283,8 +331,10 @@ class GraphBuilder:
         client: AwsClient,
         executor: ExecutorQueue,
         global_instance_types: Optional[Dict[str, Any]] = None,
+        node_index: Optional[NodeIndex] = None,
     ) -> None:
         self.graph = graph
+        self.node_index = node_index or NodeIndex(graph)
         self.cloud = cloud
         self.account = account
         self.region = region
@@ -303,7 +353,8 @@ class GraphBuilder:
     def node(self, clazz: Optional[Type[AwsResourceType]] = None, **node: Any) -> Optional[AwsResourceType]:
         if isinstance(nd := node.get("node"), AwsResource):
             return nd  # type: ignore
-        for n in self.graph:
+        candidates = self.node_index.candidates(**node)
+        for n in self.graph if candidates is None else candidates:
             is_clazz = isinstance(n, clazz) if clazz else True
             if is_clazz and all(getattr(n, k, None) == v for k, v in node.items()):
                 return n  # type: ignore
@@ -315,6 +366,7 @@ class GraphBuilder:
         node._account = self.account
         node._region = self.region
         self.graph.add_node(node, source=source or {})
+        self.node_index.add(node)
         return node
 
     def add_edge(self, from_node: BaseResource, edge_type: EdgeType, reverse: bool = False, **to_node: Any) -> None:
@@ -366,4 +418,5 @@ class GraphBuilder:
             self.client.for_region(region.name),
             self.executor,
             self.global_instance_types,
+            self.node_index,
         )
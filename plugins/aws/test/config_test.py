@@ -1,7 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from resotolib.proc import num_default_threads
 from resotolib.config import Config
 from resoto_plugin_aws import AWSCollectorPlugin
 from resoto_plugin_aws.config import AwsConfig
+from test.resources import BotoFileBasedSession
 
 
 def test_default_config() -> None:
@@ -31,3 +34,19 @@ def test_session() -> None:
     # direct session
     assert config.sessions().session("1234", aws_role=None) == config.sessions().session("1234", aws_role=None)
     # no test for sts session, since this requires sts setup
+
+
+def test_client_cache() -> None:
+    config = AwsConfig("test", "test", "test")
+    config.sessions().session_class_factory = BotoFileBasedSession
+    holder = config.sessions()
+    client = holder.client("1234", None, None, "ec2", "us-east-1")
+    assert holder.client("1234", None, None, "ec2", "us-east-1") is client
+    assert holder.client("1234", None, None, "ec2", "eu-central-1") is not client
+    assert holder.client("1234", None, None, "s3", "us-east-1") is not client
+    # clients are not shared between threads
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(holder.client, "1234", None, None, "ec2", "us-east-1").result() is not client
+    # a renewed session evicts the cached client
+    holder.session = lambda *args: BotoFileBasedSession()  # type: ignore
+    assert holder.client("1234", None, None, "ec2", "us-east-1") is not client
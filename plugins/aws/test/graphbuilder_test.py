@@ -1,7 +1,7 @@
 from typing import List
 
 from resoto_plugin_aws.resource.base import GraphBuilder, AwsRegion
-from resoto_plugin_aws.resource.ec2 import AwsEc2InstanceType
+from resoto_plugin_aws.resource.ec2 import AwsEc2InstanceType, AwsEc2Vpc, AwsEc2Subnet
 
 from test import builder, aws_client  # noqa: F401
 
@@ -29,3 +29,24 @@ def test_executor(builder: GraphBuilder) -> None:
 
     builder.executor.wait_for_submitted_work()
     assert result == list(range(0, 100))
+
+
+def test_node_lookup(builder: GraphBuilder) -> None:
+    vpc = builder.add_node(AwsEc2Vpc(id="vpc-1", arn="arn:vpc-1", name="my-vpc"))
+    subnet = builder.add_node(AwsEc2Subnet(id="subnet-1", name="my-vpc"))
+    assert builder.node(id="vpc-1") is vpc
+    assert builder.node(arn="arn:vpc-1") is vpc
+    assert builder.node(name="my-vpc") is vpc
+    assert builder.node(clazz=AwsEc2Subnet, name="my-vpc") is subnet
+    assert builder.node(clazz=AwsEc2Subnet, id="vpc-1") is None
+    assert builder.node(id="vpc-2") is None
+    # no indexed attribute: fall back to scan
+    assert builder.node(clazz=AwsEc2Subnet) is subnet
+    # the index is shared with builders of other regions
+    eu_builder = builder.for_region(AwsRegion(id="eu-central-1"))
+    eu_vpc = eu_builder.add_node(AwsEc2Vpc(id="vpc-2"))
+    assert builder.node(id="vpc-2") is eu_vpc
+    # nodes added directly to the graph are found as well
+    direct = AwsEc2Vpc(id="vpc-3")
+    builder.graph.add_node(direct)
+    assert builder.node(id="vpc-3") is direct
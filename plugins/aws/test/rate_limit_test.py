@@ -0,0 +1,33 @@
+from resoto_plugin_aws.rate_limit import AdaptiveTokenBucket, RateLimits
+
+
+def test_token_bucket() -> None:
+    bucket = AdaptiveTokenBucket(rate=2, max_rate=3)
+    # burst of one second worth of requests
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    # the next caller has to wait until the next token is available
+    assert 0.4 < bucket.reserve() <= 0.5
+    assert 0.9 < bucket.reserve() <= 1
+    # rate increases with every success up to the max rate
+    for _ in range(20):
+        bucket.success()
+    assert bucket.rate == 3
+    # rate is halved when throttled, but never falls below the min rate
+    bucket.throttled()
+    assert bucket.rate == 1.5
+    for _ in range(10):
+        bucket.throttled()
+    assert bucket.rate == bucket.min_rate
+
+
+def test_rate_limits() -> None:
+    limits = RateLimits(10, 100)
+    ec2 = limits.bucket("test", "us-east-1", "ec2")
+    assert limits.bucket("test", "us-east-1", "ec2") is ec2
+    assert limits.bucket("test", "us-west-2", "ec2") is not ec2
+    assert limits.bucket("test", "us-east-1", "s3") is not ec2
+    limits.throttled("test", "us-east-1", "ec2")
+    assert ec2.rate == 5
+    limits.success("test", "us-east-1", "ec2")
+    assert ec2.rate == 5.1
@@ -0,0 +1,61 @@
+"""
+Measure the time to connect all nodes of a synthetic account with and without the node index of the GraphBuilder.
+
+Usage: python3 graph_builder_benchmark.py --vpcs 100 --instances 20000
+"""
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional
+
+from resoto_plugin_aws.aws_client import AwsClient
+from resoto_plugin_aws.config import AwsConfig
+from resoto_plugin_aws.resource.base import AwsAccount, AwsRegion, ExecutorQueue, GraphBuilder, NodeIndex
+from resoto_plugin_aws.resource.ec2 import AwsEc2Instance, AwsEc2Subnet, AwsEc2Vpc
+from resotolib.baseresources import BaseResource, Cloud, EdgeType
+from resotolib.graph import Graph
+
+parser = ArgumentParser()
+parser.add_argument("--vpcs", type=int, default=100)
+parser.add_argument("--instances", type=int, default=20000)
+ns = parser.parse_args()
+
+
+class NoIndex(NodeIndex):
+    def candidates(self, **node: Any) -> Optional[List[BaseResource]]:
+        return None
+
+
+def run(with_index: bool) -> float:
+    account = AwsAccount(id="test")
+    graph = Graph(root=account)
+    with ThreadPoolExecutor() as executor:
+        builder = GraphBuilder(
+            graph,
+            Cloud(id="aws"),
+            account,
+            AwsRegion(id="us-east-1"),
+            AwsClient(AwsConfig(), "test", region="us-east-1"),
+            ExecutorQueue(executor, "benchmark"),
+            node_index=None if with_index else NoIndex(graph),
+        )
+        instances = [builder.add_node(AwsEc2Instance(id=f"i-{i}")) for i in range(ns.instances)]
+        for v in range(ns.vpcs):
+            builder.add_node(AwsEc2Vpc(id=f"vpc-{v}", arn=f"arn:aws:ec2:us-east-1:test:vpc/vpc-{v}"))
+            builder.add_node(AwsEc2Subnet(id=f"subnet-{v}"))
+        start = time.monotonic()
+        for num, instance in enumerate(instances):
+            vpc = num % ns.vpcs
+            builder.dependant_node(instance, reverse=True, clazz=AwsEc2Vpc, id=f"vpc-{vpc}")
+            builder.add_edge(instance, EdgeType.default, reverse=True, clazz=AwsEc2Subnet, id=f"subnet-{vpc}")
+        return time.monotonic() - start
+
+
+def main() -> None:
+    print(f"Connect {ns.instances} instances to {ns.vpcs} vpcs and subnets.")
+    for name, with_index in [("scan", False), ("index", True)]:
+        print(f"{name:>6}: {run(with_index):8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
-from typing import Optional, List, Tuple
+from collections import defaultdict
+from typing import Any, Dict, Optional, List, Tuple
 
 from resoto_plugin_digitalocean.client import StreamingWrapper, get_team_credentials
 from resoto_plugin_digitalocean.collector import DigitalOceanTeamCollector
@@ -51,7 +52,12 @@ class DigitalOceanCollectorPlugin(BaseCollectorPlugin):
 
         log.info(f"plugin: collecting DigitalOcean resources for {len(tokens)} teams")
         for token, space_key_tuple in zip(tokens, spaces_keys):
-            client = StreamingWrapper(token, space_key_tuple[0], space_key_tuple[1])
+            client = StreamingWrapper(
+                token,
+                space_key_tuple[0],
+                space_key_tuple[1],
+                max_concurrent_requests=Config.digitalocean.max_concurrent_requests,
+            )
             team_graph = self.collect_team(client)
             if team_graph:
                 self.graph.merge(team_graph)
@@ -62,7 +68,7 @@ class DigitalOceanCollectorPlugin(BaseCollectorPlugin):
         team = DigitalOceanTeam(id=team_id, tags={}, urn=f"do:team:{team_id}")
 
         try:
-            dopc = DigitalOceanTeamCollector(team, client)
+            dopc = DigitalOceanTeamCollector(team, client, max_workers=Config.digitalocean.collector_pool_size)
             dopc.collect()
         except Exception:
             log.exception(f"An unhandled error occurred while collecting team {team_id}")
@@ -96,7 +102,8 @@ class DigitalOceanCollectorPlugin(BaseCollectorPlugin):
             if key in resource.tags:
                 # resotocore knows about the tag. Therefore we need to clean it first
                 tag_key = dump_tag(key, resource.tags.get(key))
-                client.untag_resource(tag_key, tag_resource_name, resource.id)
+                # the old tag might be removed already by a previous (bulk) attempt
+                client.untag_resource(tag_key, tag_resource_name, resource.id, ignore_missing=True)
 
             # we tag the resource using the key-value formatted tag
             tag_kv = dump_tag(key, value)
@@ -145,3 +152,81 @@ class DigitalOceanCollectorPlugin(BaseCollectorPlugin):
             return True
         else:
             raise NotImplementedError(f"resource {resource.kind} does not support tagging")
+
+    @classmethod
+    def update_tags(cls, config: Config, changes: List[Tuple[BaseResource, str, str]]) -> List[bool]:
+        # digitalocean tags all resources with the same tag in one request
+        result = [False] * len(changes)
+        for team_id, indexes in cls.group_by_team(changes).items():
+            client = cls.team_client(config, team_id)
+            untag: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+            tag: Dict[str, List[int]] = defaultdict(list)
+            for idx in indexes:
+                resource, key, value = changes[idx]
+                if key in resource.tags:
+                    # resotocore knows about the tag. Therefore we need to clean it first
+                    untag[dump_tag(key, resource.tags.get(key))].append(cls.tag_resource_ref(resource))
+                tag[dump_tag(key, value)].append(idx)
+            for tag_key, resources in untag.items():
+                client.untag_resources(tag_key, resources, ignore_missing=True)
+            for tag_kv, tag_indexes in tag.items():
+                tag_count = client.get_tag_count(tag_kv)
+                # tag count call failed irrecoverably, we can't continue
+                if isinstance(tag_count, str):
+                    raise RuntimeError(f"Tag update failed. Reason: {tag_count}")
+                # tag does not exist, create it
+                tag_ready = client.create_tag(tag_kv) if tag_count is None else True
+                resources = [cls.tag_resource_ref(changes[idx][0]) for idx in tag_indexes]
+                tagged = tag_ready and client.tag_resources(tag_kv, resources)
+                for idx in tag_indexes:
+                    result[idx] = tagged
+        return result
+
+    @classmethod
+    def delete_tags(cls, config: Config, changes: List[Tuple[BaseResource, str]]) -> List[bool]:
+        # digitalocean removes the same tag from all resources in one request
+        result = [False] * len(changes)
+        for team_id, indexes in cls.group_by_team(changes).items():
+            client = cls.team_client(config, team_id)
+            untag: Dict[str, List[int]] = defaultdict(list)
+            for idx in indexes:
+                resource, key = changes[idx]
+                # tag does not exist, nothing to do
+                if key in resource.tags:
+                    untag[dump_tag(key, resource.tags.get(key))].append(idx)
+            for tag_key, tag_indexes in untag.items():
+                resources = [cls.tag_resource_ref(changes[idx][0]) for idx in tag_indexes]
+                untagged = client.untag_resources(tag_key, resources)
+                if untagged and client.get_tag_count(tag_key) == 0:
+                    untagged = client.delete("/tags", tag_key)
+                for idx in tag_indexes:
+                    result[idx] = untagged
+        return result
+
+    @staticmethod
+    def group_by_team(changes: List[Tuple[Any, ...]]) -> Dict[str, List[int]]:
+        by_team: Dict[str, List[int]] = defaultdict(list)
+        for idx, change in enumerate(changes):
+            resource = change[0]
+            assert isinstance(resource, DigitalOceanResource)
+            by_team[resource.account().id].append(idx)
+        return by_team
+
+    @staticmethod
+    def team_client(config: Config, team_id: str) -> StreamingWrapper:
+        credentials = get_team_credentials(config, team_id)
+        if credentials is None:
+            raise RuntimeError(f"Cannot change tags, credentials not found for team {team_id}")
+        return StreamingWrapper(
+            credentials.api_token,
+            credentials.spaces_access_key,
+            credentials.spaces_secret_key,
+        )
+
+    @staticmethod
+    def tag_resource_ref(resource: BaseResource) -> Tuple[str, str]:
+        assert isinstance(resource, DigitalOceanResource)
+        tag_resource_name = resource.tag_resource_name()
+        if tag_resource_name is None:
+            raise NotImplementedError(f"resource {resource.kind} does not support tagging")
+        return tag_resource_name, resource.id
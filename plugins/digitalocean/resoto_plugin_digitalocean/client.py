@@ -1,11 +1,17 @@
 import logging
+import threading
+import time
 from attrs import define
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from functools import lru_cache
-from typing import List, Any, Optional, Union, TypeVar, Callable
+from typing import List, Any, Optional, Union, TypeVar, Callable, Tuple, Iterator
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
 
 import boto3
 import requests
 from botocore.exceptions import EndpointConnectionError, HTTPClientError
+from requests.adapters import HTTPAdapter
 from retrying import retry as retry_decorator
 
 from resoto_plugin_digitalocean.utils import RetryableHttpError
@@ -30,6 +36,71 @@ log = logging.getLogger("resoto." + __name__)
 Failure = str
 
 
+def remaining_page_urls(last_page_url: str) -> List[str]:
+    """Returns the urls of all pages after the first one, given the url of the last page.
+
+    An empty list is returned, if the url does not define the page by number.
+    """
+    scheme, netloc, path, query, fragment = urlsplit(last_page_url)
+    params = parse_qs(query)
+    last_page = params.get("page", [""])[0]
+    if not last_page.isdigit():
+        return []
+
+    def page_url(page: int) -> str:
+        return urlunsplit((scheme, netloc, path, urlencode({**params, "page": [page]}, doseq=True), fragment))
+
+    return [page_url(page) for page in range(2, int(last_page) + 1)]
+
+
+def retry_after(response: requests.Response) -> float:
+    """Seconds to wait, before the next request should be sent, based on the response headers."""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        pass
+    try:
+        # epoch seconds, when the rate limit is reset
+        return float(response.headers["RateLimit-Reset"]) - time.time()
+    except (KeyError, ValueError):
+        return 1.0
+
+
+class RateLimiter:
+    """Limits the number of concurrent requests of all threads using one client.
+
+    If the API responds with 429 or announces that no request is remaining,
+    all requests are paused until the rate limit is reset.
+    """
+
+    def __init__(self, max_concurrent_requests: int, max_pause: float = 300) -> None:
+        self.slots = threading.BoundedSemaphore(max_concurrent_requests)
+        self.max_pause = max_pause
+        self.lock = threading.Lock()
+        self.paused_until = 0.0
+
+    @contextmanager
+    def request(self) -> Iterator[None]:
+        with self.slots:
+            self.wait()
+            yield
+
+    def wait(self) -> None:
+        while True:
+            with self.lock:
+                delay = self.paused_until - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def update(self, response: requests.Response) -> None:
+        if response.status_code == 429 or response.headers.get("RateLimit-Remaining") == "0":
+            delay = min(max(retry_after(response), 0), self.max_pause)
+            log.info(f"Rate limit reached: pausing requests for {delay:.1f} seconds")
+            with self.lock:
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+
+
 # todo: make it async
 # todo: stream the response
 class StreamingWrapper:
@@ -38,6 +109,7 @@ class StreamingWrapper:
         token: str,
         spaces_access_key: Optional[str],
         spaces_secret_key: Optional[str],
+        max_concurrent_requests: int = 10,
     ) -> None:
         self.do_api_endpoint = "https://api.digitalocean.com/v2"
 
@@ -45,12 +117,19 @@ class StreamingWrapper:
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
         }
+        # all requests of this client share the connections of one session
+        self.max_concurrent_requests = max_concurrent_requests
+        self.limiter = RateLimiter(max_concurrent_requests)
+        self.http_session = requests.Session()
+        self.http_session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrent_requests)
+        self.http_session.mount("https://", adapter)
+        self.http_session.mount("http://", adapter)
         self.spaces_access_key = spaces_access_key
         self.spaces_secret_key = spaces_secret_key
-        if spaces_access_key and spaces_secret_key:
-            self.session = boto3.session.Session()
-        else:
-            self.session = None
+        self.spaces_enabled = bool(spaces_access_key and spaces_secret_key)
+        # boto3 sessions are not thread-safe: every collector thread gets its own session
+        self.spaces_local = threading.local()
 
     def check_status_code(self, response: requests.Response) -> bool:
         status_code = response.status_code
@@ -70,33 +149,50 @@ class StreamingWrapper:
         log.warning(f"unknown status code {status_code}: {method} {url} {response.reason} {response.text}")
         return False
 
+    def _request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        with self.limiter.request():
+            response = self.http_session.request(method, url, allow_redirects=True, **kwargs)
+        self.limiter.update(response)
+        return response
+
     @retry
+    def _fetch_page(self, url: str) -> Json:
+        log.debug(f"fetching {url}")
+        response = self._request("GET", url)
+        if response.status_code == 429:
+            raise RetryableHttpError(f"Too many requests: {response.reason} {response.text}")
+        if response.status_code // 100 == 5:
+            raise RetryableHttpError(f"Server error: {response.reason} {response.text}")
+        json_response: Json = response.json()
+        return json_response
+
     def _fetch(self, path: str, payload_object_name: str) -> List[Json]:
         result: List[Json] = []
 
-        url = f"{self.do_api_endpoint}{path}?page=1&per_page=200"
-        log.debug(f"fetching {url}")
-
-        def validate_status(response: requests.Response) -> requests.Response:
-            if response.status_code == 429:
-                raise RetryableHttpError(f"Too many requests: {response.reason} {response.text}")
-            if response.status_code / 100 == 5:
-                raise RetryableHttpError(f"Server error: {response.reason} {response.text}")
-            return response
-
-        json_response = validate_status(requests.get(url, headers=self.headers, allow_redirects=True)).json()
-        payload = json_response.get(payload_object_name, [])
-        result.extend(payload if isinstance(payload, list) else [payload])
-
-        while json_response.get("links", {}).get("pages", {}).get("last", "") != url:
-            url = json_response.get("links", {}).get("pages", {}).get("next", "")
-            if url == "":
-                break
-            log.debug(f"fetching {url}")
-            json_response = validate_status(requests.get(url, headers=self.headers, allow_redirects=True)).json()
+        def add_payload(json_response: Json) -> None:
             payload = json_response.get(payload_object_name, [])
             result.extend(payload if isinstance(payload, list) else [payload])
 
+        url = f"{self.do_api_endpoint}{path}?page=1&per_page=200"
+        json_response = self._fetch_page(url)
+        add_payload(json_response)
+
+        pages = json_response.get("links", {}).get("pages", {})
+        page_urls = remaining_page_urls(pages.get("last", ""))
+        if page_urls:
+            # the first page tells how many pages there are: fetch all others in parallel
+            workers = min(self.max_concurrent_requests, len(page_urls))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="do-fetch") as executor:
+                for json_response in executor.map(self._fetch_page, page_urls):
+                    add_payload(json_response)
+        else:
+            # the number of pages is not known: follow the next links
+            while pages.get("next") and pages.get("next") != url:
+                url = pages["next"]
+                json_response = self._fetch_page(url)
+                add_payload(json_response)
+                pages = json_response.get("links", {}).get("pages", {})
+
         log.debug(f"DO request {path} returned {len(result)} items")
         return result
 
@@ -106,7 +202,7 @@ class StreamingWrapper:
         url = f"{self.do_api_endpoint}{path}{resource_id_path}"
         log.debug(f"deleting {url}")
 
-        response = requests.delete(url, headers=self.headers, allow_redirects=True)
+        response = self._request("DELETE", url)
 
         status_code = response.status_code
         if status_code == 429:
@@ -167,26 +263,28 @@ class StreamingWrapper:
     def unassign_floating_ip(self, floating_ip_id: str) -> bool:
         payload = '{"type":"unassign"}'
         url = f"{self.do_api_endpoint}/floating_ips/{floating_ip_id}/actions"
-        response = requests.post(
-            url,
-            headers=self.headers,
-            data=payload,
-            allow_redirects=True,
-        )
+        response = self._request("POST", url, data=payload)
 
         return self.check_status_code(response)
 
+    def spaces_resource(self, region_slug: str) -> Any:
+        session = getattr(self.spaces_local, "session", None)
+        if session is None:
+            session = boto3.session.Session()
+            self.spaces_local.session = session
+        return session.resource(
+            "s3",
+            endpoint_url=f"https://{region_slug}.digitaloceanspaces.com",
+            region_name=region_slug,
+            aws_access_key_id=self.spaces_access_key,
+            aws_secret_access_key=self.spaces_secret_key,
+        )
+
     @retry
     def list_spaces(self, region_slug: str) -> List[Json]:
-        if self.session is not None:
+        if self.spaces_enabled:
             try:
-                resource = self.session.resource(
-                    "s3",
-                    endpoint_url=f"https://{region_slug}.digitaloceanspaces.com",
-                    region_name=region_slug,
-                    aws_access_key_id=self.spaces_access_key,
-                    aws_secret_access_key=self.spaces_secret_key,
-                )
+                resource = self.spaces_resource(region_slug)
 
                 buckets: List[Json] = resource.meta.client.list_buckets().get("Buckets", [])
                 return buckets
@@ -202,15 +300,9 @@ class StreamingWrapper:
 
     @retry
     def delete_space(self, region_slug: str, bucket_name: str) -> bool:
-        if self.session is not None:
+        if self.spaces_enabled:
             try:
-                s3 = self.session.resource(
-                    "s3",
-                    endpoint_url=f"https://{region_slug}.digitaloceanspaces.com",
-                    region_name=region_slug,
-                    aws_access_key_id=self.spaces_access_key,
-                    aws_secret_access_key=self.spaces_secret_key,
-                )
+                s3 = self.spaces_resource(region_slug)
 
                 def handle_response_code(result: Any) -> bool:
                     if not isinstance(result, list):
@@ -279,7 +371,7 @@ class StreamingWrapper:
     @retry
     def get_tag_count(self, tag_name: str) -> Union[Failure, None, int]:
         url = f"{self.do_api_endpoint}/tags/{tag_name}"
-        response = requests.get(url, headers=self.headers, allow_redirects=True)
+        response = self._request("GET", url)
         if response.status_code == 404:
             return None
         if self.check_status_code(response):
@@ -293,26 +385,41 @@ class StreamingWrapper:
     @retry
     def create_tag(self, tag_name: str) -> bool:
         url = f"{self.do_api_endpoint}/tags"
-        response = requests.post(url, headers=self.headers, json={"name": tag_name})
+        response = self._request("POST", url, json={"name": tag_name})
         return self.check_status_code(response)
 
-    @retry
     def tag_resource(self, tag_name: str, resource_type: str, resource_id: str) -> bool:
+        return self.tag_resources(tag_name, [(resource_type, resource_id)])
+
+    @retry
+    def tag_resources(self, tag_name: str, resources: List[Tuple[str, str]]) -> bool:
+        """Tag all given resources (resource_type, resource_id) with one request."""
         url = f"{self.do_api_endpoint}/tags/{tag_name}/resources"
-        payload = {"resources": [{"resource_id": resource_id, "resource_type": resource_type}]}
-        response = requests.post(url, headers=self.headers, json=payload, allow_redirects=True)
+        payload = {"resources": [{"resource_id": rid, "resource_type": rtype} for rtype, rid in resources]}
+        response = self._request("POST", url, json=payload)
 
         return self.check_status_code(response)
 
+    def untag_resource(self, tag_name: str, resource_type: str, resource_id: str, ignore_missing: bool = False) -> bool:
+        return self.untag_resources(tag_name, [(resource_type, resource_id)], ignore_missing)
+
     @retry
-    def untag_resource(self, tag_name: str, resource_type: str, resource_id: str) -> bool:
+    def untag_resources(self, tag_name: str, resources: List[Tuple[str, str]], ignore_missing: bool = False) -> bool:
+        """Remove the tag from all given resources (resource_type, resource_id) with one request.
+
+        With ignore_missing, a tag that does not exist (any longer) counts as removed.
+        """
         url = f"{self.do_api_endpoint}/tags/{tag_name}/resources"
-        payload = {"resources": [{"resource_id": resource_id, "resource_type": resource_type}]}
+        payload = {"resources": [{"resource_id": rid, "resource_type": rtype} for rtype, rid in resources]}
 
-        response = requests.delete(url, headers=self.headers, json=payload, allow_redirects=True)
+        response = self._request("DELETE", url, json=payload)
 
         if response.status_code == 404:
-            raise RuntimeError(f"Tag {tag_name} or {resource_type} {resource_id} not found.")
+            if ignore_missing:
+                log.debug(f"Tag {tag_name} not found: nothing to remove")
+                return True
+            names = ", ".join(f"{rtype} {rid}" for rtype, rid in resources)
+            raise RuntimeError(f"Tag {tag_name} or {names} not found.")
         return self.check_status_code(response)
 
     def list_domains(self) -> List[Json]:
@@ -1,13 +1,17 @@
 import logging
 import math
+import threading
+from concurrent import futures
+from functools import partial
 from pprint import pformat
-from typing import Tuple, Type, List, Dict, Callable, Any, Optional, cast
+from typing import Tuple, Type, List, Dict, Callable, Any, Optional, Set, cast
 
 from prometheus_client import Summary
 
 from resotolib.baseresources import BaseResource, EdgeType, InstanceStatus, VolumeStatus
 from resotolib.graph import Graph
 from resotolib.types import Json
+from resotolib.utils import run_collectors
 from .client import StreamingWrapper
 from .resources import (
     DigitalOceanDroplet,
@@ -171,9 +175,12 @@ class DigitalOceanTeamCollector:
     all DigitalOcean resources
     """
 
-    def __init__(self, team: DigitalOceanTeam, client: StreamingWrapper) -> None:
+    def __init__(self, team: DigitalOceanTeam, client: StreamingWrapper, max_workers: int = 5) -> None:
         self.client = client
         self.team = team
+        self.max_workers = max_workers
+        # collectors run concurrently, but only one of them modifies the graph at a time
+        self.graph_lock = threading.RLock()
 
         # Mandatory collectors are always collected regardless of whether
         # they were included by --do-collect or excluded by --do-no-collect
@@ -207,6 +214,21 @@ class DigitalOceanTeamCollector:
             ("spaces", self.collect_spaces),
         ]
 
+        # Collectors that need to be done before a collector can start,
+        # since the collector connects its resources to their resources.
+        # The project collector depends on all other collectors.
+        self.collector_dependencies: Dict[str, Set[str]] = {
+            "instances": {"vpcs", "tags"},
+            "volumes": {"instances", "tags"},
+            "databases": {"vpcs", "tags"},
+            "k8s_clusters": {"vpcs", "instances"},
+            "snapshots": {"instances", "volumes", "tags"},
+            "load_balancers": {"vpcs", "instances"},
+            "floating_ips": {"instances"},
+            "apps": {"databases"},
+            "firewalls": {"instances", "tags"},
+        }
+
         self.all_collectors = dict(self.mandatory_collectors)
         self.all_collectors.update(self.region_collectors)
         self.all_collectors.update(self.global_collectors)
@@ -231,16 +253,22 @@ class DigitalOceanTeamCollector:
 
         regions = [r for r in self.graph.nodes if isinstance(r, DigitalOceanRegion)]
 
+        # region and global collectors are independent of each other, apart from the dependencies
+        to_collect: Dict[str, Callable[[], None]] = {}
         for region in regions:
             for collector_name, collector in self.region_collectors:
                 if collector_name in collectors:
-                    log.info((f"Collecting {collector_name} in {region.rtdname}" f" {self.team.rtdname}"))
-                    collector(region=region)
-
+                    to_collect[f"{collector_name} in {region.rtdname}"] = partial(collector, region=region)
         for collector_name, collector in self.global_collectors:
             if collector_name in collectors:
-                log.info(f"Collecting {collector_name} in {self.team.rtdname}")
-                collector()
+                to_collect[collector_name] = collector
+        dependencies = dict(self.collector_dependencies)
+        dependencies["project"] = set(to_collect) - {"project"}
+
+        with futures.ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix=f"do-{self.team.id}"
+        ) as executor:
+            run_collectors(executor, to_collect, dependencies, self.team.rtdname)
 
         remove_nodes = set()
 
@@ -355,71 +383,74 @@ class DigitalOceanTeamCollector:
             search_map = {}
         parent_map = {True: predecessors, False: successors}
 
-        for resource_json in resources:
-            kwargs, search_results = self.default_attributes(resource_json, attr_map=attr_map, search_map=search_map)
-            kwargs_no_underscore = {}
-            for key, value in kwargs.items():
-                if key.startswith("_"):
-                    kwargs_no_underscore[key[1:]] = value
-                else:
-                    kwargs_no_underscore[key] = value
-            resource_instance = resource_class(**kwargs_no_underscore)
-            log.debug(f"Adding {resource_instance.rtdname} to the graph")
-            if dump_resource:
-                log.debug(f"Resource Dump: {pformat(resource_json)}")
-
-            pr = kwargs.get("_region", self.graph.root)
-            log.debug(f"Parent resource for {resource_instance.rtdname} automatically set to {pr.rtdname}")
-            self.graph.add_resource(pr, resource_instance, edge_type=EdgeType.default)
-
-            def add_deferred_connection(
-                search_map: Dict[str, Any],
-                search_map_key: str,
-                is_parent: bool,
-                edge_type: EdgeType,
-            ) -> None:
-                graph_search = search_map[search_map_key]
-                attr = graph_search[0]
-                value_name = graph_search[1]
-                if value_name in resource_json:
-                    value = resource_json[value_name]
-                    if isinstance(value, List):
-                        values = value
-                        for value in values:
+        with self.graph_lock:
+            for resource_json in resources:
+                kwargs, search_results = self.default_attributes(
+                    resource_json, attr_map=attr_map, search_map=search_map
+                )
+                kwargs_no_underscore = {}
+                for key, value in kwargs.items():
+                    if key.startswith("_"):
+                        kwargs_no_underscore[key[1:]] = value
+                    else:
+                        kwargs_no_underscore[key] = value
+                resource_instance = resource_class(**kwargs_no_underscore)
+                log.debug(f"Adding {resource_instance.rtdname} to the graph")
+                if dump_resource:
+                    log.debug(f"Resource Dump: {pformat(resource_json)}")
+
+                pr = kwargs.get("_region", self.graph.root)
+                log.debug(f"Parent resource for {resource_instance.rtdname} automatically set to {pr.rtdname}")
+                self.graph.add_resource(pr, resource_instance, edge_type=EdgeType.default)
+
+                def add_deferred_connection(
+                    search_map: Dict[str, Any],
+                    search_map_key: str,
+                    is_parent: bool,
+                    edge_type: EdgeType,
+                ) -> None:
+                    graph_search = search_map[search_map_key]
+                    attr = graph_search[0]
+                    value_name = graph_search[1]
+                    if value_name in resource_json:
+                        value = resource_json[value_name]
+                        if isinstance(value, List):
+                            values = value
+                            for value in values:
+                                resource_instance.add_deferred_connection(  # type: ignore
+                                    attr,
+                                    value,
+                                    is_parent,  # type: ignore
+                                    edge_type=edge_type,
+                                )
+                        elif isinstance(value, str):
                             resource_instance.add_deferred_connection(  # type: ignore
-                                attr,
-                                value,
-                                is_parent,  # type: ignore
-                                edge_type=edge_type,
+                                attr, value, is_parent, edge_type=edge_type  # type: ignore
                             )
-                    elif isinstance(value, str):
-                        resource_instance.add_deferred_connection(  # type: ignore
-                            attr, value, is_parent, edge_type=edge_type  # type: ignore
-                        )
-                    else:
-                        log.error(("Unable to add deferred connection for" f" value {value} of type {type(value)}"))
-
-            def add_edge(search_map_key: str, is_parent: bool) -> None:
-                srs = search_results[search_map_key]
-                for sr in srs:
-                    if is_parent:
-                        src = sr
-                        dst = resource_instance
-                    else:
-                        src = resource_instance
-                        dst = sr
-                    self.graph.add_edge(src, dst, edge_type=edge_type)
-
-            for is_parent, edge_sr_names in parent_map.items():
-                for edge_type, search_result_names in edge_sr_names.items():
-                    for search_result_name in search_result_names:
-                        if search_result_name in search_results:
-                            add_edge(search_result_name, is_parent)
                         else:
-                            if search_result_name in search_map:
-                                add_deferred_connection(search_map, search_result_name, is_parent, edge_type)
+                            log.error(("Unable to add deferred connection for" f" value {value} of type {type(value)}"))
+
+                def add_edge(search_map_key: str, is_parent: bool) -> None:
+                    srs = search_results[search_map_key]
+                    for sr in srs:
+                        if is_parent:
+                            src = sr
+                            dst = resource_instance
+                        else:
+                            src = resource_instance
+                            dst = sr
+                        self.graph.add_edge(src, dst, edge_type=edge_type)
+
+                for is_parent, edge_sr_names in parent_map.items():
+                    for edge_type, search_result_names in edge_sr_names.items():
+                        for search_result_name in search_result_names:
+                            if search_result_name in search_results:
+                                add_edge(search_result_name, is_parent)
                             else:
-                                log.error(f"Key {search_result_name} is missing in search_map")
+                                if search_result_name in search_map:
+                                    add_deferred_connection(search_map, search_result_name, is_parent, edge_type)
+                                else:
+                                    log.error(f"Key {search_result_name} is missing in search_map")
 
     @metrics_collect_droplets.time()  # type: ignore
     def collect_droplets(self) -> None:
@@ -13,3 +13,11 @@ class DigitalOceanCollectorConfig:
         factory=list,
         metadata={"description": "DigitalOcean Spaces access keys for the teams to be collected, separated by colons"},
     )
+    collector_pool_size: int = field(
+        default=5,
+        metadata={"description": "DigitalOcean collector thread pool size per team"},
+    )
+    max_concurrent_requests: int = field(
+        default=10,
+        metadata={"description": "Maximum number of concurrent DigitalOcean API requests per team"},
+    )
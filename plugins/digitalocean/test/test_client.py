@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+import pytest
+from pytest import fixture
+
+from resoto_plugin_digitalocean.client import RateLimiter, StreamingWrapper, remaining_page_urls
+
+
+class DropletsApi(ThreadingHTTPServer):
+    """
+    Minimal version of the DigitalOcean droplets endpoint: 10 droplets, 3 per page.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), DropletsHandler)
+        self.lock = threading.Lock()
+        self.pages: List[int] = []
+        self.connections: Set[Tuple[str, int]] = set()
+        self.running = 0
+        self.max_running = 0
+
+
+class DropletsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep the connection alive
+    server: DropletsApi
+
+    def do_GET(self) -> None:
+        api = self.server
+        page = int(parse_qs(urlsplit(self.path).query)["page"][0])
+        with api.lock:
+            api.pages.append(page)
+            api.connections.add(self.client_address)
+            api.running += 1
+            api.max_running = max(api.max_running, api.running)
+        if page > 1:
+            time.sleep(0.2)
+        base = f"http://127.0.0.1:{api.server_port}/v2/droplets?per_page=3"
+        body = {
+            "droplets": [{"id": num} for num in range((page - 1) * 3, min(page * 3, 10))],
+            "links": {"pages": {"last": f"{base}&page=4"} if page == 1 else {}},
+        }
+        data = json.dumps(body).encode()
+        with api.lock:
+            api.running -= 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:  # type: ignore
+        pass
+
+
+@fixture
+def droplets_api() -> Iterator[DropletsApi]:
+    api = DropletsApi()
+    thread = threading.Thread(target=api.serve_forever, daemon=True)
+    thread.start()
+    yield api
+    api.shutdown()
+    api.server_close()
+
+
+def test_fetch_pages_concurrently(droplets_api: DropletsApi) -> None:
+    client = StreamingWrapper("token", None, None, max_concurrent_requests=3)
+    client.do_api_endpoint = f"http://127.0.0.1:{droplets_api.server_port}/v2"
+
+    droplets = client.list_droplets()
+    # all droplets in the order of the pages
+    assert [d["id"] for d in droplets] == list(range(10))
+    assert sorted(droplets_api.pages) == [1, 2, 3, 4]
+    # the remaining pages are fetched in parallel
+    assert droplets_api.max_running > 1
+
+    assert len(client.list_droplets()) == 10
+    # connections are reused
+    assert len(droplets_api.connections) <= 3
+
+
+def test_remaining_page_urls() -> None:
+    assert remaining_page_urls("https://api.digitalocean.com/v2/droplets?page=3&per_page=200") == [
+        "https://api.digitalocean.com/v2/droplets?page=2&per_page=200",
+        "https://api.digitalocean.com/v2/droplets?page=3&per_page=200",
+    ]
+    assert remaining_page_urls("https://api.digitalocean.com/v2/droplets?page=1&per_page=200") == []
+    assert remaining_page_urls("https://api.digitalocean.com/v2/registry?page_token=abc") == []
+    assert remaining_page_urls("") == []
+
+
+def test_rate_limiter() -> None:
+    limiter = RateLimiter(2)
+    response = requests.Response()
+    response.status_code = 200
+    limiter.update(response)
+    with limiter.request():
+        pass
+
+    # too many requests: all requests wait until the given time has passed
+    response.status_code = 429
+    response.headers["Retry-After"] = "0.3"
+    limiter.update(response)
+    start = time.monotonic()
+    with limiter.request():
+        assert time.monotonic() - start >= 0.25
+
+
+def test_untag_missing_tag() -> None:
+    client = StreamingWrapper("token", None, None)
+    not_found = requests.Response()
+    not_found.status_code = 404
+    client._request = lambda *args, **kwargs: not_found  # type: ignore
+
+    # removing the old value of an updated tag: a tag that is already removed is fine
+    assert client.untag_resources("foo:bla", [("droplet", "123")], ignore_missing=True) is True
+    with pytest.raises(RuntimeError):
+        client.untag_resources("foo:bla", [("droplet", "123")])
+
+
+def test_spaces_session_per_thread() -> None:
+    client = StreamingWrapper("token", "access_key", "secret_key")
+    sessions = []
+
+    def resource_session() -> None:
+        client.spaces_resource("ams3")
+        client.spaces_resource("fra1")
+        sessions.append(client.spaces_local.session)
+
+    threads = [threading.Thread(target=resource_session) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # the session is reused in the same thread, but never shared between threads
+    assert len(sessions) == 3
+    assert len({id(session) for session in sessions}) == 3
+    assert not StreamingWrapper("token", None, None).spaces_enabled
@@ -8,3 +8,5 @@ def test_config() -> None:
     Config.init_default_config()
     assert len(Config.digitalocean.api_tokens) == 0
     assert len(Config.digitalocean.spaces_access_keys) == 0
+    assert Config.digitalocean.collector_pool_size == 5
+    assert Config.digitalocean.max_concurrent_requests == 10
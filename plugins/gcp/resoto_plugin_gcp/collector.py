@@ -1,12 +1,15 @@
 import resotolib.logger
 import socket
+import threading
+from concurrent import futures
+from functools import partial
 from pprint import pformat
 from retrying import retry
-from typing import Callable, List, Dict, Type, Union
+from typing import Callable, List, Dict, Set, Type, Union
 from resotolib.baseresources import BaseResource, EdgeType, InstanceStatus, VolumeStatus
 from resotolib.config import Config
 from resotolib.graph import Graph
-from resotolib.utils import except_log_and_pass
+from resotolib.utils import except_log_and_pass, run_collectors
 from prometheus_client import Summary
 from .resources import (
     GCPGKECluster,
@@ -67,6 +70,10 @@ from .utils import (
 log = resotolib.logger.getLogger("resoto." + __name__)
 
 
+metrics_collect_project = Summary(
+    "resoto_plugin_gcp_collect_project_seconds",
+    "Time it took the GCPProjectCollector.collect() method",
+)
 metrics_collect_regions = Summary(
     "resoto_plugin_gcp_collect_regions_seconds",
     "Time it took the collect_regions() method",
@@ -250,6 +257,8 @@ class GCPProjectCollector:
         self.project = project
         self.credentials = Credentials.get(self.project.id)
         self.graph = Graph(root=self.project)
+        # Collectors run concurrently and all of them add to the same graph
+        self.graph_lock = threading.RLock()
 
         # Mandatory collectors are always collected regardless of whether
         # they were included by --gcp-collect or excluded by --gcp-no-collect
@@ -299,6 +308,52 @@ class GCPProjectCollector:
             "instance_templates": self.collect_instance_templates,
             "gke_clusters": self.collect_gke_clusters,
         }
+        # Global collectors run concurrently. A collector that looks up resources
+        # of other collectors in the graph has to wait until those are done.
+        # Regions and zones are always collected before any global collector.
+        health_checks = {"health_checks", "http_health_checks", "https_health_checks"}
+        target_proxies = {
+            "target_http_proxies",
+            "target_https_proxies",
+            "target_ssl_proxies",
+            "target_tcp_proxies",
+            "target_grpc_proxies",
+        }
+        self.collector_dependencies: Dict[str, Set[str]] = {
+            # pricing SKUs are collected together with the services
+            "machine_types": {"services"},
+            "disk_types": {"services"},
+            "subnetworks": {"networks"},
+            "routers": {"networks"},
+            "routes": {"networks"},
+            "instances": {"networks", "subnetworks", "machine_types"},
+            "disks": {"disk_types", "instances"},
+            "snapshots": {"disks"},
+            "target_vpn_gateways": {"networks"},
+            "vpn_gateways": {"networks"},
+            "vpn_tunnels": {"vpn_gateways", "target_vpn_gateways"},
+            "network_endpoint_groups": {"networks", "subnetworks"},
+            "instance_groups": {"networks", "subnetworks", "instances"},
+            "instance_group_managers": {"instance_groups", *health_checks},
+            "autoscalers": {"instance_group_managers"},
+            "backend_services": {"instance_groups", "network_endpoint_groups", *health_checks},
+            "url_maps": {"backend_services"},
+            "target_pools": {"instances", *health_checks},
+            "target_instances": {"instances"},
+            "target_http_proxies": {"url_maps"},
+            "target_https_proxies": {"url_maps", "ssl_certificates"},
+            "target_ssl_proxies": {"backend_services", "ssl_certificates"},
+            "target_tcp_proxies": {"backend_services"},
+            "target_grpc_proxies": {"url_maps"},
+            "forwarding_rules": {
+                "target_pools",
+                "target_instances",
+                "target_vpn_gateways",
+                "backend_services",
+                *target_proxies,
+            },
+            "instance_templates": {"machine_types"},
+        }
         # Region collectors collect resources in a single region.
         # They are being passed the GCPRegion resource object as `region` arg.
         self.region_collectors = {}
@@ -317,6 +372,7 @@ class GCPProjectCollector:
         wait_exponential_max=300000,
         retry_on_exception=retry_on_error,
     )
+    @metrics_collect_project.time()
     def collect(self) -> None:
         """Runs the actual resource collection across all resource collectors.
 
@@ -340,23 +396,24 @@ class GCPProjectCollector:
 
         log.debug(f"Found {len(zones)} zones in {len(regions)} regions")
 
-        for collector_name, collector in self.global_collectors.items():
-            if collector_name in collectors:
-                log.info(f"Collecting {collector_name} in {self.project.rtdname}")
-                collector()
-
-        # Todo: parallelize region and zone collection
+        global_collectors = {name: c for name, c in self.global_collectors.items() if name in collectors}
+        # Region and zone collectors run after all global collectors are done
+        local_collectors = {}
         for region in regions:
             for collector_name, collector in self.region_collectors.items():
                 if collector_name in collectors:
-                    log.info((f"Collecting {collector_name} in {region.rtdname}" f" {self.project.rtdname}"))
-                    collector(region=region)
-
+                    local_collectors[f"{collector_name} in {region.rtdname}"] = partial(collector, region=region)
         for zone in zones:
             for collector_name, collector in self.zone_collectors.items():
                 if collector_name in collectors:
-                    log.info((f"Collecting {collector_name} in {zone.rtdname}" f" {self.project.rtdname}"))
-                    collector(zone=zone)
+                    local_collectors[f"{collector_name} in {zone.rtdname}"] = partial(collector, zone=zone)
+
+        with futures.ThreadPoolExecutor(
+            max_workers=Config.gcp.collector_pool_size,
+            thread_name_prefix=f"gcp_{self.project.id}",
+        ) as executor:
+            run_collectors(executor, global_collectors, self.collector_dependencies, self.project.rtdname)
+            run_collectors(executor, local_collectors, {}, self.project.rtdname)
 
         remove_nodes = set()
 
@@ -608,67 +665,69 @@ class GCPProjectCollector:
             subitems_name=paginate_subitems_name,
             **resource_kwargs,
         ):
-            kwargs, search_results = self.default_attributes(resource, attr_map=attr_map, search_map=search_map)
-            r = resource_class(**kwargs)
-            pr = parent_resource
-            log.debug(f"Adding {r.rtdname} to the graph")
-            if dump_resource:
-                log.debug(f"Resource Dump: {pformat(resource)}")
-
-            if isinstance(pr, str) and pr in search_results:
-                pr = search_results[parent_resource][0]
-                log.debug(f"Parent resource for {r.rtdname} set to {pr.rtdname}")
-
-            if not isinstance(pr, BaseResource):
-                pr = kwargs.get("_zone", kwargs.get("_region", self.graph.root))
-                log.debug(f"Parent resource for {r.rtdname} automatically set to {pr.rtdname}")
-            self.graph.add_resource(pr, r, edge_type=EdgeType.default)
-
-            for is_parent, edge_sr_names in parent_map.items():
-                for edge_type, sr_names in edge_sr_names.items():
-                    for sr_name in sr_names:
-                        if sr_name in search_results:
-                            srs = search_results[sr_name]
-                            for sr in srs:
-                                if is_parent:
-                                    src = sr
-                                    dst = r
-                                else:
-                                    src = r
-                                    dst = sr
-                                self.graph.add_edge(src, dst, edge_type=edge_type)
-                        else:
-                            if sr_name in search_map:
-                                graph_search = search_map[sr_name]
-                                attr = graph_search[0]
-                                value_name = graph_search[1]
-                                if value_name in resource:
-                                    value = resource[value_name]
-                                    if isinstance(value, List):
-                                        values = value
-                                        for value in values:
+            # collectors run concurrently: the graph is only accessed while holding the lock
+            with self.graph_lock:
+                kwargs, search_results = self.default_attributes(resource, attr_map=attr_map, search_map=search_map)
+                r = resource_class(**kwargs)
+                pr = parent_resource
+                log.debug(f"Adding {r.rtdname} to the graph")
+                if dump_resource:
+                    log.debug(f"Resource Dump: {pformat(resource)}")
+
+                if isinstance(pr, str) and pr in search_results:
+                    pr = search_results[parent_resource][0]
+                    log.debug(f"Parent resource for {r.rtdname} set to {pr.rtdname}")
+
+                if not isinstance(pr, BaseResource):
+                    pr = kwargs.get("_zone", kwargs.get("_region", self.graph.root))
+                    log.debug(f"Parent resource for {r.rtdname} automatically set to {pr.rtdname}")
+                self.graph.add_resource(pr, r, edge_type=EdgeType.default)
+
+                for is_parent, edge_sr_names in parent_map.items():
+                    for edge_type, sr_names in edge_sr_names.items():
+                        for sr_name in sr_names:
+                            if sr_name in search_results:
+                                srs = search_results[sr_name]
+                                for sr in srs:
+                                    if is_parent:
+                                        src = sr
+                                        dst = r
+                                    else:
+                                        src = r
+                                        dst = sr
+                                    self.graph.add_edge(src, dst, edge_type=edge_type)
+                            else:
+                                if sr_name in search_map:
+                                    graph_search = search_map[sr_name]
+                                    attr = graph_search[0]
+                                    value_name = graph_search[1]
+                                    if value_name in resource:
+                                        value = resource[value_name]
+                                        if isinstance(value, List):
+                                            values = value
+                                            for value in values:
+                                                r.add_deferred_connection(
+                                                    {attr: value},
+                                                    is_parent,
+                                                    edge_type=edge_type,
+                                                )
+                                        elif isinstance(value, str):
                                             r.add_deferred_connection(
                                                 {attr: value},
                                                 is_parent,
                                                 edge_type=edge_type,
                                             )
-                                    elif isinstance(value, str):
-                                        r.add_deferred_connection(
-                                            {attr: value},
-                                            is_parent,
-                                            edge_type=edge_type,
-                                        )
-                                    else:
-                                        log.error(
-                                            (
-                                                "Unable to add deferred connection for"
-                                                f" value {value} of type {type(value)}"
+                                        else:
+                                            log.error(
+                                                (
+                                                    "Unable to add deferred connection for"
+                                                    f" value {value} of type {type(value)}"
+                                                )
                                             )
-                                        )
-                            else:
-                                log.error(f"Key {sr_name} is missing in search_map")
-            if callable(post_process):
-                post_process(r, self.graph)
+                                else:
+                                    log.error(f"Key {sr_name} is missing in search_map")
+                if callable(post_process):
+                    post_process(r, self.graph)
 
     # All of the following methods just call collect_something() with some resource
     # specific options.
@@ -1458,18 +1517,38 @@ class GCPProjectCollector:
 
     @metrics_collect_services.time()
     def collect_services(self):
+        compute_services: List[GCPService] = []
+
         def post_process(service: GCPService, graph: Graph):
             # Right now we are only interested in Compute Engine pricing
-            if service.name != "Compute Engine":
-                return
-            gs = gcp_client("cloudbilling", "v1", credentials=self.credentials)
-            kwargs = {"parent": f"services/{service.id}"}
-            for r in paginate(
-                gcp_resource=gs.services().skus(),
-                method_name="list",
-                items_name="skus",
-                **kwargs,
-            ):
+            if service.name == "Compute Engine":
+                compute_services.append(service)
+
+        self.collect_something(
+            resource_class=GCPService,
+            paginate_method_name="list",
+            paginate_items_name="services",
+            attr_map={
+                "id": "serviceId",
+                "name": "displayName",
+            },
+            post_process=post_process,
+        )
+        # The SKUs are fetched outside of the graph lock, so other collectors
+        # can add their resources in the meantime.
+        for service in compute_services:
+            self.collect_service_skus(service)
+
+    def collect_service_skus(self, service: GCPService):
+        gs = gcp_client("cloudbilling", "v1", credentials=self.credentials)
+        kwargs = {"parent": f"services/{service.id}"}
+        for r in paginate(
+            gcp_resource=gs.services().skus(),
+            method_name="list",
+            items_name="skus",
+            **kwargs,
+        ):
+            with self.graph_lock:
                 sku = GCPServiceSKU(
                     id=r["skuId"],
                     tags={},
@@ -1483,22 +1562,11 @@ class GCPProjectCollector:
                     geo_taxonomy_type=r.get("geoTaxonomy", {}).get("type"),
                     geo_taxonomy_regions=r.get("geoTaxonomy", {}).get("regions"),
                     link=(f"https://{service.client}.googleapis.com/" f"{service.api_version}/{r.get('name')}"),
-                    account=service.account(graph),
-                    region=service.region(graph),
-                    zone=service.zone(graph),
+                    account=service.account(self.graph),
+                    region=service.region(self.graph),
+                    zone=service.zone(self.graph),
                 )
-                graph.add_resource(service, sku, edge_type=EdgeType.default)
-
-        self.collect_something(
-            resource_class=GCPService,
-            paginate_method_name="list",
-            paginate_items_name="services",
-            attr_map={
-                "id": "serviceId",
-                "name": "displayName",
-            },
-            post_process=post_process,
-        )
+                self.graph.add_resource(service, sku, edge_type=EdgeType.default)
 
     @metrics_collect_instance_templates.time()
     def collect_instance_templates(self):
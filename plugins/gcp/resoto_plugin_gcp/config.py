@@ -20,6 +20,10 @@ class GcpConfig:
         factory=num_default_threads,
         metadata={"description": "GCP project thread/process pool size"},
     )
+    collector_pool_size: int = field(
+        default=10,
+        metadata={"description": "GCP collector thread pool size per project"},
+    )
     fork_process: bool = field(
         default=True,
         metadata={"description": "Fork collector process instead of using threads"},
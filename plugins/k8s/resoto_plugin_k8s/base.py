@@ -6,7 +6,7 @@ from tempfile import TemporaryDirectory
 from textwrap import dedent
 from threading import RLock
 from typing import ClassVar, TypeVar, Any, Callable
-from typing import List, Type, Optional, Tuple, Dict
+from typing import List, Type, Optional, Tuple, Dict, Iterator
 
 from resotolib.json import to_json as to_js, from_json as from_js
 from kubernetes.client import ApiClient, Configuration, ApiException
@@ -230,6 +230,14 @@ class K8sConfig:
         factory=num_default_threads,
         metadata={"description": "Thread/process pool size"},
     )
+    list_pool_size: int = field(
+        default=10,
+        metadata={"description": "Number of resource kinds that are listed concurrently in one cluster"},
+    )
+    list_page_size: int = field(
+        default=500,
+        metadata={"description": "Maximum number of resources returned by a single list request"},
+    )
     fork_process: bool = field(
         default=False,
         metadata={"description": "Fork collector process instead of using threads"},
@@ -350,7 +358,12 @@ class K8sApiResource:
 class K8sClient(ABC):
     @abstractmethod
     def call_api(
-        self, method: str, path: str, body: Optional[Json] = None, headers: Optional[Dict[str, str]] = None
+        self,
+        method: str,
+        path: str,
+        body: Optional[Json] = None,
+        headers: Optional[Dict[str, str]] = None,
+        query: Optional[Dict[str, Any]] = None,
     ) -> Json:
         pass
 
@@ -364,8 +377,8 @@ class K8sClient(ABC):
     def host(self) -> str:
         pass
 
-    def get(self, path: str) -> Json:
-        return self.call_api("GET", path)
+    def get(self, path: str, query: Optional[Dict[str, Any]] = None) -> Json:
+        return self.call_api("GET", path, query=query)
 
     def patch(self, path: str, js: Json) -> Json:
         return self.call_api("PATCH", path, js, {"Content-Type": "application/strategic-merge-patch+json"})
@@ -420,11 +433,30 @@ class K8sClient(ABC):
     def apis(self) -> List[K8sApiResource]:
         pass
 
-    @abstractmethod
     def list_resources(
-        self, resource: K8sApiResource, clazz: Type[KubernetesResourceType], path: Optional[str] = None
-    ) -> List[Tuple[KubernetesResourceType, Json]]:
-        pass
+        self,
+        resource: K8sApiResource,
+        clazz: Type[KubernetesResourceType],
+        path: Optional[str] = None,
+        page_size: int = 500,
+    ) -> Iterator[Tuple[KubernetesResourceType, Json]]:
+        """
+        List all resources of the given api page by page, using the limit and continue parameters.
+        Resources are converted while they are received, so only one page of json is held at a time.
+        """
+        query: Dict[str, Any] = {"limit": page_size}
+        while True:
+            try:
+                result = self.get(path or resource.list_path, query)
+            except ApiException as ex:
+                log.warning(f"Failed to list resources: {resource.kind} on {resource.base}. Reason: {ex}. Ignore.")
+                return
+            for item in result.get("items", []):
+                yield clazz.from_json(item), item  # type: ignore
+            continue_token = bend(S("metadata", "continue"), result)
+            if not continue_token:
+                return
+            query["continue"] = continue_token
 
     @staticmethod
     def filter_apis(apis: List[K8sApiResource]) -> List[K8sApiResource]:
@@ -467,9 +499,14 @@ class K8sApiClient(K8sClient):
         self.api_client = api_client
 
     def call_api(
-        self, method: str, path: str, body: Optional[Json] = None, headers: Optional[Dict[str, str]] = None
+        self,
+        method: str,
+        path: str,
+        body: Optional[Json] = None,
+        headers: Optional[Dict[str, str]] = None,
+        query: Optional[Dict[str, Any]] = None,
     ) -> Json:
-        log.debug(f"Send request to k8s {method} {path}. body={body}")
+        log.debug(f"Send request to k8s {method} {path}. query={query} body={body}")
         result, code, header = self.api_client.call_api(
             path,
             method,
@@ -477,6 +514,7 @@ class K8sApiClient(K8sClient):
             response_type="object",
             body=body,
             header_params=headers,
+            query_params=list(query.items()) if query else None,
         )
         log.debug(f"Response from {method} {path} {code}: {header}")
         return result  # type: ignore
@@ -518,16 +556,6 @@ class K8sApiClient(K8sClient):
 
         return self.filter_apis(result)
 
-    def list_resources(
-        self, resource: K8sApiResource, clazz: Type[KubernetesResourceType], path: Optional[str] = None
-    ) -> List[Tuple[KubernetesResourceType, Json]]:
-        try:
-            result = self.get(path or resource.list_path)
-            return [(clazz.from_json(r), r) for r in result.get("items", [])]  # type: ignore
-        except ApiException as ex:
-            log.warning(f"Failed to list resources: {resource.kind} on {resource.base}. Reason: {ex}. Ignore.")
-            return []
-
     @staticmethod
     def from_config(cluster_id: str, cluster_config: Configuration) -> "K8sApiClient":
         return K8sApiClient(cluster_id, ApiClient(cluster_config))
@@ -1,6 +1,8 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Type
 
-from resoto_plugin_k8s.base import K8sClient
+from resoto_plugin_k8s.base import K8sClient, K8sApiResource, KubernetesResource
 from resoto_plugin_k8s.base import K8sConfig
 from resoto_plugin_k8s.resources import (
     KubernetesCluster,
@@ -11,6 +13,7 @@ from resoto_plugin_k8s.resources import (
 )
 from resotolib.baseresources import EdgeType
 from resotolib.graph import Graph
+from resotolib.types import Json
 
 log = logging.getLogger("resoto.plugins.k8s")
 
@@ -43,15 +46,27 @@ class KubernetesCollector:
             ),
         )
 
+    def list_resources(
+        self, resource: K8sApiResource, clazz: Type[KubernetesResource]
+    ) -> List[Tuple[KubernetesResource, Json]]:
+        return list(self.client.list_resources(resource, clazz, page_size=self.k8s_config.list_page_size))
+
     def collect(self) -> None:
-        # collect all resources
-        for resource in self.client.apis:
-            known = all_k8s_resources_by_k8s_name.get(resource.kind)
-            if known and self.k8s_config.is_allowed(resource.kind):
-                for res, source in self.client.list_resources(resource, known):
+        # collect all resources: resource kinds are independent of each other and listed concurrently
+        with ThreadPoolExecutor(
+            max_workers=self.k8s_config.list_pool_size, thread_name_prefix=f"k8s_{self.client.cluster_id}"
+        ) as executor:
+            listed = []
+            for resource in self.client.apis:
+                known = all_k8s_resources_by_k8s_name.get(resource.kind)
+                if known and self.k8s_config.is_allowed(resource.kind):
+                    listed.append(executor.submit(self.list_resources, resource, known))
+                else:
+                    log.debug("Don't know how to collect %s", resource.kind)
+            # add nodes in the order of the apis, so the graph does not depend on the listing order
+            for future in listed:
+                for res, source in future.result():
                     self.builder.add_node(res, source=source)
-            else:
-                log.debug("Don't know how to collect %s", resource.kind)
 
         # connect all resources
         namespaces = {node.name: node for node in self.graph.nodes if isinstance(node, KubernetesNamespace)}
@@ -28,19 +28,43 @@ class GraphBuilder:
     def __init__(self, graph: Graph):
         self.graph = graph
         self.name = getattr(graph.root, "name", "unknown")
+        # label (key, value) -> all nodes with this label. Built on first use, updated by add_node().
+        self.nodes_by_label: Optional[Dict[Tuple[str, str], Dict[KubernetesResource, None]]] = None
 
     def node(self, clazz: Optional[Type[KubernetesResource]] = None, **node: Any) -> Optional[KubernetesResource]:
         if isinstance(nd := node.get("node"), KubernetesResource):
             return nd
-        for n in self.graph:
-            is_clazz = isinstance(n, clazz) if clazz else True
-            if is_clazz and all(getattr(n, k, None) == v for k, v in node.items()):
+        # the graph maintains an index for every searched attribute (e.g. id, name, namespace)
+        for n in self.graph.searchall(node):
+            if clazz is None or isinstance(n, clazz):
                 return n  # type: ignore
         return None
 
     def add_node(self, node: KubernetesResource, **kwargs: Any) -> None:
         log.debug(f"{self.name}: add node {node}")
         self.graph.add_node(node, **kwargs)
+        if self.nodes_by_label is not None:
+            self.index_labels(node)
+
+    def index_labels(self, node: Any) -> None:
+        assert self.nodes_by_label is not None
+        for label in (getattr(node, "labels", None) or {}).items():
+            self.nodes_by_label.setdefault(label, {})[node] = None
+
+    def nodes_with_labels(self, selector: Dict[str, str]) -> List[KubernetesResource]:
+        """
+        All nodes that have all labels of the selector.
+        Only nodes that are part of the graph when this method is called first or
+        that are added via add_node() afterwards are taken into account.
+        """
+        if self.nodes_by_label is None:
+            self.nodes_by_label = {}
+            for node in self.graph.nodes:
+                self.index_labels(node)
+        if not selector:
+            return list(self.graph.nodes)
+        candidates = min((self.nodes_by_label.get(label, {}) for label in selector.items()), key=len)
+        return [node for node in candidates if selector.items() <= node.labels.items()]
 
     def add_edge(
         self, from_node: KubernetesResource, edge_type: EdgeType, reverse: bool = False, **to_node: Any
@@ -58,9 +82,9 @@ class GraphBuilder:
         selector: Dict[str, str],
         clazz: Optional[Union[type, Tuple[type, ...]]] = None,
     ) -> None:
-        for to_n in self.graph:
+        for to_n in self.nodes_with_labels(selector):
             is_clazz = isinstance(to_n, clazz) if clazz else True
-            if is_clazz and to_n != from_node and selector.items() <= to_n.labels.items():
+            if is_clazz and to_n != from_node:
                 log.debug(f"{self.name}: add edge from selector: {from_node} -> {to_n}")
                 self.graph.add_edge(from_node, to_n, edge_type=edge_type)
 
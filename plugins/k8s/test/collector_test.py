@@ -1,8 +1,8 @@
-from typing import Tuple, List
+from typing import Tuple, List, Any
 
 import jsons
 
-from fixtures import StaticFileClient
+from fixtures import StaticFileClient, PagedFileClient
 from resoto_plugin_k8s.base import K8sConfig, K8sAccess, K8sApiResource, K8sClient
 from resoto_plugin_k8s import KubernetesCollectorPlugin
 from resoto_plugin_k8s.resources import KubernetesCluster, KubernetesClusterInfo, KubernetesConfigMap
@@ -50,6 +50,36 @@ def test_collect() -> None:
     assert len(plugin.graph.edges) == 850
 
 
+def test_collect_paged() -> None:
+    cfg = K8sConfig(
+        configs=[K8sAccess(name="test", certificate_authority_data="test", server="test", token="test")],
+        list_page_size=10,
+        list_pool_size=4,
+    )
+    Config.add_config(K8sConfig)
+    Config.running_config.data["k8s"] = cfg
+
+    clients: List[PagedFileClient] = []
+
+    def client_factory(cluster_id: str, config: Any) -> PagedFileClient:
+        client = PagedFileClient(cluster_id, config)
+        clients.append(client)
+        return client
+
+    plugin = KubernetesCollectorPlugin()
+    plugin.collect(client_factory=client_factory)
+    # same result as without pagination
+    assert len(plugin.graph.nodes) == 562
+    assert len(plugin.graph.edges) == 850
+    # 33 pods are listed with 4 requests
+    assert [query for path, query in clients[0].requests if path == "/api/v1/pods"] == [
+        {"limit": 10},
+        {"limit": 10, "continue": "10"},
+        {"limit": 10, "continue": "20"},
+        {"limit": 10, "continue": "30"},
+    ]
+
+
 def test_tag_update(config_map_in_graph: Tuple[KubernetesConfigMap, Graph, StaticFileClient]) -> None:
     cm, graph, client = config_map_in_graph
     cm.update_tag("test", "test")
@@ -1,6 +1,7 @@
 import json
 import os
 from functools import cached_property
+from threading import Lock
 from typing import Type, Optional, List, Tuple, Dict, Any
 
 import jsons
@@ -41,7 +42,12 @@ class StaticFileClient(K8sClient):
         self.deletes: List[Tuple[type, Optional[str], Optional[str]]] = []
 
     def call_api(
-        self, method: str, path: str, body: Optional[Json] = None, headers: Optional[Dict[str, str]] = None
+        self,
+        method: str,
+        path: str,
+        body: Optional[Json] = None,
+        headers: Optional[Dict[str, str]] = None,
+        query: Optional[Dict[str, Any]] = None,
     ) -> Json:
         if method != "GET":
             raise AttributeError("Only GET is supported")
@@ -75,15 +81,37 @@ class StaticFileClient(K8sClient):
         js = self.get("apis")
         return self.filter_apis(jsons.load(js, List[K8sApiResource]))
 
-    def list_resources(
-        self, resource: K8sApiResource, clazz: Type[KubernetesResourceType], path: Optional[str] = None
-    ) -> List[Tuple[KubernetesResourceType, Json]]:
-        result = self.get(path or resource.list_path)
-        if result:
-            return [(clazz.from_json(r), r) for r in result.get("items", [])]  # type: ignore
-        else:
-            return []
-
     @staticmethod
     def static(cluster_id: str, config: Configuration) -> K8sClient:
         return StaticFileClient(cluster_id, config)
+
+
+class PagedFileClient(StaticFileClient):
+    """
+    Serves the static files page by page, using the limit and continue parameters like the k8s api server.
+    """
+
+    def __init__(self, cluster_id: str, config: Any = None):
+        super().__init__(cluster_id, config)
+        self.lock = Lock()
+        self.requests: List[Tuple[str, Optional[Dict[str, Any]]]] = []
+
+    def call_api(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Json] = None,
+        headers: Optional[Dict[str, str]] = None,
+        query: Optional[Dict[str, Any]] = None,
+    ) -> Json:
+        with self.lock:
+            self.requests.append((path, dict(query) if query else None))
+        result = super().call_api(method, path, body, headers, query)
+        if query and "limit" in query and "items" in result:
+            start = int(query.get("continue", 0))
+            end = start + query["limit"]
+            page = {**result, "items": result["items"][start:end], "metadata": {}}
+            if end < len(result["items"]):
+                page["metadata"] = {"continue": str(end)}
+            return page
+        return result
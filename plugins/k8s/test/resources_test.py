@@ -16,6 +16,7 @@ from fixtures import json_file
 from resoto_plugin_k8s.base import KubernetesResourceType
 from resoto_plugin_k8s.resources import *
 from resotolib.types import Json
+from resotolib.baseresources import EdgeType
 from resotolib.graph import Graph
 
 
@@ -234,6 +235,29 @@ def test_priority_level_configuration(json_file: Json) -> None:
 #     round_trip(KubernetesRuntimeClass, json_file)
 
 
+def test_graph_builder() -> None:
+    builder = GraphBuilder(Graph())
+    ns = KubernetesNamespace(id="ns", name="ns")
+    cm = KubernetesConfigMap(id="cm", name="same", namespace="ns")
+    secret = KubernetesSecret(id="secret", name="same", namespace="ns")
+    pod_a = KubernetesPod(id="pod_a", name="pod_a", namespace="ns", labels={"app": "a", "tier": "web"})
+    pod_b = KubernetesPod(id="pod_b", name="pod_b", namespace="ns", labels={"app": "b", "tier": "web"})
+    for node in [ns, cm, secret, pod_a]:
+        builder.add_node(node)
+    assert builder.node(id="cm") is cm
+    assert builder.node(clazz=KubernetesSecret, name="same", namespace="ns") is secret
+    assert builder.node(clazz=KubernetesConfigMap, name="same", namespace="other") is None
+    assert builder.node(node=pod_b) is pod_b
+    assert builder.nodes_with_labels({"tier": "web"}) == [pod_a]
+    # nodes added later are found as well
+    builder.add_node(pod_b)
+    assert builder.node(clazz=KubernetesPod, name="pod_b") is pod_b
+    assert builder.nodes_with_labels({"tier": "web"}) == [pod_a, pod_b]
+    assert builder.nodes_with_labels({"tier": "web", "app": "b"}) == [pod_b]
+    builder.add_edges_from_selector(cm, EdgeType.default, {"app": "a"}, KubernetesPod)
+    assert list(builder.graph.successors(cm)) == [pod_a]
+
+
 def connect_in_graph(resources: List[Tuple[KubernetesResourceType, Json]]) -> Graph:
     builder = GraphBuilder(Graph())
     for resource, js in resources:
@@ -117,8 +117,8 @@ def with_config(
     log.debug(f"Starting with config: {config.editable}")
     info = system_info()
     event_sender = PostHogEventSender(system_data) if config.runtime.usage_metrics else NoEventSender()
-    db = db_access(config, sdb, event_sender)
     message_bus = MessageBus()
+    db = db_access(config, sdb, event_sender, message_bus)
     scheduler = Scheduler()
     worker_task_queue = WorkerTaskQueue()
     model = ModelHandlerDB(db.get_model_db(), config.runtime.plantuml_server)
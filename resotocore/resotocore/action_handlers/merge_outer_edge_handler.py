@@ -2,11 +2,13 @@ from resotocore.db.model import QueryModel
 from resotocore.message_bus import MessageBus, Action
 import logging
 import asyncio
+import time
 from asyncio import Task, Future
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict
 from contextlib import suppress
 from datetime import timedelta
-from resotocore.model.graph_access import ByNodeId, NodeSelector
+from aiostream import stream
+from resotocore.model.graph_access import ByNodeId, BySearchCriteria, NodeSelector
 from resotocore.task.model import Subscriber
 from resotocore.ids import NodeId, SubscriberId
 from resotocore.task.task_handler import TaskHandlerService
@@ -31,6 +33,7 @@ class MergeOuterEdgesHandler:
         task_handler_service: TaskHandlerService,
         db_access: DbAccess,
         model_handler: ModelHandler,
+        search_parallelism: int = 10,
     ):
         self.message_bus = message_bus
         self.merge_outer_edges_listener: Optional[Task[None]] = None
@@ -39,39 +42,54 @@ class MergeOuterEdgesHandler:
         self.task_handler_service = task_handler_service
         self.db_access = db_access
         self.model_handler = model_handler
+        self.search_parallelism = search_parallelism
 
     async def merge_outer_edges(self, task_id: TaskId) -> Tuple[int, int]:
         pending_outer_edge_db = self.db_access.pending_deferred_edge_db
         pending_edges = await pending_outer_edge_db.get(task_id)
         model = await self.model_handler.load_model()
         if pending_edges:
+            start = time.monotonic()
             graph_db = self.db_access.get_graph_db(pending_edges.graph)
+            selectors = {edge.from_node for edge in pending_edges.edges} | {
+                edge.to_node for edge in pending_edges.edges
+            }
+            by_ids = [NodeId(s.value) for s in selectors if isinstance(s, ByNodeId)]
+            by_queries = [s for s in selectors if isinstance(s, BySearchCriteria)]
 
-            async def find_node_id(selector: NodeSelector) -> Optional[NodeId]:
+            async def find_node_id(selector: BySearchCriteria) -> Tuple[NodeSelector, Optional[NodeId]]:
                 try:
-                    if isinstance(selector, ByNodeId):
-                        node = await graph_db.get_node(model, selector.value)
-                        return node.get("id") if node else None
-                    else:
-                        query = parse_query(selector.query).with_limit(2)
-                        async with await graph_db.search_list(QueryModel(query, model)) as cursor:
-                            results = [node async for node in cursor]
-                            if len(results) > 1:
-                                log.warning(
-                                    f"task_id: {task_id}: node selector {selector.query} returned more than one node."
-                                    "The edge was not created."
-                                )
-                                return None
-
-                        return next(iter(results), {}).get("id", None)  # type: ignore
+                    query = parse_query(selector.query).with_limit(2)
+                    async with await graph_db.search_list(QueryModel(query, model)) as cursor:
+                        results = [node async for node in cursor]
+                        if len(results) > 1:
+                            log.warning(
+                                f"task_id: {task_id}: node selector {selector.query} returned more than one node."
+                                "The edge was not created."
+                            )
+                            return selector, None
+
+                    return selector, next(iter(results), {}).get("id", None)
                 except Exception as e:
                     log.warning(f"task_id: {task_id}: Error {e} when finding node {selector}")
-                    return None
+                    return selector, None
+
+            # resolve every distinct selector only once: all node ids with one query, searches concurrently
+            resolved: Dict[NodeSelector, Optional[NodeId]] = {}
+            if by_ids:
+                existing = await graph_db.existing_node_ids(by_ids)
+                resolved.update({ByNodeId(nid): nid if nid in existing else None for nid in by_ids})
+            if by_queries:
+                found = stream.map(stream.iterate(by_queries), find_node_id, task_limit=self.search_parallelism)
+                async with found.stream() as streamer:
+                    async for selector, node_id in streamer:
+                        resolved[selector] = node_id
+            resolve_time = time.monotonic() - start
 
             edges: List[Tuple[NodeId, NodeId, str]] = []
             for edge in pending_edges.edges:
-                from_id = await find_node_id(edge.from_node)
-                to_id = await find_node_id(edge.to_node)
+                from_id = resolved.get(edge.from_node)
+                to_id = resolved.get(edge.to_node)
                 if from_id and to_id:
                     edges.append((from_id, to_id, edge.edge_type))
 
@@ -79,7 +97,10 @@ class MergeOuterEdgesHandler:
 
             log.info(
                 f"MergeOuterEdgesHandler: updated {updated}/{len(pending_edges.edges)},"
-                f"  deleted {deleted} edges in task id {task_id}"
+                f"  deleted {deleted} edges in task id {task_id}."
+                f" Resolved {sum(1 for v in resolved.values() if v)}/{len(resolved)} distinct selectors"
+                f" ({len(by_ids)} by id, {len(by_queries)} by search) in {resolve_time:.3f}s,"
+                f" total time {time.monotonic() - start:.3f}s"
             )
 
             return (updated, deleted)
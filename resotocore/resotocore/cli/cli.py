@@ -388,7 +388,8 @@ class CLI:
                     # the limit might have created a new part - make sure there is a sort order
                     p = p if p.sort else evolve(p, sort=DefaultSort)
                     # reverse the sort order -> limit -> reverse the result
-                    query.parts[0] = evolve(p, sort=[s.reversed() for s in p.sort], reverse_result=True)
+                    reversed_part = evolve(p, sort=[s.reversed() for s in p.sort], reverse_result=True)
+                    query = evolve(query, parts=[reversed_part, *query.parts[1:]])
             else:
                 raise AttributeError(f"Do not understand: {part} of type: {class_fqn(part)}")
 
@@ -63,7 +63,7 @@ from resotocore.cli import (
     js_value_at,
     js_value_get,
 )
-from resotocore.ids import ConfigId, TaskId
+from resotocore.ids import ConfigId, TaskId, NodeId
 from resotocore.cli.model import (
     CLICommand,
     CLIContext,
@@ -2676,7 +2676,7 @@ class SendWorkerTaskCommand(CLICommand, ABC):
     def send_to_queue_stream(
         self,
         in_stream: Stream,
-        result_handler: Callable[[WorkerTask, Future[Json]], Awaitable[Json]],
+        result_handler: Callable[[WorkerTask, Future[Json]], Awaitable[JsonElement]],
         wait_for_result: bool,
     ) -> Stream:
         async def send_to_queue(task_name: str, task_args: Dict[str, str], data: Json) -> JsonElement:
@@ -2716,6 +2716,31 @@ class SendWorkerTaskCommand(CLICommand, ABC):
                 result[name] = value
         return result
 
+    # this method expects a stream of Tuple[Dict[str, str], Json]
+    def batch_stream(self, in_stream: Stream, task_name: str, single_task_name: str, batch_size: int) -> Stream:
+        """
+        Combine the task data of all elements in the same cloud, account and region into one task.
+        The data of the resulting task is {"nodes": [data]} with one entry for every element.
+        If no attached worker can perform the batch task (e.g. an older worker), one single task is sent per element.
+        """
+
+        def to_batches(items: List[Tuple[Dict[str, str], Json]]) -> Stream:
+            batches: Dict[Tuple[Optional[str], ...], Tuple[Dict[str, str], List[Tuple[Dict[str, str], Json]]]] = {}
+            for attrs, data in items:
+                key = (attrs.get("cloud"), attrs.get("account"), attrs.get("region"))
+                if key not in batches:
+                    batches[key] = ({k: v for k, v in attrs.items() if k != "zone"}, [])
+                batches[key][1].append((attrs, data))
+            tasks: List[Tuple[str, Dict[str, str], Json]] = []
+            for batch_attrs, elements in batches.values():
+                if self.dependencies.worker_task_queue.has_worker(task_name, batch_attrs):
+                    tasks.append((task_name, batch_attrs, {"nodes": [data for _, data in elements]}))
+                else:
+                    tasks.extend((single_task_name, attrs, data) for attrs, data in elements)
+            return stream.iterate(tasks)
+
+        return stream.flatmap(stream.chunks(in_stream, batch_size), to_batches)
+
     @abstractmethod
     def timeout(self) -> timedelta:
         pass
@@ -2733,6 +2758,8 @@ class TagCommand(SendWorkerTaskCommand):
     not support values in tags, and only allow names. In that case the value can be omitted.
 
     When this command is issued, the change is done on the cloud resource via the cloud specific provider.
+    All resources in the same cloud, account and region are changed together with one worker task,
+    so the provider can use its bulk API, if available.
     The change in the graph data itself is reflected with this operation.
     In rare case it might take up to the next collect run.
 
@@ -2789,8 +2816,12 @@ class TagCommand(SendWorkerTaskCommand):
             "delete": [ArgInfo("--nowait"), ArgInfo(None, expects_value=True, help_text="<tag-name>")],
         }
 
+    # max number of resources changed by one worker task
+    batch_size = 1000
+
     def timeout(self) -> timedelta:
-        return timedelta(seconds=30)
+        # the timeout is defined for the whole batch
+        return timedelta(minutes=5)
 
     def load_by_id_merged(self, model: Model, in_stream: Stream, variables: Optional[Set[str]], **env: str) -> Stream:
         async def load_element(items: List[JsonElement]) -> AsyncIterator[JsonElement]:
@@ -2811,31 +2842,50 @@ class TagCommand(SendWorkerTaskCommand):
 
         return stream.flatmap(stream.chunks(in_stream, 1000), load_element)
 
-    def handle_result(self, model: Model, **env: str) -> Callable[[WorkerTask, Future[Json]], Awaitable[Json]]:
-        async def to_result(task: WorkerTask, future_result: Future[Json]) -> Json:
-            nid = js_value_at(task.data, ["node", "id"])
+    def handle_result(
+        self, model: Model, **env: str
+    ) -> Callable[[WorkerTask, Future[Json]], Awaitable[List[JsonElement]]]:
+        async def update_db(nodes: Dict[NodeId, Json]) -> Dict[NodeId, Json]:
+            db = self.dependencies.db_access.get_graph_db(env["graph"])
             try:
-                result = await future_result
-                if is_node(result):
-                    db = self.dependencies.db_access.get_graph_db(env["graph"])
+                # all nodes are updated in one transaction
+                return {node["id"]: node async for node in db.update_nodes(model, nodes, replace=True)}
+            except ClientError:
+                # a single failing node fails the whole transaction: update the nodes one by one
+                result: Dict[NodeId, Json] = {}
+                for nid, node in nodes.items():
                     try:
-                        updated: Json = await db.update_node(model, result["id"], result, True, None)
-                        return updated
+                        result[nid] = await db.update_node(model, nid, node, True, None)
                     except ClientError as ex:
                         # if the change could not be reflected in database, show success
                         log.warning(
                             f"Tag update not reflected in db. Wait until next collector run. Reason: {str(ex)}",
                             exc_info=ex,
                         )
-                        return result
+                        result[nid] = node
+                return result
+
+        async def to_result(task: WorkerTask, future_result: Future[Json]) -> List[JsonElement]:
+            # a tag task changes a single node, a tag batch task changes all nodes of the batch
+            is_batch = task.name == WorkerTaskName.tag_batch
+            try:
+                result = await future_result
+                if is_batch:
+                    results: List[Json] = result.get("nodes", []) if isinstance(result, dict) else []
                 else:
-                    log.warning(
-                        f"Result from tag worker is not a node. "
-                        f"Will not update the internal state. {json.dumps(result)}"
-                    )
-                    return result
+                    results = [result]
+                updated = {NodeId(node["id"]): node for node in results if is_node(node)}
+                for node in results:
+                    if not is_node(node) and not (isinstance(node, dict) and "error" in node):
+                        log.warning(
+                            f"Result from tag worker is not a node. "
+                            f"Will not update the internal state. {json.dumps(node)}"
+                        )
+                in_db = await update_db(updated) if updated else {}
+                return [in_db.get(node["id"], node) if is_node(node) else node for node in results]
             except Exception as ex:
-                return {"error": str(ex), "id": nid}
+                task_data = task.data["nodes"] if is_batch else [task.data]
+                return [{"error": str(ex), "id": js_value_at(data, ["node", "id"])} for data in task_data]
 
         return to_result
 
@@ -2846,9 +2896,9 @@ class TagCommand(SendWorkerTaskCommand):
         ns, rest = p.parse_known_args(arg_tokens)
         variables: Optional[Set[str]] = None
 
-        def change_tag(jfn: Callable[[Json], Json]) -> Callable[[Json], Tuple[str, Dict[str, str], Json]]:
-            def update_single(item: Json) -> Tuple[str, Dict[str, str], Json]:
-                return WorkerTaskName.tag, self.carz_from_node(item), jfn(item)
+        def change_tag(jfn: Callable[[Json], Json]) -> Callable[[Json], Tuple[Dict[str, str], Json]]:
+            def update_single(item: Json) -> Tuple[Dict[str, str], Json]:
+                return self.carz_from_node(item), jfn(item)
 
             return update_single
 
@@ -2866,8 +2916,13 @@ class TagCommand(SendWorkerTaskCommand):
         def setup_stream(in_stream: Stream) -> Stream:
             def with_dependencies(model: Model) -> Stream:
                 load = self.load_by_id_merged(model, in_stream, variables, **ctx.env)
+                batches = self.batch_stream(
+                    stream.map(load, fn), WorkerTaskName.tag_batch, WorkerTaskName.tag, self.batch_size
+                )
                 result_handler = self.handle_result(model, **ctx.env)
-                return self.send_to_queue_stream(stream.map(load, fn), result_handler, not ns.nowait)
+                results = self.send_to_queue_stream(batches, result_handler, not ns.nowait)
+                # one result for every changed node, or the spawned task, in case the result is not awaited
+                return stream.flatmap(results, lambda r: stream.iterate(r if isinstance(r, list) else [r]))
 
             # dependencies are not resolved directly (no async function is allowed here)
             dependencies = stream.call(self.dependencies.model_handler.load_model)
@@ -148,6 +148,38 @@ class DatabaseConfig(ConfigObject):
         default=False, metadata={"description": "If the connection should not be verified (default: False)"}
     )
     request_timeout: int = field(default=900, metadata={"description": "Request timeout in seconds (default: 900)"})
+    driver: str = field(
+        default="python-arango",
+        metadata={
+            "description": "Driver used to send queries and document operations to the database.\n"
+            "python-arango: blocking requests executed in a thread pool (default).\n"
+            "aiohttp: non blocking requests using a pool of keep-alive connections."
+        },
+    )
+    connection_pool_size: int = field(
+        default=64, metadata={"description": "Maximum number of connections used by the aiohttp driver (default: 64)"}
+    )
+    cursor_prefetch: int = field(
+        default=0,
+        metadata={
+            "description": "Number of result batches a query cursor fetches in advance, "
+            "while the current batch is processed. 0 fetches the next batch only on demand (default: 0)"
+        },
+    )
+    cursor_fingerprints: bool = field(
+        default=False,
+        metadata={
+            "description": "Remember the nodes and edges already returned by a graph query by a 64 bit fingerprint "
+            "instead of the full id. Reduces memory of big graph queries (default: False)"
+        },
+    )
+    entity_cache_seconds: int = field(
+        default=300,
+        metadata={
+            "description": "Time in seconds configs, templates and models are cached in memory. "
+            "Changes made by this process invalidate the cache immediately. 0 disables the cache (default: 300)"
+        },
+    )
 
 
 @define(order=True, hash=True, frozen=True)
@@ -246,6 +278,37 @@ class GraphUpdateConfig(ConfigObject):
         default=4 * 3600,
         metadata={"description": "If a graph update takes longer than this duration, the update is aborted."},
     )
+    streaming_merge: bool = field(
+        default=False,
+        metadata={
+            "description": "Merge the incoming graph merge root by merge root.\n"
+            "The incoming graph is spooled to disk and only the graph of one merge root is held in memory.\n"
+            "This reduces the memory requirements of big imports, but requires disk space in the temp directory."
+        },
+    )
+    compact_graph: bool = field(
+        default=False,
+        metadata={
+            "description": "Hold the incoming graph in a compact array based graph store.\n"
+            "This reduces the memory requirements of big imports. Not used in combination with streaming_merge."
+        },
+    )
+    merge_parallelism: int = field(
+        default=1,
+        metadata={
+            "description": "Number of merge roots that are compared with the database concurrently.\n"
+            "A value of 1 compares all merge roots sequentially."
+        },
+    )
+    spool_transfer: bool = field(
+        default=False,
+        metadata={
+            "description": "Hand the incoming graph to the import process via a spool file in the temp directory.\n"
+            "Only the position of every written batch is sent to the import process, which parses the elements\n"
+            "directly from the file. This avoids serializing all elements between the processes,\n"
+            "but requires disk space in the temp directory."
+        },
+    )
 
     def merge_max_wait_time(self) -> timedelta:
         return timedelta(seconds=self.merge_max_wait_time_seconds)
@@ -260,6 +323,7 @@ schema_registry.add(
     dict(
         merge_max_wait_time_seconds={"type": "integer", "min": 60},
         abort_after_seconds={"type": "integer", "min": 60},
+        merge_parallelism={"type": "integer", "min": 1},
     ),
 )
 
@@ -393,6 +457,11 @@ def parse_config(args: Namespace, core_config: Json, command_templates: Optional
         bootstrap_do_not_secure=args.graphdb_bootstrap_do_not_secure,
         no_ssl_verify=args.graphdb_no_ssl_verify,
         request_timeout=args.graphdb_request_timeout,
+        driver=args.graphdb_driver,
+        connection_pool_size=args.graphdb_connection_pool_size,
+        cursor_prefetch=args.graphdb_cursor_prefetch,
+        cursor_fingerprints=args.graphdb_cursor_fingerprints,
+        entity_cache_seconds=args.graphdb_entity_cache_seconds,
     )
     # take command line options and translate it to the config model
     set_from_cmd_line = {
@@ -1,8 +1,16 @@
+from __future__ import annotations
+
+import asyncio
+import json
 import logging
-from typing import Optional, MutableMapping, Union, Tuple
+from collections import deque
+from typing import Optional, MutableMapping, Union, Tuple, Type, Callable, Deque, Any
 
+from aiohttp import ClientSession, TCPConnector, BasicAuth, ClientTimeout
 from arango import HTTPClient, Response
-from arango.typings import Headers
+from arango.exceptions import ArangoServerError, CursorNextError, CursorCloseError, DocumentRevisionError
+from arango.request import Request
+from arango.typings import Headers, Json
 from requests import Session
 from requests.adapters import HTTPAdapter, Retry
 from requests_toolbelt import MultipartEncoder
@@ -42,3 +50,191 @@ class ArangoHTTPClient(HTTPClient):  # type: ignore
     ) -> Response:
         response = session.request(method, url, params, data, headers, auth=auth, timeout=self.timeout)
         return Response(method, response.url, response.headers, response.status_code, response.reason, response.text)
+
+
+class AsyncArangoHTTPClient:
+    """
+    Asynchronous HTTP client for ArangoDB based on aiohttp.
+    All requests share a pool of keep-alive connections, so concurrent requests do not need a thread each.
+    Compressed responses are requested and decompressed transparently.
+    """
+
+    def __init__(
+        self,
+        server: str,
+        database: str,
+        username: str,
+        password: str,
+        timeout: int,
+        verify: bool = True,
+        pool_size: int = 64,
+    ) -> None:
+        log.info(f"Create AsyncArangoHTTPClient with timeout={timeout}, verify={verify} and pool_size={pool_size}")
+        self.base_url = f"{server.rstrip('/')}/_db/{database}"
+        self.auth = BasicAuth(username, password)
+        self.timeout = ClientTimeout(total=timeout)
+        self.verify = verify
+        self.pool_size = pool_size
+        self._session: Optional[ClientSession] = None
+
+    def session(self) -> ClientSession:
+        # the session needs to be created inside a running event loop
+        if self._session is None or self._session.closed:
+            connector = TCPConnector(limit=self.pool_size, keepalive_timeout=60, ssl=None if self.verify else False)
+            self._session = ClientSession(
+                connector=connector,
+                auth=self.auth,
+                timeout=self.timeout,
+                headers={"Accept-Encoding": "gzip, deflate"},
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def send(self, request: Request) -> Response:
+        data = json.dumps(request.data) if request.data is not None else None
+        async with self.session().request(
+            request.method, self.base_url + request.endpoint, params=request.params, data=data, headers=request.headers
+        ) as resp:
+            text = await resp.text()
+            response = Response(request.method, str(resp.url), dict(resp.headers), resp.status, resp.reason or "", text)
+        # same logic as the python-arango connection
+        response.is_success = 200 <= response.status_code < 300
+        if text:
+            response.body = json.loads(text)
+            if isinstance(response.body, dict):
+                response.error_code = response.body.get("errorNum")
+                response.error_message = response.body.get("errorMessage")
+        return response
+
+    async def execute(
+        self, request: Request, error: Type[ArangoServerError], accept: Callable[[Response], bool] = lambda _: False
+    ) -> Response:
+        # accept: responses that are not successful, but should not raise an error
+        response = await self.send(request)
+        if response.status_code == 412:
+            raise DocumentRevisionError(response, request)
+        elif not response.is_success and not accept(response):
+            raise error(response, request)
+        return response
+
+
+def bulk_error_response(parent: Response, body: Json) -> Response:
+    """
+    Response of a single failed document in a bulk request (same as in python-arango).
+    """
+    text = json.dumps(body)
+    response = Response(parent.method, parent.url, parent.headers, parent.status_code, parent.status_text, text)
+    response.body = body
+    response.error_code = body.get("errorNum")
+    response.error_message = body.get("errorMessage")
+    response.is_success = False
+    return response
+
+
+class AsyncHTTPCursor:
+    """
+    Cursor on the result of an AQL query, that has been executed via AsyncArangoHTTPClient.
+    Similar to the python-arango cursor, but the next batch can be fetched asynchronously via fetch_next.
+    Iterating the cursor synchronously fetches the next batch on demand like the python-arango cursor:
+    from another thread via the event loop of the cursor, inside the event loop via the blocking send_sync.
+    """
+
+    def __init__(
+        self, client: AsyncArangoHTTPClient, data: Json, send_sync: Optional[Callable[[Request], Response]] = None
+    ) -> None:
+        self.client = client
+        self.send_sync = send_sync
+        self.loop = asyncio.get_event_loop()
+        self.cursor_id: Optional[str] = data.get("id")
+        self.batch_data: Deque[Json] = deque(data.get("result", []))
+        self.more: bool = data.get("hasMore", False)
+        self.total: Optional[int] = data.get("count")
+        self.extra: Json = data.get("extra", {})
+
+    def empty(self) -> bool:
+        return not self.batch_data
+
+    def has_more(self) -> bool:
+        return self.more
+
+    def pop(self) -> Json:
+        return self.batch_data.popleft()
+
+    def next(self) -> Json:
+        return self.__next__()
+
+    def count(self) -> Optional[int]:
+        return self.total
+
+    def statistics(self) -> Optional[Json]:
+        return self.extra.get("stats")
+
+    def next_batch_request(self) -> Request:
+        return Request("put", f"/_api/cursor/{self.cursor_id}")
+
+    def add_batch(self, body: Json) -> None:
+        self.batch_data.extend(body.get("result", []))
+        self.more = body.get("hasMore", False)
+        self.cursor_id = body.get("id", self.cursor_id)
+
+    async def fetch_next(self) -> None:
+        response = await self.client.execute(self.next_batch_request(), CursorNextError)
+        self.add_batch(response.body)
+
+    def fetch_next_sync(self) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # not called from within an event loop: let the event loop of the cursor fetch the batch
+            asyncio.run_coroutine_threadsafe(self.fetch_next(), self.loop).result()
+            return
+        # called from within the event loop: the request blocks like the one of the python-arango cursor
+        if self.send_sync is None:
+            raise RuntimeError("Cursor can not fetch the next batch synchronously inside the event loop")
+        request = self.next_batch_request()
+        response = self.send_sync(request)
+        if not response.is_success:
+            raise CursorNextError(response, request)
+        self.add_batch(response.body)
+
+    async def fetch_all(self) -> AsyncHTTPCursor:
+        while self.more:
+            await self.fetch_next()
+        return self
+
+    def close(self, ignore_missing: bool = False) -> None:
+        # the server side cursor only needs to be deleted, if it is not exhausted
+        if self.cursor_id is not None and self.more:
+            self.more = False
+            request = Request("delete", f"/_api/cursor/{self.cursor_id}")
+            coroutine = self.client.execute(
+                request, CursorCloseError, lambda r: ignore_missing and r.status_code == 404
+            )
+            try:
+                asyncio.get_running_loop()
+                task = self.loop.create_task(coroutine)
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            except RuntimeError:
+                # closed outside the event loop: let the event loop of the cursor delete it
+                future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def __iter__(self) -> AsyncHTTPCursor:
+        return self
+
+    def __next__(self) -> Json:
+        if not self.batch_data and self.more:
+            self.fetch_next_sync()
+        if self.batch_data:
+            return self.batch_data.popleft()
+        raise StopIteration
+
+    def __enter__(self) -> AsyncHTTPCursor:
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close(ignore_missing=True)
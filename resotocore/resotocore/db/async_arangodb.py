@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-import re
+from collections import deque
 from contextlib import asynccontextmanager
 from numbers import Number
 from typing import (
@@ -17,34 +18,76 @@ from typing import (
     Set,
     AsyncContextManager,
     Awaitable,
+    Type,
+    Deque,
+    cast,
 )
 
 from arango import ArangoServerError, CursorNextError
+from arango.exceptions import (
+    AQLQueryExecuteError,
+    AQLQueryExplainError,
+    TransactionExecuteError,
+    DocumentGetError,
+    DocumentInsertError,
+    DocumentUpdateError,
+    DocumentDeleteError,
+    DocumentCountError,
+    CollectionTruncateError,
+    CollectionRevisionError,
+)
 from arango.collection import StandardCollection, VertexCollection, EdgeCollection
 from arango.cursor import Cursor
 from arango.database import StandardDatabase, Database, TransactionDatabase
 from arango.graph import Graph
+from arango.request import Request
 from arango.typings import Json, Jsons
 
 from resotocore.async_extensions import run_async
+from resotocore.db.arangodb_extensions import AsyncArangoHTTPClient, AsyncHTTPCursor, bulk_error_response
 from resotocore.error import QueryTookToLongError
 from resotocore.metrics import timed
 from resotocore.util import identity
 
 log = logging.getLogger(__name__)
 
+# cursor of python-arango or the native async cursor
+AnyCursor = Union[Cursor, AsyncHTTPCursor]
+
 
 class AsyncCursor(AsyncIterator[Json]):
-    def __init__(self, cursor: Cursor, trafo: Optional[Callable[[Json], Optional[Json]]]):
+    """
+    Iterate the result of an AQL query asynchronously.
+    With prefetch > 0, the next batches are fetched in the background, while the current batch is consumed.
+    The background fetch waits until the consumer has caught up: up to prefetch + 2 batches are held in memory
+    (the queued batches, the batch that is consumed and the batch that waits to be queued).
+    With fingerprints, visited nodes and edges are remembered by the 64 bit hash of the id instead of the id.
+    This reduces the memory needed for big traversals with a negligible chance of a collision.
+    """
+
+    def __init__(
+        self,
+        cursor: AnyCursor,
+        trafo: Optional[Callable[[Json], Optional[Json]]],
+        prefetch: int = 0,
+        fingerprints: bool = False,
+    ):
         self.cursor = cursor
-        self.visited_node: Set[str] = set()
-        self.visited_edge: Set[str] = set()
+        self.visited_node: Set[Union[str, int]] = set()
+        self.visited_edge: Set[Union[str, int]] = set()
+        self.visited_key: Callable[[str], Union[str, int]] = hash if fingerprints else identity
         self.deferred_edges: List[Json] = []
+        # edge collection name -> edge type
+        self.edge_types: Dict[str, str] = {}
         self.cursor_exhausted = False
         self.trafo = trafo if trafo else identity
         self.vt_len: Optional[int] = None
         self.on_hold: Optional[Json] = None
         self.get_next: Callable[[], Awaitable[Optional[Json]]] = self.next_filtered if trafo else self.next_from_db
+        self.prefetch = prefetch
+        self.prefetched: Optional[asyncio.Queue[Union[Deque[Json], Exception, None]]] = None
+        self.prefetch_task: Optional[asyncio.Task[None]] = None
+        self.current_batch: Deque[Json] = deque()
 
     async def __anext__(self) -> Json:
         # if there is an on-hold element: unset and return it
@@ -68,40 +111,41 @@ class AsyncCursor(AsyncIterator[Json]):
                 return await self.next_deferred_edge()
 
     def close(self) -> None:
+        if self.prefetch_task is not None:
+            self.prefetch_task.cancel()
         self.cursor.close(ignore_missing=True)
 
     def count(self) -> Optional[int]:
-        return self.cursor.count()  # type: ignore
+        return self.cursor.count()
 
     async def next_filtered(self) -> Optional[Json]:
         element = await self.next_from_db()
         vertex = None
         edge = None
         try:
-            _key = element["_key"]
-            if _key not in self.visited_node:
-                self.visited_node.add(_key)
+            key = self.visited_key(element["_key"])
+            if key not in self.visited_node:
+                self.visited_node.add(key)
                 vertex = self.trafo(element)
 
             from_id = element.get("_from")
             to_id = element.get("_to")
             link_id = element.get("_link_id")
             if from_id is not None and to_id is not None and link_id is not None:
-                if link_id not in self.visited_edge:
-                    self.visited_edge.add(link_id)
+                link_key = self.visited_key(link_id)
+                if link_key not in self.visited_edge:
+                    self.visited_edge.add(link_key)
                     if not self.vt_len:
-                        self.vt_len = len(re.sub("/.*$", "", from_id)) + 1
-                    edge = {
-                        "type": "edge",
-                        # example: vertex_name/node_id -> node_id
-                        "from": from_id[self.vt_len :],  # noqa: E203
-                        # example: vertex_name/node_id -> node_id
-                        "to": to_id[self.vt_len :],  # noqa: E203
-                        # example: vertex_name_default/edge_id -> default
-                        "edge_type": re.sub("/.*$", "", link_id[self.vt_len :]),  # noqa: E203
-                    }
+                        self.vt_len = from_id.index("/") + 1
+                    # example: vertex_name/node_id -> node_id
+                    from_node = from_id[self.vt_len :]  # noqa: E203
+                    to_node = to_id[self.vt_len :]  # noqa: E203
+                    edge = {"type": "edge", "from": from_node, "to": to_node, "edge_type": self.edge_type(link_id)}
                     # make sure that both nodes of the edge have been visited already
-                    if from_id not in self.visited_node or to_id not in self.visited_node:
+                    if (
+                        self.visited_key(from_node) not in self.visited_node
+                        or self.visited_key(to_node) not in self.visited_node
+                    ):
                         self.deferred_edges.append(edge)
                         edge = None
             # if the vertex is not returned: return the edge
@@ -115,36 +159,94 @@ class AsyncCursor(AsyncIterator[Json]):
             log.warning(f"Could not read element {element}: {ex}. Ignore.")
         return None
 
+    def edge_type(self, link_id: str) -> str:
+        # example: vertex_name_default/edge_id -> default
+        collection = link_id[0 : link_id.index("/")]  # noqa: E203
+        edge_type = self.edge_types.get(collection)
+        if edge_type is None:
+            edge_type = collection[self.vt_len :]  # noqa: E203
+            self.edge_types[collection] = edge_type
+        return edge_type
+
     async def next_from_db(self) -> Json:
         try:
+            if self.prefetch > 0:
+                return await self.next_prefetched()
             if self.cursor.empty():
                 if not self.cursor.has_more():
                     raise StopAsyncIteration
-                # next batch is fetched in separate thread
-                await run_async(self.cursor.fetch)
+                await self.fetch_batch()
             res = self.cursor.pop()
             return res
         except CursorNextError as ex:
             raise QueryTookToLongError("Cursor does not exist any longer, since the query ran for too long.") from ex
 
+    async def fetch_batch(self) -> None:
+        if isinstance(self.cursor, AsyncHTTPCursor):
+            await self.cursor.fetch_next()
+        else:
+            # next batch is fetched in separate thread
+            await run_async(self.cursor.fetch)
+
+    async def next_prefetched(self) -> Json:
+        if self.prefetched is None:
+            self.prefetched = asyncio.Queue(self.prefetch)
+            self.prefetch_task = asyncio.create_task(self.prefetch_batches(self.prefetched))
+        while not self.current_batch:
+            batch = await self.prefetched.get()
+            if batch is None:
+                raise StopAsyncIteration
+            elif isinstance(batch, Exception):
+                raise batch
+            self.current_batch = batch
+        return self.current_batch.popleft()
+
+    async def prefetch_batches(self, queue: asyncio.Queue[Union[Deque[Json], Exception, None]]) -> None:
+        # the cursor is only accessed by this task: move every fetched batch to the queue
+        # the queue is bounded: put blocks, if the consumer does not keep up
+        try:
+            while True:
+                batch: Deque[Json] = deque()
+                while not self.cursor.empty():
+                    batch.append(self.cursor.pop())
+                if batch:
+                    await queue.put(batch)
+                if not self.cursor.has_more():
+                    break
+                await self.fetch_batch()
+            await queue.put(None)
+        except Exception as ex:
+            await queue.put(ex)
+
     async def next_deferred_edge(self) -> Json:
         try:
             while True:
                 e = self.deferred_edges.pop()
-                if e["from"] in self.visited_node and e["to"] in self.visited_node:
+                if self.visited_key(e["from"]) in self.visited_node and self.visited_key(e["to"]) in self.visited_node:
                     return e
         except IndexError as ex:
             raise StopAsyncIteration from ex
 
 
 class AsyncCursorContext(AsyncContextManager[AsyncCursor]):
-    def __init__(self, cursor: Cursor, trafo: Optional[Callable[[Json], Optional[Json]]]):
+    def __init__(
+        self,
+        cursor: AnyCursor,
+        trafo: Optional[Callable[[Json], Optional[Json]]],
+        prefetch: int = 0,
+        fingerprints: bool = False,
+    ):
         self._cursor = cursor
         self._trafo = trafo
+        self._prefetch = prefetch
+        self._fingerprints = fingerprints
+        self._async_cursor: Optional[AsyncCursor] = None
 
     @property
     def cursor(self) -> AsyncCursor:
-        return AsyncCursor(self._cursor, self._trafo)
+        if self._async_cursor is None:
+            self._async_cursor = AsyncCursor(self._cursor, self._trafo, self._prefetch, self._fingerprints)
+        return self._async_cursor
 
     async def __aenter__(self) -> AsyncCursor:
         return self.cursor
@@ -154,8 +256,12 @@ class AsyncCursorContext(AsyncContextManager[AsyncCursor]):
 
 
 class AsyncArangoDBBase:
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, cursor_prefetch: int = 0, cursor_fingerprints: bool = False):
         self.db = db
+        # number of batches fetched in advance by cursors created via aql_cursor
+        self.cursor_prefetch = cursor_prefetch
+        # remember visited elements of cursors created via aql_cursor by fingerprint
+        self.cursor_fingerprints = cursor_fingerprints
 
     @timed("arango", "aql")
     async def aql_cursor(
@@ -205,7 +311,7 @@ class AsyncArangoDBBase:
             skip_inaccessible_cols,
             max_runtime,
         )
-        return AsyncCursorContext(cursor, trafo)
+        return AsyncCursorContext(cursor, trafo, self.cursor_prefetch, self.cursor_fingerprints)
 
     @timed("arango", "aql")
     async def aql(
@@ -230,8 +336,8 @@ class AsyncArangoDBBase:
         stream: Optional[bool] = None,
         skip_inaccessible_cols: Optional[bool] = None,
         max_runtime: Optional[Number] = None,
-    ) -> Cursor:
-        return await run_async(
+    ) -> AnyCursor:
+        cursor: Cursor = await run_async(
             self.db.aql.execute,
             query,
             count,
@@ -254,6 +360,7 @@ class AsyncArangoDBBase:
             skip_inaccessible_cols,
             max_runtime,
         )
+        return cursor
 
     @timed("arango", "explain")
     async def explain(
@@ -374,16 +481,21 @@ class AsyncArangoDBBase:
         )
 
     @timed("arango", "all")
-    async def all(self, collection: str, skip: Optional[int] = None, limit: Optional[int] = None) -> Cursor:
-        return await run_async(self.db.collection(collection).all, skip, limit)
+    async def all(self, collection: str, skip: Optional[int] = None, limit: Optional[int] = None) -> AnyCursor:
+        cursor: Cursor = await run_async(self.db.collection(collection).all, skip, limit)
+        return cursor
 
     @timed("arango", "keys")
-    async def keys(self, collection: str) -> Cursor:
-        return await run_async(self.db.collection(collection).keys)
+    async def keys(self, collection: str) -> AnyCursor:
+        cursor: Cursor = await run_async(self.db.collection(collection).keys)
+        return cursor
 
     async def count(self, collection: str) -> int:
         return await run_async(self.db.collection(collection).count)  # type: ignore
 
+    async def revision(self, collection: str) -> str:
+        return await run_async(self.db.collection(collection).revision)  # type: ignore
+
     @timed("arango", "insert_many")
     async def insert_many(
         self,
@@ -547,10 +659,13 @@ class AsyncArangoDBBase:
 
 
 class AsyncArangoDB(AsyncArangoDBBase):
-    def __init__(self, db: StandardDatabase):
-        super().__init__(db)
+    def __init__(self, db: StandardDatabase, cursor_prefetch: int = 0, cursor_fingerprints: bool = False):
+        super().__init__(db, cursor_prefetch, cursor_fingerprints)
         self.db: StandardDatabase = db
 
+    async def close(self) -> None:
+        pass
+
     @asynccontextmanager
     async def begin_transaction(
         self,
@@ -565,7 +680,7 @@ class AsyncArangoDB(AsyncArangoDBBase):
         tx = await run_async(
             self.db.begin_transaction, read, write, exclusive, sync, allow_implicit, lock_timeout, max_size
         )
-        atx = AsyncArangoTransactionDB(tx)
+        atx = AsyncArangoTransactionDB(tx, self.cursor_fingerprints)
         try:
             yield atx
         except Exception as ex:
@@ -575,8 +690,9 @@ class AsyncArangoDB(AsyncArangoDBBase):
 
 
 class AsyncArangoTransactionDB(AsyncArangoDBBase):
-    def __init__(self, db: TransactionDatabase):
-        super().__init__(db)
+    def __init__(self, db: TransactionDatabase, cursor_fingerprints: bool = False):
+        # a stream transaction must not be used concurrently: cursors never prefetch in the background
+        super().__init__(db, 0, cursor_fingerprints)
         self.db: TransactionDatabase = db
 
     async def commit_transaction(self) -> bool:
@@ -584,3 +700,430 @@ class AsyncArangoTransactionDB(AsyncArangoDBBase):
 
     async def abort_transaction(self) -> bool:
         return await run_async(self.db.abort_transaction)  # type: ignore
+
+
+def request_params(**kwargs: Any) -> Dict[str, Any]:
+    return {k: v for k, v in kwargs.items() if v is not None}
+
+
+def document_key(document: Union[str, Json]) -> str:
+    # document can be: key, id (collection/key) or a json document with _key or _id
+    doc: str = (document["_key"] if "_key" in document else document["_id"]) if isinstance(document, dict) else document
+    return doc.split("/", 1)[1] if "/" in doc else doc
+
+
+class AiohttpArangoDB(AsyncArangoDB):
+    """
+    AsyncArangoDB that sends queries and document operations natively via aiohttp.
+    Requests do not block a thread from the thread pool and share a pool of keep-alive connections.
+    Operations that are not performance relevant (schema management, stream transactions) use python-arango.
+    """
+
+    def __init__(
+        self,
+        db: StandardDatabase,
+        client: AsyncArangoHTTPClient,
+        cursor_prefetch: int = 0,
+        cursor_fingerprints: bool = False,
+    ):
+        super().__init__(db, cursor_prefetch, cursor_fingerprints)
+        self.client = client
+
+    async def close(self) -> None:
+        await self.client.close()
+
+    async def __execute_aql(
+        self,
+        query: str,
+        count: bool = False,
+        batch_size: Optional[int] = None,
+        ttl: Optional[Number] = None,
+        bind_vars: Optional[Dict[str, Any]] = None,
+        full_count: Optional[bool] = None,
+        max_plans: Optional[int] = None,
+        optimizer_rules: Optional[Sequence[str]] = None,
+        cache: Optional[bool] = None,
+        memory_limit: int = 0,
+        fail_on_warning: Optional[bool] = None,
+        profile: Optional[bool] = None,
+        max_transaction_size: Optional[int] = None,
+        max_warning_count: Optional[int] = None,
+        intermediate_commit_count: Optional[int] = None,
+        intermediate_commit_size: Optional[int] = None,
+        satellite_sync_wait: Optional[int] = None,
+        stream: Optional[bool] = None,
+        skip_inaccessible_cols: Optional[bool] = None,
+        max_runtime: Optional[Number] = None,
+    ) -> AsyncHTTPCursor:
+        options = request_params(
+            fullCount=full_count,
+            maxPlans=max_plans,
+            optimizer={"rules": optimizer_rules} if optimizer_rules else None,
+            failOnWarning=fail_on_warning,
+            profile=profile,
+            maxTransactionSize=max_transaction_size,
+            maxWarningCount=max_warning_count,
+            intermediateCommitCount=intermediate_commit_count,
+            intermediateCommitSize=intermediate_commit_size,
+            satelliteSyncWait=satellite_sync_wait,
+            stream=stream,
+            skipInaccessibleCollections=skip_inaccessible_cols,
+            maxRuntime=max_runtime,
+        )
+        data = request_params(
+            query=query,
+            count=count,
+            batchSize=batch_size,
+            ttl=ttl,
+            bindVars=bind_vars,
+            cache=cache,
+            memoryLimit=memory_limit,
+            options=options,
+        )
+        response = await self.client.execute(Request("post", "/_api/cursor", data=data), AQLQueryExecuteError)
+        return AsyncHTTPCursor(self.client, response.body, self.db.conn.send_request)
+
+    @timed("arango", "aql")
+    async def aql_cursor(
+        self,
+        query: str,
+        trafo: Optional[Callable[[Json], Optional[Json]]] = None,
+        count: bool = False,
+        batch_size: Optional[int] = None,
+        ttl: Optional[Number] = None,
+        bind_vars: Optional[Dict[str, Any]] = None,
+        full_count: Optional[bool] = None,
+        max_plans: Optional[int] = None,
+        optimizer_rules: Optional[Sequence[str]] = None,
+        cache: Optional[bool] = None,
+        memory_limit: int = 0,
+        fail_on_warning: Optional[bool] = None,
+        profile: Optional[bool] = None,
+        max_transaction_size: Optional[int] = None,
+        max_warning_count: Optional[int] = None,
+        intermediate_commit_count: Optional[int] = None,
+        intermediate_commit_size: Optional[int] = None,
+        satellite_sync_wait: Optional[int] = None,
+        stream: Optional[bool] = None,
+        skip_inaccessible_cols: Optional[bool] = None,
+        max_runtime: Optional[Number] = None,
+    ) -> AsyncCursorContext:
+        cursor = await self.__execute_aql(
+            query,
+            count,
+            batch_size,
+            ttl,
+            bind_vars,
+            full_count,
+            max_plans,
+            optimizer_rules,
+            cache,
+            memory_limit,
+            fail_on_warning,
+            profile,
+            max_transaction_size,
+            max_warning_count,
+            intermediate_commit_count,
+            intermediate_commit_size,
+            satellite_sync_wait,
+            stream,
+            skip_inaccessible_cols,
+            max_runtime,
+        )
+        return AsyncCursorContext(cursor, trafo, self.cursor_prefetch, self.cursor_fingerprints)
+
+    @timed("arango", "aql")
+    async def aql(
+        self,
+        query: str,
+        count: bool = False,
+        batch_size: Optional[int] = None,
+        ttl: Optional[Number] = None,
+        bind_vars: Optional[Dict[str, Any]] = None,
+        full_count: Optional[bool] = None,
+        max_plans: Optional[int] = None,
+        optimizer_rules: Optional[Sequence[str]] = None,
+        cache: Optional[bool] = None,
+        memory_limit: int = 0,
+        fail_on_warning: Optional[bool] = None,
+        profile: Optional[bool] = None,
+        max_transaction_size: Optional[int] = None,
+        max_warning_count: Optional[int] = None,
+        intermediate_commit_count: Optional[int] = None,
+        intermediate_commit_size: Optional[int] = None,
+        satellite_sync_wait: Optional[int] = None,
+        stream: Optional[bool] = None,
+        skip_inaccessible_cols: Optional[bool] = None,
+        max_runtime: Optional[Number] = None,
+    ) -> AnyCursor:
+        cursor = await self.__execute_aql(
+            query,
+            count,
+            batch_size,
+            ttl,
+            bind_vars,
+            full_count,
+            max_plans,
+            optimizer_rules,
+            cache,
+            memory_limit,
+            fail_on_warning,
+            profile,
+            max_transaction_size,
+            max_warning_count,
+            intermediate_commit_count,
+            intermediate_commit_size,
+            satellite_sync_wait,
+            stream,
+            skip_inaccessible_cols,
+            max_runtime,
+        )
+        # batches are fetched lazily, while the cursor is consumed
+        return cursor
+
+    @timed("arango", "explain")
+    async def explain(
+        self,
+        query: str,
+        all_plans: bool = False,
+        max_plans: Optional[int] = None,
+        opt_rules: Optional[Sequence[str]] = None,
+        bind_vars: Optional[MutableMapping[str, str]] = None,
+    ) -> Union[Json, Jsons]:
+        options = request_params(
+            allPlans=all_plans, maxNumberOfPlans=max_plans, optimizer={"rules": opt_rules} if opt_rules else None
+        )
+        data = request_params(query=query, bindVars=bind_vars, options=options)
+        response = await self.client.execute(Request("post", "/_api/explain", data=data), AQLQueryExplainError)
+        body: Json = response.body
+        return body["plans"] if all_plans else {**body["plan"], "cacheable": body.get("cacheable")}
+
+    @timed("arango", "execute_transaction")
+    async def execute_transaction(
+        self,
+        command: str,
+        params: Optional[Json] = None,
+        read: Optional[Sequence[str]] = None,
+        write: Optional[Sequence[str]] = None,
+        sync: Optional[bool] = None,
+        timeout: Optional[Number] = None,
+        max_size: Optional[int] = None,
+        allow_implicit: Optional[bool] = None,
+        intermediate_commit_count: Optional[int] = None,
+        intermediate_commit_size: Optional[int] = None,
+    ) -> Any:
+        data = request_params(
+            action=command,
+            params=params,
+            collections=request_params(read=read, write=write, allowImplicit=allow_implicit),
+            waitForSync=sync,
+            lockTimeout=timeout,
+            maxTransactionSize=max_size,
+            intermediateCommitCount=intermediate_commit_count,
+            intermediateCommitSize=intermediate_commit_size,
+        )
+        response = await self.client.execute(Request("post", "/_api/transaction", data=data), TransactionExecuteError)
+        return response.body.get("result")
+
+    @timed("arango", "get")
+    async def get(
+        self,
+        collection: str,
+        document: Union[str, Json],
+        rev: Optional[str] = None,
+        check_rev: bool = True,
+    ) -> Optional[Json]:
+        rev = rev or (document.get("_rev") if isinstance(document, dict) else None)
+        headers = {"If-Match": rev} if rev and check_rev else None
+        request = Request("get", f"/_api/document/{collection}/{document_key(document)}", headers=headers)
+        response = await self.client.execute(request, DocumentGetError, lambda r: r.error_code == 1202)
+        return cast(Json, response.body) if response.is_success else None
+
+    @timed("arango", "insert")
+    async def insert(
+        self,
+        collection: str,
+        document: Json,
+        return_new: bool = False,
+        sync: Optional[bool] = None,
+        silent: bool = False,
+        overwrite: bool = False,
+        return_old: bool = False,
+        overwrite_mode: Optional[str] = None,
+        keep_none: Optional[bool] = None,
+        merge: Optional[bool] = None,
+    ) -> Union[bool, Json]:
+        params = request_params(
+            returnNew=return_new,
+            waitForSync=sync,
+            silent=silent,
+            overwrite=overwrite,
+            returnOld=return_old,
+            overwriteMode=overwrite_mode,
+            keepNull=keep_none,
+            mergeObjects=merge,
+        )
+        request = Request("post", f"/_api/document/{collection}", params=params, data=document)
+        response = await self.client.execute(request, DocumentInsertError)
+        return True if silent else cast(Json, response.body)
+
+    @timed("arango", "update")
+    async def update(
+        self,
+        collection: str,
+        document: Json,
+        check_rev: bool = True,
+        merge: bool = True,
+        keep_none: bool = True,
+        return_new: bool = False,
+        return_old: bool = False,
+        sync: Optional[bool] = None,
+        silent: bool = False,
+    ) -> Json:
+        params = request_params(
+            keepNull=keep_none,
+            mergeObjects=merge,
+            returnNew=return_new,
+            returnOld=return_old,
+            ignoreRevs=not check_rev,
+            waitForSync=sync,
+            silent=silent,
+        )
+        headers = {"If-Match": document["_rev"]} if check_rev and "_rev" in document else None
+        endpoint = f"/_api/document/{collection}/{document_key(document)}"
+        request = Request("patch", endpoint, headers=headers, params=params, data=document)
+        response = await self.client.execute(request, DocumentUpdateError)
+        return response.body  # type: ignore
+
+    @timed("arango", "delete")
+    async def delete(
+        self,
+        collection: str,
+        document: Union[str, Json],
+        rev: Optional[str] = None,
+        check_rev: bool = True,
+        ignore_missing: bool = False,
+        return_old: bool = False,
+        sync: Optional[bool] = None,
+        silent: bool = False,
+    ) -> Union[bool, Json]:
+        rev = rev or (document.get("_rev") if isinstance(document, dict) else None)
+        headers = {"If-Match": rev} if rev and check_rev else None
+        params = request_params(returnOld=return_old, ignoreRevs=not check_rev, waitForSync=sync, silent=silent)
+        endpoint = f"/_api/document/{collection}/{document_key(document)}"
+        request = Request("delete", endpoint, headers=headers, params=params)
+        response = await self.client.execute(
+            request, DocumentDeleteError, lambda r: ignore_missing and r.error_code == 1202
+        )
+        if not response.is_success:
+            return False
+        return True if silent else cast(Json, response.body)
+
+    @timed("arango", "all")
+    async def all(self, collection: str, skip: Optional[int] = None, limit: Optional[int] = None) -> AnyCursor:
+        limit_part = "LIMIT @skip, @limit" if skip is not None or limit is not None else ""
+        bind: Json = {"@collection": collection}
+        if limit_part:
+            bind.update(skip=skip or 0, limit=limit if limit is not None else 2**53)
+        return await self.aql(f"FOR doc IN @@collection {limit_part} RETURN doc", bind_vars=bind)
+
+    @timed("arango", "keys")
+    async def keys(self, collection: str) -> AnyCursor:
+        return await self.aql("FOR doc IN @@collection RETURN doc._key", bind_vars={"@collection": collection})
+
+    async def count(self, collection: str) -> int:
+        response = await self.client.execute(Request("get", f"/_api/collection/{collection}/count"), DocumentCountError)
+        return response.body["count"]  # type: ignore
+
+    async def revision(self, collection: str) -> str:
+        request = Request("get", f"/_api/collection/{collection}/revision")
+        response = await self.client.execute(request, CollectionRevisionError)
+        return str(response.body["revision"])
+
+    async def __many(
+        self, method: str, collection: str, documents: Sequence[Json], error: Type[ArangoServerError], **params: Any
+    ) -> Union[bool, List[Union[Json, ArangoServerError]]]:
+        request = Request(method, f"/_api/document/{collection}", params=request_params(**params), data=documents)
+        response = await self.client.execute(request, error)
+        if params.get("silent"):
+            return True
+        # errors of single documents are returned as json with error flag: turn them into exceptions
+        return [
+            error(bulk_error_response(response, doc), request) if isinstance(doc, dict) and doc.get("error") else doc
+            for doc in response.body
+        ]
+
+    @timed("arango", "insert_many")
+    async def insert_many(
+        self,
+        collection: str,
+        documents: Sequence[Json],
+        return_new: bool = False,
+        sync: Optional[bool] = None,
+        silent: bool = False,
+        overwrite: bool = False,
+        return_old: bool = False,
+    ) -> Union[bool, List[Union[Json, ArangoServerError]]]:
+        return await self.__many(
+            "post",
+            collection,
+            documents,
+            DocumentInsertError,
+            returnNew=return_new,
+            waitForSync=sync,
+            silent=silent,
+            overwrite=overwrite,
+            returnOld=return_old,
+        )
+
+    @timed("arango", "update_many")
+    async def update_many(
+        self,
+        collection: str,
+        documents: Sequence[Json],
+        check_rev: bool = True,
+        merge: bool = True,
+        keep_none: bool = True,
+        return_new: bool = False,
+        return_old: bool = False,
+        sync: Optional[bool] = None,
+        silent: bool = False,
+    ) -> Union[bool, List[Union[Json, ArangoServerError]]]:
+        return await self.__many(
+            "patch",
+            collection,
+            documents,
+            DocumentUpdateError,
+            ignoreRevs=not check_rev,
+            mergeObjects=merge,
+            keepNull=keep_none,
+            returnNew=return_new,
+            returnOld=return_old,
+            waitForSync=sync,
+            silent=silent,
+        )
+
+    @timed("arango", "delete_many")
+    async def delete_many(
+        self,
+        collection: str,
+        documents: Sequence[Json],
+        return_old: bool = False,
+        check_rev: bool = True,
+        sync: Optional[bool] = None,
+        silent: bool = False,
+    ) -> Union[bool, List[Union[Json, ArangoServerError]]]:
+        return await self.__many(
+            "delete",
+            collection,
+            documents,
+            DocumentDeleteError,
+            returnOld=return_old,
+            ignoreRevs=not check_rev,
+            waitForSync=sync,
+            silent=silent,
+        )
+
+    async def truncate(self, collection: str) -> bool:
+        await self.client.execute(Request("put", f"/_api/collection/{collection}/truncate"), CollectionTruncateError)
+        return True
@@ -3,7 +3,7 @@ from abc import ABC
 from argparse import Namespace
 from datetime import datetime, timezone, timedelta
 from time import sleep
-from typing import Dict, List, Tuple, Union
+from typing import Dict, List, Tuple, Union, Optional, Any
 
 from arango import ArangoServerError, ArangoClient
 from arango.database import StandardDatabase
@@ -12,12 +12,12 @@ from requests.exceptions import RequestException
 
 
 from resotocore.analytics import AnalyticsEventSender
-from resotocore.core_config import CoreConfig
+from resotocore.core_config import CoreConfig, DatabaseConfig
 from resotocore.db import SystemData
-from resotocore.db.arangodb_extensions import ArangoHTTPClient
-from resotocore.db.async_arangodb import AsyncArangoDB
+from resotocore.db.arangodb_extensions import ArangoHTTPClient, AsyncArangoHTTPClient
+from resotocore.db.async_arangodb import AsyncArangoDB, AiohttpArangoDB
 from resotocore.db.configdb import config_entity_db, config_validation_entity_db
-from resotocore.db.entitydb import EventEntityDb
+from resotocore.db.entitydb import EventEntityDb, EntityDb, CachedEntityDb, K, T
 from resotocore.db.graphdb import ArangoGraphDB, GraphDB, EventGraphDB
 from resotocore.db.jobdb import job_db
 from resotocore.db.modeldb import ModelDb, model_db
@@ -26,6 +26,7 @@ from resotocore.db.runningtaskdb import running_task_db
 from resotocore.db.subscriberdb import subscriber_db
 from resotocore.db.templatedb import template_entity_db
 from resotocore.error import NoSuchGraph, RequiredDependencyMissingError
+from resotocore.message_bus import MessageBus, CoreMessage
 from resotocore.model.adjust_node import AdjustNode
 from resotocore.model.typed_model import from_js, to_js
 from resotocore.util import Periodic, utc, shutdown_process, uuid_str
@@ -33,6 +34,22 @@ from resotocore.util import Periodic, utc, shutdown_process, uuid_str
 log = logging.getLogger(__name__)
 
 
+def async_arango_db(database: StandardDatabase, config: DatabaseConfig) -> AsyncArangoDB:
+    if config.driver == "aiohttp":
+        client = AsyncArangoHTTPClient(
+            config.server,
+            database.name,
+            config.username,
+            config.password,
+            config.request_timeout,
+            verify=not config.no_ssl_verify,
+            pool_size=config.connection_pool_size,
+        )
+        return AiohttpArangoDB(database, client, config.cursor_prefetch, config.cursor_fingerprints)
+    else:
+        return AsyncArangoDB(database, config.cursor_prefetch, config.cursor_fingerprints)
+
+
 class DbAccess(ABC):
     def __init__(
         self,
@@ -49,20 +66,34 @@ class DbAccess(ABC):
         config_validation_entity: str = "config_validation",
         configs_model: str = "configs_model",
         template_entity: str = "templates",
+        message_bus: Optional[MessageBus] = None,
     ):
         self.event_sender = event_sender
         self.database = arango_database
-        self.db = AsyncArangoDB(arango_database)
+        self.db = async_arango_db(arango_database, config.db)
         self.adjust_node = adjust_node
-        self.model_db = EventEntityDb(model_db(self.db, model_name), event_sender, model_name)
+        self.caches: List[CachedEntityDb[Any, Any]] = []
+
+        def cached(db: EntityDb[K, T], name: str, invalidate_on: Optional[List[str]] = None) -> EntityDb[K, T]:
+            if config.db.entity_cache_seconds <= 0:
+                return db
+            ttl = timedelta(seconds=config.db.entity_cache_seconds)
+            cache = CachedEntityDb(db, name, ttl, message_bus, invalidate_on)
+            self.caches.append(cache)
+            return cache
+
+        self.model_db = EventEntityDb(cached(model_db(self.db, model_name), model_name), event_sender, model_name)
         self.subscribers_db = EventEntityDb(subscriber_db(self.db, subscriber_name), event_sender, subscriber_name)
         self.running_task_db = running_task_db(self.db, running_task_name)
         self.pending_deferred_edge_db = pending_deferred_edge_db(self.db, deferred_edge_name)
         self.job_db = job_db(self.db, job_name)
-        self.config_entity_db = config_entity_db(self.db, config_entity)
-        self.config_validation_entity_db = config_validation_entity_db(self.db, config_validation_entity)
-        self.configs_model_db = model_db(self.db, configs_model)
-        self.template_entity_db = template_entity_db(self.db, template_entity)
+        config_changed = [CoreMessage.ConfigUpdated, CoreMessage.ConfigDeleted]
+        self.config_entity_db = cached(config_entity_db(self.db, config_entity), config_entity, config_changed)
+        self.config_validation_entity_db = cached(
+            config_validation_entity_db(self.db, config_validation_entity), config_validation_entity
+        )
+        self.configs_model_db = cached(model_db(self.db, configs_model), configs_model)
+        self.template_entity_db = cached(template_entity_db(self.db, template_entity), template_entity)
         self.graph_dbs: Dict[str, GraphDB] = {}
         self.config = config
         self.cleaner = Periodic("outdated_updates_cleaner", self.check_outdated_updates, timedelta(seconds=60))
@@ -81,10 +112,15 @@ class DbAccess(ABC):
             log.info(f'Found graph: {graph["name"]}')
             db = self.get_graph_db(graph["name"])
             await db.create_update_schema()
+        for cache in self.caches:
+            await cache.start()
         await self.cleaner.start()
 
     async def stop(self) -> None:
         await self.cleaner.stop()
+        for cache in self.caches:
+            await cache.stop()
+        await self.db.close()
 
     async def create_graph(self, name: str) -> GraphDB:
         db = self.get_graph_db(name, no_check=True)
@@ -96,6 +132,7 @@ class DbAccess(ABC):
         if db.has_graph(name):
             db.delete_graph(name, drop_collections=True, ignore_missing=True)
             db.delete_collection(f"{name}_in_progress", ignore_missing=True)
+            db.delete_collection(f"{name}_summary", ignore_missing=True)
             db.delete_view(f"search_{name}", ignore_missing=True)
             # remove all temp collection names
             for coll in db.collections():
@@ -112,7 +149,7 @@ class DbAccess(ABC):
         else:
             if not no_check and not self.database.has_graph(name):
                 raise NoSuchGraph(name)
-            graph_db = ArangoGraphDB(self.db, name, self.adjust_node)
+            graph_db = ArangoGraphDB(self.db, name, self.adjust_node, self.config.graph_update)
             event_db = EventGraphDB(graph_db, self.event_sender)
             self.graph_dbs[name] = event_db
             return event_db
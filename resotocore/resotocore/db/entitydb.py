@@ -1,8 +1,15 @@
+import asyncio
 import logging
+import time
 from abc import ABC, abstractmethod
+from asyncio import Task
+from contextlib import suppress
+from copy import deepcopy
+from datetime import timedelta
+
 import attrs
 
-from typing import AsyncGenerator, Generic, TypeVar, Optional, Type, Callable, List
+from typing import AsyncGenerator, Generic, TypeVar, Optional, Type, Callable, List, Dict, Tuple, cast
 
 from arango import DocumentUpdateError, DocumentRevisionError
 from jsons import JsonsError
@@ -10,6 +17,8 @@ from jsons import JsonsError
 from resotocore.analytics import AnalyticsEventSender
 from resotocore.db.async_arangodb import AsyncArangoDB
 from resotocore.error import OptimisticLockingFailed
+from resotocore.ids import SubscriberId
+from resotocore.message_bus import MessageBus
 from resotocore.model.typed_model import from_js, type_fqn, to_js
 from resotocore.types import Json
 
@@ -67,7 +76,7 @@ class ArangoEntityDb(EntityDb[K, T], ABC):
     async def keys(self) -> AsyncGenerator[K, None]:
         with await self.db.keys(self.collection_name) as cursor:
             for element in cursor:
-                yield element
+                yield cast(K, element)
 
     async def all(self) -> AsyncGenerator[T, None]:
         with await self.db.all(self.collection_name) as cursor:
@@ -162,3 +171,120 @@ class EventEntityDb(EntityDb[K, T]):
 
     async def wipe(self) -> bool:
         return await self.db.wipe()
+
+
+class CachedEntityDb(EntityDb[K, T]):
+    """
+    Read-through cache in front of an entity db.
+    Every change done via this db invalidates the cache.
+    Changes announced on the message bus via one of the given channels invalidate the element with the id
+    given in the event data (or the complete cache, if the event does not carry an id).
+    Every cached element is reloaded after the given time to live at the latest.
+    Cached elements are handed out as copies, so callers can not change the cache by accident.
+    """
+
+    def __init__(
+        self,
+        db: EntityDb[K, T],
+        name: str,
+        time_to_live: timedelta = timedelta(minutes=5),
+        message_bus: Optional[MessageBus] = None,
+        invalidate_on: Optional[List[str]] = None,
+    ):
+        self.db = db
+        self.name = name
+        self.time_to_live = time_to_live.total_seconds()
+        self.message_bus = message_bus
+        self.invalidate_on = invalidate_on or []
+        # key -> (valid until, element or None if the element does not exist)
+        self.elements: Dict[K, Tuple[float, Optional[T]]] = {}
+        # all elements: (valid until, elements)
+        self.all_elements: Optional[Tuple[float, List[T]]] = None
+        # incremented with every invalidation: elements loaded while the cache is invalidated are not cached
+        self.generation = 0
+        self.listener: Optional[Task[None]] = None
+
+    def invalidate(self, key: Optional[K] = None) -> None:
+        self.generation += 1
+        self.all_elements = None
+        if key is None:
+            self.elements.clear()
+        else:
+            self.elements.pop(key, None)
+
+    def keys(self) -> AsyncGenerator[K, None]:
+        return self.db.keys()
+
+    async def all(self) -> AsyncGenerator[T, None]:
+        cached = self.all_elements
+        if cached is None or cached[0] < time.monotonic():
+            generation = self.generation
+            cached = (time.monotonic() + self.time_to_live, [elem async for elem in self.db.all()])
+            if generation == self.generation:
+                self.all_elements = cached
+        for elem in deepcopy(cached[1]):
+            yield elem
+
+    async def update_many(self, elements: List[T]) -> None:
+        try:
+            await self.db.update_many(elements)
+        finally:
+            self.invalidate()
+
+    async def get(self, key: K) -> Optional[T]:
+        cached = self.elements.get(key)
+        if cached is None or cached[0] < time.monotonic():
+            generation = self.generation
+            cached = (time.monotonic() + self.time_to_live, await self.db.get(key))
+            if generation == self.generation:
+                self.elements[key] = cached
+        return deepcopy(cached[1])
+
+    async def update(self, t: T) -> T:
+        try:
+            return await self.db.update(t)
+        finally:
+            self.invalidate()
+
+    async def delete(self, key: K) -> None:
+        try:
+            await self.db.delete(key)
+        finally:
+            self.invalidate(key)
+
+    async def delete_value(self, value: T) -> None:
+        try:
+            await self.db.delete_value(value)
+        finally:
+            self.invalidate()
+
+    async def create_update_schema(self) -> None:
+        return await self.db.create_update_schema()
+
+    async def wipe(self) -> bool:
+        try:
+            return await self.db.wipe()
+        finally:
+            self.invalidate()
+
+    async def start(self) -> None:
+        if self.message_bus and self.invalidate_on and self.listener is None:
+            subscribed = asyncio.Event()
+            self.listener = asyncio.create_task(self.__handle_events(self.message_bus, subscribed))
+            await subscribed.wait()
+
+    async def stop(self) -> None:
+        if self.listener:
+            with suppress(Exception):
+                self.listener.cancel()
+            self.listener = None
+
+    async def __handle_events(self, message_bus: MessageBus, subscribed: asyncio.Event) -> None:
+        subscriber_id = SubscriberId(f"resotocore.cache.{self.name}")
+        async with message_bus.subscribe(subscriber_id, self.invalidate_on) as events:
+            subscribed.set()
+            while True:
+                event = await events.get()
+                key = event.data.get("id") if isinstance(event.data, dict) else None
+                log.debug(f"Cache {self.name}: invalidate {key or 'all'} on {event.message_type}")
+                self.invalidate(key)
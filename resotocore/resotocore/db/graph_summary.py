@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Union
+
+from attrs import evolve
+
+from resotocore.model.graph_access import Section
+from resotocore.model.resolve_in_graph import NodePath
+from resotocore.query.model import (
+    Query,
+    Term,
+    AllTerm,
+    IsTerm,
+    Predicate,
+    CombinedTerm,
+    NotTerm,
+    AggregateFunction,
+    AggregateVariableName,
+    AggregateVariableCombined,
+)
+from resotocore.types import Json
+from resotocore.util import json_hash, value_in_path
+
+# The summary counts the nodes of a graph grouped by kinds, kind and the resolved cloud, account and region.
+# Every summary document has the shape of a node (with only the grouped properties) and the number of nodes.
+summary_ancestors = ["cloud", "account", "region"]
+summary_paths: Set[str] = {
+    "kinds",
+    "reported.kind",
+    *(f"ancestors.{ancestor}.reported.{prop}" for ancestor in summary_ancestors for prop in ["id", "name"]),
+}
+# only simple comparisons can be answered from the summary
+summary_ops = {"==", "!=", "in", "not in"}
+
+
+def summary_group(node: Json) -> Json:
+    """
+    Extract the properties of the node that define its summary group.
+    """
+    ancestors = node.get(Section.ancestors) or {}
+    group_ancestors: Json = {}
+    for name in summary_ancestors:
+        reported = value_in_path(ancestors, [name, Section.reported])
+        if reported:
+            group_ancestors[name] = {Section.reported: {"id": reported.get("id"), "name": reported.get("name")}}
+    return {
+        "kinds": node.get("kinds") or [],
+        Section.reported: {"kind": value_in_path(node, NodePath.reported_kind)},
+        Section.ancestors: group_ancestors,
+    }
+
+
+class SummaryDelta:
+    """
+    Collects the change of the node count per summary group.
+    """
+
+    def __init__(self) -> None:
+        self.groups: Dict[str, Json] = {}
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def add(self, node: Json, count: int = 1) -> None:
+        self.add_group(summary_group(node), count)
+
+    def add_group(self, group: Json, count: int) -> None:
+        key = json_hash(group)
+        self.groups[key] = group
+        self.counts[key] += count
+
+    def remove(self, node: Json) -> None:
+        self.add(node, -1)
+
+    def change(self, before: Json, after: Json) -> None:
+        before_group = summary_group(before)
+        after_group = summary_group(after)
+        if before_group != after_group:
+            self.add_group(before_group, -1)
+            self.add_group(after_group, 1)
+
+    def updates(self) -> List[Json]:
+        """
+        One document per changed group: the count holds the change of the number of nodes.
+        """
+        return [{"_key": key, **self.groups[key], "count": count} for key, count in self.counts.items() if count != 0]
+
+    def decreased_keys(self) -> List[str]:
+        """
+        Keys of all groups with fewer nodes: only these groups can become empty.
+        """
+        return [key for key, count in self.counts.items() if count < 0]
+
+    def __iadd__(self, other: SummaryDelta) -> SummaryDelta:
+        self.groups.update(other.groups)
+        for key, count in other.counts.items():
+            self.counts[key] += count
+        return self
+
+    def __bool__(self) -> bool:
+        return any(count != 0 for count in self.counts.values())
+
+
+def summary_query(query: Query) -> Optional[Query]:
+    """
+    Check if the given query is a count aggregation, that can be answered from the summary.
+    This is the case, if the query filters and groups only by summary properties and only counts nodes.
+    :return: the query to run against the summary or None, if the query can not be answered from the summary.
+    """
+    aggregate = query.aggregate
+    if aggregate is None or query.preamble or len(query.parts) != 1:
+        return None
+    part = query.parts[0]
+    if part.navigation or part.with_clause or part.tag or part.limit or part.reverse_result:
+        return None
+
+    def supported_term(term: Term) -> bool:
+        if isinstance(term, (AllTerm, IsTerm)):
+            return True
+        elif isinstance(term, Predicate):
+            return term.name in summary_paths and term.op in summary_ops and not term.args
+        elif isinstance(term, NotTerm):
+            return supported_term(term.term)
+        elif isinstance(term, CombinedTerm):
+            return supported_term(term.left) and supported_term(term.right)
+        else:
+            return False
+
+    def supported_variable(name: Union[AggregateVariableName, AggregateVariableCombined]) -> bool:
+        if isinstance(name, AggregateVariableName):
+            return name.name in summary_paths
+        return all(p.name in summary_paths for p in name.parts if isinstance(p, AggregateVariableName))
+
+    def counts_nodes(fn: AggregateFunction) -> bool:
+        return fn.function == "sum" and fn.name == 1 and not fn.ops
+
+    if not supported_term(part.term):
+        return None
+    if not all(supported_variable(v.name) for v in aggregate.group_by):
+        return None
+    if not all(counts_nodes(fn) for fn in aggregate.group_func):
+        return None
+    if not all(s.name in summary_paths for s in part.sort):
+        return None
+    # every summary document counts the number of nodes in its group
+    group_func = [AggregateFunction("sum", "count", as_name=fn.get_as_name()) for fn in aggregate.group_func]
+    return evolve(query, aggregate=evolve(aggregate, group_func=group_func))
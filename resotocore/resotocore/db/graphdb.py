@@ -1,37 +1,84 @@
 import asyncio
 import logging
+import re
 import uuid
 from abc import ABC, abstractmethod
 from collections import defaultdict
 from datetime import datetime, timedelta
 from functools import partial
 from numbers import Number
-from typing import DefaultDict, Optional, Callable, AsyncGenerator, Any, Iterable, Dict, List, Tuple, TypeVar, cast
+from typing import (
+    DefaultDict,
+    Optional,
+    Callable,
+    AsyncGenerator,
+    Any,
+    Iterable,
+    Dict,
+    List,
+    Set,
+    Tuple,
+    TypeVar,
+    cast,
+    Union,
+)
 
 from arango import AnalyzerGetError
 from arango.collection import VertexCollection, StandardCollection, EdgeCollection
 from arango.graph import Graph
+from aiostream import stream
 from arango.typings import Json
 from networkx import MultiDiGraph
+from resotolib.durations import time_units
 
 from resotocore.analytics import CoreEvent, AnalyticsEventSender
+from resotocore.async_extensions import run_async
+from resotocore.core_config import GraphUpdateConfig
 from resotocore.db import arango_query, EstimatedSearchCost
 from resotocore.db.arango_query import fulltext_delimiter
 from resotocore.db.async_arangodb import AsyncArangoDB, AsyncArangoTransactionDB, AsyncArangoDBBase, AsyncCursorContext
+from resotocore.db.graph_summary import SummaryDelta, summary_query
 from resotocore.db.model import GraphUpdate, QueryModel
 from resotocore.error import InvalidBatchUpdate, ConflictingChangeInProgress, NoSuchChangeError, OptimisticLockingFailed
 from resotocore.model.adjust_node import AdjustNode
-from resotocore.model.graph_access import GraphAccess, GraphBuilder, EdgeTypes, Section
+from resotocore.model.compact_graph import CompactGraph, AnyGraphAccess, merge_graphs
+from resotocore.model.graph_access import GraphAccess, GraphBuilder, EdgeTypes, Section, StreamingGraphBuilder
 from resotocore.model.model import Model, ComplexKind, TransformKind
 from resotocore.model.resolve_in_graph import NodePath, GraphResolver
 from resotocore.query.model import Query
 from resotocore.types import JsonElement, EdgeType
-from resotocore.util import first, value_in_path_get, utc_str, uuid_str, value_in_path, json_hash, set_value_in_path
+from resotocore.util import (
+    first,
+    value_in_path_get,
+    utc_str,
+    uuid_str,
+    value_in_path,
+    json_hash,
+    set_value_in_path,
+    LRUCache,
+)
 from resotocore.ids import NodeId
 
 log = logging.getLogger(__name__)
 
 
+async def execute_many_async(
+    async_fn: Callable[[str, List[Json]], Any], name: str, array: List[Json], **kwargs: Any
+) -> None:
+    if array:
+        async_fn_with_args = partial(async_fn, **kwargs) if kwargs else async_fn
+        result = await async_fn_with_args(name, array)  # type: ignore
+        ex: Optional[Exception] = first(lambda x: isinstance(x, Exception), result)
+        if ex:
+            raise ex  # pylint: disable=raising-bad-type
+
+
+# matches all durations in a query string (e.g. 3d, 1.5h, 2 days), which are translated relative to now
+relative_time_re = re.compile(
+    "\\d\\s*(" + "|".join(sorted((n for _, names, _ in time_units for n in names), key=len, reverse=True)) + ")\\b"
+)
+
+
 class GraphDB(ABC):
     @property
     @abstractmethod
@@ -42,6 +89,10 @@ class GraphDB(ABC):
     async def get_node(self, model: Model, node_id: NodeId) -> Optional[Json]:
         pass
 
+    @abstractmethod
+    async def existing_node_ids(self, node_ids: List[NodeId]) -> Set[NodeId]:
+        pass
+
     @abstractmethod
     async def create_node(self, model: Model, node_id: NodeId, data: Json, under_node_id: NodeId) -> Json:
         pass
@@ -80,7 +131,21 @@ class GraphDB(ABC):
 
     @abstractmethod
     async def merge_graph(
-        self, graph_to_merge: MultiDiGraph, model: Model, maybe_change_id: Optional[str] = None, is_batch: bool = False
+        self,
+        graph_to_merge: Union[MultiDiGraph, CompactGraph],
+        model: Model,
+        maybe_change_id: Optional[str] = None,
+        is_batch: bool = False,
+    ) -> Tuple[List[str], GraphUpdate]:
+        pass
+
+    @abstractmethod
+    async def merge_graph_streaming(
+        self,
+        builder: StreamingGraphBuilder,
+        model: Model,
+        maybe_change_id: Optional[str] = None,
+        is_batch: bool = False,
     ) -> Tuple[List[str], GraphUpdate]:
         pass
 
@@ -124,6 +189,12 @@ class GraphDB(ABC):
     async def wipe(self) -> None:
         pass
 
+    @abstractmethod
+    async def revision(self) -> str:
+        """
+        The revision of the graph changes with every change to any node or edge.
+        """
+
     @abstractmethod
     async def to_query(self, query_model: QueryModel, with_edges: bool = False) -> Tuple[str, Json]:
         pass
@@ -133,14 +204,27 @@ class GraphDB(ABC):
         pass
 
 
+class SummaryCollection:
+    """
+    Summary documents have the shape of nodes: the query generator can use the summary collection as vertex collection.
+    """
+
+    def __init__(self, vertex_name: str) -> None:
+        self.vertex_name = vertex_name
+
+
 class ArangoGraphDB(GraphDB):
-    def __init__(self, db: AsyncArangoDB, name: str, adjust_node: AdjustNode) -> None:
+    def __init__(self, db: AsyncArangoDB, name: str, adjust_node: AdjustNode, config: GraphUpdateConfig) -> None:
         super().__init__()
         self._name = name
         self.node_adjuster = adjust_node
+        self.config = config
         self.vertex_name = name
         self.in_progress = f"{name}_in_progress"
+        self.summary_name = f"{name}_summary"
         self.db = db
+        self.query_cache: LRUCache[Tuple[str, bool], Tuple[str, Json]] = LRUCache("aql_query", 1024)
+        self.query_cache_model: Optional[Model] = None
 
     @property
     def name(self) -> str:
@@ -153,19 +237,24 @@ class ArangoGraphDB(GraphDB):
         node = await self.by_id(node_id)
         return self.document_to_instance_fn(model)(node) if node is not None else None
 
+    async def existing_node_ids(self, node_ids: List[NodeId]) -> Set[NodeId]:
+        with await self.db.aql(query=self.query_existing_node_ids(), bind_vars={"rids": node_ids}) as cursor:
+            return {cast(NodeId, nid) for nid in cursor}
+
     async def create_node(self, model: Model, node_id: NodeId, data: Json, under_node_id: NodeId) -> Json:
         graph = GraphBuilder(model)
         graph.add_node(node_id, data)
         graph.add_edge(under_node_id, node_id, EdgeTypes.default)
         access = GraphAccess(graph.graph, node_id, {under_node_id})
-        _, node_inserts, _, _ = self.prepare_nodes(access, [], model)
+        _, node_inserts, _, _, summary = self.prepare_nodes(access, [], model)
         _, edge_inserts, _ = self.prepare_edges(access, [], EdgeTypes.default)
         assert len(node_inserts) == 1
         assert len(edge_inserts) == 1
         edge_collection = self.edge_collection(EdgeTypes.default)
-        async with self.db.begin_transaction(write=[self.vertex_name, edge_collection]) as tx:
+        async with self.db.begin_transaction(write=[self.vertex_name, edge_collection, self.summary_name]) as tx:
             result: Json = await tx.insert(self.vertex_name, node_inserts[0], return_new=True)
             await tx.insert(edge_collection, edge_inserts[0])
+            await self.update_summary(tx, summary)
             trafo = self.document_to_instance_fn(model)
             return trafo(result["new"])
 
@@ -215,7 +304,10 @@ class ArangoGraphDB(GraphDB):
     async def update_node(
         self, model: Model, node_id: NodeId, patch_or_replace: Json, replace: bool, section: Optional[str]
     ) -> Json:
-        return await self.update_node_with(self.db, model, node_id, patch_or_replace, replace, section)
+        # the node and the summary are updated together
+        write = [self.vertex_name, self.summary_name]
+        async with self.db.begin_transaction(read=[self.vertex_name], write=write) as tx:
+            return await self.update_node_with(tx, model, node_id, patch_or_replace, replace, section)
 
     async def update_node_with(
         self,
@@ -261,11 +353,14 @@ class ArangoGraphDB(GraphDB):
                 update[sec] = adjusted[sec]
 
         result = await db.update(self.vertex_name, update, return_new=True, merge=not replace)
+        summary = SummaryDelta()
+        summary.change(node, result["new"])
+        await self.update_summary(db, summary)
         trafo = self.document_to_instance_fn(model)
         return trafo(result["new"])
 
     async def update_nodes(
-        self, model: Model, patches_by_id: Dict[NodeId, Json], **kwargs: Any
+        self, model: Model, patches_by_id: Dict[NodeId, Json], replace: bool = False, **kwargs: Any
     ) -> AsyncGenerator[Json, None]:
         log.info(f"Update nodes called with {len(patches_by_id)} updates.")
         # collect all sections to be deleted
@@ -291,12 +386,13 @@ class ArangoGraphDB(GraphDB):
                 updated_nodes[hashed].append(uid)
 
         # all changes are executed inside a transaction: either all changes are successful or none
-        async with self.db.begin_transaction(read=[self.vertex_name], write=[self.vertex_name]) as tx:
+        write = [self.vertex_name, self.summary_name]
+        async with self.db.begin_transaction(read=[self.vertex_name], write=write) as tx:
 
             async def update_node_multi(js: Json, node_ids: List[NodeId]) -> AsyncGenerator[Json, None]:
                 for node_id in node_ids:
                     log.debug(f"Update node: change={js} on {node_id}")
-                    single_update = await self.update_node_with(tx, model, node_id, js, False, None)
+                    single_update = await self.update_node_with(tx, model, node_id, js, replace, None)
                     yield single_update
 
             for section, ids in deletes.items():
@@ -306,11 +402,11 @@ class ArangoGraphDB(GraphDB):
 
             for change_id, change in updates.items():
                 items = updated_nodes[change_id]
-                if len(change) == 1 and Section.desired in change:
+                if not replace and len(change) == 1 and Section.desired in change:
                     log.debug(f"Update desired many: change={change} on {items}")
                     patch = change[Section.desired]
                     result = self.update_nodes_section_with(tx, model, Section.desired, patch, items)
-                elif len(change) == 1 and Section.metadata in change:
+                elif not replace and len(change) == 1 and Section.metadata in change:
                     log.debug(f"Update metadata many: change={change} on {items}")
                     patch = change[Section.metadata]
                     result = self.update_nodes_section_with(tx, model, Section.metadata, patch, items)
@@ -349,15 +445,26 @@ class ArangoGraphDB(GraphDB):
 
     async def delete_node(self, node_id: NodeId) -> None:
         with await self.db.aql(query=self.query_count_direct_children(), bind_vars={"rid": node_id}) as cursor:
-            count = cursor.next()
+            count = cast(int, cursor.next())
             if count > 0:
                 raise AttributeError(f"Can not delete node, since it has {count} child(ren)!")
 
-        with await self.db.aql(query=self.query_node_by_id(), bind_vars={"rid": node_id}) as cursor:
-            if not cursor.empty():
-                await self.db.delete_vertex(self.name, cursor.next())
-            else:
-                return None
+        edge_collections = [self.edge_collection(a) for a in EdgeTypes.all]
+        write = [self.vertex_name, self.summary_name, *edge_collections]
+        # the node, its edges and the summary are deleted together
+        async with self.db.begin_transaction(write=write) as tx:
+            with await tx.aql(query=self.query_node_by_id(), bind_vars={"rid": node_id}) as cursor:
+                if cursor.empty():
+                    return None
+                node = cursor.next()
+            for edge_collection in edge_collections:
+                bind_vars = {"node_id": node["_id"]}
+                with await tx.aql(query=self.query_delete_edges_of_node(edge_collection), bind_vars=bind_vars):
+                    pass
+            await tx.delete(self.vertex_name, node, check_rev=False)
+            summary = SummaryDelta()
+            summary.remove(node)
+            await self.update_summary(tx, summary)
 
     async def by_id(self, node_id: NodeId) -> Optional[Json]:
         return await self.by_id_with(self.db, node_id)
@@ -406,8 +513,14 @@ class ArangoGraphDB(GraphDB):
             return graph
 
     async def search_aggregation(self, query: QueryModel) -> AsyncCursorContext:
-        q_string, bind = await self.to_query(query)
         assert query.query.aggregate is not None, "Given query has no aggregation section"
+        if summary := summary_query(query.query):
+            # count aggregations are answered from the summary, which holds one document per group
+            q_string, bind = arango_query.to_query(
+                SummaryCollection(self.summary_name), QueryModel(summary, query.model)
+            )
+        else:
+            q_string, bind = await self.to_query(query)
         return await self.db.aql_cursor(query=q_string, bind_vars=bind)
 
     async def explain(self, query: QueryModel, with_edges: bool = False) -> EstimatedSearchCost:
@@ -417,8 +530,14 @@ class ArangoGraphDB(GraphDB):
         await self.db.truncate(self.vertex_name)
         for edge_type in EdgeTypes.all:
             await self.db.truncate(self.edge_collection(edge_type))
+        await self.db.truncate(self.summary_name)
         await self.insert_genesis_data()
 
+    async def revision(self) -> str:
+        collections = [self.vertex_name, *(self.edge_collection(edge_type) for edge_type in EdgeTypes.all)]
+        revisions = await asyncio.gather(*(self.db.revision(collection) for collection in collections))
+        return "-".join(revisions)
+
     @staticmethod
     def document_to_instance_fn(model: Model, query: Optional[Query] = None) -> Callable[[Json], Optional[Json]]:
         def props(doc: Json, result: Json, definition: Iterable[str]) -> None:
@@ -513,13 +632,26 @@ class ArangoGraphDB(GraphDB):
                 ]
                 + edge_inserts
                 + edge_deletes
+                + [
+                    # the same group can be changed in different partitions of the update
+                    f'for e in {temp_name} filter e.action=="summary_update" '
+                    "collect key=e.data._key into entries=e.data "
+                    "let update=MERGE(entries[0], {count: SUM(entries[*].count)}) "
+                    "upsert {_key: key} insert update update {count: OLD.count + update.count} "
+                    f"in {self.summary_name}",
+                    # only groups with fewer nodes can become empty
+                    f'for e in {temp_name} filter e.action=="summary_update" '
+                    "collect key=e.data._key aggregate change=SUM(e.data.count) filter change < 0 "
+                    f"for s in {self.summary_name} filter s._key==key and s.count <= 0 remove s in {self.summary_name}",
+                ]
                 + [f'remove {{_key: "{change_key}"}} in {self.in_progress}'],
             )
         )
         await self.db.execute_transaction(
             f'function () {{\nvar db=require("@arangodb").db;\n{updates}\n}}',
             read=[temp_name],
-            write=[self.edge_collection(a) for a in EdgeTypes.all] + [self.vertex_name, self.in_progress],
+            write=[self.edge_collection(a) for a in EdgeTypes.all]
+            + [self.vertex_name, self.in_progress, self.summary_name],
         )
         log.info(f"Move temp->proper data: change_id={change_id} done.")
 
@@ -564,13 +696,15 @@ class ArangoGraphDB(GraphDB):
         return self.node_adjuster.adjust(json)
 
     def prepare_nodes(
-        self, access: GraphAccess, node_cursor: Iterable[Json], model: Model
-    ) -> Tuple[GraphUpdate, List[Json], List[Json], List[Json]]:
+        self, access: AnyGraphAccess, node_cursor: Iterable[Json], model: Model
+    ) -> Tuple[GraphUpdate, List[Json], List[Json], List[Json], SummaryDelta]:
         log.info(f"Prepare nodes for subgraph {access.root()}")
         info = GraphUpdate()
         resource_inserts: List[Json] = []
         resource_updates: List[Json] = []
         resource_deletes: List[Json] = []
+        # summary changes of inserted nodes: see summary_of_changes for updated and deleted nodes
+        summary = SummaryDelta()
 
         optional_properties = [*Section.all_ordered, "refs", "kinds", "flat", "hash"]
 
@@ -582,18 +716,20 @@ class ArangoGraphDB(GraphDB):
                 if value:
                     js_doc[prop] = value
             resource_inserts.append(js_doc)
+            summary.add(js_doc)
             info.nodes_created += 1
 
         def update_or_delete_node(node: Json) -> None:
             key = node["_key"]
             hash_string = node["hash"]
-            elem = access.node(key)
+            elem = access.visit_node(key)
             if elem is None:
                 # node is in db, but not in the graph any longer: delete node
                 resource_deletes.append({"_key": key})
                 info.nodes_deleted += 1
-            elif elem["hash"] != hash_string:
+            elif elem.get("hash") != hash_string and access.dump(key, elem)["hash"] != hash_string:
                 # node is in db and in the graph, content is different
+                # note: the node is only dumped (validated, hashed, flattened), if the hash does not match
                 adjusted: Json = self.adjust_node(model, elem, node["created"])
                 js = {"_key": key, "updated": access.at_json}
                 for prop in optional_properties:
@@ -608,7 +744,64 @@ class ArangoGraphDB(GraphDB):
 
         for not_visited in access.not_visited_nodes():
             insert_node(not_visited)
-        return info, resource_inserts, resource_updates, resource_deletes
+        return info, resource_inserts, resource_updates, resource_deletes, summary
+
+    async def summary_of_changes(self, resource_updates: List[Json], resource_deletes: List[Json]) -> SummaryDelta:
+        # the node query of an update only reads the update index: the summary group is loaded for changes only
+        updates = {update["_key"]: update for update in resource_updates}
+        node_ids = [*updates.keys(), *(delete["_key"] for delete in resource_deletes)]
+
+        def compute(cursor: Iterable[Json]) -> SummaryDelta:
+            summary = SummaryDelta()
+            for node in cursor:
+                update = updates.get(node["_key"])
+                if update is None:
+                    summary.remove(node)
+                else:
+                    # properties not defined in the update are not changed
+                    summary.change(node, {**node, **update})
+            return summary
+
+        bind_vars = {"ids": node_ids}
+        with await self.db.aql(self.query_summary_groups_by_ids(), bind_vars=bind_vars, batch_size=50000) as cursor:
+            summary: SummaryDelta = await run_async(compute, cursor)
+            return summary
+
+    async def update_summary(self, db: AsyncArangoDBBase, summary: SummaryDelta) -> None:
+        if summary:
+            with await db.aql(self.query_update_summary(), bind_vars={"updates": summary.updates()}):
+                pass
+            # only groups with fewer nodes can become empty
+            if decreased := summary.decreased_keys():
+                with await db.aql(self.query_delete_empty_summary(), bind_vars={"keys": decreased}):
+                    pass
+
+    async def summary_groups(self) -> SummaryDelta:
+        summary = SummaryDelta()
+        with await self.db.aql(self.query_summary_groups()) as cursor:
+            for group in cursor:
+                summary.add(group, group.pop("count"))
+        return summary
+
+    async def rebuild_summary(self) -> None:
+        log.info(f"Rebuild summary {self.summary_name}")
+        summary = await self.summary_groups()
+        await self.db.truncate(self.summary_name)
+        await self.update_summary(self.db, summary)
+
+    async def check_summary(self) -> bool:
+        """
+        Compare the summary with the counted nodes of the graph and rebuild it, if it is not consistent.
+        :return: True if the summary was consistent, otherwise False.
+        """
+        expected = {doc["_key"]: doc["count"] for doc in (await self.summary_groups()).updates()}
+        with await self.db.aql(f"FOR s IN {self.summary_name} RETURN [s._key, s.count]") as cursor:
+            maintained = {key: count for key, count in cursor}
+        if expected == maintained:
+            return True
+        log.warning(f"Summary {self.summary_name} is not consistent with the graph {self.name}.")
+        await self.rebuild_summary()
+        return False
 
     def edge_to_json(self, from_node: str, to_node: str, refs: Optional[Dict[str, str]]) -> Json:
         key = self.db_edge_key(from_node, to_node)
@@ -621,7 +814,7 @@ class ArangoGraphDB(GraphDB):
         return js
 
     def prepare_edges(
-        self, access: GraphAccess, edge_cursor: Iterable[Json], edge_type: EdgeType
+        self, access: AnyGraphAccess, edge_cursor: Iterable[Json], edge_type: EdgeType
     ) -> Tuple[GraphUpdate, List[Json], List[Json]]:
         log.info(f"Prepare edges of type {edge_type} for subgraph {access.root()}")
         info = GraphUpdate()
@@ -657,47 +850,64 @@ class ArangoGraphDB(GraphDB):
 
         return info, edges_inserts, edges_deletes
 
+    async def prepare_graph(
+        self,
+        sub: AnyGraphAccess,
+        node_query: Tuple[str, Json],
+        edge_query: Callable[[EdgeType], Tuple[str, Json]],
+        model: Model,
+    ) -> Tuple[
+        GraphUpdate,
+        List[Json],
+        List[Json],
+        List[Json],
+        SummaryDelta,
+        Dict[EdgeType, List[Json]],
+        Dict[EdgeType, List[Json]],
+    ]:
+        graph_info = GraphUpdate()
+        # check all nodes for this subgraph
+        query, bind = node_query
+        log.debug(f"Query for nodes: {sub.root()}")
+        with await self.db.aql(query, bind_vars=bind, batch_size=50000) as node_cursor:
+            # the diff is computed in a separate thread: fetching the next batch of the cursor is blocking
+            node_info, ni, nu, nd, summary = await run_async(self.prepare_nodes, sub, node_cursor, model)
+            graph_info += node_info
+        if nu or nd:
+            summary += await self.summary_of_changes(nu, nd)
+
+        # check all edges in all relevant edge-collections
+        edge_inserts: DefaultDict[EdgeType, List[Json]] = defaultdict(list)
+        edge_deletes: DefaultDict[EdgeType, List[Json]] = defaultdict(list)
+        for edge_type in EdgeTypes.all:
+            query, bind = edge_query(edge_type)
+            log.debug(f"Query for edges of type {edge_type}: {sub.root()}")
+            with await self.db.aql(query, bind_vars=bind, batch_size=50000) as ec:
+                edge_info, gei, ged = await run_async(self.prepare_edges, sub, ec, edge_type)
+                graph_info += edge_info
+                edge_inserts[edge_type] = gei
+                edge_deletes[edge_type] = ged
+        return graph_info, ni, nu, nd, summary, edge_inserts, edge_deletes
+
+    def merge_edges_query(self, merge_node: str, merge_node_kind: str, edge_type: EdgeType) -> Tuple[str, Json]:
+        return self.query_update_edges(edge_type, merge_node_kind), {"update_id": merge_node}
+
     async def merge_graph(
-        self, graph_to_merge: MultiDiGraph, model: Model, maybe_change_id: Optional[str] = None, is_batch: bool = False
+        self,
+        graph_to_merge: Union[MultiDiGraph, CompactGraph],
+        model: Model,
+        maybe_change_id: Optional[str] = None,
+        is_batch: bool = False,
     ) -> Tuple[List[str], GraphUpdate]:
         change_id = maybe_change_id if maybe_change_id else uuid_str()
 
-        async def prepare_graph(
-            sub: GraphAccess, node_query: Tuple[str, Json], edge_query: Callable[[EdgeType], Tuple[str, Json]]
-        ) -> Tuple[
-            GraphUpdate, List[Json], List[Json], List[Json], Dict[EdgeType, List[Json]], Dict[EdgeType, List[Json]]
-        ]:
-            graph_info = GraphUpdate()
-            # check all nodes for this subgraph
-            query, bind = node_query
-            log.debug(f"Query for nodes: {sub.root()}")
-            with await self.db.aql(query, bind_vars=bind, batch_size=50000) as node_cursor:
-                node_info, ni, nu, nd = self.prepare_nodes(sub, node_cursor, model)
-                graph_info += node_info
-
-            # check all edges in all relevant edge-collections
-            edge_inserts: DefaultDict[EdgeType, List[Json]] = defaultdict(list)
-            edge_deletes: DefaultDict[EdgeType, List[Json]] = defaultdict(list)
-            for edge_type in EdgeTypes.all:
-                query, bind = edge_query(edge_type)
-                log.debug(f"Query for edges of type {edge_type}: {sub.root()}")
-                with await self.db.aql(query, bind_vars=bind, batch_size=50000) as ec:
-                    edge_info, gei, ged = self.prepare_edges(sub, ec, edge_type)
-                    graph_info += edge_info
-                    edge_inserts[edge_type] = gei
-                    edge_deletes[edge_type] = ged
-            return graph_info, ni, nu, nd, edge_inserts, edge_deletes
-
-        roots, parent, graphs = GraphAccess.merge_graphs(graph_to_merge)
+        roots, parent, graphs = merge_graphs(graph_to_merge)
         logging.info(f"merge_graph {len(roots)} merge nodes found. change_id={change_id}, is_batch={is_batch}.")
 
         def parent_edges(edge_type: EdgeType) -> Tuple[str, Json]:
-            edge_ids = [self.db_edge_key(f, t) for f, t, et in parent.g.edges(data="edge_type") if et == edge_type]
+            edge_ids = [self.db_edge_key(f, t) for f, t in parent.edges(edge_type)]
             return self.query_update_edges_by_ids(edge_type), {"ids": edge_ids}
 
-        def merge_edges(merge_node: str, merge_node_kind: str, edge_type: EdgeType) -> Tuple[str, Json]:
-            return self.query_update_edges(edge_type, merge_node_kind), {"update_id": merge_node}
-
         K = TypeVar("K")  # noqa: N806
         V = TypeVar("V")  # noqa: N806
 
@@ -712,34 +922,124 @@ class ArangoGraphDB(GraphDB):
         log.debug("Mark all parent nodes for this update to avoid conflicting changes")
         await self.mark_update(roots, list(parent.nodes), change_id, is_batch)
         try:
-            parents_nodes = self.query_update_nodes_by_ids(), {"ids": list(parent.g.nodes)}
-            info, nis, nus, nds, eis, eds = await prepare_graph(parent, parents_nodes, parent_edges)
-            for num, (root, graph) in enumerate(graphs):
+            parents_nodes = self.query_update_nodes_by_ids(), {"ids": list(parent.nodes)}
+            info, nis, nus, nds, sds, eis, eds = await self.prepare_graph(parent, parents_nodes, parent_edges, model)
+
+            async def prepare_sub_graph(
+                num: int, root_graph: Tuple[str, AnyGraphAccess]
+            ) -> Tuple[
+                GraphUpdate,
+                List[Json],
+                List[Json],
+                List[Json],
+                SummaryDelta,
+                Dict[EdgeType, List[Json]],
+                Dict[EdgeType, List[Json]],
+            ]:
+                root, graph = root_graph
                 root_kind = GraphResolver.resolved_kind(graph_to_merge.nodes[root])
                 if root_kind:
                     log.info(f"Update subgraph: root={root} ({root_kind}, {num+1} of {len(roots)})")
                     node_query = self.query_update_nodes(root_kind), {"update_id": root}
-                    edge_query = partial(merge_edges, root, root_kind)
+                    edge_query = partial(self.merge_edges_query, root, root_kind)
+                    return await self.prepare_graph(graph, node_query, edge_query, model)
+                else:
+                    # Already checked in GraphAccess - only here as safeguard.
+                    raise AttributeError(f"Kind of update root {root} is not a pre-resolved and can not be used!")
 
-                    i, ni, nu, nd, ei, ed = await prepare_graph(graph, node_query, edge_query)
+            # diff up to merge_parallelism sub graphs concurrently.
+            # the results are ordered by merge root, so the combined result is deterministic.
+            prepared = stream.starmap(
+                stream.enumerate(stream.iterate(graphs)),
+                prepare_sub_graph,
+                ordered=True,
+                task_limit=self.config.merge_parallelism,
+            )
+            async with prepared.stream() as streamer:
+                async for i, ni, nu, nd, sd, ei, ed in streamer:
                     info += i
                     nis += ni
                     nus += nu
                     nds += nd
+                    sds += sd
                     eis = combine_dict(eis, ei)
                     eds = combine_dict(eds, ed)
-                else:
-                    # Already checked in GraphAccess - only here as safeguard.
-                    raise AttributeError(f"Kind of update root {root} is not a pre-resolved and can not be used!")
 
             log.debug(f"Update prepared: {info}. Going to persist the changes.")
             await self.refresh_marked_update(change_id)
-            await self.persist_update(change_id, is_batch, info, nis, nus, nds, eis, eds)
+            await self.persist_update(change_id, is_batch, info, nis, nus, nds, sds, eis, eds)
             return roots, info
         except Exception as ex:
             await self.delete_marked_update(change_id)
             raise ex
 
+    async def merge_graph_streaming(
+        self,
+        builder: StreamingGraphBuilder,
+        model: Model,
+        maybe_change_id: Optional[str] = None,
+        is_batch: bool = False,
+    ) -> Tuple[List[str], GraphUpdate]:
+        """
+        Merge the graph partition by partition.
+        Every partition is diffed against the database and the changes are written to the temp collection
+        of this change, before the next partition is materialized.
+        The parent graph is handled last, since it depends on the resolved merge roots.
+        The temp collection is moved to the real collections in one transaction, unless this is a batch update.
+        """
+        change_id = maybe_change_id if maybe_change_id else uuid_str()
+        roots, parents, partitions = builder.merge_partitions()
+        logging.info(
+            f"merge_graph_streaming {len(roots)} merge nodes found. change_id={change_id}, is_batch={is_batch}."
+        )
+
+        # this will throw an exception, in case of a conflicting update (--> outside try block)
+        log.debug("Mark all parent nodes for this update to avoid conflicting changes")
+        await self.mark_update(roots, list(parents), change_id, is_batch)
+        temp: Optional[StandardCollection] = None
+        try:
+            info = GraphUpdate()
+            temp = await self.get_tmp_collection(change_id)
+            for num, (root, partition) in enumerate(partitions):
+                _, _, graphs = GraphAccess.merge_graphs(partition)
+                for sub_root, graph in graphs:
+                    root_kind = GraphResolver.resolved_kind(partition.nodes[sub_root])
+                    if root_kind:
+                        log.info(f"Update subgraph: root={sub_root} ({root_kind}, {num+1} of {len(roots)})")
+                        node_query = self.query_update_nodes(root_kind), {"update_id": sub_root}
+                        edge_query = partial(self.merge_edges_query, sub_root, root_kind)
+                        i, ni, nu, nd, sd, ei, ed = await self.prepare_graph(graph, node_query, edge_query, model)
+                        info += i
+                        await self.store_to_tmp_collection(temp, ni, nu, nd, sd, ei, ed)
+                    else:
+                        # Already checked in GraphAccess - only here as safeguard.
+                        raise AttributeError(f"Kind of update root {root} is not a pre-resolved and can not be used!")
+                await self.refresh_marked_update(change_id)
+
+            parent = builder.parent_graph()
+
+            def parent_edges(edge_type: EdgeType) -> Tuple[str, Json]:
+                edge_ids = [self.db_edge_key(f, t) for f, t in parent.edges(edge_type)]
+                return self.query_update_edges_by_ids(edge_type), {"ids": edge_ids}
+
+            parents_nodes = self.query_update_nodes_by_ids(), {"ids": list(parent.nodes)}
+            i, ni, nu, nd, sd, ei, ed = await self.prepare_graph(parent, parents_nodes, parent_edges, model)
+            info += i
+            await self.store_to_tmp_collection(temp, ni, nu, nd, sd, ei, ed)
+
+            log.debug(f"Update prepared: {info}. Going to persist the changes.")
+            if is_batch:
+                await self.refresh_marked_update(change_id)
+            else:
+                await self.move_temp_to_proper(change_id, temp.name)
+                await self.db.delete_collection(temp.name)
+            return roots, info
+        except Exception as ex:
+            if temp is not None:
+                await self.db.delete_collection(temp.name)
+            await self.delete_marked_update(change_id)
+            raise ex
+
     async def persist_update(
         self,
         change_id: str,
@@ -748,34 +1048,16 @@ class ArangoGraphDB(GraphDB):
         resource_inserts: List[Json],
         resource_updates: List[Json],
         resource_deletes: List[Json],
+        summary: SummaryDelta,
         edge_inserts: Dict[EdgeType, List[Json]],
         edge_deletes: Dict[EdgeType, List[Json]],
     ) -> None:
-        async def execute_many_async(
-            async_fn: Callable[[str, List[Json]], Any], name: str, array: List[Json], **kwargs: Any
-        ) -> None:
-            if array:
-                async_fn_with_args = partial(async_fn, **kwargs) if kwargs else async_fn
-                result = await async_fn_with_args(name, array)  # type: ignore
-                ex: Optional[Exception] = first(lambda x: isinstance(x, Exception), result)
-                if ex:
-                    raise ex  # pylint: disable=raising-bad-type
-
-        async def trafo_many(
-            async_fn: Callable[[str, List[Json]], Any], name: str, array: List[Json], template: Json
-        ) -> None:
-            # update the array in place to not create another intermediate array
-            for idx, item in enumerate(array):
-                entry = template.copy()
-                entry["data"] = item
-                array[idx] = entry
-            await execute_many_async(async_fn, name, array)
-
         async def update_directly() -> None:
             log.debug(f"Persist the changes directly ({info.all_changes()} changes).")
             edge_collections = [self.edge_collection(a) for a in EdgeTypes.all]
             update_many_no_merge = partial(self.db.update_many, merge=False)
-            async with self.db.begin_transaction(write=edge_collections + [self.vertex_name, self.in_progress]) as tx:
+            write = edge_collections + [self.vertex_name, self.in_progress, self.summary_name]
+            async with self.db.begin_transaction(write=write) as tx:
                 # note: all requests are done sequentially on purpose
                 # https://www.arangodb.com/docs/stable/http/transaction-stream-transaction.html#concurrent-requests
                 await execute_many_async(self.db.insert_many, self.vertex_name, resource_inserts, overwrite=True)
@@ -788,22 +1070,13 @@ class ArangoGraphDB(GraphDB):
                     )
                 for ed_d_type, ed_delete in edge_deletes.items():
                     await execute_many_async(self.db.delete_many, self.edge_collection(ed_d_type), ed_delete)
+                await self.update_summary(tx, summary)
                 await self.delete_marked_update(change_id, tx)
 
         async def store_to_tmp_collection(temp: StandardCollection) -> None:
-            tmp = temp.name
-            ri = trafo_many(self.db.insert_many, tmp, resource_inserts, {"action": "node_insert"})
-            ru = trafo_many(self.db.insert_many, tmp, resource_updates, {"action": "node_update"})
-            rd = trafo_many(self.db.insert_many, tmp, resource_deletes, {"action": "node_delete"})
-            edge_i = [
-                trafo_many(self.db.insert_many, tmp, inserts, {"action": "edge_insert", "edge_type": tpe})
-                for tpe, inserts in edge_inserts.items()
-            ]
-            edge_u = [
-                trafo_many(self.db.insert_many, tmp, deletes, {"action": "edge_delete", "edge_type": tpe})
-                for tpe, deletes in edge_deletes.items()
-            ]
-            await asyncio.gather(*([ri, ru, rd] + edge_i + edge_u))
+            await self.store_to_tmp_collection(
+                temp, resource_inserts, resource_updates, resource_deletes, summary, edge_inserts, edge_deletes
+            )
 
         async def update_via_temp_collection() -> None:
             temp = await self.get_tmp_collection(change_id)
@@ -829,6 +1102,41 @@ class ArangoGraphDB(GraphDB):
             await update_via_temp_collection()
         log.debug("Persist update done.")
 
+    async def store_to_tmp_collection(
+        self,
+        temp: StandardCollection,
+        resource_inserts: List[Json],
+        resource_updates: List[Json],
+        resource_deletes: List[Json],
+        summary: SummaryDelta,
+        edge_inserts: Dict[EdgeType, List[Json]],
+        edge_deletes: Dict[EdgeType, List[Json]],
+    ) -> None:
+        async def trafo_many(
+            async_fn: Callable[[str, List[Json]], Any], name: str, array: List[Json], template: Json
+        ) -> None:
+            # update the array in place to not create another intermediate array
+            for idx, item in enumerate(array):
+                entry = template.copy()
+                entry["data"] = item
+                array[idx] = entry
+            await execute_many_async(async_fn, name, array)
+
+        tmp = temp.name
+        ri = trafo_many(self.db.insert_many, tmp, resource_inserts, {"action": "node_insert"})
+        ru = trafo_many(self.db.insert_many, tmp, resource_updates, {"action": "node_update"})
+        rd = trafo_many(self.db.insert_many, tmp, resource_deletes, {"action": "node_delete"})
+        su = trafo_many(self.db.insert_many, tmp, summary.updates(), {"action": "summary_update"})
+        edge_i = [
+            trafo_many(self.db.insert_many, tmp, inserts, {"action": "edge_insert", "edge_type": tpe})
+            for tpe, inserts in edge_inserts.items()
+        ]
+        edge_u = [
+            trafo_many(self.db.insert_many, tmp, deletes, {"action": "edge_delete", "edge_type": tpe})
+            for tpe, deletes in edge_deletes.items()
+        ]
+        await asyncio.gather(*([ri, ru, rd, su] + edge_i + edge_u))
+
     async def commit_batch_update(self, batch_id: str) -> None:
         temp_table = await self.get_tmp_collection(batch_id, False)
         await self.move_temp_to_proper(batch_id, temp_table.name)
@@ -843,7 +1151,20 @@ class ArangoGraphDB(GraphDB):
         await self.delete_marked_update(batch_id)
 
     async def to_query(self, query_model: QueryModel, with_edges: bool = False) -> Tuple[str, Json]:
-        return arango_query.to_query(self, query_model, with_edges)
+        if query_model.model is not self.query_cache_model:
+            # the model is part of every cached query: a new model invalidates all entries
+            self.query_cache.clear()
+            self.query_cache_model = query_model.model
+        query_str = str(query_model.query)
+        # durations are translated to timestamps relative to now: such queries can not be cached
+        if relative_time_re.search(query_str):
+            return arango_query.to_query(self, query_model, with_edges)
+        key = (query_str, with_edges)
+        cached = self.query_cache.get(key)
+        if cached is None:
+            cached = self.query_cache.put(key, arango_query.to_query(self, query_model, with_edges))
+        aql, bind_vars = cached
+        return aql, dict(bind_vars)  # the caller owns the bind vars
 
     async def insert_genesis_data(self) -> None:
         root_data = {"kind": "graph_root", "name": "root"}
@@ -854,6 +1175,9 @@ class ArangoGraphDB(GraphDB):
         except Exception:
             # ignore if the root not is already created
             return None
+        summary = SummaryDelta()
+        summary.add(root_node)
+        await self.update_summary(self.db, summary)
 
     async def create_update_schema(self) -> None:
         db = self.db
@@ -962,6 +1286,13 @@ class ArangoGraphDB(GraphDB):
 
         vertex = db.graph(self.name).vertex_collection(self.vertex_name)
         in_progress = await create_collection(self.in_progress)
+        if not await db.has_collection(self.summary_name):
+            await db.create_collection(self.summary_name)
+            # the graph might exist already: count all existing nodes
+            await self.rebuild_summary()
+        else:
+            # a change, that was not completed, might have left the summary in an inconsistent state
+            await self.check_summary()
         create_update_collection_indexes(vertex, in_progress)
         for edge_type in EdgeTypes.all:
             edge_collection = db.graph(self.name).edge_collection(self.edge_collection(edge_type))
@@ -984,6 +1315,13 @@ class ArangoGraphDB(GraphDB):
       RETURN resource
       """
 
+    def query_existing_node_ids(self) -> str:
+        return f"""
+      FOR resource in {self.vertex_name}
+      FILTER resource._key IN @rids
+      RETURN resource._key
+      """
+
     def query_update_nodes(self, merge_node_kind: str) -> str:
         return f"""
         FOR a IN {self.vertex_name}
@@ -991,6 +1329,50 @@ class ArangoGraphDB(GraphDB):
         RETURN {{_key: a._key, hash:a.hash, created:a.created}}
         """
 
+    def query_summary_groups_by_ids(self) -> str:
+        return f"""
+        FOR a IN {self.vertex_name}
+        FILTER a._key IN @ids
+        RETURN {{_key: a._key, kinds: a.kinds, reported: {{kind: a.reported.kind}}, ancestors: a.ancestors}}
+        """
+
+    def query_summary_groups(self) -> str:
+        return f"""
+        FOR a IN {self.vertex_name}
+        COLLECT kinds=a.kinds, kind=a.reported.kind, cloud=a.ancestors.cloud.reported,
+            account=a.ancestors.account.reported, region=a.ancestors.region.reported WITH COUNT INTO count
+        RETURN {{
+            kinds: kinds,
+            reported: {{kind: kind}},
+            ancestors: {{cloud: {{reported: cloud}}, account: {{reported: account}}, region: {{reported: region}}}},
+            count: count
+        }}
+        """
+
+    def query_update_summary(self) -> str:
+        return f"""
+        FOR u IN @updates
+        UPSERT {{_key: u._key}}
+        INSERT u
+        UPDATE {{count: OLD.count + u.count}}
+        IN {self.summary_name}
+        """
+
+    def query_delete_empty_summary(self) -> str:
+        return f"""
+        FOR key IN @keys
+        FOR s IN {self.summary_name}
+        FILTER s._key == key AND s.count <= 0
+        REMOVE s IN {self.summary_name}
+        """
+
+    def query_delete_edges_of_node(self, edge_collection: str) -> str:
+        return f"""
+        FOR e IN {edge_collection}
+        FILTER e._from == @node_id OR e._to == @node_id
+        REMOVE e IN {edge_collection}
+        """
+
     def query_update_edges(self, edge_type: EdgeType, merge_node_kind: str) -> str:
         collection = self.edge_collection(edge_type)
         return f"""
@@ -1078,6 +1460,9 @@ class EventGraphDB(GraphDB):
     async def get_node(self, model: Model, node_id: NodeId) -> Optional[Json]:
         return await self.real.get_node(model, node_id)
 
+    async def existing_node_ids(self, node_ids: List[NodeId]) -> Set[NodeId]:
+        return await self.real.existing_node_ids(node_ids)
+
     async def create_node(self, model: Model, node_id: NodeId, data: Json, under_node_id: NodeId) -> Json:
         result = await self.real.create_node(model, node_id, data, under_node_id)
         await self.event_sender.core_event(CoreEvent.NodeCreated, {"graph": self.graph_name})
@@ -1126,12 +1511,44 @@ class EventGraphDB(GraphDB):
             yield a
 
     async def merge_graph(
-        self, graph_to_merge: MultiDiGraph, model: Model, maybe_change_id: Optional[str] = None, is_batch: bool = False
+        self,
+        graph_to_merge: Union[MultiDiGraph, CompactGraph],
+        model: Model,
+        maybe_change_id: Optional[str] = None,
+        is_batch: bool = False,
     ) -> Tuple[List[str], GraphUpdate]:
         roots, info = await self.real.merge_graph(graph_to_merge, model, maybe_change_id, is_batch)
+        root_nodes = {root: graph_to_merge.nodes[root] for root in roots}
+        nodes, edges = graph_to_merge.number_of_nodes(), graph_to_merge.number_of_edges()
+        await self.graph_merged(roots, info, root_nodes, graph_to_merge, nodes, edges, is_batch)
+        return roots, info
+
+    async def merge_graph_streaming(
+        self,
+        builder: StreamingGraphBuilder,
+        model: Model,
+        maybe_change_id: Optional[str] = None,
+        is_batch: bool = False,
+    ) -> Tuple[List[str], GraphUpdate]:
+        roots, info = await self.real.merge_graph_streaming(builder, model, maybe_change_id, is_batch)
+        # only the parent graph is held in memory, that includes all cloud nodes
+        parent = builder.parent_graph().g
+        await self.graph_merged(roots, info, builder.resolved_roots, parent, builder.nodes, builder.edges, is_batch)
+        return roots, info
+
+    async def graph_merged(
+        self,
+        roots: List[str],
+        info: GraphUpdate,
+        root_nodes: Dict[str, Json],
+        graph: Union[MultiDiGraph, CompactGraph],
+        nodes: int,
+        edges: int,
+        is_batch: bool,
+    ) -> None:
         root_counter: Dict[str, int] = {}
         for root in roots:
-            root_node = graph_to_merge.nodes[root]
+            root_node = root_nodes[root]
             rep_id = value_in_path_get(root_node, NodePath.reported_id, root)
             root_counter[f"node_count_{rep_id}.total"] = value_in_path_get(root_node, NodePath.descendant_count, 0)
             summary: Dict[str, int] = value_in_path_get(root_node, NodePath.descendant_summary, {})
@@ -1141,7 +1558,7 @@ class EventGraphDB(GraphDB):
         # Filter the cloud nodes and get the name
         provider_names = [
             value_in_path_get(data, NodePath.reported_name, node_id)
-            for node_id, data in graph_to_merge.nodes(data=True)
+            for node_id, data in graph.nodes(data=True)
             if "cloud" in data.get("kinds", [])
         ]
         event_data: Dict[str, JsonElement] = {"graph": self.graph_name, "providers": provider_names, "batch": is_batch}
@@ -1150,8 +1567,8 @@ class EventGraphDB(GraphDB):
         await self.event_sender.core_event(
             kind,
             event_data,
-            nodes=len(graph_to_merge.nodes),
-            edges=len(graph_to_merge.edges),
+            nodes=nodes,
+            edges=edges,
             updated_roots=len(roots),
             updated=info.all_changes(),
             nodes_updated=info.nodes_updated,
@@ -1162,7 +1579,6 @@ class EventGraphDB(GraphDB):
             edges_deleted=info.edges_deleted,
             **root_counter,
         )
-        return roots, info
 
     async def list_in_progress_updates(self) -> List[Json]:
         return await self.real.list_in_progress_updates()
@@ -1209,6 +1625,9 @@ class EventGraphDB(GraphDB):
         await self.event_sender.core_event(CoreEvent.GraphDBWiped, {"graph": self.graph_name})
         return result
 
+    async def revision(self) -> str:
+        return await self.real.revision()
+
     async def to_query(self, query_model: QueryModel, with_edges: bool = False) -> Tuple[str, Json]:
         return await self.real.to_query(query_model, with_edges)
 
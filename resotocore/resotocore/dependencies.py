@@ -29,6 +29,7 @@ from resotocore.analytics import AnalyticsEventSender
 from resotocore.core_config import CoreConfig, parse_config, git_hash_from_file, inside_docker
 from resotocore.db.db_access import DbAccess
 from resotocore.model.adjust_node import DirectAdjuster
+from resotocore.message_bus import MessageBus
 from resotocore.types import JsonElement
 from resotocore.util import utc
 
@@ -139,6 +140,40 @@ def parse_args(args: Optional[List[str]] = None) -> Namespace:
         dest="graphdb_request_timeout",
         help="Request timeout in seconds (default: 900)",
     )
+    parser.add_argument(
+        "--graphdb-driver",
+        default="python-arango",
+        choices=["python-arango", "aiohttp"],
+        dest="graphdb_driver",
+        help="Driver used to send queries and document operations (default: python-arango)",
+    )
+    parser.add_argument(
+        "--graphdb-connection-pool-size",
+        type=int,
+        default=64,
+        dest="graphdb_connection_pool_size",
+        help="Maximum number of connections used by the aiohttp driver (default: 64)",
+    )
+    parser.add_argument(
+        "--graphdb-cursor-prefetch",
+        type=int,
+        default=0,
+        dest="graphdb_cursor_prefetch",
+        help="Number of result batches a query cursor fetches in advance (default: 0)",
+    )
+    parser.add_argument(
+        "--graphdb-cursor-fingerprints",
+        action="store_true",
+        dest="graphdb_cursor_fingerprints",
+        help="Remember visited elements of graph queries by a 64 bit fingerprint instead of the id (default: False)",
+    )
+    parser.add_argument(
+        "--graphdb-entity-cache-seconds",
+        type=int,
+        default=300,
+        dest="graphdb_entity_cache_seconds",
+        help="Time in seconds configs, templates and models are cached in memory. 0 disables the cache (default: 300)",
+    )
     parser.add_argument("--no-tls", default=False, action="store_true", help="Disable TLS and use plain HTTP.")
     parser.add_argument(
         "--cert",
@@ -291,6 +326,11 @@ def reset_process_start_method() -> None:
         log.warning(f"{preferred} method not available. Have {mp.get_all_start_methods()}. Use {current}")
 
 
-def db_access(config: CoreConfig, db: StandardDatabase, event_sender: AnalyticsEventSender) -> DbAccess:
+def db_access(
+    config: CoreConfig,
+    db: StandardDatabase,
+    event_sender: AnalyticsEventSender,
+    message_bus: Optional[MessageBus] = None,
+) -> DbAccess:
     adjuster = DirectAdjuster()
-    return DbAccess(db, event_sender, adjuster, config)
+    return DbAccess(db, event_sender, adjuster, config, message_bus=message_bus)
@@ -10,6 +10,8 @@ MethodDuration = Histogram(f"{Prefix}method_call_duration", "Duration of single
 RequestCount = Counter(f"{Prefix}requests_total", "Total Request Count", ["method", "endpoint", "http_status"])
 RequestLatency = Histogram(f"{Prefix}request_latency_seconds", "Request latency", ["endpoint"])
 RequestInProgress = Gauge(f"{Prefix}requests_in_progress_total", "Requests in progress", ["endpoint", "method"])
+CacheHits = Counter(f"{Prefix}cache_hits_total", "Number of cache hits", ["cache"])
+CacheMisses = Counter(f"{Prefix}cache_misses_total", "Number of cache misses", ["cache"])
 
 # Create a type that is bound to the underlying wrapped function
 # This way all signature information is preserved!
@@ -0,0 +1,537 @@
+from __future__ import annotations
+
+import logging
+from array import array
+from bisect import bisect_left
+from collections import deque
+from functools import reduce
+from typing import Optional, Dict, List, Set, Tuple, Generator, Iterator, Any, Union, FrozenSet, Mapping, Iterable
+
+from networkx import MultiDiGraph
+
+from resotocore.ids import NodeId
+from resotocore.model.graph_access import GraphAccess, GraphBuilder, EdgeTypes, Section
+from resotocore.model.model import AnyKind
+from resotocore.model.resolve_in_graph import GraphResolver, NodePath
+from resotocore.types import Json, EdgeType
+from resotocore.util import utc, utc_str, value_in_path, set_value_in_path, value_in_path_get
+
+log = logging.getLogger(__name__)
+
+
+class Adjacency:
+    """
+    Adjacency list of one edge type in compressed sparse row (CSR) format.
+    The neighbours of node i are targets[offsets[i]:offsets[i+1]] in ascending order.
+    Duplicate edges are removed.
+    """
+
+    def __init__(self, size: int, sources: Iterable[int], targets: Iterable[int]) -> None:
+        pairs = list(zip(sources, targets))
+        counts = [0] * (size + 1)
+        for source, _ in pairs:
+            counts[source + 1] += 1
+        for idx in range(size):
+            counts[idx + 1] += counts[idx]
+        position = counts[:]
+        unsorted = array("i", bytes(4 * len(pairs)))
+        for source, target in pairs:
+            unsorted[position[source]] = target
+            position[source] += 1
+        del pairs
+        self.offsets = array("i", [0])
+        self.targets = array("i")
+        for idx in range(size):
+            self.targets.extend(sorted(set(unsorted[counts[idx] : counts[idx + 1]])))  # noqa: E203
+            self.offsets.append(len(self.targets))
+
+    def neighbours(self, idx: int) -> array[int]:
+        return self.targets[self.offsets[idx] : self.offsets[idx + 1]]  # noqa: E203
+
+    def degree(self, idx: int) -> int:
+        return self.offsets[idx + 1] - self.offsets[idx]
+
+    def position(self, source: int, target: int) -> Optional[int]:
+        lo, hi = self.offsets[source], self.offsets[source + 1]
+        pos = bisect_left(self.targets, target, lo, hi)
+        return pos if pos < hi and self.targets[pos] == target else None
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+
+class CompactNodes(Mapping[str, Json]):
+    """
+    Read only view on the nodes of a compact graph, similar to the networkx NodeView.
+    If members is defined, only nodes with a member flag are visible.
+    """
+
+    def __init__(self, graph: CompactGraph, members: Optional[bytearray] = None) -> None:
+        self.graph = graph
+        self.members = members
+
+    def __getitem__(self, node_id: str) -> Json:
+        idx = self.graph.index.get(node_id)
+        if idx is None or (self.members is not None and not self.members[idx]):
+            raise KeyError(node_id)
+        return self.graph.data[idx]
+
+    def __iter__(self) -> Iterator[NodeId]:
+        ids = self.graph.ids
+        return iter(ids) if self.members is None else (ids[idx] for idx in self.indexes())
+
+    def __len__(self) -> int:
+        return len(self.graph.ids) if self.members is None else self.members.count(1)
+
+    def indexes(self) -> Iterator[int]:
+        if self.members is None:
+            return iter(range(len(self.graph.ids)))
+        members = self.members
+        return (idx for idx in range(len(members)) if members[idx])
+
+    def __call__(self, data: bool = False) -> Iterator[Any]:
+        if data:
+            ids, nodes = self.graph.ids, self.graph.data
+            return ((ids[idx], nodes[idx]) for idx in self.indexes())
+        else:
+            return iter(self)
+
+
+class CompactGraph:
+    """
+    Graph store that keeps the structure of the graph in arrays.
+    Every node id is interned and mapped to an integer index.
+    Edges are maintained per edge type as compressed sparse row adjacency lists of node indexes.
+    Kind hierarchies are interned and shared across all nodes of the same kind.
+    The adjacency lists are computed lazily, once the graph is read and recomputed, if the graph changes.
+    """
+
+    def __init__(self) -> None:
+        self.ids: List[NodeId] = []
+        self.index: Dict[str, int] = {}
+        self.data: List[Json] = []
+        self.edge_sources: Dict[EdgeType, array[int]] = {}
+        self.edge_targets: Dict[EdgeType, array[int]] = {}
+        self.nodes = CompactNodes(self)
+        # edge type -> adjacency. The key None defines the adjacency of all edge types.
+        self.__outbound: Dict[Optional[EdgeType], Adjacency] = {}
+        self.__inbound: Dict[Optional[EdgeType], Adjacency] = {}
+        self.__kinds: Dict[FrozenSet[str], Tuple[List[str], Set[str]]] = {}
+
+    def intern(self, node_id: NodeId) -> int:
+        idx = self.index.get(node_id)
+        if idx is None:
+            idx = len(self.ids)
+            self.index[node_id] = idx
+            self.ids.append(node_id)
+            self.data.append({})
+            self.__outbound.clear()
+            self.__inbound.clear()
+        return idx
+
+    def add_node(self, node_id: NodeId, **attr: Any) -> None:
+        kinds_set = attr.get("kinds_set")
+        if kinds_set is not None:
+            key = frozenset(kinds_set)
+            shared = self.__kinds.get(key)
+            if shared is None:
+                shared = (attr.get("kinds", list(kinds_set)), set(kinds_set))
+                self.__kinds[key] = shared
+            attr["kinds"], attr["kinds_set"] = shared
+        self.data[self.intern(node_id)].update(attr)
+
+    def add_edge(self, from_node: NodeId, to_node: NodeId, key: Any = None, edge_type: EdgeType = "default") -> None:
+        if edge_type not in self.edge_sources:
+            self.edge_sources[edge_type] = array("i")
+            self.edge_targets[edge_type] = array("i")
+        self.edge_sources[edge_type].append(self.intern(from_node))
+        self.edge_targets[edge_type].append(self.intern(to_node))
+        self.__outbound.clear()
+        self.__inbound.clear()
+
+    def rename_node(self, node_id: NodeId, new_id: NodeId) -> None:
+        idx = self.index.pop(node_id)
+        self.index[new_id] = idx
+        self.ids[idx] = new_id
+
+    def index_of(self, node_id: str) -> Optional[int]:
+        return self.index.get(node_id)
+
+    def edge_types(self) -> Set[EdgeType]:
+        return set(self.edge_sources.keys())
+
+    def __sources(self, edge_type: Optional[EdgeType]) -> Iterable[int]:
+        if edge_type is None:
+            return (s for et in self.edge_sources for s in self.edge_sources[et])
+        return self.edge_sources.get(edge_type, array("i"))
+
+    def __targets(self, edge_type: Optional[EdgeType]) -> Iterable[int]:
+        if edge_type is None:
+            return (t for et in self.edge_targets for t in self.edge_targets[et])
+        return self.edge_targets.get(edge_type, array("i"))
+
+    def outbound(self, edge_type: Optional[EdgeType]) -> Adjacency:
+        adjacency = self.__outbound.get(edge_type)
+        if adjacency is None:
+            adjacency = Adjacency(len(self.ids), self.__sources(edge_type), self.__targets(edge_type))
+            self.__outbound[edge_type] = adjacency
+        return adjacency
+
+    def inbound(self, edge_type: Optional[EdgeType]) -> Adjacency:
+        adjacency = self.__inbound.get(edge_type)
+        if adjacency is None:
+            adjacency = Adjacency(len(self.ids), self.__targets(edge_type), self.__sources(edge_type))
+            self.__inbound[edge_type] = adjacency
+        return adjacency
+
+    def number_of_nodes(self) -> int:
+        return len(self.ids)
+
+    def number_of_edges(self) -> int:
+        return sum(len(self.outbound(edge_type)) for edge_type in self.edge_sources)
+
+    def root_index(self) -> int:
+        inbound = self.inbound(None)
+        roots = [idx for idx in range(len(self.ids)) if inbound.degree(idx) == 0]
+        assert len(roots) == 1, f"Given subgraph has more than one root: {[self.ids[r] for r in roots]}"
+        return roots[0]
+
+    def root_id(self) -> NodeId:
+        return self.ids[self.root_index()]
+
+
+class CompactGraphBuilder(GraphBuilder):
+    """
+    GraphBuilder that creates a CompactGraph instead of a networkx graph.
+    """
+
+    def __init__(self, model: Any) -> None:
+        super().__init__(model)
+        self.graph = CompactGraph()
+
+    def check_complete(self) -> None:
+        graph: CompactGraph = self.graph
+        # check that all vertices are given, that were defined in any edge definition
+        for idx, node in enumerate(graph.data):
+            assert node.get(
+                Section.reported
+            ), f"{graph.ids[idx]} was used in an edge definition but not provided as vertex!"
+
+        edge_types = graph.edge_types()
+        al = EdgeTypes.all
+        assert not edge_types.difference(al), f"Graph contains unknown edge types! Given: {edge_types}. Known: {al}"
+        # make sure there is only one root node
+        rid = graph.root_id()
+        root_node = graph.nodes[rid]
+        # make sure the root has the expected id
+        if value_in_path(root_node, NodePath.reported_kind) == "graph_root" and rid != "root":
+            root_node["id"] = "root"
+            graph.rename_node(rid, NodeId("root"))
+
+
+class CompactGraphAccess:
+    """
+    Provides the same functionality as GraphAccess, but is based on a CompactGraph.
+    All algorithms work on the integer index of the nodes.
+    Visited nodes and edges are maintained as bit flags per node and per edge.
+    """
+
+    def __init__(
+        self,
+        graph: CompactGraph,
+        maybe_root_id: Optional[str] = None,
+        members: Optional[bytearray] = None,
+        visited_nodes: Optional[Iterable[int]] = None,
+    ):
+        self.g = graph
+        self.members = members
+        self.nodes = CompactNodes(graph, members)
+        self.visited = bytearray(len(graph.ids))
+        for idx in visited_nodes or []:
+            self.visited[idx] = 1
+        self.visited_edges: Dict[EdgeType, bytearray] = {}
+        self.at = utc()
+        self.at_json = utc_str(self.at)
+        self.maybe_root_id = maybe_root_id
+        self.resolved = False
+
+    def __member(self, idx: int) -> bool:
+        return self.members is None or self.members[idx] == 1
+
+    def __visited_edges(self, edge_type: EdgeType) -> bytearray:
+        visited = self.visited_edges.get(edge_type)
+        if visited is None:
+            visited = bytearray(len(self.g.outbound(edge_type)))
+            self.visited_edges[edge_type] = visited
+        return visited
+
+    def root(self) -> str:
+        return self.maybe_root_id if self.maybe_root_id else self.g.root_id()
+
+    def node(self, node_id: NodeId) -> Optional[Json]:
+        n = self.visit_node(node_id)
+        return self.dump(node_id, n) if n is not None else None
+
+    def visit_node(self, node_id: NodeId) -> Optional[Json]:
+        idx = self.g.index_of(node_id)
+        if idx is None:
+            return None
+        self.visited[idx] = 1
+        return self.g.data[idx] if self.__member(idx) else None
+
+    def has_edge(self, from_id: NodeId, to_id: NodeId, edge_type: EdgeType) -> bool:
+        from_idx, to_idx = self.g.index_of(from_id), self.g.index_of(to_id)
+        if from_idx is None or to_idx is None or not self.__member(from_idx) or not self.__member(to_idx):
+            return False
+        pos = self.g.outbound(edge_type).position(from_idx, to_idx)
+        if pos is None:
+            return False
+        self.__visited_edges(edge_type)[pos] = 1
+        return True
+
+    def successor_indexes(self, idx: int, edge_type: Optional[EdgeType]) -> List[int]:
+        return [a for a in self.g.outbound(edge_type).neighbours(idx) if self.__member(a)]
+
+    def predecessor_indexes(self, idx: int, edge_type: Optional[EdgeType]) -> List[int]:
+        return [a for a in self.g.inbound(edge_type).neighbours(idx) if self.__member(a)]
+
+    def predecessors(self, node_id: NodeId, edge_type: EdgeType) -> Generator[NodeId, Any, None]:
+        idx = self.g.index[node_id]
+        return (self.g.ids[a] for a in self.predecessor_indexes(idx, edge_type))
+
+    def successors(self, node_id: NodeId, edge_type: EdgeType) -> Generator[NodeId, Any, None]:
+        idx = self.g.index[node_id]
+        return (self.g.ids[a] for a in self.successor_indexes(idx, edge_type))
+
+    def ancestor_index(self, idx: int, edge_type: EdgeType, kind: str) -> Optional[int]:
+        # note: we are using breadth first search here on purpose.
+        # if there is an ancestor with less distance to this node, we should use this one
+        next_level = [idx]
+        while next_level:
+            parents: List[int] = []
+            for p_idx in next_level:
+                kinds: Optional[List[str]] = self.g.data[p_idx].get("kinds")
+                if kinds and kind in kinds:
+                    return p_idx
+                else:
+                    parents.extend(self.predecessor_indexes(p_idx, edge_type))
+            next_level = parents
+        return None
+
+    def ancestor_of(self, node_id: NodeId, edge_type: EdgeType, kind: str) -> Optional[Json]:
+        idx = self.ancestor_index(self.g.index[node_id], edge_type, kind)
+        return self.g.data[idx] if idx is not None else None
+
+    def resolve(self) -> None:
+        if not self.resolved:
+            self.resolved = True
+            log.info("Resolve attributes in graph")
+            for idx in self.nodes.indexes():
+                self.__resolve(idx)
+            self.__resolve_count_descendants()
+            log.info("Resolve attributes finished.")
+
+    def __resolve(self, idx: int) -> None:
+        node = self.g.data[idx]
+        for resolver in GraphResolver.to_resolve:
+            # search for ancestor that matches filter criteria
+            anc_idx = self.ancestor_index(idx, EdgeTypes.default, resolver.kind)
+            if anc_idx is not None:
+                ancestor = self.g.data[anc_idx]
+                on_self = anc_idx == idx
+                for res in resolver.resolve:
+                    if not on_self or res.apply_on_self:
+                        extracted = value_in_path(ancestor, res.extract_path)
+                        if extracted:
+                            set_value_in_path(extracted, res.to_path, node)
+
+    def __resolve_count_descendants(self) -> None:
+        visited = bytearray(len(self.g.ids))
+        data = self.g.data
+
+        def count_successors_by(idx: int, edge_type: EdgeType, path: List[str]) -> Dict[str, int]:
+            result: Dict[str, int] = {}
+            to_visit = self.successor_indexes(idx, edge_type)
+            while to_visit:
+                visit_next: List[int] = []
+                for elem_idx in to_visit:
+                    if not visited[elem_idx]:
+                        visited[elem_idx] = 1
+                        elem = data[elem_idx]
+                        if not value_in_path_get(elem, NodePath.is_phantom, False):
+                            extracted = value_in_path(elem, path)
+                            if isinstance(extracted, str):
+                                result[extracted] = result.get(extracted, 0) + 1
+                        # check if there is already a successor summary: stop the traversal and take the result.
+                        existing = value_in_path(elem, NodePath.descendant_summary)
+                        if existing and isinstance(existing, dict):
+                            for summary_item, count in existing.items():
+                                result[summary_item] = result.get(summary_item, 0) + count
+                        else:
+                            visit_next.extend(a for a in self.successor_indexes(elem_idx, edge_type) if not visited[a])
+                to_visit = visit_next
+            return result
+
+        for on_kind, prop in GraphResolver.count_successors.items():
+            for idx in self.nodes.indexes():
+                node = data[idx]
+                kinds = node.get("kinds_set")
+                if kinds and on_kind in kinds:
+                    summary = count_successors_by(idx, EdgeTypes.default, prop.extract_path)
+                    set_value_in_path(summary, prop.to_path, node)
+                    total = sum(summary.values())
+                    set_value_in_path(total, NodePath.descendant_count, node)
+
+    def is_acyclic_per_edge_type(self) -> bool:
+        for edge_type in self.g.edge_types():
+            # Kahn's algorithm: the graph is acyclic, if all nodes can be sorted topologically
+            in_degree = {idx: len(self.predecessor_indexes(idx, edge_type)) for idx in self.nodes.indexes()}
+            ready = deque(idx for idx, degree in in_degree.items() if degree == 0)
+            sorted_nodes = 0
+            while ready:
+                idx = ready.popleft()
+                sorted_nodes += 1
+                for succ in self.successor_indexes(idx, edge_type):
+                    in_degree[succ] -= 1
+                    if in_degree[succ] == 0:
+                        ready.append(succ)
+            if sorted_nodes != len(in_degree):
+                return False
+        return True
+
+    def dump(self, node_id: NodeId, node: Json) -> Json:
+        kind = node.get("kind", AnyKind())
+        return GraphAccess.dump_direct(node_id, node, kind)
+
+    def not_visited_nodes(self) -> Generator[Json, None, None]:
+        ids, data, visited = self.g.ids, self.g.data, self.visited
+        return (self.dump(ids[idx], data[idx]) for idx in self.nodes.indexes() if not visited[idx])
+
+    def edges(self, edge_type: EdgeType) -> Generator[Tuple[str, str], None, None]:
+        adjacency = self.g.outbound(edge_type)
+        ids = self.g.ids
+        for idx in self.nodes.indexes():
+            for pos in range(adjacency.offsets[idx], adjacency.offsets[idx + 1]):
+                target = adjacency.targets[pos]
+                if self.__member(target):
+                    yield ids[idx], ids[target]
+
+    def not_visited_edges(self, edge_type: EdgeType) -> Generator[Tuple[str, str], None, None]:
+        adjacency = self.g.outbound(edge_type)
+        visited = self.__visited_edges(edge_type)
+        ids = self.g.ids
+        for idx in self.nodes.indexes():
+            for pos in range(adjacency.offsets[idx], adjacency.offsets[idx + 1]):
+                target = adjacency.targets[pos]
+                if not visited[pos] and self.__member(target):
+                    yield ids[idx], ids[target]
+
+    @staticmethod
+    def replace_roots(graph: CompactGraph) -> Dict[int, Set[int]]:
+        """
+        Find all replace nodes and all nodes on the shortest paths from the graph root to the replace node.
+        See GraphAccess.replace_roots
+        """
+        root = graph.root_index()
+        replace_nodes = [idx for idx, data in enumerate(graph.data) if data.get("replace", False)]
+        assert (
+            len(replace_nodes) > 0
+        ), "No replace nodes provided in the graph. Mark at least one node with replace=true!"
+        outbound, inbound = graph.outbound(None), graph.inbound(None)
+        # breadth first search from root: distance of every node to the root
+        distance = array("i", [-1]) * len(graph.ids)
+        distance[root] = 0
+        to_visit = deque([root])
+        while to_visit:
+            idx = to_visit.popleft()
+            for succ in outbound.neighbours(idx):
+                if distance[succ] < 0:
+                    distance[succ] = distance[idx] + 1
+                    to_visit.append(succ)
+        result: Dict[int, Set[int]] = {}
+        for node in replace_nodes:
+            kind = GraphResolver.resolved_kind(graph.data[node])
+            assert kind is not None, f"Node {graph.ids[node]} is marked as replace node, but the kind is not resolved!"
+            assert distance[node] >= 0, f"Node {graph.ids[node]} is not reachable from root!"
+            # walk back all shortest paths: every predecessor with distance - 1 is on a shortest path
+            on_path = {node}
+            level = [node]
+            while level:
+                level = list({p for idx in level for p in inbound.neighbours(idx) if distance[p] == distance[idx] - 1})
+                on_path.update(level)
+            result[node] = on_path
+        # make sure there is no replace node beyond another replace node
+        rs = result.copy()
+        for node in rs:
+            for nid, parent_nodes in rs.items():
+                if nid != node and node in parent_nodes:
+                    log.info(
+                        f"Node {graph.ids[nid]} marked as replace, "
+                        f"but is child of another replace node {graph.ids[node]}. Ignore."
+                    )
+                    result.pop(nid, None)
+        return result
+
+    @staticmethod
+    def sub_graph_nodes(graph: CompactGraph, from_node: int, parent_ids: Set[int]) -> Set[int]:
+        outbound = graph.outbound(None)
+        visited: Set[int] = {from_node}
+        to_visit = [from_node]
+        while to_visit:
+            to_visit = [a for n in to_visit for a in outbound.neighbours(n) if a not in visited and a not in parent_ids]
+            visited.update(to_visit)
+        return visited
+
+    @staticmethod
+    def merge_graphs(
+        graph: CompactGraph,
+    ) -> Tuple[List[str], CompactGraphAccess, Generator[Tuple[str, CompactGraphAccess], None, None]]:
+        """
+        Find all merge graphs in the provided graph.
+        See GraphAccess.merge_graphs for a detailed description.
+        """
+        size = len(graph.ids)
+
+        def mask(indexes: Iterable[int]) -> bytearray:
+            result = bytearray(size)
+            for idx in indexes:
+                result[idx] = 1
+            return result
+
+        def merge_sub_graphs(
+            root_nodes: Dict[int, Set[int]], parent_nodes: Set[int]
+        ) -> Generator[Tuple[str, CompactGraphAccess], None, None]:
+            all_successors = bytearray(size)
+            for root, predecessors in root_nodes.items():
+                successors = CompactGraphAccess.sub_graph_nodes(graph, root, predecessors)
+                # make sure nodes are not "mixed" between different merge nodes
+                overlap = [graph.ids[idx] for idx in successors if all_successors[idx]]
+                if overlap:
+                    raise AttributeError(f"Nodes are referenced in more than one merge node: {overlap}")
+                for idx in successors:
+                    all_successors[idx] = 1
+                # create subgraph with all successors and all parents, where all parents are already marked as visited
+                root_id = graph.ids[root]
+                yield root_id, CompactGraphAccess(graph, root_id, mask(successors), parent_nodes)
+
+        CompactGraphAccess(graph).resolve()  # resolve graph references
+        roots = CompactGraphAccess.replace_roots(graph)
+        parents: Set[int] = reduce(lambda res, ps: {*res, *ps}, roots.values(), set())
+        parent = CompactGraphAccess(graph, graph.root_id(), mask(parents))
+        return [graph.ids[root] for root in roots], parent, merge_sub_graphs(roots, parents)
+
+
+# Graph implementations that can be merged into the database
+AnyGraphAccess = Union[GraphAccess, CompactGraphAccess]
+
+
+def merge_graphs(
+    graph: Union[MultiDiGraph, CompactGraph]
+) -> Tuple[List[str], AnyGraphAccess, Generator[Tuple[str, AnyGraphAccess], None, None]]:
+    """
+    Find all merge graphs in the provided graph, independent of the underlying graph implementation.
+    """
+    if isinstance(graph, CompactGraph):
+        return CompactGraphAccess.merge_graphs(graph)
+    else:
+        return GraphAccess.merge_graphs(graph)
@@ -2,6 +2,9 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import mmap
+import struct
+import tempfile
 from abc import ABC
 from asyncio import Task
 from contextlib import suppress
@@ -9,8 +12,9 @@ from attrs import define
 from datetime import timedelta
 from multiprocessing import Process, Queue
 from queue import Empty
-from typing import Optional, Union, AsyncGenerator, Any, Generator, List
+from typing import Optional, Union, AsyncGenerator, Any, Generator, List, IO
 
+import msgpack
 from aiostream import stream
 from aiostream.core import Stream
 
@@ -23,7 +27,8 @@ from resotocore.db.model import GraphUpdate
 from resotocore.db.deferred_edge_db import PendingDeferredEdges
 from resotocore.dependencies import db_access, setup_process, reset_process_start_method
 from resotocore.error import ImportAborted
-from resotocore.model.graph_access import GraphBuilder
+from resotocore.model.compact_graph import CompactGraphBuilder
+from resotocore.model.graph_access import GraphBuilder, StreamingGraphBuilder
 from resotocore.model.model import Model
 from resotocore.types import Json
 from resotocore.ids import TaskId
@@ -43,16 +48,63 @@ class ProcessAction(ABC):
 class ReadElement(ProcessAction):
     """
     Read an incoming element:
-    - either a line of text or
+    - either a line of text,
+    - a msgpack encoded element (if packed is true) or
     - a complete json element
     Parent -> Child: for every incoming data line.
     """
 
     elements: List[Union[bytes, Json]]
     task_id: Optional[str]
+    packed: bool = False
 
     def jsons(self) -> Generator[Json, Any, None]:
-        return (e if isinstance(e, dict) else json.loads(e) for e in self.elements)
+        parse = msgpack.unpackb if self.packed else json.loads
+        return (e if isinstance(e, dict) else parse(e) for e in self.elements)
+
+
+@define
+class ReadSpooled(ProcessAction):
+    """
+    Read the elements of a region in the spool file, which is written by the parent:
+    - either newline delimited json or
+    - length prefixed msgpack frames (if packed is true)
+    Parent -> Child: for every batch of elements written to the spool file.
+    """
+
+    path: str
+    start: int
+    end: int
+    task_id: Optional[str]
+    packed: bool = False
+
+    def jsons(self) -> Generator[Json, Any, None]:
+        with open(self.path, "rb") as file:
+            with mmap.mmap(file.fileno(), self.end, access=mmap.ACCESS_READ) as mm:
+                pos = self.start
+                while pos < self.end:
+                    if self.packed:
+                        start = pos + 4
+                        pos = start + struct.unpack_from(">I", mm, pos)[0]
+                        yield msgpack.unpackb(mm[start:pos])
+                    else:
+                        end = mm.find(b"\n", pos, self.end)
+                        end = self.end if end < 0 else end
+                        if end > pos:
+                            yield json.loads(mm[pos:end])
+                        pos = end + 1
+
+
+def spool_elements(elements: List[Union[bytes, Json]], packed: bool) -> bytes:
+    """
+    Render the given elements in the format read by ReadSpooled.
+    """
+    if packed:
+        frames = (e if isinstance(e, bytes) else msgpack.packb(e) for e in elements)
+        return b"".join(len(frame).to_bytes(4, "big") + frame for frame in frames)
+    else:
+        lines = (e if isinstance(e, bytes) else json.dumps(e).encode() for e in elements)
+        return b"".join(line if line.endswith(b"\n") else line + b"\n" for line in lines)
 
 
 @define
@@ -129,11 +181,21 @@ class DbUpdaterProcess(Process):
         except Empty as ex:
             raise ImportAborted("Merge process did not receive any data for more than 90 seconds. Abort.") from ex
 
+    def graph_builder(self, model: Model) -> GraphBuilder:
+        if self.config.graph_update.streaming_merge:
+            return StreamingGraphBuilder(model, self.config.run.temp_dir)
+        elif self.config.graph_update.compact_graph:
+            return CompactGraphBuilder(model)
+        else:
+            return GraphBuilder(model)
+
     async def merge_graph(self, db: DbAccess) -> GraphUpdate:  # type: ignore
         model = Model.from_kinds([kind async for kind in db.model_db.all()])
-        builder = GraphBuilder(model)
+        # the spool file of the streaming builder is a temp file, which is removed when the process ends
+        streaming = self.config.graph_update.streaming_merge
+        builder = self.graph_builder(model)
         nxt = self.next_action()
-        while isinstance(nxt, ReadElement):
+        while isinstance(nxt, (ReadElement, ReadSpooled)):
             for element in nxt.jsons():
                 builder.add_from_json(element)
             log.debug(f"Read {int(BatchSize / 1000)}K elements in process")
@@ -142,11 +204,15 @@ class DbUpdaterProcess(Process):
             log.debug("Got poison pill - going to die.")
             shutdown_process(0)
         elif isinstance(nxt, MergeGraph):
-            log.debug("Graph read into memory")
+            log.debug("Graph spooled to disk" if streaming else "Graph read into memory")
             builder.check_complete()
             graphdb = db.get_graph_db(nxt.graph)
             outer_edge_db = db.pending_deferred_edge_db
-            _, result = await graphdb.merge_graph(builder.graph, model, nxt.change_id, nxt.is_batch)
+            if isinstance(builder, StreamingGraphBuilder):
+                _, result = await graphdb.merge_graph_streaming(builder, model, nxt.change_id, nxt.is_batch)
+                builder.close()
+            else:
+                _, result = await graphdb.merge_graph(builder.graph, model, nxt.change_id, nxt.is_batch)
             if nxt.task_id and builder.deferred_edges:
                 await outer_edge_db.update(PendingDeferredEdges(nxt.task_id, utc(), nxt.graph, builder.deferred_edges))
                 log.debug(f"Updated {len(builder.deferred_edges)} pending outer edges for collect task {nxt.task_id}")
@@ -185,6 +251,7 @@ async def merge_graph_process(
     max_wait: timedelta,
     maybe_batch: Optional[str],
     task_id: Optional[TaskId],
+    packed: bool = False,
 ) -> GraphUpdate:
     change_id = maybe_batch if maybe_batch else uuid_str()
     write: Queue[ProcessAction] = Queue()
@@ -200,6 +267,24 @@ async def merge_graph_process(
             await run_async(write.put, pa, True, stale)
         return alive
 
+    async def spool_to_child(spool: IO[bytes]) -> None:
+        def append(elements: List[Union[bytes, Json]]) -> int:
+            data = spool_elements(elements, packed)
+            spool.write(data)
+            spool.flush()
+            return len(data)
+
+        start = 0
+        chunked: Stream = stream.chunks(content, BatchSize)
+        async with chunked.stream() as streamer:
+            async for lines in streamer:
+                end = start + await run_async(append, lines)
+                # only the position of the batch is sent to the child: it reads the elements from the file
+                if not await send_to_child(ReadSpooled(spool.name, start, end, task_id, packed)):
+                    # in case the child is dead, we should stop
+                    break
+                start = end
+
     def read_results() -> Task[GraphUpdate]:
         async def read_forever() -> GraphUpdate:
             nonlocal deadline
@@ -225,16 +310,22 @@ async def merge_graph_process(
 
     task: Optional[Task[GraphUpdate]] = None
     result: Optional[GraphUpdate] = None
+    spool: Optional[IO[bytes]] = None
     try:
         reset_process_start_method()  # other libraries might have tampered the value in the mean time
         updater.start()
         task = read_results()  # concurrently read result queue
-        chunked: Stream = stream.chunks(content, BatchSize)
-        async with chunked.stream() as streamer:
-            async for lines in streamer:
-                if not await send_to_child(ReadElement(lines, task_id)):
-                    # in case the child is dead, we should stop
-                    break
+        if config.graph_update.spool_transfer:
+            # the child reads from the spool file until the import is done: it is removed at the end
+            spool = tempfile.NamedTemporaryFile(prefix="merge-", suffix=".spool", dir=config.run.temp_dir)
+            await spool_to_child(spool)
+        else:
+            chunked: Stream = stream.chunks(content, BatchSize)
+            async with chunked.stream() as streamer:
+                async for lines in streamer:
+                    if not await send_to_child(ReadElement(lines, task_id, packed)):
+                        # in case the child is dead, we should stop
+                        break
         await send_to_child(MergeGraph(db.name, change_id, maybe_batch is not None, task_id))
         result = await task  # wait for final result
         return result
@@ -260,3 +351,5 @@ async def merge_graph_process(
         if not updater.is_alive():
             with suppress(Exception):
                 updater.close()
+        if spool is not None:
+            spool.close()
@@ -4,9 +4,12 @@ import hashlib
 import json
 import logging
 import re
+import tempfile
+from array import array
 from collections import namedtuple, defaultdict
 from functools import reduce
-from typing import Optional, Generator, Any, Dict, List, Set, Tuple, Union
+from pathlib import Path
+from typing import Optional, Generator, Any, Dict, List, Set, Tuple, Union, IO
 from attrs import define
 
 from networkx import DiGraph, MultiDiGraph, all_shortest_paths, is_directed_acyclic_graph
@@ -104,12 +107,12 @@ class Direction:
 EdgeKey = namedtuple("EdgeKey", ["from_node", "to_node", "edge_type"])
 
 
-@define
+@define(frozen=True)
 class BySearchCriteria:
     query: str
 
 
-@define
+@define(frozen=True)
 class ByNodeId:
     value: NodeId
 
@@ -141,6 +144,7 @@ class GraphBuilder:
                 js.get(Section.metadata, None),
                 js.get("search", None),
                 js.get("replace", False) is True,
+                js.get("digest", None),
             )
         elif "from" in js and "to" in js:
             self.add_edge(js["from"], js["to"], js.get("edge_type", EdgeTypes.default))
@@ -170,8 +174,29 @@ class GraphBuilder:
         metadata: Optional[Json] = None,
         search: Optional[str] = None,
         replace: bool = False,
+        digest: Optional[str] = None,
     ) -> None:
         self.nodes += 1
+        kind = self.model.get(reported) if digest else None
+        if digest and kind is not None:
+            # The sender provided a digest of the node content, which is used to compute the hash.
+            # Most nodes do not change between imports: the hash is the same as the one in the database.
+            # Validation and flattening is deferred until the node needs to be written (see dump_direct).
+            self.graph.add_node(
+                node_id,
+                id=node_id,
+                reported=reported,
+                desired=desired,
+                metadata=metadata,
+                hash=GraphBuilder.digest_hash(digest),
+                kind=kind,
+                kinds=list(kind.kind_hierarchy()),
+                kinds_set=kind.kind_hierarchy(),
+                unchecked=True,
+                **({"flat": search} if isinstance(search, str) else {}),
+                replace=replace | metadata.get("replace", False) is True if metadata else False,
+            )
+            return
         # validate kind of this reported json
         coerced = self.model.check_valid(reported)
         reported = reported if coerced is None else coerced
@@ -214,6 +239,14 @@ class GraphBuilder:
             sha256.update(json.dumps(metadata, sort_keys=True).encode("utf-8"))
         return sha256.hexdigest()
 
+    @staticmethod
+    def digest_hash(digest: str) -> str:
+        sha256 = hashlib.sha256()
+        # all content hashes will be different, when the version changes
+        sha256.update(ContentHashVersion.to_bytes(2, "big"))
+        sha256.update(digest.encode("utf-8"))
+        return sha256.hexdigest()
+
     @staticmethod
     def flatten(js: Json, kind: Kind) -> str:
         result = ""
@@ -274,6 +307,168 @@ class GraphBuilder:
             self.graph.remove_node(rid)
 
 
+class StreamingGraphBuilder(GraphBuilder):
+    """
+    Alternative to the GraphBuilder, that does not hold the complete graph in memory.
+
+    All incoming elements are spooled to a temporary file, while only the structure of the graph
+    (node ids, kinds, the replace flag and all edges) is maintained in memory.
+    Once all elements are read, the structure is partitioned by merge root (nodes marked with replace=true).
+    Every partition is materialized with a GraphBuilder, one after the other, so the peak memory
+    is bounded by the size of the largest merge root and not by the size of the complete graph.
+
+    A partition consists of all nodes on the shortest paths from the graph root to the merge root
+    as well as all successors of the merge root, which is the same subgraph GraphAccess.merge_graphs would create.
+    """
+
+    def __init__(self, model: Model, spool_dir: Optional[Path] = None):
+        super().__init__(model)
+        self.spool: IO[bytes] = tempfile.TemporaryFile(dir=spool_dir)
+        # in case the root node is renamed during check_complete: old id -> new id
+        self.renamed: Dict[NodeId, NodeId] = {}
+        # resolved data of the merge roots: available after the related partition has been processed
+        self.resolved_roots: Dict[str, Json] = {}
+        self.__parent: Optional[GraphAccess] = None
+
+    def add_from_json(self, js: Json) -> None:
+        super().add_from_json(js)
+        if "from_selector" not in js:
+            self.spool.write(json.dumps(js).encode("utf-8"))
+            self.spool.write(b"\n")
+
+    def add_node(
+        self,
+        node_id: NodeId,
+        reported: Json,
+        desired: Optional[Json] = None,
+        metadata: Optional[Json] = None,
+        search: Optional[str] = None,
+        replace: bool = False,
+        digest: Optional[str] = None,
+    ) -> None:
+        # only maintain the structure: the complete node is materialized, when the partition is created
+        self.nodes += 1
+        kind = self.model[reported]
+        self.graph.add_node(
+            node_id,
+            id=node_id,
+            reported={"kind": kind.fqn},
+            kinds=list(kind.kind_hierarchy()),
+            replace=replace | metadata.get("replace", False) is True if metadata else False,
+        )
+
+    def check_complete(self) -> None:
+        rid = GraphAccess.root_id(self.graph)
+        super().check_complete()
+        if rid not in self.graph:
+            self.renamed[rid] = NodeId("root")
+
+    def close(self) -> None:
+        self.spool.close()
+
+    def __elements(self) -> Generator[Tuple[int, Json], None, None]:
+        self.spool.seek(0)
+        offset = 0
+        for line in self.spool:
+            yield offset, json.loads(line)
+            offset += len(line)
+
+    def __element_at(self, offset: int) -> Json:
+        self.spool.seek(offset)
+        return json.loads(self.spool.readline())  # type: ignore
+
+    def __node_id(self, node_id: NodeId) -> NodeId:
+        return self.renamed.get(node_id, node_id)
+
+    def merge_partitions(self) -> Tuple[List[str], Set[NodeId], Generator[Tuple[NodeId, MultiDiGraph], None, None]]:
+        """
+        Partition the graph by merge root.
+        :return: the list of all merge roots, the set of all parent nodes and a generator of all partitions.
+        """
+        roots = GraphAccess.replace_roots(self.graph)
+        parents: Set[NodeId] = reduce(lambda res, ps: {*res, *ps}, roots.values(), set[NodeId]())
+        # node id -> index of the partition
+        partition_of: Dict[NodeId, int] = {}
+        for idx, (root, predecessors) in enumerate(roots.items()):
+            for nid in GraphAccess.sub_graph_nodes(self.graph, root, predecessors):
+                if nid in partition_of:
+                    raise AttributeError(f"Nodes are referenced in more than one merge node: {nid}")
+                partition_of[nid] = idx
+        # the graph structure is not needed any longer
+        self.graph = MultiDiGraph()
+
+        # distribute all elements of the spool file: offsets per partition
+        parent_nodes: Dict[NodeId, Json] = {}
+        parent_edges: List[Tuple[NodeId, NodeId, EdgeType]] = []
+        offsets = [array("q") for _ in roots]
+        paths = list(roots.values())
+        for offset, js in self.__elements():
+            if "id" in js:
+                nid = self.__node_id(js["id"])
+                js["id"] = nid
+                if nid in parents:
+                    parent_nodes[nid] = js
+                if nid in partition_of and nid not in parents:
+                    offsets[partition_of[nid]].append(offset)
+            else:
+                from_id, to_id = self.__node_id(js["from"]), self.__node_id(js["to"])
+                if from_id in parents and to_id in parents:
+                    parent_edges.append((from_id, to_id, js.get("edge_type", EdgeTypes.default)))
+                else:
+                    fp, tp = partition_of.get(from_id), partition_of.get(to_id)
+                    if fp is not None and (fp == tp or to_id in paths[fp]):
+                        offsets[fp].append(offset)
+                    elif tp is not None and from_id in paths[tp]:
+                        offsets[tp].append(offset)
+
+        def add_parents(builder: GraphBuilder, node_ids: Set[NodeId]) -> None:
+            for nid in node_ids:
+                resolved = self.resolved_roots.get(nid)
+                if resolved is not None:
+                    # take the resolved node as is: this also maintains the content hash
+                    builder.graph.add_node(nid, **resolved)
+                else:
+                    builder.add_from_json(parent_nodes[nid])
+            for from_id, to_id, edge_type in parent_edges:
+                if from_id in node_ids and to_id in node_ids:
+                    builder.add_edge(from_id, to_id, edge_type)
+
+        def partitions() -> Generator[Tuple[NodeId, MultiDiGraph], None, None]:
+            for idx, (root, path) in enumerate(roots.items()):
+                builder = GraphBuilder(self.model)
+                add_parents(builder, path)
+                for offset in offsets[idx]:
+                    js = self.__element_at(offset)
+                    if "id" in js:
+                        builder.add_from_json(js)
+                    else:
+                        edge_type = js.get("edge_type", EdgeTypes.default)
+                        builder.add_edge(self.__node_id(js["from"]), self.__node_id(js["to"]), edge_type)
+                offsets[idx] = array("q")
+                builder.check_complete()
+                yield root, builder.graph
+                # the partition has been processed and is resolved: remember the resolved root
+                self.resolved_roots[root] = dict(builder.graph.nodes[root])
+
+            # create the parent graph: all parents including all merge roots with resolved data
+            parent_builder = GraphBuilder(self.model)
+            add_parents(parent_builder, parents)
+            graph = parent_builder.graph
+            summarized = {NodeId(nid) for nid in self.resolved_roots}
+            self.__parent = GraphAccess(graph, GraphAccess.root_id(graph), summarized_nodes=summarized)
+
+        return list(roots.keys()), parents, partitions()
+
+    def parent_graph(self) -> GraphAccess:
+        """
+        The parent graph is available after all partitions have been processed.
+        It includes all parent nodes and all merge roots with resolved descendant summaries.
+        """
+        assert self.__parent is not None, "All partitions need to be processed before the parent is available!"
+        self.__parent.resolve()
+        return self.__parent
+
+
 NodeData = Tuple[str, Json, Optional[Json], Optional[Json], Optional[Json], str, List[str], str]
 
 
@@ -284,6 +479,7 @@ class GraphAccess:
         maybe_root_id: Optional[str] = None,
         visited_nodes: Optional[Set[NodeId]] = None,
         visited_edges: Optional[Set[EdgeKey]] = None,
+        summarized_nodes: Optional[Set[NodeId]] = None,
     ):
         super().__init__()
         self.g = sub
@@ -293,18 +489,21 @@ class GraphAccess:
         self.at = utc()
         self.at_json = utc_str(self.at)
         self.maybe_root_id = maybe_root_id
+        # the descendant summary of these nodes is already computed and will not be recomputed
+        self.summarized_nodes: Set[NodeId] = summarized_nodes if summarized_nodes else set()
         self.resolved = False
 
     def root(self) -> str:
         return self.maybe_root_id if self.maybe_root_id else GraphAccess.root_id(self.g)
 
     def node(self, node_id: NodeId) -> Optional[Json]:
+        n = self.visit_node(node_id)
+        return self.dump(node_id, n) if n is not None else None
+
+    def visit_node(self, node_id: NodeId) -> Optional[Json]:
+        # mark the node as visited and return the node data as is
         self.visited_nodes.add(node_id)
-        if self.g.has_node(node_id):
-            n = self.nodes[node_id]
-            return self.dump(node_id, n)
-        else:
-            return None
+        return self.nodes[node_id] if self.g.has_node(node_id) else None
 
     def has_edge(self, from_id: object, to_id: object, edge_type: EdgeType) -> bool:
         key = self.edge_key(from_id, to_id, edge_type)
@@ -351,7 +550,7 @@ class GraphAccess:
         for on_kind, prop in GraphResolver.count_successors.items():
             for node_id, node in self.g.nodes(data=True):
                 kinds = node.get("kinds_set")
-                if kinds and on_kind in kinds:
+                if kinds and on_kind in kinds and node_id not in self.summarized_nodes:
                     summary = count_successors_by(node_id, EdgeTypes.default, prop.extract_path)
                     set_value_in_path(summary, prop.to_path, node)
                     total = reduce(lambda l, r: l + r, summary.values(), 0)
@@ -427,6 +626,11 @@ class GraphAccess:
     @staticmethod
     def dump_direct(node_id: NodeId, node: Json, kind: Kind, recompute: bool = False) -> Json:
         reported = node[Section.reported]
+        if node.pop("unchecked", False):
+            # validation has been deferred by the builder: only nodes that are written are validated
+            coerced = kind.check_valid(reported)
+            if coerced is not None:
+                reported = node[Section.reported] = coerced
         desired: Optional[Json] = node.get(Section.desired, None)
         metadata: Optional[Json] = node.get(Section.metadata, None)
         if "id" not in node:
@@ -442,6 +646,9 @@ class GraphAccess:
     def not_visited_nodes(self) -> Generator[Json, None, None]:
         return (self.dump(nid, self.nodes[nid]) for nid in self.g.nodes if nid not in self.visited_nodes)
 
+    def edges(self, edge_type: EdgeType) -> Generator[Tuple[str, str], None, None]:
+        return ((f, t) for f, t, et in self.g.edges(data="edge_type") if et == edge_type)
+
     def not_visited_edges(self, edge_type: EdgeType) -> Generator[Tuple[str, str], None, None]:
         # edge collection with (from, to, type): filter and drop type -> (from, to)
         edges = self.g.edges(data="edge_type")
@@ -458,6 +665,57 @@ class GraphAccess:
         assert len(roots) == 1, f"Given subgraph has more than one root: {roots}"
         return roots[0]
 
+    @staticmethod
+    def replace_roots(graph: MultiDiGraph) -> Dict[NodeId, Set[NodeId]]:
+        """
+        Find replace nodes: all nodes that are marked as replace node.
+        :param graph: the incoming multi graph update. The kind of all replace nodes needs to be resolved.
+        :return: all replace roots as key, with the respective predecessor nodes as value.
+        """
+        graph_root = GraphAccess.root_id(graph)
+        replace_nodes: Dict[NodeId, Json] = {
+            node_id: data for node_id, data in graph.nodes(data=True) if data.get("replace", False)
+        }
+        assert (
+            len(replace_nodes) > 0
+        ), "No replace nodes provided in the graph. Mark at least one node with replace=true!"
+        result: Dict[NodeId, Set[NodeId]] = {}
+        for node, data in replace_nodes.items():
+            kind = GraphResolver.resolved_kind(data)
+            assert (
+                kind is not None
+            ), f"Node {node} is marked as replace node, but the kind is not resolved during import!"
+            # compute the shortest path from root to here
+            pres: Set[NodeId] = reduce(
+                lambda res, p: {*res, *p}, all_shortest_paths(graph, graph_root, node), set[NodeId]()
+            )
+            result[node] = pres
+        # make sure there is no replace node beyond another replace node
+        rs = result.copy()
+        for node in rs:
+            for nid, parent_nodes in rs.items():
+                if nid != node and node in parent_nodes:
+                    log.info(f"Node {nid} marked as replace, but is child of another replace node {node}. Ignore.")
+                    result.pop(nid, None)
+        return result
+
+    @staticmethod
+    def sub_graph_nodes(graph: MultiDiGraph, from_node: NodeId, parent_ids: Set[NodeId]) -> Set[NodeId]:
+        """
+        Walk the graph from given starting node and return all successors.
+        A successor which is also a predecessors is not followed.
+        """
+        to_visit = [from_node]
+        visited: Set[NodeId] = {from_node}
+
+        def successors(node: NodeId) -> List[NodeId]:
+            return [a for a in graph.successors(node) if a not in visited and a not in parent_ids]
+
+        while to_visit:
+            to_visit = reduce(lambda li, node: li + successors(node), to_visit, list[NodeId]())
+            visited.update(to_visit)
+        return visited
+
     @staticmethod
     def merge_graphs(
         graph: MultiDiGraph,
@@ -481,50 +739,6 @@ class GraphAccess:
         :return: the list of all merge roots, the expected parent graph and all merge root graphs.
         """
 
-        # Find replace nodes: all nodes that are marked as replace node.
-        # This method returns all replace roots as key, with the respective predecessors nodes as value.
-        def replace_roots() -> Dict[NodeId, Set[NodeId]]:
-            graph_root = GraphAccess.root_id(graph)
-            replace_nodes: Dict[NodeId, Json] = {
-                node_id: data for node_id, data in graph.nodes(data=True) if data.get("replace", False)
-            }
-            assert (
-                len(replace_nodes) > 0
-            ), "No replace nodes provided in the graph. Mark at least one node with replace=true!"
-            result: Dict[NodeId, Set[NodeId]] = {}
-            for node, data in replace_nodes.items():
-                kind = GraphResolver.resolved_kind(data)
-                assert (
-                    kind is not None
-                ), f"Node {node} is marked as replace node, but the kind is not resolved during import!"
-                # compute the shortest path from root to here
-                pres: Set[NodeId] = reduce(
-                    lambda res, p: {*res, *p}, all_shortest_paths(graph, graph_root, node), set[NodeId]()
-                )
-                result[node] = pres
-            # make sure there is no replace node beyond another replace node
-            rs = result.copy()
-            for node in rs:
-                for nid, parent_nodes in rs.items():
-                    if nid != node and node in parent_nodes:
-                        log.info(f"Node {nid} marked as replace, but is child of another replace node {node}. Ignore.")
-                        result.pop(nid, None)
-            return result
-
-        # Walk the graph from given starting node and return all successors.
-        # A successor which is also a predecessors is not followed.
-        def sub_graph_nodes(from_node: NodeId, parent_ids: Set[NodeId]) -> Set[NodeId]:
-            to_visit = [from_node]
-            visited: Set[NodeId] = {from_node}
-
-            def successors(node: NodeId) -> List[NodeId]:
-                return [a for a in graph.successors(node) if a not in visited and a not in parent_ids]
-
-            while to_visit:
-                to_visit = reduce(lambda li, node: li + successors(node), to_visit, list[NodeId]())
-                visited.update(to_visit)
-            return visited
-
         # Create a generator for all given merge roots by:
         #   - creating the set of all successors
         #   - creating a subgraph which contains all predecessors and all succors
@@ -537,7 +751,7 @@ class GraphAccess:
         ) -> Generator[Tuple[NodeId, GraphAccess], None, None]:
             all_successors: Set[NodeId] = set()
             for root, predecessors in root_nodes.items():
-                successors: Set[NodeId] = sub_graph_nodes(root, predecessors)
+                successors: Set[NodeId] = GraphAccess.sub_graph_nodes(graph, root, predecessors)
                 # make sure nodes are not "mixed" between different merge nodes
                 overlap = successors & all_successors
                 if overlap:
@@ -548,7 +762,7 @@ class GraphAccess:
                 yield root, sub
 
         GraphAccess(graph).resolve()  # resolve graph references
-        roots = replace_roots()
+        roots = GraphAccess.replace_roots(graph)
         parents: Set[NodeId] = reduce(lambda res, ps: {*res, *ps}, roots.values(), set[NodeId]())
         parent_graph = graph.subgraph(parents)
         graphs = merge_sub_graphs(roots, parents, set(parent_graph.edges(data="edge_type")))
@@ -1,6 +1,6 @@
 from attrs import evolve
 from functools import reduce
-from typing import List
+from typing import List, Optional, Tuple
 
 import parsy
 from parsy import string, Parser, regex
@@ -70,6 +70,7 @@ from resotocore.query.model import (
     FulltextTerm,
     Limit,
 )
+from resotocore.util import LRUCache
 
 operation_p = (
     reduce(
@@ -425,7 +426,19 @@ def query_parser() -> Parser:
     return Query(parts[::-1], preamble, maybe_aggregate)
 
 
+# parsed queries by query string and edge type
+parsed_queries: LRUCache[Tuple[str, Optional[str]], Query] = LRUCache("parsed_query", 1024)
+
+
 def parse_query(query: str, **env: str) -> Query:
+    # only the edge type is taken from the environment: parsed queries are immutable and can be reused
+    key = (query.strip(), env.get("edge_type"))
+    if (parsed := parsed_queries.get(key)) is not None:
+        return parsed
+    return parsed_queries.put(key, parse_query_uncached(query, **env))
+
+
+def parse_query_uncached(query: str, **env: str) -> Query:
     def set_edge_type_if_not_set(part: Part, edge_types: List[str]) -> Part:
         def set_in_with_clause(wc: WithClause) -> WithClause:
             nav = wc.navigation
@@ -9,7 +9,7 @@ import string
 import sys
 import uuid
 from asyncio import Future
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from collections.abc import Iterable
 from contextlib import suppress
 from datetime import timedelta, datetime, timezone
@@ -27,6 +27,8 @@ from typing import (
     Iterator,
     Union,
     Sequence,
+    Generic,
+    Hashable,
 )
 
 from dateutil.parser import isoparse
@@ -34,12 +36,14 @@ from resotolib.asynchronous import periodic
 
 from resotolib.durations import parse_duration
 from resotocore.error import RestartService
+from resotocore.metrics import CacheHits, CacheMisses
 from resotocore.types import JsonElement, Json
 
 log = logging.getLogger(__name__)
 
 AnyT = TypeVar("AnyT")
 AnyR = TypeVar("AnyR")
+AnyK = TypeVar("AnyK", bound=Hashable)
 
 # moved to resotolib. define it here to have stable references
 Periodic = periodic.Periodic
@@ -385,3 +389,37 @@ class AccessJson(Dict[Any, Any]):
     ) -> AccessJson:
         # only here for a typed result
         return AccessJson.wrap(obj, not_existent, simple_formatter)  # type: ignore
+
+
+class LRUCache(Generic[AnyK, AnyT]):
+    """
+    Holds up to max_size entries and evicts the least recently used entry first.
+    Hits and misses are counted in the cache metrics under the given name.
+    """
+
+    def __init__(self, name: str, max_size: int = 1024) -> None:
+        self.name = name
+        self.max_size = max_size
+        self.entries: OrderedDict[AnyK, AnyT] = OrderedDict()
+
+    def get(self, key: AnyK) -> Optional[AnyT]:
+        value = self.entries.get(key)
+        if value is None:
+            CacheMisses.labels(self.name).inc()
+        else:
+            CacheHits.labels(self.name).inc()
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: AnyK, value: AnyT) -> AnyT:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -5,6 +5,7 @@ import os
 import re
 import shutil
 import string
+import struct
 import tempfile
 import uuid
 from asyncio import Future
@@ -15,8 +16,10 @@ from pathlib import Path
 from random import SystemRandom
 from typing import AsyncGenerator, Any, Optional, Sequence, Union, List, Dict, AsyncIterator, Tuple, Callable, Awaitable
 
+import msgpack
 import prometheus_client
 import yaml
+import zstandard
 from aiohttp import web, MultipartWriter, AsyncIterablePayload, BufferedReaderPayload, MultipartReader, ClientSession
 from aiohttp.abc import AbstractStreamWriter
 from aiohttp.hdrs import METH_ANY
@@ -24,6 +27,7 @@ from aiohttp.web import Request, StreamResponse, WebSocketResponse
 from aiohttp.web_exceptions import HTTPNotFound, HTTPNoContent, HTTPOk, HTTPNotAcceptable
 from aiohttp.web_routedef import AbstractRouteDef
 from aiohttp_swagger3 import SwaggerFile, SwaggerUiSettings
+from aiostream import stream
 from aiostream.core import Stream
 from networkx.readwrite import cytoscape_data
 from resotolib.asynchronous.web.auth import auth_handler
@@ -47,7 +51,7 @@ from resotocore.config import ConfigHandler, ConfigValidation, ConfigEntity
 from resotocore.console_renderer import ConsoleColorSystem, ConsoleRenderer
 from resotocore.core_config import CoreConfig
 from resotocore.db.db_access import DbAccess
-from resotocore.db.graphdb import GraphDB
+from resotocore.db.graphdb import GraphDB, relative_time_re
 from resotocore.db.model import QueryModel
 from resotocore.message_bus import MessageBus, Message, ActionDone, Action, ActionError
 from resotocore.model.db_updater import merge_graph_process
@@ -61,7 +65,7 @@ from resotocore.ids import SubscriberId, WorkerId
 from resotocore.task.subscribers import SubscriptionHandler
 from resotocore.task.task_handler import TaskHandlerService
 from resotocore.types import Json, JsonElement
-from resotocore.util import uuid_str, force_gen, rnd_str, if_set, duration
+from resotocore.util import uuid_str, force_gen, rnd_str, if_set, duration, LRUCache
 from resotocore.web.certificate_handler import CertificateHandler
 from resotocore.web.content_renderer import result_binary_gen, single_result
 from resotocore.web.directives import (
@@ -92,6 +96,8 @@ def section_of(request: Request) -> Optional[str]:
 
 
 AlwaysAllowed = {"/", "/metrics", "/api-doc.*", "/system/.*", "/ui.*", "/ca/cert"}
+# Stream of msgpack encoded elements, where every element is prefixed by its length (4 bytes, big endian).
+MsgPackFramesContentType = "application/x-msgpack-frames"
 
 
 class Api:
@@ -122,6 +128,8 @@ class Api:
         self.cli = cli
         self.query_parser = query_parser
         self.config = config
+        # (graph, query) -> (graph revision, aggregation result)
+        self.aggregation_cache: LRUCache[Tuple[str, str], Tuple[str, List[Json]]] = LRUCache("aggregation", 256)
         self.app = web.Application(
             # note on order: the middleware is passed in the order provided.
             middlewares=[
@@ -445,15 +453,27 @@ class Api:
         attrs = {k: re.split("\\s*,\\s*", v) for k, v in request.query.items() if k != "task"}
         task_descriptions = [WorkerTaskDescription(name, attrs) for name in re.split("\\s*,\\s*", task_param)]
 
-        async def handle_message(msg: str) -> None:
-            tr = from_js(json.loads(msg), WorkerTaskResult)
+        async def handle_result(js: Json) -> None:
+            tr = from_js(js, WorkerTaskResult)
             if tr.result == "error":
                 error = tr.error if tr.error else "worker signalled error without detailed error message"
                 await self.worker_task_queue.error_task(worker_id, tr.task_id, error)
             elif tr.result == "done":
                 await self.worker_task_queue.acknowledge_task(worker_id, tr.task_id, tr.data)
             else:
-                log.info(f"Do not understand this message: {msg}")
+                log.info(f"Do not understand this message: {js}")
+
+        async def handle_message(msg: str) -> None:
+            js = json.loads(msg)
+            if isinstance(js, list):
+                # the worker acknowledges many tasks with one message
+                for result in js:
+                    await handle_result(result)
+            elif isinstance(js, dict) and "outstanding" in js:
+                # the worker reconnected and still performs these tasks
+                await self.worker_task_queue.resync_tasks(worker_id, js["outstanding"])
+            else:
+                await handle_result(js)
 
         def task_json(task: WorkerTask) -> str:
             return to_js_str(task.to_json())
@@ -611,7 +631,14 @@ class Api:
         db = self.db.get_graph_db(graph_id)
         it = self.to_line_generator(request)
         info = await merge_graph_process(
-            db, self.event_sender, self.config, it, self.config.graph_update.merge_max_wait_time(), None, task_id
+            db,
+            self.event_sender,
+            self.config,
+            it,
+            self.config.graph_update.merge_max_wait_time(),
+            None,
+            task_id,
+            self.is_msgpack(request),
         )
         return web.json_response(to_js(info))
 
@@ -626,7 +653,14 @@ class Api:
         batch_id = request.query.get("batch_id", rnd)
         it = self.to_line_generator(request)
         info = await merge_graph_process(
-            db, self.event_sender, self.config, it, self.config.graph_update.merge_max_wait_time(), batch_id, task_id
+            db,
+            self.event_sender,
+            self.config,
+            it,
+            self.config.graph_update.merge_max_wait_time(),
+            batch_id,
+            task_id,
+            self.is_msgpack(request),
         )
         return web.json_response(to_json(info), headers={"BatchId": batch_id})
 
@@ -688,8 +722,19 @@ class Api:
 
     async def query_aggregation(self, request: Request) -> StreamResponse:
         graph_db, query_model = await self.graph_query_model_from_request(request)
-        async with await graph_db.search_aggregation(query_model) as gen:
-            return await self.stream_response_from_gen(request, gen)
+        query_str = str(query_model.query)
+        # durations are translated to timestamps relative to now: such results can not be cached
+        if request.query.get("cached", "false") == "false" or relative_time_re.search(query_str):
+            async with await graph_db.search_aggregation(query_model) as gen:
+                return await self.stream_response_from_gen(request, gen)
+        # the result is valid, as long as the graph does not change
+        revision = await graph_db.revision()
+        key = (graph_db.name, query_str)
+        cached = self.aggregation_cache.get(key)
+        if cached is None or cached[0] != revision:
+            async with await graph_db.search_aggregation(query_model) as gen:
+                cached = self.aggregation_cache.put(key, (revision, [elem async for elem in gen]))
+        return await self.stream_response_from_gen(request, stream.iterate(cached[1]))
 
     @staticmethod
     async def no_ui(_: Request) -> StreamResponse:
@@ -864,19 +909,76 @@ class Api:
 
     @classmethod
     async def to_json_generator(cls, request: Request) -> AsyncGenerator[Json, None]:
+        packed = cls.is_msgpack(request)
         async for line in cls.to_line_generator(request):
-            yield json.loads(line) if isinstance(line, bytes) else line
+            if isinstance(line, bytes):
+                yield msgpack.unpackb(line) if packed else json.loads(line)
+            else:
+                yield line
+
+    @staticmethod
+    def is_msgpack(request: Request) -> bool:
+        return request.content_type == MsgPackFramesContentType
 
     @staticmethod
     def to_line_generator(request: Request) -> AsyncGenerator[Union[bytes, Json], None]:
+        """
+        Read the elements of the request body.
+        Supported content types: a json array, newline delimited json or length prefixed msgpack frames.
+        Elements are returned either as parsed json or as raw line/frame, which is parsed by the consumer.
+        Bodies encoded with gzip or deflate are decompressed by aiohttp, zstd is decompressed here.
+        """
+        zstd_encoded = request.headers.get("Content-Encoding") == "zstd"
+
+        async def body_chunks() -> AsyncGenerator[bytes, None]:
+            if zstd_encoded:
+                decompressor = zstandard.ZstdDecompressor().decompressobj()
+                async for chunk in request.content.iter_any():
+                    if data := decompressor.decompress(chunk):
+                        yield data
+            else:
+                async for chunk in request.content.iter_any():
+                    yield chunk
+
         async def stream_lines() -> AsyncGenerator[Union[bytes, Json], None]:
-            async for line in request.content:
-                if len(line.strip()) == 0:
-                    continue
-                yield line
+            if zstd_encoded:
+                rest = b""
+                async for chunk in body_chunks():
+                    lines = (rest + chunk).split(b"\n")
+                    rest = lines.pop()
+                    for line in lines:
+                        if len(line.strip()) > 0:
+                            yield line
+                if len(rest.strip()) > 0:
+                    yield rest
+            else:
+                async for line in request.content:
+                    if len(line.strip()) == 0:
+                        continue
+                    yield line
+
+        async def stream_frames() -> AsyncGenerator[Union[bytes, Json], None]:
+            # every frame: 4 bytes length (unsigned, big endian) followed by a msgpack encoded element
+            buffer = bytearray()
+            async for chunk in body_chunks():
+                buffer += chunk
+                offset = 0
+                while len(buffer) - offset >= 4:
+                    start = offset + 4
+                    end = start + struct.unpack_from(">I", buffer, offset)[0]
+                    if end > len(buffer):
+                        break
+                    yield bytes(buffer[start:end])
+                    offset = end
+                del buffer[0:offset]
+            if buffer:
+                raise AttributeError(f"Incomplete msgpack frame at the end of the request: {len(buffer)} bytes left.")
 
         async def stream_json_array() -> AsyncGenerator[Union[bytes, Json], None]:
-            js_elem = await request.json()
+            if zstd_encoded:
+                js_elem = json.loads(b"".join([chunk async for chunk in body_chunks()]))
+            else:
+                js_elem = await request.json()
             if isinstance(js_elem, list):
                 for doc in js_elem:
                     yield doc
@@ -889,8 +991,10 @@ class Api:
             return stream_json_array()
         elif request.content_type in ["application/x-ndjson", "application/ndjson"]:
             return stream_lines()
+        elif request.content_type == MsgPackFramesContentType:
+            return stream_frames()
         else:
-            raise AttributeError("Can not read graph. Currently supported formats: json and ndjson!")
+            raise AttributeError("Can not read graph. Currently supported formats: json, ndjson and msgpack frames!")
 
     @staticmethod
     def optional_json(o: Any, hint: str) -> StreamResponse:
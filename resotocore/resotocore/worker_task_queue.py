@@ -19,6 +19,8 @@ log = logging.getLogger(__name__)
 
 class WorkerTaskName:
     tag = "tag"
+    # tag changes of many resources in the same cloud, account and region
+    tag_batch = "tag_batch"
     validate_config = "validate_config"
 
 
@@ -79,6 +81,15 @@ class WorkerTaskSubscription:
     def __len__(self) -> int:
         return self.queue.qsize()
 
+    def can_perform(self, attrs: Dict[str, str]) -> bool:
+        # the filter criteria in the subscription needs to be matched by the task attributes
+        # note: the task can define more attributes, that would be ignored
+        def matches_task_filter(name: str, filter_list: List[str]) -> bool:
+            value = attrs.get(name)
+            return value in filter_list if value else False
+
+        return all(matches_task_filter(n, f) for n, f in self.task.filter.items())
+
 
 class WorkerTaskQueue:
     """
@@ -130,6 +141,12 @@ class WorkerTaskQueue:
                 open_tasks = [task for task in self.outstanding_tasks.values() if task.worker.worker_id == worker_id]
                 await self.__retry_tasks(open_tasks)
 
+    def has_worker(self, task_name: str, attrs: Dict[str, str]) -> bool:
+        """
+        Check if an attached worker can perform a task with the given name and attributes.
+        """
+        return any(sub.can_perform(attrs) for sub in self.worker_by_task_name.get(task_name, []))
+
     async def add_task(self, task: WorkerTask, retry_count: int = 3) -> None:
         async with self.lock:
             await self.__add_task(task, retry_count)
@@ -142,6 +159,27 @@ class WorkerTaskQueue:
         async with self.lock:
             await self.__error_task(worker_id, task_id, message)
 
+    async def resync_tasks(self, worker_id: WorkerId, task_ids: List[TaskId]) -> None:
+        """
+        A worker reconnected and still performs the given tasks.
+        Tasks that have not been assigned to another worker since, are assigned to this worker again.
+        """
+        async with self.lock:
+            for task_id in task_ids:
+                on_hold = self.unassigned_tasks.get(task_id)
+                if on_hold is None:
+                    continue
+                for sub in self.worker_by_task_name[on_hold.task.name]:
+                    if sub.worker_id == worker_id:
+                        self.unassigned_tasks.pop(task_id, None)
+                        deadline = utc() + on_hold.task.timeout
+                        self.outstanding_tasks[task_id] = WorkerTaskInProgress(
+                            on_hold.task, sub, on_hold.retry_counter, deadline
+                        )
+                        self.work_count[worker_id] = self.work_count[worker_id] + 1
+                        log.info(f"Task {task_id} is still performed by worker {worker_id}.")
+                        break
+
     async def check_outdated_unassigned_tasks(self) -> None:
         now = utc()
         outstanding = [ip for ip in self.outstanding_tasks.values() if ip.deadline < now]
@@ -161,17 +199,8 @@ class WorkerTaskQueue:
         def outstanding_tasks(subscription: WorkerTaskSubscription) -> int:
             return self.work_count[subscription.worker_id]
 
-        def can_perform(subscription: WorkerTaskSubscription) -> bool:
-            # the filter criteria in the subscription needs to be matched by the task attributes
-            # note: the task can define more attributes, that would be ignored
-            def matches_task_filter(name: str, filter_list: List[str]) -> bool:
-                value = task.attrs.get(name)
-                return value in filter_list if value else False
-
-            return all(matches_task_filter(n, f) for n, f in subscription.task.filter.items())
-
         # all workers that match the task filter
-        matching_subscriptions = [wt for wt in self.worker_by_task_name[task.name] if can_perform(wt)]
+        matching_subscriptions = [wt for wt in self.worker_by_task_name[task.name] if wt.can_perform(task.attrs)]
         if matching_subscriptions:
             # filter the list for worker with the most specific filter (==most task filter)
             max_filter_len = reduce(lambda res, x: max(res, len(x.task.filter)), matching_subscriptions, 0)
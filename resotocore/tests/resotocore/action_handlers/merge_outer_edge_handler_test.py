@@ -146,6 +146,12 @@ async def test_merge_outer_edges(
             graph_db.name,
             [
                 DeferredEdge(ByNodeId(id1), BySearchCriteria("is(bla)"), EdgeTypes.default),
+                # the same selectors are resolved only once
+                DeferredEdge(ByNodeId(id3), BySearchCriteria("is(bla)"), EdgeTypes.default),
+                DeferredEdge(ByNodeId(id3), ByNodeId(id1), EdgeTypes.default),
+                # selectors that can not be resolved do not create an edge
+                DeferredEdge(ByNodeId(NodeId("does_not_exist")), ByNodeId(id1), EdgeTypes.default),
+                DeferredEdge(ByNodeId(id1), BySearchCriteria("is(foo)"), EdgeTypes.default),
             ],
         )
     )
@@ -153,6 +159,9 @@ async def test_merge_outer_edges(
 
     graph = await graph_db.search_graph(QueryModel(parse_query("is(graph_root) -default[0:]->"), foo_model))
     assert graph.has_edge("id1", "id2")
+    assert graph.has_edge("id3", "id2")
+    assert graph.has_edge("id3", "id1")
+    assert not graph.has_edge("id1", "id3")
     assert graph.has_edge("root", "id3")
 
     # deletion test
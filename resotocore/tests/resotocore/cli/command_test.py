@@ -34,7 +34,7 @@ from resotocore.task.task_description import TimeTrigger, Workflow, EventTrigger
 from resotocore.task.task_handler import TaskHandlerService
 from resotocore.types import JsonElement, Json
 from resotocore.util import AccessJson, utc_str
-from resotocore.worker_task_queue import WorkerTask
+from resotocore.worker_task_queue import WorkerTask, WorkerTaskName
 
 # noinspection PyUnresolvedReferences
 from tests.resotocore.analytics import event_sender
@@ -468,11 +468,13 @@ async def test_tag_command(
     res1 = await cli.execute_cli_command(
         'json ["root", "collector"] | tag update foo "bla_{reported.some_int}"', stream.list
     )
-    assert nr_of_performed() == 2
+    # both nodes have no cloud, account and region: they are changed with one batch task
+    assert nr_of_performed() == 1
     assert {a["id"] for a in res1[0]} == {"root", "collector"}
-    assert len(incoming_tasks) == 2
+    assert len(incoming_tasks) == 1
+    assert incoming_tasks[0].name == WorkerTaskName.tag_batch
     # check that the worker task data is correct
-    data = AccessJson(incoming_tasks[0].data)
+    data = AccessJson(incoming_tasks[0].data["nodes"][0])
     assert data["update"] is not None  # tag update -> data.update is defined
     assert not data.node.reported.is_none  # the node reported section is defined
     assert not data.node.metadata.is_none  # the node metadata section is defined
@@ -480,18 +482,19 @@ async def test_tag_command(
     assert data["update"].foo == "bla_0"  # using the renderer bla_{reported.some_int}
 
     res2 = await cli.execute_cli_command('search is("foo") | tag update foo bla', stream.list)
-    assert nr_of_performed() == 11
+    assert nr_of_performed() == 1
     assert len(res2[0]) == 11
+    assert all(a["reported"]["tags"]["foo"] == "bla" for a in res2[0])
     res2_tag_no_val = await cli.execute_cli_command('search is("foo") | tag update foobar', stream.list)
-    assert nr_of_performed() == 11
+    assert nr_of_performed() == 1
     assert len(res2_tag_no_val[0]) == 11
     res3 = await cli.execute_cli_command('search is("foo") | tag delete foo', stream.list)
-    assert nr_of_performed() == 11
+    assert nr_of_performed() == 1
     assert len(res3[0]) == 11
     with caplog.at_level(logging.WARNING):
         caplog.clear()
         res4 = await cli.execute_cli_command('search is("bla") limit 2 | tag delete foo', stream.list)
-        assert nr_of_performed() == 2
+        assert nr_of_performed() == 1
         assert len(res4[0]) == 2
         # make sure that 2 warnings are emitted
         assert len(caplog.records) == 2
@@ -499,13 +502,25 @@ async def test_tag_command(
             assert res.message.startswith("Tag update not reflected in db. Wait until next collector run.")
     # tag updates can be put into background
     res6 = await cli.execute_cli_command('json ["root", "collector"] | tag update --nowait foo bla', stream.list)
-    assert cli.dependencies.forked_tasks.qsize() == 2
+    assert cli.dependencies.forked_tasks.qsize() == 1
     for res in res6[0]:
         # in this case a message with the task id is emitted
-        assert res.startswith("Spawned WorkerTask tag:")  # type:ignore
+        assert res.startswith("Spawned WorkerTask tag_batch:")  # type:ignore
         # and the real result is found when the forked task is awaited, which happens by the CLI reaper
         awaitable, info = await cli.dependencies.forked_tasks.get()
-        assert (await awaitable)["id"] in ["root", "collector"]  # type:ignore
+        assert {a["id"] for a in await awaitable} == {"root", "collector"}  # type:ignore
+
+
+@pytest.mark.asyncio
+async def test_tag_command_without_batch_worker(
+    cli: CLI, incoming_tasks: List[WorkerTask], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # workers that do not subscribe to tag batches (e.g. older versions) get one tag task per node
+    monkeypatch.setitem(cli.dependencies.worker_task_queue.worker_by_task_name, WorkerTaskName.tag_batch, [])
+    res = await cli.execute_cli_command('json ["root", "collector"] | tag update foo bla', stream.list)
+    assert {a["id"] for a in res[0]} == {"root", "collector"}
+    assert all(a["reported"]["tags"]["foo"] == "bla" for a in res[0])
+    assert [task.name for task in incoming_tasks] == [WorkerTaskName.tag, WorkerTaskName.tag]
 
 
 @pytest.mark.asyncio
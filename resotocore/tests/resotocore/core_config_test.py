@@ -164,7 +164,14 @@ def config_json() -> Json:
                     }
                 ],
             },
-            "graph_update": {"abort_after_seconds": 1234, "merge_max_wait_time_seconds": 4321},
+            "graph_update": {
+                "abort_after_seconds": 1234,
+                "merge_max_wait_time_seconds": 4321,
+                "streaming_merge": True,
+                "compact_graph": True,
+                "merge_parallelism": 4,
+                "spool_transfer": True,
+            },
             "runtime": {
                 "usage_metrics": False,
                 "debug": True,
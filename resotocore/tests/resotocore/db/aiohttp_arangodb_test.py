@@ -0,0 +1,191 @@
+import asyncio
+import json
+from typing import AsyncIterator, Dict, List, Tuple
+
+import pytest
+from aiohttp.test_utils import TestServer
+from aiohttp.web import Request, Response, Application, json_response, post, put, get, patch
+from aiostream import stream
+from arango.client import ArangoClient
+from arango.request import Request as ArangoRequest
+from arango.response import Response as ArangoResponse
+from arango.exceptions import DocumentInsertError, DocumentUpdateError
+from arango.typings import Json
+from pytest import fixture
+
+from resotocore.async_extensions import run_async
+from resotocore.db.arangodb_extensions import AsyncArangoHTTPClient, AsyncHTTPCursor
+from resotocore.db.async_arangodb import AiohttpArangoDB, AsyncCursor
+from resotocore.db.graphdb import execute_many_async
+
+
+def fake_arango() -> Tuple[Application, List[Request]]:
+    """
+    Minimal stand in for the ArangoDB HTTP API: returns 10 documents in batches of 3 and stores documents in memory.
+    """
+    requests: List[Request] = []
+    cursors: Dict[str, List[Json]] = {}
+    documents: Dict[str, Json] = {}
+
+    def batch(cursor_id: str) -> Response:
+        remaining = cursors[cursor_id]
+        result, cursors[cursor_id] = remaining[0:3], remaining[3:]
+        has_more = bool(cursors[cursor_id])
+        return json_response({"id": cursor_id, "result": result, "hasMore": has_more, "count": 10, "error": False})
+
+    async def create_cursor(request: Request) -> Response:
+        requests.append(request)
+        body = await request.json()
+        assert body["query"] == "RETURN 1..10"
+        cursor_id = str(len(cursors))
+        cursors[cursor_id] = [{"_key": str(i), "num": i} for i in range(10)]
+        return batch(cursor_id)
+
+    async def next_batch(request: Request) -> Response:
+        requests.append(request)
+        return batch(request.match_info["cursor_id"])
+
+    async def insert_many(request: Request) -> Response:
+        requests.append(request)
+        docs = await request.json()
+        result: List[Json] = []
+        for doc in docs:
+            if doc["_key"] in documents:  # document failures are reported per document
+                result.append({"error": True, "errorNum": 1210, "errorMessage": "unique constraint violated"})
+            else:
+                documents[doc["_key"]] = doc
+                result.append({"_key": doc["_key"], "_id": f"col/{doc['_key']}"})
+        return json_response(result, status=202)
+
+    async def get_document(request: Request) -> Response:
+        requests.append(request)
+        key = request.match_info["key"]
+        if key in documents:
+            return json_response(documents[key])
+        return json_response({"error": True, "errorNum": 1202, "errorMessage": "document not found"}, status=404)
+
+    async def update_document(request: Request) -> Response:
+        requests.append(request)
+        return json_response({"error": True, "errorNum": 1202, "errorMessage": "document not found"}, status=404)
+
+    async def collection_revision(request: Request) -> Response:
+        requests.append(request)
+        return json_response({"name": request.match_info["name"], "revision": str(len(documents)), "error": False})
+
+    app = Application()
+    app.add_routes(
+        [
+            post("/_db/test/_api/cursor", create_cursor),
+            put("/_db/test/_api/cursor/{cursor_id}", next_batch),
+            post("/_db/test/_api/document/col", insert_many),
+            get("/_db/test/_api/document/col/{key}", get_document),
+            patch("/_db/test/_api/document/col/{key}", update_document),
+            get("/_db/test/_api/collection/{name}/revision", collection_revision),
+        ]
+    )
+    return app, requests
+
+
+@fixture
+async def fake_db() -> AsyncIterator[Tuple[AiohttpArangoDB, List[Request]]]:
+    app, requests = fake_arango()
+    server = TestServer(app)
+    await server.start_server()
+    url = f"http://localhost:{server.port}"
+    client = AsyncArangoHTTPClient(url, "test", "test", "test", 10)
+    db = AiohttpArangoDB(ArangoClient(hosts=url).db("test", "test", "test"), client)
+    yield db, requests
+    await db.close()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_aql_cursor(fake_db: Tuple[AiohttpArangoDB, List[Request]]) -> None:
+    db, requests = fake_db
+    async with await db.aql_cursor("RETURN 1..10", trafo=lambda x: x) as crs:
+        assert isinstance(crs, AsyncCursor)
+        assert crs.count() == 10
+        assert [e["num"] for e in await stream.list(crs)] == list(range(10))
+    # one request to create the cursor and 3 requests to fetch the next batches
+    assert len(requests) == 4
+    assert all(r.headers["Accept-Encoding"] == "gzip, deflate" for r in requests)
+
+
+@pytest.mark.asyncio
+async def test_aql(fake_db: Tuple[AiohttpArangoDB, List[Request]]) -> None:
+    db, requests = fake_db
+    cursor = await db.aql("RETURN 1..10")
+    assert isinstance(cursor, AsyncHTTPCursor)
+    # only the first batch is fetched
+    assert len(requests) == 1
+    assert not cursor.empty()
+    assert cursor.next()["num"] == 0
+    # the cursor is consumed in a separate thread: the next batches are fetched via the event loop
+    assert [e["num"] for e in await run_async(list, cursor)] == list(range(1, 10))
+    assert len(requests) == 4
+
+
+@pytest.mark.asyncio
+async def test_aql_inside_event_loop(fake_db: Tuple[AiohttpArangoDB, List[Request]]) -> None:
+    db, _ = fake_db
+    sent: List[ArangoRequest] = []
+
+    def send_sync(request: ArangoRequest) -> ArangoResponse:
+        sent.append(request)
+        response = ArangoResponse("put", request.endpoint, {}, 200, "OK", "")
+        response.is_success = True
+        response.body = {"id": "0", "result": [{"num": 3}], "hasMore": False}
+        return response
+
+    cursor = await db.aql("RETURN 1..10")
+    assert isinstance(cursor, AsyncHTTPCursor)
+    cursor.send_sync = send_sync
+    # inside the event loop the next batch is fetched with a blocking request
+    assert [e["num"] for e in cursor] == [0, 1, 2, 3]
+    assert [r.endpoint for r in sent] == ["/_api/cursor/0"]
+
+
+@pytest.mark.asyncio
+async def test_documents(fake_db: Tuple[AiohttpArangoDB, List[Request]]) -> None:
+    db, requests = fake_db
+    result = await db.insert_many("col", [{"_key": "a", "num": 1}, {"_key": "b", "num": 2}])
+    assert result == [{"_key": "a", "_id": "col/a"}, {"_key": "b", "_id": "col/b"}]
+    assert json.loads(await requests[0].text()) == [{"_key": "a", "num": 1}, {"_key": "b", "num": 2}]
+    assert await db.get("col", "a") == {"_key": "a", "num": 1}
+    assert await db.get("col", "col/b") == {"_key": "b", "num": 2}
+    assert await db.get("col", "c") is None
+    with pytest.raises(DocumentUpdateError) as ex:
+        await db.update("col", {"_key": "c", "_rev": "123"})
+    assert ex.value.error_code == 1202
+    assert requests[-1].headers["If-Match"] == "123"
+    assert await db.revision("col") == "2"
+
+
+@pytest.mark.asyncio
+async def test_insert_many_document_error(fake_db: Tuple[AiohttpArangoDB, List[Request]]) -> None:
+    db, _ = fake_db
+    await db.insert_many("col", [{"_key": "a", "num": 1}])
+    result = await db.insert_many("col", [{"_key": "b", "num": 2}, {"_key": "a", "num": 3}])
+    assert isinstance(result, list)
+    assert result[0] == {"_key": "b", "_id": "col/b"}
+    # the failed document is returned as exception, like python-arango does
+    error = result[1]
+    assert isinstance(error, DocumentInsertError)
+    assert error.error_code == 1210
+    assert error.error_message == "unique constraint violated"
+    # the failure is not swallowed, when many documents are persisted
+    with pytest.raises(DocumentInsertError):
+        await execute_many_async(db.insert_many, "col", [{"_key": "c", "num": 4}, {"_key": "a", "num": 5}])
+
+
+@pytest.mark.asyncio
+async def test_aql_cursor_prefetch(fake_db: Tuple[AiohttpArangoDB, List[Request]]) -> None:
+    db, requests = fake_db
+    db.cursor_prefetch = 1
+    async with await db.aql_cursor("RETURN 1..10", trafo=lambda x: x) as crs:
+        assert (await crs.__anext__())["num"] == 0
+        await asyncio.sleep(0.1)
+        # backpressure: one batch is consumed, one is waiting in the queue, one is waiting to be added
+        assert len(requests) == 3
+        assert [e["num"] for e in await stream.list(crs)] == list(range(1, 10))
+    assert len(requests) == 4
@@ -1,10 +1,14 @@
+from typing import List, Optional
 from uuid import uuid1
 
 import pytest
 from arango.collection import StandardCollection
 from arango.database import StandardDatabase
+from arango.typings import Json
+from aiostream import stream
 
-from resotocore.db.async_arangodb import AsyncArangoDB
+from resotocore.db.arangodb_extensions import AsyncArangoHTTPClient, AsyncHTTPCursor
+from resotocore.db.async_arangodb import AsyncArangoDB, AsyncCursor
 
 # noinspection PyUnresolvedReferences
 from tests.resotocore.db.graphdb_test import test_db, system_db, local_client
@@ -41,3 +45,39 @@ async def test_events(async_db: AsyncArangoDB, test_collection: StandardCollecti
         await tx.insert(tc, {"_key": "foo"})
     result = list(await async_db.all(tc))
     assert len(result) == 1
+
+
+def list_cursor(elements: List[Json]) -> AsyncHTTPCursor:
+    # a cursor with a single batch never sends a request
+    client = AsyncArangoHTTPClient("http://localhost:8529", "test", "test", "test", 10)
+    return AsyncHTTPCursor(client, {"result": elements, "hasMore": False})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fingerprints", [False, True])
+async def test_graph_cursor(fingerprints: bool) -> None:
+    def node(nid: str, from_id: Optional[str] = None, edge_type: str = "default") -> Json:
+        js: Json = {"_key": nid, "id": nid}
+        if from_id:
+            js.update(_from=f"ns/{from_id}", _to=f"ns/{nid}", _link_id=f"ns_{edge_type}/{from_id}_{nid}")
+        return js
+
+    # a traversal result: edges are part of the target node. c is traversed twice via different edges.
+    elements = [node("a"), node("c", "b"), node("b", "a"), node("c", "a", "delete"), node("c", "b")]
+    cursor = AsyncCursor(list_cursor(elements), lambda js: {"type": "node", "id": js["id"]}, fingerprints=fingerprints)
+    result = await stream.list(cursor)
+    assert [e["id"] if e["type"] == "node" else (e["from"], e["to"], e["edge_type"]) for e in result] == [
+        "a",
+        "c",
+        "b",
+        ("a", "b", "default"),
+        ("a", "c", "delete"),
+        ("b", "c", "default"),
+    ]
+    # an edge is only returned, after both nodes have been returned
+    seen = set()
+    for elem in result:
+        if elem["type"] == "node":
+            seen.add(elem["id"])
+        else:
+            assert elem["from"] in seen and elem["to"] in seen
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import timedelta
+from typing import Optional, List
+
+import pytest
+
+from resotocore.config import ConfigEntity
+from resotocore.db.entitydb import CachedEntityDb
+from resotocore.ids import ConfigId
+from resotocore.message_bus import MessageBus, CoreMessage
+from tests.resotocore.db.entitydb import InMemoryDb
+
+
+class CountingDb(InMemoryDb[ConfigId, ConfigEntity]):
+    def __init__(self) -> None:
+        super().__init__(ConfigEntity, lambda c: c.id)
+        self.reads: List[str] = []
+
+    async def get(self, key: ConfigId) -> Optional[ConfigEntity]:
+        self.reads.append(key)
+        return await super().get(key)
+
+
+@pytest.mark.asyncio
+async def test_cached_entity_db() -> None:
+    db = CountingDb()
+    await db.update(ConfigEntity(ConfigId("a"), {"a": {"num": 1}}))
+    message_bus = MessageBus()
+    cached = CachedEntityDb(db, "test", timedelta(minutes=5), message_bus, [CoreMessage.ConfigUpdated])
+    await cached.start()
+    try:
+        # elements are read only once: also elements that do not exist
+        for _ in range(3):
+            assert (await cached.get(ConfigId("a"))) == ConfigEntity(ConfigId("a"), {"a": {"num": 1}})
+            assert await cached.get(ConfigId("b")) is None
+        assert db.reads == ["a", "b"]
+        # elements are copies: changing them does not change the cache
+        (await cached.get(ConfigId("a"))).config["a"]["num"] = 23  # type: ignore
+        assert (await cached.get(ConfigId("a"))).config == {"a": {"num": 1}}  # type: ignore
+        # changes via the cache invalidate the cache
+        await cached.update(ConfigEntity(ConfigId("b"), {"b": {}}))
+        assert await cached.get(ConfigId("b")) == ConfigEntity(ConfigId("b"), {"b": {}})
+        assert [e.id async for e in cached.all()] == ["a", "b"]
+        await cached.delete(ConfigId("b"))
+        assert await cached.get(ConfigId("b")) is None
+        assert [e.id async for e in cached.all()] == ["a"]
+        # changes done elsewhere are picked up, when announced on the message bus
+        db.reads.clear()
+        assert (await cached.get(ConfigId("a"))).config == {"a": {"num": 1}}  # type: ignore
+        await db.update(ConfigEntity(ConfigId("a"), {"a": {"num": 2}}))
+        assert (await cached.get(ConfigId("a"))).config == {"a": {"num": 1}}  # type: ignore
+        await message_bus.emit_event(CoreMessage.ConfigUpdated, {"id": "a"})
+        await asyncio.sleep(0.05)
+        assert (await cached.get(ConfigId("a"))).config == {"a": {"num": 2}}  # type: ignore
+        assert db.reads == ["a", "a"]
+    finally:
+        await cached.stop()
+
+    # elements are reloaded after the time to live
+    no_ttl = CachedEntityDb(db, "no_ttl", timedelta(seconds=-1))
+    db.reads.clear()
+    await no_ttl.get(ConfigId("a"))
+    await no_ttl.get(ConfigId("a"))
+    assert db.reads == ["a", "a"]
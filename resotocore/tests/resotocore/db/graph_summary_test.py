@@ -0,0 +1,82 @@
+from typing import Optional
+
+from resotocore.db.graph_summary import SummaryDelta, summary_group, summary_query
+from resotocore.query.model import Query
+from resotocore.query.query_parser import parse_query
+from resotocore.types import Json
+
+
+def node(kind: str, account: str) -> Json:
+    return {
+        "kinds": [kind, "resource"],
+        "reported": {"kind": kind, "id": "some_id", "name": "some_name"},
+        "ancestors": {
+            "cloud": {"reported": {"id": "aws", "name": "aws"}},
+            "account": {"reported": {"id": account, "name": account}},
+        },
+    }
+
+
+def test_summary_group() -> None:
+    assert summary_group(node("foo", "a")) == {
+        "kinds": ["foo", "resource"],
+        "reported": {"kind": "foo"},
+        "ancestors": {
+            "cloud": {"reported": {"id": "aws", "name": "aws"}},
+            "account": {"reported": {"id": "a", "name": "a"}},
+        },
+    }
+    assert summary_group({"reported": {"kind": "graph_root"}}) == {
+        "kinds": [],
+        "reported": {"kind": "graph_root"},
+        "ancestors": {},
+    }
+
+
+def test_summary_delta() -> None:
+    delta = SummaryDelta()
+    assert not delta
+    delta.add(node("foo", "a"))
+    delta.add(node("foo", "a"))
+    delta.add(node("bla", "a"))
+    # a change of a property outside the summary group does not change the summary
+    delta.change(node("bla", "a"), {**node("bla", "a"), "reported": {"kind": "bla", "name": "other"}})
+    assert {u["reported"]["kind"]: u["count"] for u in delta.updates()} == {"foo": 2, "bla": 1}
+    # a node moves to another account
+    other = SummaryDelta()
+    other.change(node("foo", "a"), node("foo", "b"))
+    other.remove(node("bla", "a"))
+    delta += other
+    counts = {(u["reported"]["kind"], u["ancestors"]["account"]["reported"]["id"]): u["count"] for u in delta.updates()}
+    assert counts == {("foo", "a"): 1, ("foo", "b"): 1}
+    # only the groups of the other delta lost nodes
+    assert len(other.decreased_keys()) == 2
+    assert delta.decreased_keys() == []
+    # removing all added nodes leaves no update behind
+    delta.remove(node("foo", "a"))
+    delta.remove(node("foo", "b"))
+    assert not delta
+    assert delta.updates() == []
+
+
+def test_summary_query() -> None:
+    def summary(query: str) -> Optional[Query]:
+        return summary_query(parse_query(query).on_section("reported"))
+
+    # queries that only filter and group by summary properties and count nodes
+    assert str(summary("aggregate(kind: sum(1) as count): all")) == "aggregate(reported.kind: sum(count) as count):all"
+    assert summary("aggregate(kind: sum(1) as count): is(instance)") is not None
+    assert summary("aggregate(/ancestors.account.reported.id as account: sum(1)): is(volume) and kind!=foo") is not None
+    assert summary('aggregate("{kind}_{/ancestors.region.reported.name}" as n: sum(1)): all') is not None
+    assert summary("aggregate(kind: sum(1)): is(instance) sort kind") is not None
+    # not eligible: properties outside the summary, other functions, navigation, limits
+    assert summary("is(instance)") is None
+    assert summary("aggregate(kind: sum(1)): name==foo") is None
+    assert summary("aggregate(kind: sum(1)): kind=~foo") is None
+    assert summary("aggregate(name: sum(1)): all") is None
+    assert summary("aggregate(kind: count(name)): all") is None
+    assert summary("aggregate(kind: sum(instance_cores)): is(instance)") is None
+    assert summary("aggregate(kind: sum(1)): is(instance) limit 10") is None
+    assert summary("aggregate(kind: sum(1)): is(instance) --> is(volume)") is None
+    assert summary("aggregate(kind: sum(1)): is(instance) with(any, --> is(volume))") is None
+    assert summary("aggregate(kind: sum(1)): is(instance) sort name") is None
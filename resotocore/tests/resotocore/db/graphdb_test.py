@@ -13,13 +13,15 @@ from arango.typings import Json
 from networkx import MultiDiGraph
 
 from resotocore.analytics import AnalyticsEventSender, CoreEvent, InMemoryEventSender
+from resotocore.core_config import GraphUpdateConfig, DatabaseConfig
 from resotocore.db.async_arangodb import AsyncArangoDB
+from resotocore.db.db_access import async_arango_db
 from resotocore.db.graphdb import ArangoGraphDB, GraphDB, EventGraphDB
 
 from resotocore.db.model import QueryModel, GraphUpdate
 from resotocore.error import ConflictingChangeInProgress, NoSuchChangeError, InvalidBatchUpdate
 from resotocore.model.adjust_node import NoAdjust
-from resotocore.model.graph_access import GraphAccess, EdgeTypes, Section
+from resotocore.model.graph_access import GraphAccess, EdgeTypes, Section, StreamingGraphBuilder
 from resotocore.model.model import Model, ComplexKind, Property, Kind, SyntheticProperty
 from resotocore.model.typed_model import from_js, to_js
 from resotocore.query.model import Query, P, Navigation
@@ -249,7 +251,7 @@ def test_db(local_client: ArangoClient, system_db: StandardDatabase) -> Standard
 @pytest.fixture
 async def graph_db(test_db: StandardDatabase) -> ArangoGraphDB:
     async_db = AsyncArangoDB(test_db)
-    graph_db = ArangoGraphDB(async_db, "ns", NoAdjust())
+    graph_db = ArangoGraphDB(async_db, "ns", NoAdjust(), GraphUpdateConfig())
     await graph_db.create_update_schema()
     await async_db.truncate(graph_db.in_progress)
     return graph_db
@@ -341,6 +343,45 @@ async def test_merge_multi_graph(graph_db: ArangoGraphDB, foo_model: Model) -> N
     assert len(nodes) == 8
 
 
+@pytest.mark.asyncio
+async def test_merge_multi_graph_parallel(graph_db: ArangoGraphDB, foo_model: Model) -> None:
+    await graph_db.wipe()
+    graph_db.config.merge_parallelism = 3
+    # same graph and same expectations as in test_merge_multi_graph
+    nodes, info = await graph_db.merge_graph(create_multi_collector_graph(), foo_model)
+    assert info == GraphUpdate(110, 1, 0, 218, 0, 0)
+    assert len(nodes) == 8
+    nodes, info = await graph_db.merge_graph(create_multi_collector_graph(), foo_model)
+    assert info == GraphUpdate(0, 0, 0, 0, 0, 0)
+    assert len(nodes) == 8
+
+
+@pytest.mark.asyncio
+async def test_merge_graph_streaming(graph_db: ArangoGraphDB, foo_model: Model) -> None:
+    await graph_db.wipe()
+
+    def streaming_builder() -> StreamingGraphBuilder:
+        graph = create_multi_collector_graph()
+        builder = StreamingGraphBuilder(foo_model)
+        for node_id, data in graph.nodes(data=True):
+            reported = {k: v for k, v in data["reported"].items() if k != "id"}
+            metadata = {"replace": True} if data["replace"] else {}
+            builder.add_from_json({"id": node_id, "reported": reported, "metadata": metadata})
+        for from_node, to_node, data in graph.edges(data=True):
+            builder.add_from_json({"from": from_node, "to": to_node, "edge_type": data["edge_type"]})
+        builder.check_complete()
+        return builder
+
+    # same expectations as test_merge_multi_graph: the result does not depend on the merge strategy
+    nodes, info = await graph_db.merge_graph_streaming(streaming_builder(), foo_model)
+    assert info == GraphUpdate(110, 1, 0, 218, 0, 0)
+    assert len(nodes) == 8
+    # doing the same thing again should do nothing
+    nodes, info = await graph_db.merge_graph_streaming(streaming_builder(), foo_model)
+    assert info == GraphUpdate(0, 0, 0, 0, 0, 0)
+    assert len(nodes) == 8
+
+
 @pytest.mark.asyncio
 async def test_mark_update(filled_graph_db: ArangoGraphDB) -> None:
     db = filled_graph_db
@@ -463,6 +504,41 @@ async def test_query_aggregate(filled_graph_db: ArangoGraphDB, foo_model: Model)
         assert [x async for x in g] == [{"a": 2300, "b": 23}]
 
 
+@pytest.mark.asyncio
+async def test_summary(graph_db: ArangoGraphDB, foo_model: Model) -> None:
+    await graph_db.wipe()
+
+    async def summary() -> List[Json]:
+        q = parse_query("aggregate(kind, /ancestors.account.reported.id as account: sum(1) as count): all")
+        async with await graph_db.search_aggregation(QueryModel(q.on_section("reported"), foo_model)) as gen:
+            return sorted([x async for x in gen], key=lambda x: (x["group"]["kind"], x["group"]["account"] or ""))
+
+    async def assert_summary_consistent() -> None:
+        maintained = await summary()
+        await graph_db.rebuild_summary()
+        assert maintained == await summary()
+
+    await graph_db.merge_graph(create_multi_collector_graph(), foo_model)
+    assert sum(a["count"] for a in await summary()) == 111
+    await assert_summary_consistent()
+    # the width of the graph is reduced: deleted nodes are removed from the summary
+    await graph_db.merge_graph(create_graph("yes or no", width=5), foo_model)
+    await assert_summary_consistent()
+    await graph_db.merge_graph(create_graph("maybe"), foo_model)
+    await assert_summary_consistent()
+    # a single node is deleted: the summary is updated in the same transaction
+    await graph_db.create_node(foo_model, NodeId("new_child"), to_json(Foo("new_child", "foo")), NodeId("sub_root"))
+    await assert_summary_consistent()
+    await graph_db.delete_node(NodeId("new_child"))
+    await assert_summary_consistent()
+    # a summary that drifted from the graph is detected and rebuilt
+    assert await graph_db.check_summary()
+    await graph_db.db.truncate(graph_db.summary_name)
+    assert not await graph_db.check_summary()
+    assert await graph_db.check_summary()
+    await assert_summary_consistent()
+
+
 @pytest.mark.asyncio
 async def test_query_with_fulltext(filled_graph_db: ArangoGraphDB, foo_model: Model) -> None:
     async def search(query: str) -> List[JsonElement]:
@@ -577,6 +653,21 @@ async def test_update_node(graph_db: ArangoGraphDB, foo_model: Model) -> None:
     assert json_replace == {"kind": "bla", "identifier": "123"}
 
 
+@pytest.mark.asyncio
+async def test_revision(graph_db: ArangoGraphDB, foo_model: Model) -> None:
+    await graph_db.wipe()
+    revision = await graph_db.revision()
+    # reading the graph does not change the revision
+    assert await graph_db.get_node(foo_model, NodeId("root")) is not None
+    assert await graph_db.revision() == revision
+    # every change changes the revision
+    await graph_db.create_node(foo_model, NodeId("some_other"), to_json(Foo("some_other", "foo")), NodeId("root"))
+    changed = await graph_db.revision()
+    assert changed != revision
+    await graph_db.delete_node(NodeId("some_other"))
+    assert await graph_db.revision() not in (revision, changed)
+
+
 @pytest.mark.asyncio
 async def test_update_nodes(graph_db: ArangoGraphDB, foo_model: Model) -> None:
     def expect(jsons: List[Json], path: List[str], value: JsonElement) -> None:
@@ -636,6 +727,31 @@ async def test_delete_node(graph_db: ArangoGraphDB, foo_model: Model) -> None:
     assert str(not_allowed.value) == "Can not delete node, since it has 1 child(ren)!"
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("driver", ["python-arango", "aiohttp"])
+async def test_get_and_delete_node_with_driver(test_db: StandardDatabase, foo_model: Model, driver: str) -> None:
+    async_db = async_arango_db(
+        test_db, DatabaseConfig(database="test", username="test", password="test", driver=driver)
+    )
+    graph_db = ArangoGraphDB(async_db, "ns", NoAdjust(), GraphUpdateConfig())
+    try:
+        await graph_db.create_update_schema()
+        await graph_db.wipe()
+        await graph_db.create_node(foo_model, NodeId("sub_root"), to_json(Foo("sub_root", "foo")), NodeId("root"))
+        await graph_db.create_node(foo_model, NodeId("child"), to_json(Foo("child", "foo")), NodeId("sub_root"))
+        child = await graph_db.get_node(foo_model, NodeId("child"))
+        assert child is not None and to_foo(child).identifier == "child"
+        assert await graph_db.get_node(foo_model, NodeId("does_not_exist")) is None
+        with pytest.raises(AttributeError):
+            await graph_db.delete_node(NodeId("sub_root"))
+        await graph_db.delete_node(NodeId("child"))
+        assert await graph_db.get_node(foo_model, NodeId("child")) is None
+        # deleting a node that does not exist is a no-op
+        await graph_db.delete_node(NodeId("child"))
+    finally:
+        await async_db.close()
+
+
 @pytest.mark.asyncio
 async def test_events(event_graph_db: EventGraphDB, foo_model: Model, event_sender: InMemoryEventSender) -> None:
     await event_graph_db.create_node(foo_model, NodeId("some_other"), to_json(Foo("some_other", "foo")), NodeId("root"))
@@ -669,3 +785,19 @@ def to_bla(json: Json) -> Bla:
 
 def to_foo(json: Json) -> Foo:
     return from_js(json["reported"], Foo)
+
+
+@pytest.mark.asyncio
+async def test_query_cache(graph_db: ArangoGraphDB, foo_model: Model) -> None:
+    graph_db.query_cache.clear()
+    query = QueryModel(parse_query("is(foo) and identifier==9"), foo_model)
+    aql, bind_vars = await graph_db.to_query(query)
+    assert await graph_db.to_query(QueryModel(parse_query("is(foo) and identifier==9"), foo_model)) == (aql, bind_vars)
+    assert len(graph_db.query_cache) == 1
+    # queries with relative times are not cached
+    await graph_db.to_query(QueryModel(parse_query("is(foo) and ctime>-3d"), foo_model))
+    assert len(graph_db.query_cache) == 1
+    # a new model invalidates the cache
+    await graph_db.to_query(QueryModel(parse_query("is(bla)"), Model.from_kinds(list(foo_model.kinds.values()))))
+    assert len(graph_db.query_cache) == 1
+    assert graph_db.query_cache_model is not foo_model
@@ -0,0 +1,104 @@
+from typing import Tuple
+
+from resotocore.ids import NodeId
+from resotocore.model.compact_graph import CompactGraphBuilder, CompactGraphAccess, Adjacency
+from resotocore.model.graph_access import GraphBuilder, GraphAccess, EdgeTypes
+from resotocore.model.model import Model
+from resotocore.util import AccessJson
+
+# noinspection PyUnresolvedReferences
+from tests.resotocore.model.model_test import person_model
+from tests.resotocore.model.graph_access_test import multi_account_elements
+
+
+def builders(model: Model, accounts: int, resources: int) -> Tuple[GraphBuilder, CompactGraphBuilder]:
+    builder = GraphBuilder(model)
+    compact = CompactGraphBuilder(model)
+    for element in multi_account_elements(accounts, resources):
+        builder.add_from_json(element)
+        compact.add_from_json(element)
+    builder.check_complete()
+    compact.check_complete()
+    return builder, compact
+
+
+def test_adjacency() -> None:
+    adjacency = Adjacency(4, [2, 0, 0, 2, 0], [1, 3, 1, 1, 2])
+    assert list(adjacency.neighbours(0)) == [1, 2, 3]
+    assert list(adjacency.neighbours(1)) == []
+    assert list(adjacency.neighbours(2)) == [1]
+    assert adjacency.degree(0) == 3
+    assert adjacency.position(0, 2) == 1
+    assert adjacency.position(2, 1) == 3
+    assert adjacency.position(1, 2) is None
+    assert len(adjacency) == 4
+
+
+def test_compact_graph(person_model: Model) -> None:
+    builder, compact = builders(person_model, 2, 3)
+    graph = compact.graph
+    assert graph.number_of_nodes() == builder.graph.number_of_nodes()
+    assert graph.number_of_edges() == builder.graph.number_of_edges()
+    assert graph.root_id() == "root"
+    # kinds are shared between all nodes of the same kind
+    assert graph.nodes["child_region_account_0_0_0"]["kinds"] is graph.nodes["child_region_account_1_1_2"]["kinds"]
+    # nodes view behaves like the networkx one
+    assert set(graph.nodes) == set(builder.graph.nodes)
+    assert {nid: data["hash"] for nid, data in graph.nodes(data=True)} == {
+        nid: data["hash"] for nid, data in builder.graph.nodes(data=True)
+    }
+
+
+def test_reassign_root(person_model: Model) -> None:
+    compact = CompactGraphBuilder(person_model)
+    compact.add_from_json({"id": "3", "reported": {"id": "3", "kind": "graph_root"}})
+    compact.add_from_json({"id": "4", "reported": {"id": "4", "kind": "cloud"}})
+    compact.add_from_json({"from": "3", "to": "4"})
+    compact.check_complete()
+    access = CompactGraphAccess(compact.graph)
+    assert access.root() == "root"
+    assert set(access.successors(NodeId("root"), EdgeTypes.default)) == {"4"}
+    assert set(access.predecessors(NodeId("4"), EdgeTypes.default)) == {"root"}
+
+
+def test_merge_graphs(person_model: Model) -> None:
+    builder, compact = builders(person_model, 3, 5)
+    roots, parent, graphs = GraphAccess.merge_graphs(builder.graph)
+    c_roots, c_parent, c_graphs = CompactGraphAccess.merge_graphs(compact.graph)
+    assert c_roots == roots
+    assert set(c_parent.nodes) == set(parent.nodes)
+    assert c_parent.is_acyclic_per_edge_type()
+    for edge_type in EdgeTypes.all:
+        assert set(c_parent.edges(edge_type)) == set(parent.edges(edge_type))
+    cloud = AccessJson(c_parent.nodes["cloud"])
+    assert cloud.metadata.descendant_summary == {"account": 3, "region": 6, "child": 30}
+    expected = {root: access for root, access in graphs}
+    for root, sub in c_graphs:
+        exp = expected[root]
+        assert set(sub.nodes) == set(exp.nodes)
+        for nid in exp.nodes:
+            assert sub.nodes[nid]["hash"] == exp.nodes[nid]["hash"]
+            assert sub.nodes[nid].get("ancestors") == exp.nodes[nid].get("ancestors")
+            assert sub.nodes[nid].get("refs") == exp.nodes[nid].get("refs")
+            assert sub.nodes[nid].get("metadata") == exp.nodes[nid].get("metadata")
+        for edge_type in EdgeTypes.all:
+            assert set(sub.not_visited_edges(edge_type)) == set(exp.not_visited_edges(edge_type))
+        assert sorted(n["id"] for n in sub.not_visited_nodes()) == sorted(n["id"] for n in exp.not_visited_nodes())
+
+
+def test_visited(person_model: Model) -> None:
+    _, compact = builders(person_model, 1, 2)
+    _, _, graphs = CompactGraphAccess.merge_graphs(compact.graph)
+    _, sub = next(graphs)
+    region = NodeId("region_account_0_0")
+    child = NodeId("child_region_account_0_0_0")
+    assert sub.node(region) is not None
+    assert sub.node(NodeId("cloud")) is None  # not part of this sub graph
+    assert sub.node(NodeId("does_not_exist")) is None
+    assert sub.has_edge(region, child, EdgeTypes.default)
+    assert not sub.has_edge(child, region, EdgeTypes.default)
+    assert sub.has_edge(child, region, EdgeTypes.delete)
+    assert (region, child) not in set(sub.not_visited_edges(EdgeTypes.default))
+    assert (child, region) not in set(sub.not_visited_edges(EdgeTypes.delete))
+    assert region not in {n["id"] for n in sub.not_visited_nodes()}
+    assert sub.ancestor_of(child, EdgeTypes.default, "account") == compact.graph.nodes["account_0"]
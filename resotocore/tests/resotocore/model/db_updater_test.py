@@ -1,8 +1,10 @@
 import json
 from datetime import timedelta
+from pathlib import Path
 from multiprocessing import set_start_method
 from typing import List, AsyncGenerator
 
+import msgpack
 import pytest
 
 from resotocore.analytics import AnalyticsEventSender
@@ -10,7 +12,7 @@ from resotocore.db.graphdb import ArangoGraphDB
 from resotocore.db.model import GraphUpdate
 from resotocore.dependencies import empty_config
 from resotocore.ids import TaskId
-from resotocore.model.db_updater import merge_graph_process
+from resotocore.model.db_updater import merge_graph_process, ReadElement, ReadSpooled, spool_elements
 from resotocore.model.model import Kind
 from resotocore.model.typed_model import to_js
 from resotocore.db.deferred_edge_db import pending_deferred_edge_db
@@ -61,3 +63,25 @@ async def test_merge_process(
     assert elem["_key"] == "test_task_123"
     assert elem["task_id"] == "test_task_123"
     assert elem["edges"][0] == {"from_node": {"value": "id_123"}, "to_node": {"value": "id_456"}, "edge_type": "delete"}
+
+
+def test_read_element() -> None:
+    elements = [{"id": "a", "reported": {"kind": "foo"}}, {"from": "a", "to": "b"}]
+    assert list(ReadElement([json.dumps(e).encode() for e in elements], None).jsons()) == elements
+    assert list(ReadElement([msgpack.packb(e) for e in elements], None, packed=True).jsons()) == elements
+    assert list(ReadElement(elements, None, packed=True).jsons()) == elements  # type: ignore
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_read_spooled(tmp_path: Path, packed: bool) -> None:
+    first = [{"id": "a", "reported": {"kind": "foo"}}, {"from": "a", "to": "b"}]
+    second = [{"id": str(a), "reported": {"kind": "bla", "num": a}} for a in range(10)]
+    encode = msgpack.packb if packed else lambda e: json.dumps(e).encode()
+    # elements are either raw bytes as received or parsed json
+    first_data = spool_elements([encode(e) for e in first], packed)
+    second_data = spool_elements(second, packed)  # type: ignore
+    spool = tmp_path / "test.spool"
+    spool.write_bytes(first_data + second_data)
+    end = len(first_data) + len(second_data)
+    assert list(ReadSpooled(str(spool), 0, len(first_data), None, packed).jsons()) == first
+    assert list(ReadSpooled(str(spool), len(first_data), end, None, packed).jsons()) == second
@@ -1,5 +1,7 @@
 import collections
+import json
 import re
+import tracemalloc
 from datetime import date
 
 import jsons
@@ -7,9 +9,9 @@ import pytest
 from deepdiff import DeepDiff
 from networkx import MultiDiGraph
 from pytest import fixture
-from typing import Optional
+from typing import Optional, List, Any
 
-from resotocore.model.graph_access import GraphAccess, GraphBuilder, EdgeTypes, EdgeKey
+from resotocore.model.graph_access import GraphAccess, GraphBuilder, EdgeTypes, EdgeKey, StreamingGraphBuilder
 from resotocore.model.model import Model, AnyKind
 from resotocore.model.typed_model import to_json
 from resotocore.types import Json, EdgeType
@@ -156,6 +158,31 @@ def test_builder(person_model: Model) -> None:
     builder.check_complete()
 
 
+def test_builder_with_digest(person_model: Model) -> None:
+    builder = GraphBuilder(person_model)
+    builder.add_from_json({"id": "root", "reported": {"id": "root", "kind": "graph_root"}})
+    builder.add_from_json({"id": "1", "reported": {"id": "1", "kind": "Person", "mtime": "2021-03-29"}, "digest": "1"})
+    builder.add_from_json({"id": "2", "reported": {"id": "2", "kind": "Person", "mtime": "invalid"}, "digest": "2"})
+    builder.add_from_json({"from": "root", "to": "1"})
+    builder.add_from_json({"from": "root", "to": "2"})
+    builder.check_complete()
+    access = GraphAccess(builder.graph)
+    # the hash is derived from the digest, validation and flattening is deferred
+    valid = access.visit_node(NodeId("1"))
+    assert valid is not None
+    assert valid["hash"] == GraphBuilder.digest_hash("1")
+    assert "flat" not in valid
+    assert valid["reported"]["mtime"] == "2021-03-29"
+    # once the node is dumped, it is validated and flattened, the hash is not changed
+    dumped = access.dump(NodeId("1"), valid)
+    assert dumped["reported"]["mtime"] == "2021-03-29T00:00:00Z"
+    assert dumped["flat"] == "1 Person 2021-03-29 00:00:00"
+    assert dumped["hash"] == GraphBuilder.digest_hash("1")
+    # an invalid node is detected when dumped
+    with pytest.raises(ValueError):
+        access.node(NodeId("2"))
+
+
 def test_reassign_root(person_model: Model) -> None:
     max_m = {"id": "max", "kind": "Person", "name": "Max"}
     builder = GraphBuilder(person_model)
@@ -362,3 +389,91 @@ def test_resolve_graph_data() -> None:
     r3 = AccessJson(graph.node("cloud_gcp"))  # type: ignore
     assert r3.metadata.descendant_summary == {"child": 162, "region": 18, "account": 3}
     assert r3.metadata.descendant_count == 183
+
+
+def multi_account_elements(accounts: int, resources: int) -> List[Json]:
+    tags = {f"tag_{a}": f"some tag value {a}" for a in range(10)}
+
+    def node(nid: str, kind: str, **kwargs: Any) -> Json:
+        return {"id": nid, "reported": {"id": nid, "kind": kind, "tags": tags}, **kwargs}
+
+    elements = [node("root", "graph_root"), node("cloud", "cloud"), {"from": "root", "to": "cloud"}]
+    for a in range(accounts):
+        account = f"account_{a}"
+        elements.append(node(account, "account", metadata={"replace": True}))
+        elements.append({"from": "cloud", "to": account})
+        elements.append({"from": account, "to": "cloud", "edge_type": EdgeTypes.delete})
+        for r in range(2):
+            region = f"region_{account}_{r}"
+            elements.append(node(region, "region"))
+            elements.append({"from": account, "to": region})
+            for c in range(resources):
+                child = f"child_{region}_{c}"
+                elements.append(node(child, "child"))
+                elements.append({"from": region, "to": child})
+                elements.append({"from": child, "to": region, "edge_type": EdgeTypes.delete})
+    return elements
+
+
+def test_streaming_builder(person_model: Model) -> None:
+    elements = multi_account_elements(3, 5)
+    builder = GraphBuilder(person_model)
+    streaming = StreamingGraphBuilder(person_model)
+    for element in elements:
+        builder.add_from_json(element)
+        streaming.add_from_json(element)
+    builder.check_complete()
+    streaming.check_complete()
+    roots, parent, graphs = GraphAccess.merge_graphs(builder.graph)
+    expected = {root: access for root, access in graphs}
+    s_roots, s_parents, partitions = streaming.merge_partitions()
+    assert s_roots == roots
+    assert s_parents == set(parent.nodes)
+    for root, partition in partitions:
+        _, _, sub_graphs = GraphAccess.merge_graphs(partition)
+        for sub_root, sub in sub_graphs:
+            assert sub_root == root
+            assert set(sub.nodes) == set(expected[root].nodes)
+            for nid in sub.nodes:
+                assert sub.nodes[nid]["hash"] == expected[root].nodes[nid]["hash"]
+                assert sub.nodes[nid].get("ancestors") == expected[root].nodes[nid].get("ancestors")
+                assert sub.nodes[nid].get("refs") == expected[root].nodes[nid].get("refs")
+                assert sub.nodes[nid].get("metadata") == expected[root].nodes[nid].get("metadata")
+            assert set(sub.g.edges(keys=True)) == set(expected[root].g.edges(keys=True))
+    s_parent = streaming.parent_graph()
+    assert set(s_parent.nodes) == set(parent.nodes)
+    assert set(s_parent.g.edges(keys=True)) == set(parent.g.edges(keys=True))
+    for nid in parent.nodes:
+        assert s_parent.nodes[nid]["hash"] == parent.nodes[nid]["hash"]
+        assert s_parent.nodes[nid].get("metadata") == parent.nodes[nid].get("metadata")
+        assert s_parent.nodes[nid].get("ancestors") == parent.nodes[nid].get("ancestors")
+    cloud = AccessJson(s_parent.nodes["cloud"])
+    assert cloud.metadata.descendant_summary == {"account": 3, "region": 6, "child": 30}
+    streaming.close()
+
+
+def test_streaming_builder_peak_memory(person_model: Model) -> None:
+    elements = [json.dumps(e) for e in multi_account_elements(16, 40)]
+
+    def peak_memory(builder: GraphBuilder) -> int:
+        tracemalloc.start()
+        try:
+            for element in elements:
+                builder.add_from_json(json.loads(element))
+            builder.check_complete()
+            if isinstance(builder, StreamingGraphBuilder):
+                _, _, partitions = builder.merge_partitions()
+                for _, partition in partitions:
+                    list(GraphAccess.merge_graphs(partition)[2])
+                builder.parent_graph()
+                builder.close()
+            else:
+                list(GraphAccess.merge_graphs(builder.graph)[2])
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    in_memory = peak_memory(GraphBuilder(person_model))
+    streaming = peak_memory(StreamingGraphBuilder(person_model))
+    # the streaming builder only holds the structure and one merge root in memory
+    assert streaming * 2 < in_memory
@@ -54,6 +54,7 @@ from resotocore.query.query_parser import (
     not_term,
     term_parser,
     parse_query,
+    parsed_queries,
 )
 
 
@@ -329,3 +330,14 @@ def assert_round_trip(parser: Parser, obj: object, after_parsed: Optional[Callab
     parsed = parser.parse(str_rep)
     post = after_parsed(parsed) if after_parsed else parsed
     assert str(post) == str_rep, f"Expected: {str(post)} but got {str_rep}.\nDifference: {DeepDiff(obj, post)}"
+
+
+def test_parse_query_cached() -> None:
+    parsed_queries.clear()
+    query = parse_query("is(foo) -->")
+    assert parse_query(" is(foo) --> ") is query
+    # the edge type is part of the parsed query
+    delete = parse_query("is(foo) -->", edge_type=EdgeTypes.delete)
+    assert delete is not query
+    assert delete.parts[0].navigation.maybe_edge_types == [EdgeTypes.delete]  # type: ignore
+    assert len(parsed_queries) == 2
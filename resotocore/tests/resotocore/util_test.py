@@ -15,6 +15,7 @@ from resotocore.util import (
     rnd_str,
     del_value_in_path,
     deep_merge,
+    LRUCache,
 )
 
 
@@ -111,3 +112,16 @@ def test_deep_merge() -> None:
     l = {"a": {"b": 1, "d": 2}, "d": 2, "e": 4}
     r = {"a": {"c": 1, "d": 3}, "d": 1}
     assert deep_merge(l, r) == {"a": {"b": 1, "c": 1, "d": 3}, "d": 1, "e": 4}
+
+
+def test_lru_cache() -> None:
+    cache: LRUCache[str, int] = LRUCache("test", 3)
+    for num, name in enumerate(["a", "b", "c"]):
+        cache.put(name, num)
+    assert cache.get("a") == 0  # a is used and will be evicted last
+    cache.put("d", 3)
+    assert cache.get("b") is None
+    assert [cache.get(a) for a in ["a", "c", "d"]] == [0, 2, 3]
+    assert len(cache) == 3
+    cache.clear()
+    assert cache.get("a") is None
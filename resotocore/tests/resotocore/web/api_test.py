@@ -1,17 +1,25 @@
+import gzip
+import json
 from asyncio import sleep
 from contextlib import suppress
 from multiprocessing import Process
-from typing import AsyncIterator, List
+from typing import AsyncIterator, List, Optional
 
+import msgpack
 import pytest
+import zstandard
 from _pytest.fixtures import fixture
 from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+from aiohttp.web import Application, Request, StreamResponse, json_response, post
 from arango.database import StandardDatabase
 
 from resotocore.__main__ import run
 from resotocore.model.model import predefined_kinds, Kind
 from resotocore.model.typed_model import to_js
+from resotocore.types import Json
 from resotocore.util import rnd_str, AccessJson
+from resotocore.web.api import Api, MsgPackFramesContentType
 
 # noinspection PyUnresolvedReferences
 from tests.resotocore.db.graphdb_test import foo_kinds, test_db, create_graph, system_db, local_client
@@ -225,6 +233,20 @@ async def test_graph_api(core_client: ApiClient) -> None:
         "graph_root": 1,
     }
 
+    # cached aggregate: returns the same result and is evaluated again, once the graph changes
+    aggregate_url = f"{core_client.resotocore_url}/graph/{g}/search/aggregate?cached=true"
+    aggregate = "aggregate(reported.kind as kind: sum(1) as count): all"
+    async with ClientSession() as session:
+
+        async def cached_aggregate() -> Json:
+            async with session.post(aggregate_url, data=aggregate) as response:
+                return {r["group"]["kind"]: r["count"] for r in await response.json()}
+
+        assert await cached_aggregate() == {"bla": 100, "cloud": 1, "foo": 11, "graph_root": 1}
+        assert await cached_aggregate() == {"bla": 100, "cloud": 1, "foo": 11, "graph_root": 1}
+        core_client.create_node("root", "cached", {"identifier": "cached", "kind": "foo"}, g)
+        assert await cached_aggregate() == {"bla": 100, "cloud": 1, "foo": 12, "graph_root": 1}
+
     # delete the graph
     assert core_client.delete_graph(g) == "Graph deleted."
     assert g not in core_client.list_graphs()
@@ -341,3 +363,34 @@ async def test_config(core_client: ApiClient, foo_kinds: List[rc.Kind]) -> None:
     # delete config
     core_client.delete_config(cfg_id)
     assert list(core_client.configs()) == []
+
+
+@pytest.mark.asyncio
+async def test_read_compressed_and_framed_elements(client_session: ClientSession) -> None:
+    async def read_elements(request: Request) -> StreamResponse:
+        return json_response([elem async for elem in Api.to_json_generator(request)])
+
+    app = Application()
+    app.add_routes([post("/elements", read_elements)])
+    server = TestServer(app)
+    await server.start_server()
+    elements = [{"id": str(num), "reported": {"num": num, "name": "a" * num}} for num in range(100)]
+    ndjson = "".join(json.dumps(elem) + "\n" for elem in elements).encode()
+    frames = b"".join(len(p).to_bytes(4, "big") + p for p in (msgpack.packb(elem) for elem in elements))
+    try:
+
+        async def send(body: bytes, content_type: str, encoding: Optional[str] = None) -> List[Json]:
+            headers = {"Content-Type": content_type, **({"Content-Encoding": encoding} if encoding else {})}
+            async with client_session.post(f"http://localhost:{server.port}/elements", data=body, headers=headers) as r:
+                return await r.json()  # type: ignore
+
+        zstd = zstandard.ZstdCompressor()
+        assert await send(ndjson, "application/x-ndjson") == elements
+        assert await send(gzip.compress(ndjson), "application/x-ndjson", "gzip") == elements
+        assert await send(zstd.compress(ndjson), "application/x-ndjson", "zstd") == elements
+        assert await send(frames, MsgPackFramesContentType) == elements
+        assert await send(gzip.compress(frames), MsgPackFramesContentType, "gzip") == elements
+        assert await send(zstd.compress(frames), MsgPackFramesContentType, "zstd") == elements
+        assert await send(zstd.compress(json.dumps(elements).encode()), "application/json", "zstd") == elements
+    finally:
+        await server.close()
@@ -7,6 +7,7 @@ from pytest import fixture, mark
 from resotocore.ids import WorkerId
 
 from resotocore.model.graph_access import Section
+from resotocore.types import Json
 from resotocore.model.resolve_in_graph import GraphResolver, NodePath
 from resotocore.util import group_by, value_in_path
 from resotocore.worker_task_queue import WorkerTaskDescription, WorkerTaskQueue, WorkerTask, WorkerTaskName
@@ -36,8 +37,33 @@ async def worker(
     fail = WorkerTaskDescription("fail_task")
     wait = WorkerTaskDescription("wait_task")
     tag = WorkerTaskDescription(WorkerTaskName.tag)
+    tag_batch = WorkerTaskDescription(WorkerTaskName.tag_batch)
     validate_config = WorkerTaskDescription(WorkerTaskName.validate_config)
 
+    def change_tags(data: Json) -> Json:
+        node: Json = data["node"]
+        for key in GraphResolver.resolved_ancestors.keys():
+            for section in Section.content:
+                if section in node:
+                    node[section].pop(key, None)
+
+        # update or delete tags
+        if "tags" not in node:
+            node["tags"] = {}
+
+        if data.get("delete"):
+            for a in data.get("delete"):  # type: ignore
+                node["tags"].pop(a, None)
+        elif data.get("update"):
+            for k, v in data.get("update").items():  # type: ignore
+                node["tags"][k] = v
+
+        # for testing purposes: change revision number
+        kind: str = value_in_path(node, NodePath.reported_kind)  # type: ignore
+        if kind == "bla":
+            node["revision"] = "changed"
+        return node
+
     async def do_work(worker_id: WorkerId, task_descriptions: List[WorkerTaskDescription]) -> None:
         async with task_queue.attach(worker_id, task_descriptions) as tasks:
             while True:
@@ -58,32 +84,13 @@ async def worker(
                     else:
                         await task_queue.acknowledge_task(worker_id, task.id, None)
                 elif task.name == WorkerTaskName.tag:
-                    node = task.data["node"]
-                    for key in GraphResolver.resolved_ancestors.keys():
-                        for section in Section.content:
-                            if section in node:
-                                node[section].pop(key, None)
-
-                    # update or delete tags
-                    if "tags" not in node:
-                        node["tags"] = {}
-
-                    if task.data.get("delete"):
-                        for a in task.data.get("delete"):  # type: ignore
-                            node["tags"].pop(a, None)
-                    elif task.data.get("update"):
-                        for k, v in task.data.get("update").items():  # type: ignore
-                            node["tags"][k] = v
-
-                    # for testing purposes: change revision number
-                    kind: str = value_in_path(node, NodePath.reported_kind)  # type: ignore
-                    if kind == "bla":
-                        node["revision"] = "changed"
-
-                    await task_queue.acknowledge_task(worker_id, task.id, node)
+                    await task_queue.acknowledge_task(worker_id, task.id, change_tags(task.data))
+                elif task.name == WorkerTaskName.tag_batch:
+                    nodes = [change_tags(data) for data in task.data["nodes"]]
+                    await task_queue.acknowledge_task(worker_id, task.id, {"nodes": nodes})
 
     workers = [
-        asyncio.create_task(do_work(WorkerId(f"w{a}"), [success, fail, wait, tag, validate_config]))
+        asyncio.create_task(do_work(WorkerId(f"w{a}"), [success, fail, wait, tag, tag_batch, validate_config]))
         for a in range(0, 4)
     ]
     await asyncio.sleep(0)
@@ -165,5 +172,36 @@ async def test_handle_outdated(
         assert len(work_done) == 20
 
 
+@mark.asyncio
+async def test_resync_after_reconnect(task_queue: WorkerTaskQueue) -> None:
+    description = WorkerTaskDescription("resync_task")
+    task = create_task("1", description.name)
+    async with task_queue.attach(WorkerId("w1"), [description]) as queue:
+        await task_queue.add_task(task)
+        assert (await queue.get()) == task
+    # the worker is gone: the task is waiting for a new worker
+    assert task.id in task_queue.unassigned_tasks
+    async with task_queue.attach(WorkerId("w2"), [description]) as queue:
+        # the reconnected worker still performs the task
+        await task_queue.resync_tasks(WorkerId("w2"), [task.id, TaskId("unknown")])
+        assert task.id not in task_queue.unassigned_tasks
+        assert task_queue.outstanding_tasks[task.id].worker.worker_id == "w2"
+        # the task is not sent again
+        assert queue.empty()
+        await task_queue.acknowledge_task(WorkerId("w2"), task.id, {"result": "done!"})
+        assert await task.callback == {"result": "done!"}
+
+
+@mark.asyncio
+async def test_has_worker(task_queue: WorkerTaskQueue) -> None:
+    description = WorkerTaskDescription("test", {"cloud": ["aws"]})
+    assert not task_queue.has_worker("test", {"cloud": "aws"})
+    async with task_queue.attach(WorkerId("w1"), [description]):
+        assert task_queue.has_worker("test", {"cloud": "aws", "account": "123"})
+        assert not task_queue.has_worker("test", {"cloud": "gcp"})
+        assert not task_queue.has_worker("other", {"cloud": "aws"})
+    assert not task_queue.has_worker("test", {"cloud": "aws"})
+
+
 def create_task(uid: str, name: str) -> WorkerTask:
     return WorkerTask(TaskId(uid), name, {}, {}, asyncio.get_event_loop().create_future(), timedelta())
@@ -0,0 +1,84 @@
+"""
+Compare the throughput of an AsyncCursor with and without prefetching.
+Simulates a `search all | dump`: the database returns batches with a given latency,
+every element is transformed and rendered as JSON.
+
+Usage: python3 cursor_benchmark.py --nodes 1000000 --batch-size 10000 --latency 0.1 --prefetch 0 2
+"""
+import asyncio
+import json
+import time
+from argparse import ArgumentParser
+from collections import deque
+from typing import Deque, Optional
+
+from arango.typings import Json
+
+from resotocore.db.async_arangodb import AsyncCursor
+
+parser = ArgumentParser()
+parser.add_argument("--nodes", type=int, default=1000000)
+parser.add_argument("--batch-size", type=int, default=10000)
+parser.add_argument("--latency", type=float, default=0.1, help="Time in seconds to fetch one batch.")
+parser.add_argument("--prefetch", type=int, nargs="+", default=[0, 2])
+ns = parser.parse_args()
+
+
+class SimulatedCursor:
+    """
+    Implements the part of the python-arango cursor used by AsyncCursor.
+    """
+
+    def __init__(self, nodes: int, batch_size: int, latency: float) -> None:
+        self.nodes = nodes
+        self.batch_size = batch_size
+        self.latency = latency
+        self.offset = 0
+        self.batch: Deque[Json] = deque()
+        self.fetch()
+
+    def fetch(self) -> None:
+        time.sleep(self.latency)
+        end = min(self.offset + self.batch_size, self.nodes)
+        for num in range(self.offset, end):
+            self.batch.append({"_key": str(num), "id": str(num), "reported": {"kind": "instance", "num": num}})
+        self.offset = end
+
+    def empty(self) -> bool:
+        return not self.batch
+
+    def has_more(self) -> bool:
+        return self.offset < self.nodes
+
+    def pop(self) -> Json:
+        return self.batch.popleft()
+
+    def count(self) -> Optional[int]:
+        return self.nodes
+
+    def close(self, ignore_missing: bool = False) -> None:
+        pass
+
+
+def to_instance(doc: Json) -> Json:
+    return {"id": doc["id"], "type": "node", "reported": doc["reported"]}
+
+
+async def run(prefetch: int) -> float:
+    cursor = SimulatedCursor(ns.nodes, ns.batch_size, ns.latency)
+    start = time.monotonic()
+    async_cursor = AsyncCursor(cursor, to_instance, prefetch)  # type: ignore
+    async for elem in async_cursor:
+        json.dumps(elem)
+    return time.monotonic() - start
+
+
+async def main() -> None:
+    print(f"Read {ns.nodes} nodes in batches of {ns.batch_size} with latency {ns.latency}s per batch.")
+    for prefetch in ns.prefetch:
+        duration = await run(prefetch)
+        print(f"prefetch={prefetch}: {duration:8.2f}s {ns.nodes / duration:10.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Compare time and memory of the networkx based graph with the compact graph store.
+A synthetic graph with the given number of accounts, regions and resources is read and merged.
+
+Usage: python3 graph_benchmark.py --accounts 10 --regions 5 --resources 1000
+"""
+import json
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from typing import List, Tuple
+
+from resotocore.model.compact_graph import CompactGraphBuilder, merge_graphs
+from resotocore.model.graph_access import GraphBuilder, EdgeTypes
+from resotocore.model.model import Model, ComplexKind, Property, predefined_kinds
+
+parser = ArgumentParser()
+parser.add_argument("--accounts", type=int, default=10)
+parser.add_argument("--regions", type=int, default=5)
+parser.add_argument("--resources", type=int, default=1000)
+ns = parser.parse_args()
+
+
+def benchmark_model() -> Model:
+    base = ComplexKind(
+        "base",
+        [],
+        [
+            Property("id", "string", required=True),
+            Property("kind", "string", required=True),
+            Property("name", "string"),
+            Property("tags", "dictionary[string, string]"),
+        ],
+    )
+    kinds = [ComplexKind(name, ["base"], []) for name in ["graph_root", "cloud", "account", "region", "instance"]]
+    return Model.from_kinds([*predefined_kinds, base, *kinds])
+
+
+def elements(accounts: int, regions: int, resources: int) -> List[str]:
+    def node(nid: str, kind: str, **kwargs: object) -> str:
+        tags = {"owner": "team", "cost_center": nid[:12]}
+        return json.dumps({"id": nid, "reported": {"id": nid, "kind": kind, "name": nid, "tags": tags}, **kwargs})
+
+    def edge(from_node: str, to_node: str, edge_type: str = EdgeTypes.default) -> str:
+        return json.dumps({"from": from_node, "to": to_node, "edge_type": edge_type})
+
+    result = [node("root", "graph_root"), node("cloud", "cloud"), edge("root", "cloud")]
+    for a in range(accounts):
+        account = f"account_{a}"
+        result += [node(account, "account", metadata={"replace": True}), edge("cloud", account)]
+        for r in range(regions):
+            region = f"{account}_region_{r}"
+            result += [node(region, "region"), edge(account, region)]
+            for i in range(resources):
+                instance = f"{region}_instance_{i}"
+                result += [node(instance, "instance"), edge(region, instance), edge(instance, region, EdgeTypes.delete)]
+    return result
+
+
+def run(builder: GraphBuilder, data: List[str]) -> Tuple[float, int]:
+    tracemalloc.start()
+    start = time.monotonic()
+    try:
+        for line in data:
+            builder.add_from_json(json.loads(line))
+        builder.check_complete()
+        _, parent, graphs = merge_graphs(builder.graph)
+        # simulate the work done by the merge: visit all nodes and edges
+        for _, access in [("parent", parent), *graphs]:
+            for node in access.not_visited_nodes():
+                node.get("hash")
+            for edge_type in EdgeTypes.all:
+                for _ in access.not_visited_edges(edge_type):
+                    pass
+        return time.monotonic() - start, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    model = benchmark_model()
+    data = elements(ns.accounts, ns.regions, ns.resources)
+    print(f"Graph with {len(data)} elements")
+    for name, builder in [("networkx", GraphBuilder(model)), ("compact", CompactGraphBuilder(model))]:
+        duration, peak = run(builder, data)
+        print(f"{name:>10}: {duration:8.2f}s peak memory: {peak / 1024 / 1024:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,7 @@ from prometheus_client import Counter
 import resotolib.config
 import resotolib.proc
 import time
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 # from multiprocessing import Process
 
@@ -221,6 +221,22 @@ class BaseCollectorPlugin(BasePlugin):
         """Delete the tag of a resource"""
         return resource.delete_tag(key)
 
+    @classmethod
+    def update_tags(cls, config: Config, changes: List[Tuple[BaseResource, str, str]]) -> List[bool]:
+        """Update the tags of many resources. The result holds the success of every change.
+
+        Plugins can override this method to use the bulk API of the cloud provider.
+        """
+        return [cls.update_tag(config, resource, key, value) for resource, key, value in changes]
+
+    @classmethod
+    def delete_tags(cls, config: Config, changes: List[Tuple[BaseResource, str]]) -> List[bool]:
+        """Delete the tags of many resources. The result holds the success of every change.
+
+        Plugins can override this method to use the bulk API of the cloud provider.
+        """
+        return [cls.delete_tag(config, resource, key) for resource, key in changes]
+
     def go(self) -> None:
         self.collect()
 
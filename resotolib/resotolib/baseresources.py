@@ -8,7 +8,7 @@ import uuid
 import weakref
 from resotolib.logger import log
 from enum import Enum
-from typing import Dict, Iterator, List, ClassVar, Optional
+from typing import Any, Dict, Iterator, List, ClassVar, Optional
 from resotolib.utils import make_valid_timestamp, utc_str
 from prometheus_client import Counter, Summary
 from attrs import define, field, resolve_types, Factory
@@ -573,9 +573,19 @@ class BaseResource(ABC):
     def _graph(self, value) -> None:
         self.__graph = weakref.ref(value)
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        # Keep the graph search indexes of this node up to date.
+        # All indexes are updated, since computed attributes might depend on the changed one.
+        search_indexes = self.__dict__.get("_search_indexes")
+        if search_indexes:
+            for index in list(search_indexes):
+                index.add(self)
+
     def __getstate__(self):
         ret = self.__dict__.copy()
         ret["_BaseResource__graph"] = None
+        ret.pop("_search_indexes", None)
         return ret
 
     def __setstate__(self, state):
@@ -1,19 +1,29 @@
-import threading
-import queue
-import time
-import websocket
-import json
+import asyncio
 import jsons
-from resotolib.event import EventType, remove_event_listener, add_event_listener, Event
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from aiohttp import ClientWebSocketResponse
 from resotolib.logger import log
-from resotolib.args import ArgumentParser
-from resotolib.jwt import encode_jwt_to_headers
 from resotolib.core.ca import TLSData
-from typing import Callable, Dict, Optional, List
+from resotolib.core.ws_client import CoreWebSocketClient
+from resotolib.types import Json
+from typing import Any, Callable, Coroutine, Dict, Optional, List
 from urllib.parse import urlunsplit, urlencode, urlsplit
+from uuid import uuid1
 
 
-class CoreTasks(threading.Thread):
+class CoreTasks(CoreWebSocketClient):
+    """
+    Performs the tasks of the resotocore worker task queue.
+
+    Up to max_workers tasks are processed concurrently by the message processor.
+    No new task is received, while max_in_flight tasks are received but not yet done.
+    Results are acknowledged in batches. Results that could not be sent, since the connection
+    is lost, are sent after the connection is reestablished.
+    Running tasks are not affected by a reconnect: the ids of all running and not acknowledged tasks
+    are sent to resotocore after every reconnect, so these tasks are not assigned again.
+    """
+
     def __init__(
         self,
         identifier: str,
@@ -23,106 +33,100 @@ class CoreTasks(threading.Thread):
         message_processor: Optional[Callable] = None,
         max_workers: int = 20,
         tls_data: Optional[TLSData] = None,
+        max_in_flight: Optional[int] = None,
+        ack_batch_size: int = 100,
+        ack_delay: timedelta = timedelta(milliseconds=50),
     ) -> None:
-        super().__init__()
+        resotocore_ws_uri_split = urlsplit(resotocore_ws_uri)
+        scheme = resotocore_ws_uri_split.scheme
+        netloc = resotocore_ws_uri_split.netloc
+        path = resotocore_ws_uri_split.path + "/work/queue"
+        query_dict = {"task": ",".join(tasks)}
+        query_dict.update({k: ",".join(v) for k, v in (task_queue_filter or {}).items()})
+        query = urlencode(query_dict)
+        super().__init__(identifier, urlunsplit((scheme, netloc, path, query, "")), tls_data)
         self.identifier = identifier
-        self.resotocore_ws_uri = resotocore_ws_uri
         self.tasks = tasks
-        if task_queue_filter is None:
-            task_queue_filter = {}
-        self.task_queue_filter = task_queue_filter
         self.message_processor = message_processor
         self.max_workers = max_workers
-        self.tls_data = tls_data
-        self.ws = None
-        self.shutdown_event = threading.Event()
-        self.queue = queue.Queue()
-
-    def __del__(self):
-        remove_event_listener(EventType.SHUTDOWN, self.shutdown)
-
-    def run(self) -> None:
-        self.name = self.identifier
-        add_event_listener(EventType.SHUTDOWN, self.shutdown)
-
-        for i in range(self.max_workers):
-            threading.Thread(target=self.worker, daemon=True, name=f"worker-{i}").start()
-
-        while not self.shutdown_event.is_set():
-            log.debug("Connecting to resotocore task queue")
-            try:
-                self.connect()
-            except Exception as e:
-                log.error(e)
-            time.sleep(1)
+        self.max_in_flight = max_in_flight or max_workers * 2
+        self.ack_batch_size = ack_batch_size
+        self.ack_delay = ack_delay
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{identifier}-worker")
+        # task id -> running task
+        self.in_flight: Dict[str, "asyncio.Task[None]"] = {}
+        # task id -> result that is not yet acknowledged
+        self.results: Dict[str, Json] = {}
+        self.results_available: Optional[asyncio.Event] = None
+        self.in_flight_slots: Optional[asyncio.Semaphore] = None
+
+    async def start_async(self) -> None:
+        self.results_available = asyncio.Event()
+        self.in_flight_slots = asyncio.Semaphore(self.max_in_flight)
+
+    async def stop_async(self) -> None:
+        for task in self.in_flight.values():
+            task.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def connected(self, ws: ClientWebSocketResponse) -> None:
+        outstanding = [*self.in_flight.keys(), *self.results.keys()]
+        if outstanding:
+            # tell resotocore about tasks that are still performed by this worker
+            log.info(f"{self.identifier}: resync {len(outstanding)} outstanding tasks")
+            await ws.send_str(jsons.dumps({"outstanding": outstanding}))
+
+    def connection_tasks(self, ws: ClientWebSocketResponse) -> List[Coroutine[Any, Any, None]]:
+        return [self.send_results(ws)]
+
+    async def on_message(self, message: Any) -> None:
+        log.debug(f"{self.identifier} received: {message}")
+        task_id = message.get("task_id") if isinstance(message, dict) else None
+        task_id = task_id or str(uuid1())
+        if task_id in self.in_flight or task_id in self.results:
+            log.debug(f"{self.identifier}: task {task_id} is already performed by this worker")
+            return
+        assert self.in_flight_slots is not None
+        await self.in_flight_slots.acquire()
+        self.in_flight[task_id] = asyncio.create_task(self.perform(task_id, message))
 
-    def worker(self) -> None:
-        while not self.shutdown_event.is_set():
-            message = self.queue.get()
-            log.debug(f"{self.identifier} received: {message}")
+    async def perform(self, task_id: str, message: Json) -> None:
+        try:
             if self.message_processor is not None and callable(self.message_processor):
                 try:
-                    result = self.message_processor(message)
-                    log.debug(f"Sending reply {result}")
-                    self.ws.send(jsons.dumps(result))
-                except Exception:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(self.executor, self.message_processor, message)
+                except Exception as ex:
                     log.exception(f"Something went wrong while processing {message}")
-            self.queue.task_done()
-
-    def connect(self) -> None:
-        resotocore_ws_uri_split = urlsplit(self.resotocore_ws_uri)
-        scheme = resotocore_ws_uri_split.scheme
-        netloc = resotocore_ws_uri_split.netloc
-        path = resotocore_ws_uri_split.path + "/work/queue"
-        query_dict = {"task": ",".join(self.tasks)}
-        query_dict.update({k: ",".join(v) for k, v in self.task_queue_filter.items()})
-        query = urlencode(query_dict)
-        ws_uri = urlunsplit((scheme, netloc, path, query, ""))
-
-        log.debug(f"{self.identifier} connecting to {ws_uri}")
-        headers = {}
-        if getattr(ArgumentParser.args, "psk", None):
-            encode_jwt_to_headers(headers, {}, ArgumentParser.args.psk)
-        self.ws = websocket.WebSocketApp(
-            ws_uri,
-            header=headers,
-            on_open=self.on_open,
-            on_message=self.on_message,
-            on_error=self.on_error,
-            on_close=self.on_close,
-            on_ping=self.on_ping,
-            on_pong=self.on_pong,
-        )
-        sslopt = None
-        if self.tls_data:
-            sslopt = {"ca_certs": self.tls_data.ca_cert_path}
-        self.ws.run_forever(sslopt=sslopt, ping_interval=30, ping_timeout=10, ping_payload="ping")
-
-    def shutdown(self, event: Event = None) -> None:
-        log.debug("Received shutdown event - shutting down resotocore task queue listener")
-        self.shutdown_event.set()
-        if self.ws:
-            self.ws.close()
-
-    def on_message(self, ws, message):
-        try:
-            message: Dict = json.loads(message)
-        except json.JSONDecodeError:
-            log.exception(f"Unable to decode received message {message}")
-            return
-        self.queue.put(message)
-
-    def on_error(self, ws, e):
-        log.debug(f"{self.identifier} event bus error: {e!r}")
-
-    def on_close(self, ws, close_status_code, close_msg):
-        log.debug(f"{self.identifier} disconnected from resotocore task queue")
-
-    def on_open(self, ws):
-        log.debug(f"{self.identifier} connected to resotocore task queue")
-
-    def on_ping(self, ws, message):
-        log.debug(f"{self.identifier} tasks ping from resotocore message bus")
-
-    def on_pong(self, ws, message):
-        log.debug(f"{self.identifier} tasks pong from resotocore message bus")
+                    result = {"task_id": task_id, "result": "error", "error": str(ex)}
+                if result is not None:
+                    log.debug(f"Sending reply {result}")
+                    self.results[task_id] = result
+                    assert self.results_available is not None
+                    self.results_available.set()
+        finally:
+            self.in_flight.pop(task_id, None)
+            assert self.in_flight_slots is not None
+            self.in_flight_slots.release()
+
+    async def send_results(self, ws: ClientWebSocketResponse) -> None:
+        results_available = self.results_available
+        assert results_available is not None
+        if self.results:
+            # results of the last connection, that are not acknowledged yet
+            results_available.set()
+        while not ws.closed:
+            await results_available.wait()
+            # wait a little, so more results can be acknowledged with the same message
+            await asyncio.sleep(self.ack_delay.total_seconds())
+            results_available.clear()
+            while self.results and not ws.closed:
+                batch = dict(list(self.results.items())[: self.ack_batch_size])
+                try:
+                    await ws.send_str(jsons.dumps(list(batch.values())))
+                except Exception as ex:
+                    log.info(f"{self.identifier}: could not send results: {ex}. Send after reconnect.")
+                    results_available.set()
+                    return
+                for task_id in batch:
+                    self.results.pop(task_id, None)
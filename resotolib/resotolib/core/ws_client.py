@@ -0,0 +1,141 @@
+import asyncio
+import json
+import threading
+from abc import ABC, abstractmethod
+from contextlib import suppress
+from datetime import timedelta
+from ssl import SSLContext
+from typing import Any, Coroutine, Dict, List, Optional, Union
+
+from aiohttp import ClientSession, ClientWebSocketResponse, WSMsgType
+
+from resotolib.args import ArgumentParser
+from resotolib.core.ca import TLSData
+from resotolib.event import EventType, remove_event_listener, add_event_listener, Event
+from resotolib.jwt import encode_jwt_to_headers
+from resotolib.logger import log
+
+
+class CoreWebSocketClient(threading.Thread, ABC):
+    """
+    Maintains a websocket connection to resotocore.
+    The connection is handled by an asyncio event loop, that runs in this thread.
+    If the connection is lost, it is reestablished until the client is shut down.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ws_uri: str,
+        tls_data: Optional[TLSData] = None,
+        reconnect_delay: timedelta = timedelta(seconds=1),
+        ping_interval: timedelta = timedelta(seconds=30),
+    ) -> None:
+        super().__init__(name=name, daemon=True)
+        self.ws_uri = ws_uri
+        self.tls_data = tls_data
+        self.reconnect_delay = reconnect_delay
+        self.ping_interval = ping_interval
+        self.ws: Optional[ClientWebSocketResponse] = None
+        self.shutdown_event = threading.Event()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stopped: Optional[asyncio.Event] = None
+
+    def __del__(self) -> None:
+        remove_event_listener(EventType.SHUTDOWN, self.shutdown)
+
+    def run(self) -> None:
+        add_event_listener(EventType.SHUTDOWN, self.shutdown)
+        asyncio.run(self.run_async())
+
+    def shutdown(self, event: Optional[Event] = None) -> None:
+        log.debug(f"{self.name}: received shutdown event - shutting down websocket connection")
+        self.shutdown_event.set()
+        if self.loop is not None and self.stopped is not None:
+            with suppress(RuntimeError):  # the loop might be closed already
+                self.loop.call_soon_threadsafe(self.stopped.set)
+
+    async def run_async(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.stopped = asyncio.Event()
+        if self.shutdown_event.is_set():
+            return
+        await self.start_async()
+        try:
+            async with ClientSession() as session:
+                while not self.stopped.is_set():
+                    log.debug(f"{self.name}: connecting to {self.ws_uri}")
+                    try:
+                        await self.connect(session)
+                    except Exception as e:
+                        log.error(f"{self.name}: connection error: {e!r}")
+                    with suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(self.stopped.wait(), self.reconnect_delay.total_seconds())
+        finally:
+            await self.stop_async()
+
+    async def connect(self, session: ClientSession) -> None:
+        headers: Dict[str, str] = {}
+        if getattr(ArgumentParser.args, "psk", None):
+            encode_jwt_to_headers(headers, {}, ArgumentParser.args.psk)
+        stopped = self.stopped
+        assert stopped is not None, "Client is not running"
+        # the connection is closed, if the server does not answer a ping within half of the interval
+        heartbeat = self.ping_interval.total_seconds()
+        async with session.ws_connect(self.ws_uri, headers=headers, ssl=self.ssl(), heartbeat=heartbeat) as ws:
+            log.debug(f"{self.name}: connected to {self.ws_uri}")
+            self.ws = ws
+            tasks = [
+                asyncio.create_task(self.receive(ws)),
+                asyncio.create_task(stopped.wait()),
+                *(asyncio.create_task(coroutine) for coroutine in self.connection_tasks(ws)),
+            ]
+            try:
+                await self.connected(ws)
+                # the connection is done, when any of the tasks is done
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()  # raise the exception of the task, if available
+            finally:
+                self.ws = None
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                log.debug(f"{self.name}: disconnected from {self.ws_uri}")
+
+    async def receive(self, ws: ClientWebSocketResponse) -> None:
+        async for msg in ws:
+            if msg.type == WSMsgType.TEXT:
+                try:
+                    message = json.loads(msg.data)
+                except json.JSONDecodeError:
+                    log.exception(f"{self.name}: unable to decode received message {msg.data}")
+                    continue
+                await self.on_message(message)
+            elif msg.type in (WSMsgType.CLOSE, WSMsgType.CLOSED, WSMsgType.ERROR):
+                break
+
+    def ssl(self) -> Union[SSLContext, bool, None]:
+        if self.tls_data is None:
+            return None
+        elif self.tls_data.verify is False:
+            return False
+        else:
+            return self.tls_data.ssl_context
+
+    async def start_async(self) -> None:
+        """Called in the event loop of this thread, before the first connection is established."""
+
+    async def stop_async(self) -> None:
+        """Called in the event loop of this thread, after the client is shut down."""
+
+    async def connected(self, ws: ClientWebSocketResponse) -> None:
+        """Called after the connection is (re)established."""
+
+    def connection_tasks(self, ws: ClientWebSocketResponse) -> List[Coroutine[Any, Any, None]]:
+        """Additional tasks that run as long as the connection is established. The connection ends with any task."""
+        return []
+
+    @abstractmethod
+    async def on_message(self, message: Any) -> None:
+        pass
@@ -7,8 +7,12 @@ import threading
 import pickle
 import json
 import jsons
+import hashlib
 import re
 import tempfile
+import multiprocessing
+import zlib
+import msgpack
 from resotolib.logger import log
 from resotolib.baseresources import (
     BaseCloud,
@@ -32,11 +36,12 @@ from resotolib.event import (
     remove_event_listener,
 )
 from prometheus_client import Summary
-from typing import Dict, Iterator, List, Tuple, Optional, Union
+from typing import Dict, Iterator, List, Tuple, Optional, Union, Any, Deque
 from io import BytesIO
+from weakref import WeakSet
 from typeguard import check_type
 from time import time
-from collections import defaultdict, namedtuple
+from collections import defaultdict, namedtuple, deque
 from attrs import define, fields
 
 
@@ -86,10 +91,81 @@ metrics_graph2pajek = Summary("resoto_graph2pajek_seconds", "Time it took the gr
 EdgeKey = namedtuple("EdgeKey", ["src", "dst", "edge_type"])
 
 
+def is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+        return True
+    except TypeError:
+        return False
+
+
+class AttributeIndex:
+    """Index of graph nodes by the value of a single attribute
+
+    Nodes are kept in the order they have been indexed, so the first node returned
+    by find() is usually the first node of the graph with this attribute value.
+    Nodes with an attribute value that is None, callable or not hashable are not indexed.
+    Every indexed node knows its indexes and updates them, whenever one of its attributes is set.
+    """
+
+    def __init__(self, attr: str) -> None:
+        self.attr = attr
+        self.nodes_by_value: Dict[Any, Dict[BaseResource, None]] = {}
+        self.value_by_node: Dict[BaseResource, Any] = {}
+
+    def add(self, node: BaseResource) -> None:
+        self.remove(node)
+        if isinstance(node, BaseResource):
+            search_indexes = node.__dict__.get("_search_indexes")
+            if search_indexes is None:
+                search_indexes = node.__dict__["_search_indexes"] = WeakSet()
+            search_indexes.add(self)
+        value = getattr(node, self.attr, None)
+        if value is None or callable(value) or not is_hashable(value):
+            return
+        self.nodes_by_value.setdefault(value, {})[node] = None
+        self.value_by_node[node] = value
+
+    def remove(self, node: BaseResource) -> None:
+        search_indexes = getattr(node, "__dict__", {}).get("_search_indexes")
+        if search_indexes is not None:
+            search_indexes.discard(self)
+        if node in self.value_by_node:
+            value = self.value_by_node.pop(node)
+            nodes = self.nodes_by_value[value]
+            del nodes[node]
+            if not nodes:
+                del self.nodes_by_value[value]
+
+    def find(self, value: Any) -> List[BaseResource]:
+        """Return all nodes with the given attribute value
+
+        The attribute of an indexed node might have been changed in the meantime.
+        Such nodes are not returned but indexed again with their current value.
+        """
+        found = []
+        for node in list(self.nodes_by_value.get(value, ())):
+            if getattr(node, self.attr, None) == value:
+                found.append(node)
+            else:
+                self.add(node)
+        return found
+
+    def count(self, value: Any) -> int:
+        return len(self.nodes_by_value.get(value, ()))
+
+    def __len__(self) -> int:
+        return len(self.value_by_node)
+
+
 class Graph(networkx.MultiDiGraph):
     """A directed Graph"""
 
     def __init__(self, *args, root: BaseResource = None, **kwargs) -> None:
+        # Attribute indexes used by search(), search_first() and searchall().
+        # An index is built the first time an attribute is searched for and is updated
+        # whenever a node is added to or removed from the graph.
+        self.search_indexes: Dict[str, AttributeIndex] = {}
         super().__init__(*args, **kwargs)
         self.root = None
         self._log_edge_creation = True
@@ -98,6 +174,26 @@ class Graph(networkx.MultiDiGraph):
             self.add_node(self.root, label=self.root.name, **get_resource_attributes(self.root))
         self.deferred_edges: List[Tuple[NodeSelector, NodeSelector, EdgeType]] = []
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # the search indexes are rebuilt on demand and do not need to be pickled
+        state = self.__dict__.copy()
+        state["search_indexes"] = {}
+        return state
+
+    def search_index(self, attr: str) -> AttributeIndex:
+        index = self.search_indexes.get(attr)
+        if index is None:
+            index = AttributeIndex(attr)
+            for node in self.nodes():
+                index.add(node)
+            self.search_indexes[attr] = index
+        return index
+
+    def reindex(self, node: BaseResource) -> None:
+        """Add node to all existing search indexes"""
+        for index in self.search_indexes.values():
+            index.add(node)
+
     def merge(self, graph: Graph):
         """Merge another graph into ourselves
 
@@ -153,6 +249,19 @@ class Graph(networkx.MultiDiGraph):
             # We hand a reference to ourselves to the added BaseResource
             # which stores it as a weakref.
             node_for_adding._graph = self
+        self.reindex(node_for_adding)
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        super().add_nodes_from(nodes_for_adding, **attr)
+        self.search_indexes.clear()
+
+    def remove_nodes_from(self, nodes):
+        super().remove_nodes_from(nodes)
+        self.search_indexes.clear()
+
+    def clear(self):
+        super().clear()
+        self.search_indexes.clear()
 
     def has_edge(
         self, src: BaseResource, dst: BaseResource, key: Optional[EdgeKey] = None, edge_type: Optional[str] = None
@@ -181,7 +290,11 @@ class Graph(networkx.MultiDiGraph):
         if self.has_edge(src, dst, key=key):
             log.debug(f"Edge from {src} to {dst} already exists in graph")
             return
+        # nodes that are not part of the graph yet are added together with the edge
+        new_nodes = [node for node in (src, dst) if node not in self._node]
         return_key = super().add_edge(src, dst, key=key, **attr)
+        for node in new_nodes:
+            self.reindex(node)
         if self._log_edge_creation and isinstance(src, BaseResource) and isinstance(dst, BaseResource):
             log.debug(f"Added edge from {src.rtdname} to {dst.rtdname} (type: {edge_type.value})")
             try:
@@ -206,6 +319,8 @@ class Graph(networkx.MultiDiGraph):
 
     def remove_node(self, node: BaseResource):
         super().remove_node(node)
+        for index in self.search_indexes.values():
+            index.remove(node)
 
     def remove_edge(
         self,
@@ -273,11 +388,19 @@ class Graph(networkx.MultiDiGraph):
 
     @metrics_graph_search.time()
     def search(self, attr, value, regex_search=False):
-        """Search for graph nodes by their attribute value"""
+        """Search for graph nodes by their attribute value
+
+        Searching for a hashable value uses the attribute index instead of scanning all nodes.
+        """
         if value is None:
             log.debug(f"Not searching graph for nodes with attribute values {attr}: {value}")
             return ()
         log.debug((f"Searching graph for nodes with attribute values {attr}: {value}" f" (regex: {regex_search})"))
+        if regex_search is False and is_hashable(value):
+            return iter(self.search_index(attr).find(value))
+        return self._search_nodes(attr, value, regex_search)
+
+    def _search_nodes(self, attr, value, regex_search):
         for node in self.nodes():
             node_attr = getattr(node, attr, None)
             if (
@@ -298,10 +421,17 @@ class Graph(networkx.MultiDiGraph):
 
     @metrics_graph_searchall.time()
     def searchall(self, match: Dict):
-        """Search for graph nodes by multiple attributes and values"""
-        return (
-            node for node in self.nodes() if all(getattr(node, attr, None) == value for attr, value in match.items())
-        )
+        """Search for graph nodes by multiple attributes and values
+
+        Candidates are taken from the smallest attribute index with a hashable, not None value.
+        """
+        indexes = [self.search_index(a) for a, v in match.items() if v is not None and is_hashable(v)]
+        if indexes:
+            index = min(indexes, key=lambda idx: idx.count(match[idx.attr]))
+            candidates = index.find(match[index.attr])
+        else:
+            candidates = self.nodes()
+        return (node for node in candidates if all(getattr(node, attr, None) == value for attr, value in match.items()))
 
     @metrics_graph_search_first.time()
     def search_first(self, attr, value):
@@ -721,23 +851,45 @@ class GraphMergeKind(Enum):
 
 
 class GraphExportIterator:
+    """
+    Export the graph as ndjson.
+
+    Default: the graph is exported into a temp file via export_graph(), which is read when this iterator is iterated.
+    Streaming: the graph is exported while this iterator is iterated. The graph is only accessed by this process:
+    the resulting node and edge dicts are serialized in chunks by a pool of processes, the resulting ndjson
+    can be gzip compressed. The pool processes are not forked from this (multi threaded) process.
+    Packed (streaming only): every element is msgpack encoded and prefixed by its length (4 bytes, big endian)
+    instead of a line of json.
+    """
+
     def __init__(
         self,
         graph: Graph,
         delete_tempfile: bool = True,
         tempdir: Optional[str] = None,
         graph_merge_kind: GraphMergeKind = GraphMergeKind.cloud,
+        streaming: bool = False,
+        processes: int = 1,
+        chunk_size: int = 1000,
+        compress: bool = False,
+        packed: bool = False,
     ):
         self.graph = graph
-        ts = datetime.now().strftime("%Y-%m-%d-%H-%M")
-        self.tempfile = tempfile.NamedTemporaryFile(
-            prefix=f"resoto-graph-{ts}-",
-            suffix=".ndjson",
-            delete=delete_tempfile,
-            dir=tempdir,
-        )
-        if not delete_tempfile:
-            log.info(f"Writing graph json to file {self.tempfile.name}")
+        self.streaming = streaming
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.compress = compress and streaming
+        self.packed = packed and streaming
+        if not streaming:
+            ts = datetime.now().strftime("%Y-%m-%d-%H-%M")
+            self.tempfile = tempfile.NamedTemporaryFile(
+                prefix=f"resoto-graph-{ts}-",
+                suffix=".ndjson",
+                delete=delete_tempfile,
+                dir=tempdir,
+            )
+            if not delete_tempfile:
+                log.info(f"Writing graph json to file {self.tempfile.name}")
 
         if not isinstance(graph_merge_kind, GraphMergeKind):
             log.error(f"Graph merge kind is wrong type {type(graph_merge_kind)}")
@@ -753,6 +905,9 @@ class GraphExportIterator:
 
         self.graph_exported = False
         self.found_replace_node = False
+        if streaming:
+            # the graph is exported while it is sent: check for replace nodes upfront
+            self.found_replace_node = any(isinstance(node, self.graph_merge_kind) for node in graph.nodes)
         self.export_lock = threading.Lock()
         self.total_lines = 0
         self.number_of_nodes = int(graph.number_of_nodes())
@@ -766,6 +921,9 @@ class GraphExportIterator:
             pass
 
     def __iter__(self) -> Iterator[bytes]:
+        if self.streaming:
+            yield from self.export_stream()
+            return
         if not self.graph_exported:
             self.export_graph()
         start_time = time()
@@ -791,19 +949,68 @@ class GraphExportIterator:
             f" in {elapsed:.4f}s"
         )
 
+    def node_dict(self, node: BaseResource) -> Json:
+        return jsons.dump(self.node_attributes(node))  # type: ignore
+
+    def node_attributes(self, node: BaseResource) -> Dict[str, Any]:
+        """Attributes of the node, that are not converted to json yet"""
+        node_dict = node_to_dict(node)
+        if isinstance(node, self.graph_merge_kind):
+            log.debug(f"Replacing sub graph below {node.rtdname}")
+            if "metadata" not in node_dict or not isinstance(node_dict["metadata"], dict):
+                node_dict["metadata"] = {}
+            node_dict["metadata"]["replace"] = True
+            self.found_replace_node = True
+        return node_dict
+
+    def node_json(self, node: BaseResource) -> str:
+        return json.dumps(with_digest(self.node_dict(node)), sort_keys=True) + "\n"
+
+    def node_frame(self, node: BaseResource) -> bytes:
+        return msgpack_frame(with_digest(self.node_dict(node)))
+
+    @staticmethod
+    def edge_json(edge: Tuple[Any, ...]) -> Optional[str]:
+        edge_dict = GraphExportIterator.edge_dict(edge)
+        return None if edge_dict is None else json.dumps(edge_dict) + "\n"
+
+    @staticmethod
+    def edge_dict(edge: Tuple[Any, ...]) -> Optional[Json]:
+        from_node = edge[0]
+        to_node = edge[1]
+        if not isinstance(from_node, BaseResource) or not isinstance(to_node, BaseResource):
+            log.error(f"One of {from_node} and {to_node} is no base resource")
+            return None
+        edge_dict = {"from": from_node.chksum, "to": to_node.chksum}
+        if len(edge) == 3:
+            key = edge[2]
+            if isinstance(key, EdgeKey) and key.edge_type != EdgeType.default:
+                edge_dict["edge_type"] = key.edge_type.value
+        return edge_dict
+
+    @staticmethod
+    def deferred_edge_json(from_selector: NodeSelector, to_selector: NodeSelector, edge_type: EdgeType) -> str:
+        return json.dumps(GraphExportIterator.deferred_edge_dict(from_selector, to_selector, edge_type)) + "\n"
+
+    @staticmethod
+    def deferred_edge_dict(from_selector: NodeSelector, to_selector: NodeSelector, edge_type: EdgeType) -> Json:
+        deferred_edge_dict: Dict[str, Any] = {}
+        if isinstance(from_selector, ByNodeId):
+            deferred_edge_dict["from_selector"] = {"node_id": from_selector.value}
+        else:
+            deferred_edge_dict["from_selector"] = {"search_criteria": from_selector.query}
+        if isinstance(to_selector, ByNodeId):
+            deferred_edge_dict["to_selector"] = {"node_id": to_selector.value}
+        else:
+            deferred_edge_dict["to_selector"] = {"search_criteria": to_selector.query}
+        deferred_edge_dict["edge_type"] = edge_type.value
+        return deferred_edge_dict
+
     def export_graph(self) -> None:
         with self.export_lock:
             start_time = time()
             for node in self.graph.nodes:
-                node_dict = node_to_dict(node)
-                if isinstance(node, self.graph_merge_kind):
-                    log.debug(f"Replacing sub graph below {node.rtdname}")
-                    if "metadata" not in node_dict or not isinstance(node_dict["metadata"], dict):
-                        node_dict["metadata"] = {}
-                    node_dict["metadata"]["replace"] = True
-                    self.found_replace_node = True
-                node_json = jsons.dumps(node_dict) + "\n"
-                self.tempfile.write(node_json.encode())
+                self.tempfile.write(self.node_json(node).encode())
                 self.total_lines += 1
             elapsed_nodes = time() - start_time
             log.debug(f"Exported {self.number_of_nodes} nodes in {elapsed_nodes:.4f}s")
@@ -811,32 +1018,11 @@ class GraphExportIterator:
                 log.warning(f"No nodes of kind {self.graph_merge_kind.kind} found in graph")
             start_time = time()
             for edge in self.graph.edges:
-                from_node = edge[0]
-                to_node = edge[1]
-                if not isinstance(from_node, BaseResource) or not isinstance(to_node, BaseResource):
-                    log.error(f"One of {from_node} and {to_node} is no base resource")
-                    continue
-                edge_dict = {"from": from_node.chksum, "to": to_node.chksum}
-                if len(edge) == 3:
-                    key = edge[2]
-                    if isinstance(key, EdgeKey) and key.edge_type != EdgeType.default:
-                        edge_dict["edge_type"] = key.edge_type.value
-                edge_json = json.dumps(edge_dict) + "\n"
-                self.tempfile.write(edge_json.encode())
-                self.total_lines += 1
+                if (edge_json := self.edge_json(edge)) is not None:
+                    self.tempfile.write(edge_json.encode())
+                    self.total_lines += 1
             for from_selector, to_selector, edge_type in self.graph.deferred_edges:
-                deferred_edge_dict = {}
-                if isinstance(from_selector, ByNodeId):
-                    deferred_edge_dict["from_selector"] = {"node_id": from_selector.value}
-                else:
-                    deferred_edge_dict["from_selector"] = {"search_criteria": from_selector.query}
-                if isinstance(to_selector, ByNodeId):
-                    deferred_edge_dict["to_selector"] = {"node_id": to_selector.value}
-                else:
-                    deferred_edge_dict["to_selector"] = {"search_criteria": to_selector.query}
-                deferred_edge_dict["edge_type"] = edge_type.value
-                deferred_edge_json = json.dumps(deferred_edge_dict) + "\n"
-                self.tempfile.write(deferred_edge_json.encode())
+                self.tempfile.write(self.deferred_edge_json(from_selector, to_selector, edge_type).encode())
                 self.total_lines += 1
             elapsed_edges = time() - start_time
             log.debug(f"Exported {self.number_of_edges} edges in {elapsed_edges:.4f}s")
@@ -845,3 +1031,88 @@ class GraphExportIterator:
             self.graph_exported = True
             del self.graph
             self.tempfile.seek(0)
+
+    def export_stream(self) -> Iterator[bytes]:
+        """
+        Export the graph in chunks of ndjson or msgpack frames, while the chunks are consumed.
+        Every time this method is called, the graph is exported again.
+        """
+        with self.export_lock:
+            start_time = time()
+            self.total_lines = 0
+            if not self.found_replace_node:
+                log.warning(f"No nodes of kind {self.graph_merge_kind.kind} found in graph")
+            compressor = zlib.compressobj(1, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if self.compress else None
+            for lines, chunk in self.__export_chunks():
+                self.total_lines += lines
+                if compressor is None:
+                    yield chunk
+                elif compressed := compressor.compress(chunk):
+                    yield compressed
+            if self.packed:
+                deferred = b"".join(msgpack_frame(self.deferred_edge_dict(*e)) for e in self.graph.deferred_edges)
+            else:
+                deferred = "".join(self.deferred_edge_json(*edge) for edge in self.graph.deferred_edges).encode()
+            self.total_lines += self.number_of_deferred_edges
+            if compressor is not None:
+                yield compressor.compress(deferred) + compressor.flush()
+            elif deferred:
+                yield deferred
+            log.info(f"Exported and sent {self.total_lines} nodes and edges in {time() - start_time:.4f}s")
+            self.graph_exported = True
+
+    def __export_chunks(self) -> Iterator[Tuple[int, bytes]]:
+        def node_chunks() -> Iterator[Tuple[bool, bool, List[Any]]]:
+            nodes = list(self.graph.nodes)
+            for start in range(0, len(nodes), self.chunk_size):
+                yield self.packed, True, [self.node_attributes(node) for node in nodes[start : start + self.chunk_size]]
+            edges = list(self.graph.edges)
+            for start in range(0, len(edges), self.chunk_size):
+                chunk = [js for edge in edges[start : start + self.chunk_size] if (js := self.edge_dict(edge))]
+                yield self.packed, False, chunk
+
+        if self.processes > 1:
+            # Forking this multi threaded process could deadlock the child on a lock held by another thread.
+            # The pool processes are started from a fresh interpreter and receive every chunk as picklable input.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            with context.Pool(self.processes) as pool:
+                # only a limited number of chunks is computed ahead of the consumer
+                pending: Deque[Any] = deque()
+                for chunk in node_chunks():
+                    pending.append(pool.apply_async(_export_chunk, chunk))
+                    if len(pending) >= 2 * self.processes:
+                        yield pending.popleft().get()
+                while pending:
+                    yield pending.popleft().get()
+        else:
+            for chunk in node_chunks():
+                yield _export_chunk(*chunk)
+
+
+def _export_chunk(packed: bool, is_node: bool, elements: List[Any]) -> Tuple[int, bytes]:
+    """
+    Serialize a chunk of node attributes or edge dicts. Might run in a pool process, so it does not access the graph.
+    """
+    if is_node:
+        elements = [with_digest(jsons.dump(node)) for node in elements]
+    if packed:
+        return len(elements), b"".join(msgpack_frame(js) for js in elements)
+    else:
+        return len(elements), "".join(json.dumps(js, sort_keys=is_node) + "\n" for js in elements).encode()
+
+
+def with_digest(node_dict: Json) -> Json:
+    """
+    Add a stable digest of the node content to the given node: resotocore skips the processing of unchanged nodes.
+    """
+    node_dict["digest"] = hashlib.sha256(json.dumps(node_dict, sort_keys=True).encode()).hexdigest()
+    return node_dict
+
+
+def msgpack_frame(js: Json) -> bytes:
+    """
+    Encode the given json as msgpack, prefixed by the length of the encoded element (4 bytes, big endian).
+    """
+    packed: bytes = msgpack.packb(js)
+    return len(packed).to_bytes(4, "big") + packed
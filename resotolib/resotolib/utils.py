@@ -5,6 +5,7 @@ import re
 import socket
 import string
 import time
+from concurrent import futures
 from datetime import date, datetime, timezone, timedelta
 
 try:
@@ -15,7 +16,7 @@ from tzlocal import get_localzone_name
 from functools import wraps
 from pprint import pformat
 from tarfile import TarFile, TarInfo
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional, Set
 
 import pkg_resources
 import requests
@@ -479,3 +480,47 @@ def rrdata_as_dict(record_type: str, record_data: str) -> Dict:
         rrdata["record_value"] = record_elements[2]
 
     return rrdata
+
+
+def run_collectors(
+    executor: futures.Executor,
+    collectors: Dict[str, Callable[[], None]],
+    dependencies: Dict[str, Set[str]],
+    location: str,
+) -> None:
+    """Runs collectors concurrently using the given executor.
+
+    A collector is started as soon as all of the collectors it depends on are done.
+    Dependencies on collectors that are not part of `collectors` are ignored.
+    If a collector fails, all collectors that were not started yet are cancelled
+    and the exception is raised.
+
+    Args:
+        executor: The executor the collectors are submitted to.
+        collectors: Dict of collector name to a callable without arguments.
+        dependencies: Dict of collector name to the names of the collectors
+            that need to be done before this collector can start.
+        location: Where the resources are collected. Only used for logging.
+    """
+    pending = {name: set(dependencies.get(name, ())).intersection(collectors) for name in collectors}
+    running: Dict["futures.Future[None]", str] = {}
+    done: Set[str] = set()
+
+    while pending or running:
+        for name in [name for name, depends_on in pending.items() if depends_on <= done]:
+            del pending[name]
+            log.info(f"Collecting {name} in {location}")
+            running[executor.submit(collectors[name])] = name
+        if not running:
+            raise ValueError(f"Circular collector dependencies: {', '.join(sorted(pending))}")
+        finished, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+        for future in finished:
+            name = running.pop(future)
+            try:
+                future.result()
+            except Exception:
+                for waiting in running:
+                    waiting.cancel()
+                raise
+            log.debug(f"Collector {name} in {location} is done")
+            done.add(name)
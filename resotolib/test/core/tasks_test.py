@@ -0,0 +1,115 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List
+
+from aiohttp import WSMsgType
+from aiohttp.test_utils import TestServer
+from aiohttp.web import Application, Request, WebSocketResponse
+from pytest import fixture, mark
+
+from resotolib.core.tasks import CoreTasks
+from resotolib.types import Json
+
+
+class WorkQueue:
+    """
+    Minimal version of the resotocore worker task queue endpoint.
+    """
+
+    def __init__(self) -> None:
+        self.connections: "asyncio.Queue[WebSocketResponse]" = asyncio.Queue()
+        self.messages: "asyncio.Queue[Any]" = asyncio.Queue()
+        self.port = 0
+
+    async def handle(self, request: Request) -> WebSocketResponse:
+        ws = WebSocketResponse()
+        await ws.prepare(request)
+        await self.connections.put(ws)
+        async for msg in ws:
+            if msg.type == WSMsgType.TEXT:
+                await self.messages.put(json.loads(msg.data))
+        return ws
+
+    async def next_message(self) -> Any:
+        return await asyncio.wait_for(self.messages.get(), 5)
+
+    async def next_connection(self) -> WebSocketResponse:
+        return await asyncio.wait_for(self.connections.get(), 5)
+
+
+@fixture
+async def work_queue() -> AsyncIterator[WorkQueue]:
+    queue = WorkQueue()
+    app = Application()
+    app.router.add_get("/work/queue", queue.handle)
+    server = TestServer(app)
+    await server.start_server()
+    queue.port = server.port or 0
+    yield queue
+    await server.close()
+
+
+def task(task_id: str) -> str:
+    return json.dumps({"task_id": task_id, "task_name": "test", "attrs": {}, "data": {}})
+
+
+@mark.asyncio
+async def test_perform_tasks(work_queue: WorkQueue) -> None:
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+    performed: List[str] = []
+    release_slow = threading.Event()
+
+    def process(message: Json) -> Json:
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+            performed.append(message["task_id"])
+        if message["task_id"] == "slow":
+            release_slow.wait(5)
+        else:
+            time.sleep(0.05)
+        with lock:
+            running -= 1
+        return {"task_id": message["task_id"], "result": "done", "data": {"id": message["task_id"]}}
+
+    core_tasks = CoreTasks(
+        "test", f"ws://127.0.0.1:{work_queue.port}", ["test"], message_processor=process, max_workers=2
+    )
+    core_tasks.start()
+    try:
+        ws = await work_queue.next_connection()
+        for num in range(10):
+            await ws.send_str(task(str(num)))
+
+        # all tasks are acknowledged in batches
+        acknowledged: Dict[str, Json] = {}
+        while len(acknowledged) < 10:
+            message = await work_queue.next_message()
+            assert isinstance(message, list)
+            acknowledged.update({result["task_id"]: result for result in message})
+        assert set(acknowledged.keys()) == {str(num) for num in range(10)}
+        assert max_running == 2
+
+        # a task is still running, when the connection is lost
+        await ws.send_str(task("slow"))
+        while "slow" not in performed:
+            await asyncio.sleep(0.01)
+        await ws.close()
+        ws = await work_queue.next_connection()
+        # the client tells about the running task
+        assert await work_queue.next_message() == {"outstanding": ["slow"]}
+        # the task is not performed twice, if it is sent again
+        await ws.send_str(task("slow"))
+        release_slow.set()
+        assert await work_queue.next_message() == [{"task_id": "slow", "result": "done", "data": {"id": "slow"}}]
+        assert performed.count("slow") == 1
+    finally:
+        core_tasks.shutdown()
+        # the server needs to run, while the client closes the connection
+        await asyncio.get_running_loop().run_in_executor(None, core_tasks.join, 5)
+    assert not core_tasks.is_alive()
@@ -0,0 +1,74 @@
+import asyncio
+from datetime import timedelta
+from typing import Any, AsyncIterator
+
+from aiohttp import WSMsgType
+from aiohttp.test_utils import TestServer
+from aiohttp.web import Application, Request, WebSocketResponse
+from pytest import fixture, mark
+
+from resotolib.core.ws_client import CoreWebSocketClient
+
+
+class SilentServer:
+    """
+    Websocket endpoint, that stops answering pings after the first connection.
+    """
+
+    def __init__(self) -> None:
+        self.connections: "asyncio.Queue[WebSocketResponse]" = asyncio.Queue()
+        self.pings = 0
+        self.port = 0
+
+    async def handle(self, request: Request) -> WebSocketResponse:
+        answer_pings = self.connections.qsize() > 0
+        ws = WebSocketResponse(autoping=False)
+        await ws.prepare(request)
+        await self.connections.put(ws)
+        async for msg in ws:
+            if msg.type == WSMsgType.PING:
+                self.pings += 1
+                if answer_pings:
+                    await ws.pong(msg.data)
+        return ws
+
+    async def next_connection(self) -> WebSocketResponse:
+        return await asyncio.wait_for(self.connections.get(), 5)
+
+
+class ExampleClient(CoreWebSocketClient):
+    async def on_message(self, message: Any) -> None:
+        pass
+
+
+@fixture
+async def silent_server() -> AsyncIterator[SilentServer]:
+    server = SilentServer()
+    app = Application()
+    app.router.add_get("/ws", server.handle)
+    test_server = TestServer(app)
+    await test_server.start_server()
+    server.port = test_server.port or 0
+    yield server
+    await test_server.close()
+
+
+@mark.asyncio
+async def test_reconnect_without_pong(silent_server: SilentServer) -> None:
+    client = ExampleClient(
+        "test",
+        f"ws://127.0.0.1:{silent_server.port}/ws",
+        reconnect_delay=timedelta(milliseconds=50),
+        ping_interval=timedelta(milliseconds=200),
+    )
+    client.start()
+    try:
+        await silent_server.next_connection()
+        # the server does not answer the ping: the client reconnects
+        await silent_server.next_connection()
+        assert silent_server.pings >= 1
+    finally:
+        client.shutdown()
+        # the server needs to run, while the client closes the connection
+        await asyncio.get_running_loop().run_in_executor(None, client.join, 5)
+    assert not client.is_alive()
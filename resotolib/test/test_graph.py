@@ -1,9 +1,12 @@
 import pytest
-from resotolib.graph import Graph, GraphContainer, GraphExportIterator
+from resotolib.graph import Graph, GraphContainer, GraphExportIterator, ByNodeId, BySearchCriteria
 from resotolib.baseresources import BaseResource, EdgeType, GraphRoot
 import resotolib.logger as logger
 from attrs import define
-from typing import ClassVar
+import gzip
+import json
+import msgpack
+from typing import ClassVar, List, Dict, Any
 from sys import getrefcount
 
 logger.getLogger("resoto").setLevel(logger.DEBUG)
@@ -102,6 +105,41 @@ def test_multidigraph():
     assert g.is_dag_per_edge_type() is False
 
 
+def test_search_index():
+    g = Graph()
+    a = SomeTestResource(id="a", tags={}, name="same")
+    b = SomeTestResource(id="b", tags={}, name="same")
+    c = SomeTestResource(id="c", tags={}, name="other")
+    g.add_node(a)
+    g.add_node(b)
+    assert g.search_first("id", "a") == a
+    assert list(g.search("name", "same")) == [a, b]
+    assert "id" in g.search_indexes and len(g.search_indexes["id"]) == 2
+    # nodes added with an edge or removed from the graph update the existing index
+    g.add_edge(b, c)
+    assert g.search_first("id", "c") == c
+    g.remove_node(a)
+    assert g.search_first("id", "a") is None
+    assert list(g.search("name", "same")) == [b]
+    assert list(g.searchall({"kind": "some_test_resource", "name": "other"})) == [c]
+    # a changed attribute updates the index
+    c.name = "same"
+    assert list(g.search("name", "same")) == [b, c]
+    # a node that has been removed from the graph is not indexed again
+    a.name = "other"
+    assert list(g.search("name", "other")) == []
+    assert g.search_first("name", "same") == b
+    assert list(g.searchall({"kind": "some_test_resource", "name": "other"})) == []
+    # values that can not be indexed are searched for in all nodes
+    assert list(g.search("tags", {})) == [b, c]
+    assert list(g.searchall({"id": "c", "tags": {}})) == [c]
+    assert list(g.searchre("id", "^[bc]$")) == [b, c]
+    # bulk changes drop all indexes
+    g.remove_nodes_from([b])
+    assert g.search_indexes == {}
+    assert g.search_first("id", "b") is None
+
+
 def test_baseresource_chksum():
     g = Graph()
     a = SomeTestResource(id="a", tags={})
@@ -121,3 +159,49 @@ def test_graph_export_iterator():
     gei.export_graph()
     assert getrefcount(g) == 2
     assert len(list(gei)) == 3
+
+
+def test_graph_export_iterator_digest():
+    def export() -> List[Dict[str, Any]]:
+        g = Graph(root=GraphRoot(id="root", tags={}))
+        g.add_resource(g.root, SomeTestResource(id="a", tags={"b": "2", "a": "1"}))
+        return [json.loads(line) for line in GraphExportIterator(g)]
+
+    first, second = export(), export()
+    nodes = [elem for elem in first if "id" in elem]
+    assert len(nodes) == 2
+    for node in nodes:
+        assert len(node["digest"]) == 64
+    # the same content creates the same digest
+    assert [e.get("digest") for e in first] == [e.get("digest") for e in second]
+    assert nodes[0]["digest"] != nodes[1]["digest"]
+
+
+@pytest.mark.parametrize(
+    "processes,compress,packed", [(1, False, False), (2, False, False), (2, True, False), (2, True, True)]
+)
+def test_graph_export_iterator_streaming(processes: int, compress: bool, packed: bool):
+    def graph() -> Graph:
+        g = Graph(root=GraphRoot(id="root", tags={}))
+        for i in range(25):
+            g.add_resource(g.root, SomeTestResource(id=f"a{i}", tags={}))
+        g.add_deferred_edge(ByNodeId("a1"), BySearchCriteria("is(foo)"), EdgeType.delete)
+        return g
+
+    gei = GraphExportIterator(graph())
+    expected = [json.loads(line) for line in gei]
+    streaming = GraphExportIterator(
+        graph(), streaming=True, processes=processes, chunk_size=10, compress=compress, packed=packed
+    )
+    data = b"".join(streaming)
+    data = gzip.decompress(data) if compress else data
+    if packed:
+        elements = []
+        while data:
+            size = int.from_bytes(data[0:4], "big")
+            elements.append(msgpack.unpackb(data[4 : 4 + size]))
+            data = data[4 + size :]
+        assert elements == expected
+    else:
+        assert [json.loads(line) for line in data.decode().splitlines()] == expected
+    assert streaming.total_lines == gei.total_lines == 52
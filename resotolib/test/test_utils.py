@@ -2,6 +2,8 @@ import unittest
 import threading
 import time
 import copy
+import pytest
+from concurrent import futures
 from datetime import datetime
 
 try:
@@ -10,7 +12,7 @@ except ImportError:
     from backports.zoneinfo import ZoneInfo
 from tempfile import TemporaryDirectory
 from resotolib.lock import RWLock
-from resotolib.utils import ordinal, sha256sum, rrdata_as_dict, get_local_tzinfo, utc_str
+from resotolib.utils import ordinal, sha256sum, rrdata_as_dict, get_local_tzinfo, utc_str, run_collectors
 from resotolib.baseresources import BaseResource
 from attrs import define
 from typing import ClassVar
@@ -305,3 +307,62 @@ def test_utc_str():
     assert utc_str(dt.replace(tzinfo=ZoneInfo("GMT"))) == "2020-08-03T18:00:00Z"
     assert utc_str(dt.replace(tzinfo=ZoneInfo("US/Eastern"))) == "2020-08-03T22:00:00Z"
     assert utc_str(dt.replace(tzinfo=ZoneInfo("US/Pacific"))) == "2020-08-04T01:00:00Z"
+
+
+def test_run_collectors():
+    lock = threading.Lock()
+    started = []
+    done = []
+    both_running = threading.Barrier(2, timeout=5)
+
+    def collector(name: str, wait_for_other: bool = False):
+        def collect():
+            with lock:
+                started.append(name)
+            if wait_for_other:
+                # only succeeds, if both collectors run at the same time
+                both_running.wait()
+            with lock:
+                done.append(name)
+
+        return collect
+
+    collectors = {
+        "services": collector("services"),
+        "networks": collector("networks"),
+        "disk_types": collector("disk_types", wait_for_other=True),
+        "subnetworks": collector("subnetworks", wait_for_other=True),
+        "disks": collector("disks"),
+    }
+    dependencies = {
+        "disk_types": {"services"},
+        "subnetworks": {"networks"},
+        "disks": {"disk_types", "instances"},
+    }
+    with futures.ThreadPoolExecutor(max_workers=4) as executor:
+        run_collectors(executor, collectors, dependencies, "test")
+
+    assert set(done) == set(collectors)
+    # the dependencies are done before a collector starts
+    assert done.index("services") < started.index("disk_types")
+    assert done.index("networks") < started.index("subnetworks")
+    # instances is not collected, so only disk_types needs to be done
+    assert done.index("disk_types") < started.index("disks")
+
+
+def test_run_collectors_error():
+    started = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    collectors = {
+        "networks": fail,
+        "subnetworks": lambda: started.append("subnetworks"),
+    }
+    with futures.ThreadPoolExecutor(max_workers=2) as executor:
+        with pytest.raises(RuntimeError):
+            run_collectors(executor, collectors, {"subnetworks": {"networks"}}, "test")
+        with pytest.raises(ValueError):
+            run_collectors(executor, collectors, {"networks": {"subnetworks"}, "subnetworks": {"networks"}}, "test")
+    assert started == []
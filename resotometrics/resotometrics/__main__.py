@@ -1,6 +1,7 @@
 import os
 import sys
 import time
+import requests
 import resotolib.proc
 from resotolib.logger import log, setup_logger, add_args as logging_add_args
 from resotolib.jwt import add_args as jwt_add_args
@@ -27,7 +28,9 @@ from prometheus_client import Summary, REGISTRY
 from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
 from resotolib.event import add_event_listener, EventType, Event as ResotoEvent
 from threading import Event
-from typing import Optional
+from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from resotolib.args import ArgumentParser
 
 
@@ -87,7 +90,8 @@ def main() -> None:
 
     resotocore_graph = Config.resotometrics.graph
     graph_uri = f"{resotocore.http_uri}/graph/{resotocore_graph}"
-    search_uri = f"{graph_uri}/search/aggregate?section=reported"
+    # results are cached by resotocore, until the graph changes
+    search_uri = f"{graph_uri}/search/aggregate?section=reported&cached=true"
 
     message_processor = partial(core_actions_processor, metrics, search_uri, tls_data)
     core_actions = CoreActions(
@@ -160,50 +164,62 @@ def core_actions_processor(metrics: Metrics, search_uri: str, tls_data: TLSData,
 @metrics_update_metrics.time()
 def update_metrics(metrics: Metrics, search_uri: str, tls_data: Optional[TLSData] = None) -> None:
     metrics_descriptions = Config.resotometrics.metrics
-    for _, data in metrics_descriptions.items():
-        if shutdown_event.is_set():
-            return
-        metrics_search = data.search
-        metric_type = data.type.value
-        metric_help = data.help
-
-        if metrics_search is None:
+    metrics_searches = {}
+    for name, data in metrics_descriptions.items():
+        if data.search is None:
             continue
-
-        if metric_type not in ("gauge", "counter"):
-            log.error(f"Do not know how to handle metrics of type {metric_type}")
+        if data.type.value not in ("gauge", "counter"):
+            log.error(f"Do not know how to handle metrics of type {data.type.value}")
             continue
+        metrics_searches[name] = data
 
-        try:
-            for result in search(metrics_search, search_uri, tls_data=tls_data):
-                labels = get_labels_from_result(result)
-                label_values = get_label_values_from_result(result, labels)
-
-                for metric_name, metric_value in get_metrics_from_result(result).items():
-                    if metric_name not in metrics.staging:
-                        log.debug(f"Adding metric {metric_name} of type {metric_type}")
-                        if metric_type == "gauge":
-                            metrics.staging[metric_name] = GaugeMetricFamily(
-                                f"resoto_{metric_name}",
-                                metric_help,
-                                labels=labels,
-                            )
-                        elif metric_type == "counter":
-                            metrics.staging[metric_name] = CounterMetricFamily(
-                                f"resoto_{metric_name}",
-                                metric_help,
-                                labels=labels,
-                            )
-                    if metric_type == "counter" and metric_name in metrics.live:
-                        current_metric = metrics.live[metric_name]
-                        for sample in current_metric.samples:
-                            if sample.labels == result.get("group"):
-                                metric_value += sample.value
-                                break
-                    metrics.staging[metric_name].add_metric(label_values, metric_value)
-        except RuntimeError as e:
-            log.error(e)
-            continue
+    def search_all(search_str: str) -> List[dict]:
+        if shutdown_event.is_set():
+            return []
+        return list(search(search_str, search_uri, tls_data=tls_data, session=session))
+
+    # all searches run concurrently via a pool of keep-alive connections
+    parallelism = max(1, Config.resotometrics.search_parallelism)
+    with requests.Session() as session, ThreadPoolExecutor(parallelism, "resotometrics.search") as executor:
+        session.mount(search_uri, HTTPAdapter(pool_maxsize=parallelism))
+        results = {name: executor.submit(search_all, data.search) for name, data in metrics_searches.items()}
+        # results are processed in the order of the metric definitions
+        for name, data in metrics_searches.items():
+            if shutdown_event.is_set():
+                return
+            metric_type = data.type.value
+            metric_help = data.help
+
+            try:
+                for result in results[name].result():
+                    labels = get_labels_from_result(result)
+                    label_values = get_label_values_from_result(result, labels)
+
+                    for metric_name, metric_value in get_metrics_from_result(result).items():
+                        if metric_name not in metrics.staging:
+                            log.debug(f"Adding metric {metric_name} of type {metric_type}")
+                            if metric_type == "gauge":
+                                metrics.staging[metric_name] = GaugeMetricFamily(
+                                    f"resoto_{metric_name}",
+                                    metric_help,
+                                    labels=labels,
+                                )
+                            elif metric_type == "counter":
+                                metrics.staging[metric_name] = CounterMetricFamily(
+                                    f"resoto_{metric_name}",
+                                    metric_help,
+                                    labels=labels,
+                                )
+                        if metric_type == "counter" and metric_name in metrics.live:
+                            current_metric = metrics.live[metric_name]
+                            for sample in current_metric.samples:
+                                if sample.labels == result.get("group"):
+                                    metric_value += sample.value
+                                    break
+                        metrics.staging[metric_name].add_metric(label_values, metric_value)
+            except RuntimeError as e:
+                log.error(e)
+                continue
     metrics.swap()
 
 
@@ -44,6 +44,9 @@ class ResotoMetricsConfig:
         metadata={"description": "Name of the graph to run aggregation searches on"},
     )
     timeout: int = field(default=300, metadata={"description": "Metrics generation timeout in seconds"})
+    search_parallelism: int = field(
+        default=10, metadata={"description": "Number of aggregation searches executed concurrently"}
+    )
     metrics: Dict[str, Metric] = field(
         factory=_load_default_metrics,
         metadata={
@@ -6,12 +6,18 @@ from resotolib.jwt import encode_jwt_to_headers
 from typing import Iterator, Optional
 
 
-def search(search_str: str, search_uri: str, tls_data: Optional[TLSData] = None) -> Iterator:
+def search(
+    search_str: str,
+    search_uri: str,
+    tls_data: Optional[TLSData] = None,
+    session: Optional[requests.Session] = None,
+) -> Iterator:
     headers = {"Accept": "application/x-ndjson"}
     if ArgumentParser.args.psk:
         encode_jwt_to_headers(headers, {}, ArgumentParser.args.psk)
 
-    r = requests.post(
+    post = session.post if session else requests.post
+    r = post(
         search_uri,
         data=search_str,
         headers=headers,
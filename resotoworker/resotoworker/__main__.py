@@ -147,7 +147,7 @@ def main() -> None:
     core_tasks = CoreTasks(
         identifier=f"{ArgumentParser.args.subscriber_id}-tagger",
         resotocore_ws_uri=resotocore.ws_uri,
-        tasks=["tag"],
+        tasks=["tag", "tag_batch"],
         task_queue_filter=task_queue_filter,
         message_processor=partial(
             core_tag_tasks_processor,
@@ -29,6 +29,30 @@ class ResotoWorkerConfig:
     )
     debug_dump_json: bool = field(default=False, metadata={"description": "Dump the generated JSON data to disk"})
     tempdir: Optional[str] = field(default=None, metadata={"description": "Directory to create temporary files in"})
+    graph_export_streaming: bool = field(
+        default=False,
+        metadata={
+            "description": "Serialize the graph in parallel and send it to resotocore while it is serialized,\n"
+            "instead of writing it to a temporary file first. debug_dump_json is ignored in this mode."
+        },
+    )
+    graph_export_processes: int = field(
+        factory=num_default_threads,
+        metadata={
+            "description": "Number of processes used to serialize the graph in streaming mode.\n"
+            "The processes are started via forkserver (spawn if not available), never forked from the worker."
+        },
+    )
+    graph_export_compression: bool = field(
+        default=True,
+        metadata={"description": "Send the graph gzip compressed in streaming mode"},
+    )
+    graph_export_msgpack: bool = field(
+        default=False,
+        metadata={
+            "description": "Send the graph as length prefixed msgpack frames instead of ndjson in streaming mode"
+        },
+    )
     cleanup: bool = field(default=False, metadata={"description": "Enable cleanup of resources"})
     cleanup_pool_size: int = field(
         factory=lambda: num_default_threads() * 2,
@@ -34,6 +34,7 @@ class Resotocore:
         dump_json = self._config.resotoworker.debug_dump_json
         tempdir = self._config.resotoworker.tempdir
         graph_merge_kind = self._config.resotoworker.graph_merge_kind
+        streaming = self._config.resotoworker.graph_export_streaming
 
         self.create_graph(base_uri, resotocore_graph)
         self.update_model(graph, base_uri, dump_json=dump_json, tempdir=tempdir)
@@ -43,10 +44,16 @@ class Resotocore:
             delete_tempfile=not dump_json,
             tempdir=tempdir,
             graph_merge_kind=graph_merge_kind,
+            streaming=streaming,
+            processes=self._config.resotoworker.graph_export_processes,
+            compress=self._config.resotoworker.graph_export_compression,
+            packed=self._config.resotoworker.graph_export_msgpack,
         )
         #  The graph is not required any longer and can be released.
         del graph
-        graph_export_iterator.export_graph()
+        # in streaming mode, the graph is exported while it is sent
+        if not streaming:
+            graph_export_iterator.export_graph()
         if not graph_export_iterator.found_replace_node:
             log.error("No replace node found, not sending graph to resotocore")
             return
@@ -120,11 +127,13 @@ class Resotocore:
         log.debug(f"Sending graph via {merge_uri}")
 
         headers = {
-            "Content-Type": "application/x-ndjson",
+            "Content-Type": "application/x-msgpack-frames" if graph_export_iterator.packed else "application/x-ndjson",
             "Resoto-Worker-Nodes": str(graph_export_iterator.number_of_nodes),
             "Resoto-Worker-Edges": str(graph_export_iterator.number_of_edges),
             "Resoto-Worker-Task-Id": task_id,
         }
+        if graph_export_iterator.compress:
+            headers["Content-Encoding"] = "gzip"
         if getattr(ArgumentParser.args, "psk", None):
             encode_jwt_to_headers(headers, {}, ArgumentParser.args.psk)
 
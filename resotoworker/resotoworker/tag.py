@@ -1,80 +1,29 @@
+from collections import defaultdict
 from resotolib.baseplugin import BaseCollectorPlugin
 from resotolib.baseresources import BaseResource
 from resotolib.config import Config
 from resotolib.logger import log
 from resotolib.core.model_export import node_from_dict, node_to_dict
 from resotolib.types import Json
-from typing import Any, Dict, List, Type
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type
 
 
 def core_tag_tasks_processor(
     plugins: Dict[str, Type[BaseCollectorPlugin]], config: Config, message: Dict[str, Any]
 ) -> Json:
     task_id = message.get("task_id")
-    # task_name = message.get("task_name")
+    task_name = message.get("task_name")
     # task_attrs = message.get("attrs", {})
     task_data: Dict[str, Any] = message.get("data", {})
-    delete_tags: List[str] = task_data.get("delete", [])
-    update_tags: Dict[str, str] = task_data.get("update", {})
-    node_data: Dict[str, Any] = task_data.get("node", {})
     result = "done"
     extra_data: Dict[str, Any] = {}
 
-    def delete(plugin: Type[BaseCollectorPlugin], node: BaseResource, key: str) -> None:
-        log.debug(f"Calling parent resource to delete tag {key} in cloud")
-        try:
-            if plugin.delete_tag(config, node, key):
-                log_msg = f"Successfully deleted tag {key} in cloud"
-                node.add_change("tags")
-                node.log(log_msg)
-                log.info((f"{log_msg} for {node.kind}" f" {node.id}"))
-                del node.tags[key]
-            else:
-                log_msg = f"Error deleting tag {key} in cloud"
-                node.log(log_msg)
-                log.error((f"{log_msg} for {node.kind}" f" {node.id}"))
-        except Exception as e:
-            log_msg = f"Unhandled exception while trying to delete tag {key} in cloud:" f" {type(e)} {e}"
-            node.log(log_msg, exception=e)
-            if node._raise_tags_exceptions:
-                raise
-            else:
-                log.exception(log_msg)
-
-    def update(plugin: Type[BaseCollectorPlugin], node: BaseResource, key: str, value: str) -> None:
-        log.debug(f"Calling parent resource to set tag {key} to {value} in cloud")
-        try:
-            if plugin.update_tag(config, node, key, value):
-                log_msg = f"Successfully set tag {key} to {value} in cloud"
-                node.add_change("tags")
-                node.log(log_msg)
-                log.info((f"{log_msg} for {node.kind}" f" {node.id}"))
-                node.tags[key] = value
-            else:
-                log_msg = f"Error setting tag {key} to {value} in cloud"
-                node.log(log_msg)
-                log.error((f"{log_msg} for {node.kind}" f" {node.id}"))
-        except Exception as e:
-            log_msg = f"Unhandled exception while trying to set tag {key} to {value}" f" in cloud: {type(e)} {e}"
-            node.log(log_msg, exception=e)
-            if node._raise_tags_exceptions:
-                raise
-            else:
-                log.exception(log_msg)
-
     try:
-        node = node_from_dict(node_data, include_select_ancestors=True)
-        plugin = plugins.get(node.cloud().id)
-        if plugin is None:
-            raise ValueError(f"No plugin found for cloud {node.cloud().id}")
-        for delete_tag in delete_tags:
-            delete(plugin, node, delete_tag)
-
-        for k, v in update_tags.items():
-            update(plugin, node, k, v)
-
-        node_dict = node_to_dict(node)
-        extra_data.update({"data": node_dict})
+        if task_name == "tag_batch":
+            # the task holds the tag changes of many resources in the same cloud, account and region
+            extra_data["data"] = {"nodes": tag_nodes(plugins, config, task_data.get("nodes", []))}
+        else:
+            extra_data["data"] = tag_node(plugins, config, task_data)
     except Exception as e:
         log.exception("Error while updating tags")
         result = "error"
@@ -86,3 +35,149 @@ def core_tag_tasks_processor(
     }
     reply_message.update(extra_data)
     return reply_message
+
+
+def tag_node(plugins: Dict[str, Type[BaseCollectorPlugin]], config: Config, task_data: Json) -> Json:
+    """
+    Perform the tag changes of a single resource.
+    """
+    delete_tags: List[str] = task_data.get("delete", [])
+    update_tags: Dict[str, str] = task_data.get("update", {})
+    node = node_from_dict(task_data.get("node", {}), include_select_ancestors=True)
+    plugin = plugins.get(node.cloud().id)
+    if plugin is None:
+        raise ValueError(f"No plugin found for cloud {node.cloud().id}")
+
+    delete_node_tags(plugin, config, node, delete_tags)
+    update_node_tags(plugin, config, node, update_tags)
+    return node_to_dict(node)
+
+
+def delete_node_tags(plugin: Type[BaseCollectorPlugin], config: Config, node: BaseResource, keys: List[str]) -> None:
+    for delete_tag in keys:
+        log.debug(f"Calling parent resource to delete tag {delete_tag} in cloud")
+        change_tag(
+            node,
+            f"delete tag {delete_tag}",
+            lambda: tag_deleted(node, delete_tag, plugin.delete_tag(config, node, delete_tag)),
+        )
+
+
+def update_node_tags(
+    plugin: Type[BaseCollectorPlugin], config: Config, node: BaseResource, tags: Dict[str, str]
+) -> None:
+    for k, v in tags.items():
+        log.debug(f"Calling parent resource to set tag {k} to {v} in cloud")
+        change_tag(
+            node,
+            f"set tag {k} to {v}",
+            lambda: tag_updated(node, k, v, plugin.update_tag(config, node, k, v)),
+        )
+
+
+def tag_nodes(plugins: Dict[str, Type[BaseCollectorPlugin]], config: Config, entries: List[Json]) -> List[Json]:
+    """
+    Perform the tag changes of many resources with the bulk methods of the plugin.
+    Every entry has the same shape as the data of a single tag task.
+    Deletes and updates are separate bulk calls. If one of them fails,
+    only the changes of this call are performed one by one.
+    :return: for every entry the changed node or the error.
+    """
+    results: List[Optional[Json]] = [None] * len(entries)
+    by_plugin: Dict[Type[BaseCollectorPlugin], List[Tuple[int, BaseResource, Json]]] = defaultdict(list)
+
+    def error(idx: int, ex: Exception) -> None:
+        log.exception("Error while updating tags")
+        results[idx] = {"error": str(ex), "id": entries[idx].get("node", {}).get("id")}
+
+    for idx, entry in enumerate(entries):
+        try:
+            node = node_from_dict(entry.get("node", {}), include_select_ancestors=True)
+            plugin = plugins.get(node.cloud().id)
+            if plugin is None:
+                raise ValueError(f"No plugin found for cloud {node.cloud().id}")
+            by_plugin[plugin].append((idx, node, entry))
+        except Exception as e:
+            error(idx, e)
+
+    for plugin, items in by_plugin.items():
+        failed: Set[int] = set()
+
+        def one_by_one(change: Callable[[BaseResource, Json], None]) -> None:
+            for idx, node, entry in items:
+                if idx not in failed:
+                    try:
+                        change(node, entry)
+                    except Exception as ex:
+                        failed.add(idx)
+                        error(idx, ex)
+
+        deletes = [(node, key) for _, node, entry in items for key in entry.get("delete", [])]
+        if deletes:
+            try:
+                log.debug(f"Calling {plugin.cloud} to delete {len(deletes)} tags in cloud")
+                deleted = plugin.delete_tags(config, deletes)
+            except Exception as e:
+                log.warning(f"Bulk tag delete failed: {e}. Delete tags one by one.")
+                one_by_one(lambda node, entry: delete_node_tags(plugin, config, node, entry.get("delete", [])))
+            else:
+                for (node, key), success in zip(deletes, deleted):
+                    tag_deleted(node, key, success)
+
+        updates = [
+            (node, k, v) for idx, node, entry in items if idx not in failed for k, v in entry.get("update", {}).items()
+        ]
+        if updates:
+            try:
+                log.debug(f"Calling {plugin.cloud} to set {len(updates)} tags in cloud")
+                updated = plugin.update_tags(config, updates)
+            except Exception as e:
+                log.warning(f"Bulk tag update failed: {e}. Set tags one by one.")
+                one_by_one(lambda node, entry: update_node_tags(plugin, config, node, entry.get("update", {})))
+            else:
+                for (node, key, value), success in zip(updates, updated):
+                    tag_updated(node, key, value, success)
+
+        for idx, node, _ in items:
+            if idx not in failed:
+                results[idx] = node_to_dict(node)
+
+    return [result if result is not None else {} for result in results]
+
+
+def change_tag(node: BaseResource, action: str, fn: Callable[[], None]) -> None:
+    try:
+        fn()
+    except Exception as e:
+        log_msg = f"Unhandled exception while trying to {action} in cloud: {type(e)} {e}"
+        node.log(log_msg, exception=e)
+        if node._raise_tags_exceptions:
+            raise
+        else:
+            log.exception(log_msg)
+
+
+def tag_deleted(node: BaseResource, key: str, success: bool) -> None:
+    if success:
+        log_msg = f"Successfully deleted tag {key} in cloud"
+        node.add_change("tags")
+        node.log(log_msg)
+        log.info((f"{log_msg} for {node.kind}" f" {node.id}"))
+        del node.tags[key]
+    else:
+        log_msg = f"Error deleting tag {key} in cloud"
+        node.log(log_msg)
+        log.error((f"{log_msg} for {node.kind}" f" {node.id}"))
+
+
+def tag_updated(node: BaseResource, key: str, value: str, success: bool) -> None:
+    if success:
+        log_msg = f"Successfully set tag {key} to {value} in cloud"
+        node.add_change("tags")
+        node.log(log_msg)
+        log.info((f"{log_msg} for {node.kind}" f" {node.id}"))
+        node.tags[key] = value
+    else:
+        log_msg = f"Error setting tag {key} to {value} in cloud"
+        node.log(log_msg)
+        log.error((f"{log_msg} for {node.kind}" f" {node.id}"))
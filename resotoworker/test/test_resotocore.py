@@ -1,8 +1,10 @@
+import gzip
 import json
 from argparse import ArgumentParser
 from typing import Dict, cast
 from resotolib.graph import Graph
 from resotoworker.resotocore import Resotocore
+import pytest
 import requests
 from test.fakeconfig import FakeConfig
 from resotolib.config import Config
@@ -36,13 +38,17 @@ class ExampleCollectorPlugin(BaseCollectorPlugin):
         pass
 
 
-def test_resotocore() -> None:
+@pytest.mark.parametrize("streaming", [False, True])
+def test_resotocore(streaming: bool) -> None:
 
     recorded_headers: Dict[str, str] = {}
+    recorded_data: bytes = b""
 
     def make_query(request: requests.Request) -> requests.Response:
-        nonlocal recorded_headers
+        nonlocal recorded_headers, recorded_data
         recorded_headers = request.headers
+        if request.url.endswith("/merge"):
+            recorded_data = b"".join(request.data)
         resp = requests.Response()
         resp.status_code = 200
         resp._content = str.encode(json.dumps("OK"))
@@ -57,6 +63,10 @@ def test_resotocore() -> None:
                     "debug_dump_json": False,
                     "tempdir": "/tmp",
                     "graph_merge_kind": "foo_kind",
+                    "graph_export_streaming": streaming,
+                    "graph_export_processes": 1,
+                    "graph_export_compression": streaming,
+                    "graph_export_msgpack": False,
                 },
                 "running_config": None,
             }
@@ -74,3 +84,8 @@ def test_resotocore() -> None:
     print(recorded_headers)
 
     assert recorded_headers["Resoto-Worker-Task-Id"] == "task_123"
+    if streaming:
+        assert recorded_headers["Content-Encoding"] == "gzip"
+        recorded_data = gzip.decompress(recorded_data)
+    nodes = [json.loads(line) for line in recorded_data.decode().splitlines()]
+    assert len(nodes) == 5  # 3 nodes and 2 edges
@@ -0,0 +1,104 @@
+from typing import ClassVar, List, Tuple
+
+from attrs import define
+
+from resotolib.baseplugin import BaseCollectorPlugin
+from resotolib.baseresources import BaseResource
+from resotolib.config import Config
+from resotolib.graph import Graph
+from resotolib.types import Json
+from resotoworker.tag import core_tag_tasks_processor
+from test.fakeconfig import FakeConfig
+
+
+@define(eq=False)
+class ExampleResource(BaseResource):
+    kind: ClassVar[str] = "example_resource"
+
+    def delete(self, graph: Graph) -> bool:
+        return NotImplemented
+
+
+class ExampleTagPlugin(BaseCollectorPlugin):
+    cloud = "example"
+    bulk_calls: List[int] = []
+    single_deletes: List[str] = []
+
+    def collect(self) -> None:
+        pass
+
+    @staticmethod
+    def update_tag(config: Config, resource: BaseResource, key: str, value: str) -> bool:
+        if resource.id == "fail":
+            raise AttributeError("Can not tag this resource")
+        return True
+
+    @classmethod
+    def update_tags(cls, config: Config, changes: List[Tuple[BaseResource, str, str]]) -> List[bool]:
+        cls.bulk_calls.append(len(changes))
+        if any(resource.id == "fail" for resource, _, _ in changes):
+            raise AttributeError("Can not tag all resources")
+        return [True for _ in changes]
+
+    @staticmethod
+    def delete_tag(config: Config, resource: BaseResource, key: str) -> bool:
+        ExampleTagPlugin.single_deletes.append(resource.id)
+        return True
+
+    @classmethod
+    def delete_tags(cls, config: Config, changes: List[Tuple[BaseResource, str]]) -> List[bool]:
+        cls.bulk_calls.append(len(changes))
+        return [True for _ in changes]
+
+
+def node(uid: str) -> Json:
+    return {
+        "id": uid,
+        "reported": {"id": uid, "kind": "example_resource", "tags": {"a": "b"}},
+        "metadata": {"python_type": "test.test_tag.ExampleResource"},
+        "ancestors": {
+            "cloud": {"reported": {"id": "example"}, "metadata": {"python_type": "resotolib.baseresources.Cloud"}},
+        },
+    }
+
+
+def tag_batch(*node_ids: str, delete: bool = False) -> Json:
+    nodes = [
+        {"update": {"foo": f"bla_{uid}"}, "delete": ["a"] if delete else [], "node": node(uid)} for uid in node_ids
+    ]
+    message = {"task_id": "123", "task_name": "tag_batch", "data": {"nodes": nodes}}
+    return core_tag_tasks_processor({"example": ExampleTagPlugin}, FakeConfig({}), message)  # type: ignore
+
+
+def test_tag_batch() -> None:
+    ExampleTagPlugin.bulk_calls.clear()
+    # all tags are changed with one bulk call
+    result = tag_batch("a", "b", "c")
+    assert result["result"] == "done"
+    assert ExampleTagPlugin.bulk_calls == [3]
+    assert [n["reported"]["tags"] for n in result["data"]["nodes"]] == [
+        {"a": "b", "foo": "bla_a"},
+        {"a": "b", "foo": "bla_b"},
+        {"a": "b", "foo": "bla_c"},
+    ]
+
+    # the bulk call fails: every resource is tagged individually and failures are reported per resource
+    result = tag_batch("a", "fail", "c")
+    assert result["result"] == "done"
+    nodes = result["data"]["nodes"]
+    assert nodes[0]["reported"]["tags"] == {"a": "b", "foo": "bla_a"}
+    assert nodes[1] == {"error": "Can not tag this resource", "id": "fail"}
+    assert nodes[2]["reported"]["tags"] == {"a": "b", "foo": "bla_c"}
+
+
+def test_tag_batch_update_fails_after_delete() -> None:
+    ExampleTagPlugin.bulk_calls.clear()
+    ExampleTagPlugin.single_deletes.clear()
+    result = tag_batch("a", "fail", delete=True)
+    assert result["result"] == "done"
+    # deletes and updates are separate bulk calls: only the failed updates are done one by one
+    assert ExampleTagPlugin.bulk_calls == [2, 2]
+    assert ExampleTagPlugin.single_deletes == []
+    nodes = result["data"]["nodes"]
+    assert nodes[0]["reported"]["tags"] == {"foo": "bla_a"}
+    assert nodes[1] == {"error": "Can not tag this resource", "id": "fail"}